@@ -0,0 +1,56 @@
+"""
+Append-only activity log for the admin dashboard.
+
+Handlers record an entry whenever something worth showing happens: a signup,
+a complaint submission, a status change, a registration approval or
+rejection, a block or unblock. Entries are never updated, so
+/admin/recent-activity is a single order_by('ts', DESCENDING).limit(n)
+query instead of scanning users and complaints.
+
+Pass the handler's write batch to record_activity() so the entry commits
+together with the change it describes, in the same round trip.
+"""
+from datetime import datetime, timezone
+
+from firebase_config import get_db
+
+ACTIVITY_COLLECTION = 'activity'
+
+# Activity type -> Font Awesome icon shown on the dashboard
+ACTIVITY_ICONS = {
+    'new_user': 'user-plus',
+    'complaint_submitted': 'file-alt',
+    'status_changed': 'sync-alt',
+    'complaint_resolved': 'check-circle',
+    'registration_approved': 'user-check',
+    'registration_rejected': 'user-times',
+    'user_blocked': 'ban',
+    'user_unblocked': 'unlock',
+}
+
+
+def activity_entry(activity_type, message, actor_uid=None, subject_id=None):
+    """Document for one activity log entry"""
+    return {
+        'type': activity_type,
+        'icon': ACTIVITY_ICONS.get(activity_type, 'info-circle'),
+        'message': message,
+        # UTC with offset, so browsers in any timezone format it correctly
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'actor_uid': actor_uid,
+        'subject_id': subject_id,
+    }
+
+
+def record_activity(activity_type, message, actor_uid=None, subject_id=None, batch=None):
+    """Append an entry to the activity log, as part of batch when given"""
+    db = get_db()
+    activity_ref = db.collection(ACTIVITY_COLLECTION).document()
+    entry = activity_entry(activity_type, message, actor_uid, subject_id)
+    if batch is not None:
+        batch.set(activity_ref, entry)
+        return
+    try:
+        activity_ref.set(entry)
+    except Exception as e:
+        print(f"Error recording activity: {str(e)}")
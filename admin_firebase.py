@@ -1,58 +1,95 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, jsonify, session
 from datetime import datetime, timedelta
+import asyncio
 from functools import wraps
 from auth_firebase import login_required
 from firebase_admin import firestore, auth as firebase_auth
 from firebase_config import initialize_firebase, get_db
+from async_firestore import get_async_db, stream_dicts
+from activity import ACTIVITY_COLLECTION, record_activity
+from loader import get_loader
+from complaint_ids import CursorNotFound, recent_complaints
+from complaint_sync import write_tombstone
+from user_search import search_query
+from user_index import index_user, unindex_user
+from user_cleanup import CLEANUP_JOBS_COLLECTION, CLEANUP_MODES, new_job, start_cleanup
+from stats_cache import invalidate, stats_cache
+from events import publish_complaint
 import uuid
 
 initialize_firebase()
 
 admin_bp = Blueprint('admin', __name__)
 
+# Activity entries shown on the dashboard, and the most one page may return
+RECENT_ACTIVITY_LIMIT = 5
+RECENT_ACTIVITY_MAX_LIMIT = 50
+
+# Latest complaints shown on the dashboard
+ADMIN_COMPLAINTS_LIMIT = 10
+
+# /admin/users page size and filters (status 'active' is what user management shows)
+USERS_PAGE_SIZE = 10
+USERS_MAX_PAGE_SIZE = 100
+USER_LIST_ROLES = ('all', 'resident', 'official')
+USER_LIST_STATUSES = {
+    'active': ['approved', 'blocked'],
+    'approved': ['approved'],
+    'blocked': ['blocked'],
+    'pending_approval': ['pending_approval'],
+    'rejected': ['rejected'],
+}
+
+# User cleanup jobs shown on the dashboard
+CLEANUP_JOBS_LIMIT = 10
+
+# Dashboard statistics, recomputed after 30s / 60s (see stats_cache.py)
+ADMIN_STATS_CACHE = stats_cache('admin_stats', ttl=30, hard_ttl=300, depends_on=('users', 'complaints'))
+ADMIN_ANALYTICS_CACHE = stats_cache('admin_analytics', ttl=60, hard_ttl=600)
+
 def admin_required(f):
     """Decorator to ensure user is admin"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if session.get('user_role') != 'official' or not session.get('is_admin', False):
             return jsonify({'error': 'Admin privileges required'}), 403
-        return f(*args, **kwargs)
+        return current_app.ensure_sync(f)(*args, **kwargs)
     return decorated_function
 
+async def compute_admin_stats():
+    """Dashboard statistics for admin"""
+    db = get_async_db()
+    
+    # Users and complaints, streamed concurrently
+    users_list, complaints_list = await asyncio.gather(
+        stream_dicts(db.collection('users')),
+        stream_dicts(db.collection('complaints')),
+    )
+    
+    # Count users by role
+    residents_count = sum(1 for u in users_list if u.get('role') == 'resident')
+    officials_count = sum(1 for u in users_list if u.get('role') == 'official')
+    
+    # Count complaints by status
+    pending_count = sum(1 for c in complaints_list if c.get('status') in ['New', 'Pending', 'Pending Review', 'In Progress'])
+    
+    # For demo purposes - upcoming events
+    events_count = 8
+    
+    return {
+        'total_residents': residents_count,
+        'total_officials': officials_count,
+        'pending_requests': pending_count,
+        'upcoming_events': events_count
+    }
+
 @admin_bp.route('/admin/stats')
 @login_required
 @admin_required
-def get_admin_stats():
+async def get_admin_stats():
     """Get dashboard statistics for admin"""
     try:
-        db = get_db()
-        
-        # Get users
-        users_ref = db.collection('users')
-        users_docs = users_ref.stream()
-        users_list = [doc.to_dict() for doc in users_docs]
-        
-        # Get complaints
-        complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.stream()
-        complaints_list = [doc.to_dict() for doc in complaints_docs]
-        
-        # Count users by role
-        residents_count = sum(1 for u in users_list if u.get('role') == 'resident')
-        officials_count = sum(1 for u in users_list if u.get('role') == 'official')
-        
-        # Count complaints by status
-        pending_count = sum(1 for c in complaints_list if c.get('status') in ['New', 'Pending', 'Pending Review', 'In Progress'])
-        
-        # For demo purposes - upcoming events
-        events_count = 8
-        
-        return jsonify({
-            'total_residents': residents_count,
-            'total_officials': officials_count,
-            'pending_requests': pending_count,
-            'upcoming_events': events_count
-        })
+        return jsonify(await ADMIN_STATS_CACHE.get_async(None, compute_admin_stats))
     except Exception as e:
         print(f"Error getting admin stats: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -61,92 +98,44 @@ def get_admin_stats():
 @login_required
 @admin_required
 def get_recent_activity():
-    """Get recent activity for admin dashboard"""
+    """Get recent activity for admin dashboard, newest first.
+
+    Returns ?limit= entries (default 5) from the activity log; when there
+    are more, X-Next-Cursor holds the ?cursor= for the next page. Entries
+    carry their ISO timestamp in 'ts' and the dashboard formats it.
+    """
     try:
-        activities = []
         db = get_db()
+        try:
+            limit = max(1, min(int(request.args.get('limit', RECENT_ACTIVITY_LIMIT)), RECENT_ACTIVITY_MAX_LIMIT))
+        except ValueError:
+            limit = RECENT_ACTIVITY_LIMIT
+        
+        query = db.collection(ACTIVITY_COLLECTION).order_by('ts', direction=firestore.Query.DESCENDING)
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor_doc = db.collection(ACTIVITY_COLLECTION).document(cursor).get()
+            if not cursor_doc.exists:
+                # Removed with a deleted user; starting over would repeat what was seen
+                return jsonify({'error': f"Activity entry {cursor} no longer exists; start again from the first page"}), 400
+            query = query.start_after(cursor_doc)
+        
+        docs = list(query.limit(limit).stream())
+        activities = []
+        for doc in docs:
+            entry = doc.to_dict()
+            activities.append({
+                'id': doc.id,
+                'type': entry.get('type'),
+                'icon': entry.get('icon'),
+                'message': entry.get('message'),
+                'ts': entry.get('ts')
+            })
         
-        # Get recent users (last 10)
-        users_ref = db.collection('users')
-        users_docs = users_ref.stream()
-        users_list = []
-        for doc in users_docs:
-            user = doc.to_dict()
-            user['uid'] = doc.id
-            users_list.append(user)
-        
-        # Sort by created_at
-        users_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        # Add recent registrations to activities
-        for user in users_list[:3]:
-            created_at = user.get('created_at', '')
-            if created_at:
-                try:
-                    created_time = datetime.fromisoformat(created_at)
-                    time_diff = datetime.now() - created_time
-                    
-                    if time_diff.days > 0:
-                        timestamp = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-                    elif time_diff.seconds // 3600 > 0:
-                        hours = time_diff.seconds // 3600
-                        timestamp = f"{hours} hour{'s' if hours > 1 else ''} ago"
-                    else:
-                        minutes = time_diff.seconds // 60
-                        timestamp = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-                    
-                    activities.append({
-                        'type': 'new_user',
-                        'icon': 'user-plus',
-                        'message': f'New {user.get("role", "user")} registered: {user.get("full_name", "Unknown")}',
-                        'timestamp': timestamp
-                    })
-                except:
-                    pass
-        
-        # Get recent complaints
-        complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.stream()
-        complaints_list = [doc.to_dict() for doc in complaints_docs]
-        
-        complaints_list.sort(key=lambda x: x.get('submitted_date', ''), reverse=True)
-        
-        # Add recent complaint updates
-        for complaint in complaints_list[:2]:
-            submitted_date = complaint.get('submitted_date', '')
-            if submitted_date:
-                try:
-                    submitted_time = datetime.fromisoformat(submitted_date)
-                    time_diff = datetime.now() - submitted_time
-                    
-                    if time_diff.days > 0:
-                        timestamp = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-                    elif time_diff.seconds // 3600 > 0:
-                        hours = time_diff.seconds // 3600
-                        timestamp = f"{hours} hour{'s' if hours > 1 else ''} ago"
-                    else:
-                        minutes = time_diff.seconds // 60
-                        timestamp = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-                    
-                    if complaint.get('status') == 'Resolved':
-                        activities.append({
-                            'type': 'document',
-                            'icon': 'check-circle',
-                            'message': f'Complaint resolved: {complaint.get("title", "Untitled")}',
-                            'timestamp': timestamp
-                        })
-                    else:
-                        activities.append({
-                            'type': 'document',
-                            'icon': 'file-alt',
-                            'message': f'New complaint: {complaint.get("title", "Untitled")}',
-                            'timestamp': timestamp
-                        })
-                except:
-                    pass
-        
-        # Sort all activities by timestamp relevance
-        return jsonify(activities[:5])
+        response = jsonify(activities)
+        if len(docs) == limit:
+            response.headers['X-Next-Cursor'] = docs[-1].id
+        return response
         
     except Exception as e:
         print(f"Error getting recent activity: {str(e)}")
@@ -156,36 +145,43 @@ def get_recent_activity():
 @login_required
 @admin_required
 def get_admin_complaints():
-    """Get all complaints for admin dashboard"""
+    """Get the latest complaints for admin dashboard.
+
+    Complaint ids sort by submission time, so this pages by document key;
+    the next page starts at the id in the X-Next-Cursor header.
+    """
     try:
         db = get_db()
         complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.stream()
-        
-        complaints_data = {}
-        for doc in complaints_docs:
-            complaints_data[doc.id] = doc.to_dict()
+        try:
+            complaints_docs, next_cursor = recent_complaints(
+                complaints_ref, ADMIN_COMPLAINTS_LIMIT, cursor=request.args.get('cursor'))
+        except CursorNotFound as e:
+            return jsonify({'error': str(e)}), 400
         
-        if not complaints_data:
+        if not complaints_docs:
             return jsonify([])
         
-        # Get users for name lookup
-        users_ref = db.collection('users')
-        users_docs = users_ref.stream()
-        users_data = {doc.id: doc.to_dict() for doc in users_docs}
+        # Resident names for just these complaints, in one batched read
+        loader = get_loader()
+        loader.prime('users', [doc.to_dict().get('user_uid') for doc in complaints_docs])
         
         complaints_list = []
-        for complaint_id, complaint in complaints_data.items():
+        for doc in complaints_docs:
+            complaint = doc.to_dict()
             # Get resident name and email
             user_uid = complaint.get('user_uid')
             resident_name = 'Unknown'
             resident_email = ''
-            if user_uid and user_uid in users_data:
-                resident_name = users_data[user_uid].get('full_name', 'Unknown')
-                resident_email = users_data[user_uid].get('email', '')
+            if user_uid:
+                user_doc = loader.get('users', user_uid)
+                if user_doc.exists:
+                    user = user_doc.to_dict()
+                    resident_name = user.get('full_name', 'Unknown')
+                    resident_email = user.get('email', '')
             
             complaints_list.append({
-                'id': complaint.get('id', complaint_id),
+                'id': complaint.get('id', doc.id),
                 'title': complaint.get('title', 'Untitled'),
                 'resident': resident_name,
                 'resident_email': resident_email,
@@ -193,10 +189,10 @@ def get_admin_complaints():
                 'status': complaint.get('status', 'New')
             })
         
-        # Sort by date (newest first)
-        complaints_list.sort(key=lambda x: x.get('date', ''), reverse=True)
-        
-        return jsonify(complaints_list[:10])  # Return top 10
+        response = jsonify(complaints_list)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
         
     except Exception as e:
         print(f"Error getting admin complaints: {str(e)}")
@@ -206,27 +202,46 @@ def get_admin_complaints():
 @login_required
 @admin_required
 def get_admin_users():
-    """Get all users for admin dashboard (excludes admin users and pending/rejected)"""
+    """Get a page of users for admin dashboard, filtered by role, status and name/email prefix.
+
+    Admins are never listed; by default neither are pending or rejected
+    users (they are in the pending registrations section). The next page
+    starts at the uid in the X-Next-Cursor header.
+    """
     try:
-        db = get_db()
-        users_ref = db.collection('users')
-        users_docs = users_ref.stream()
+        role = request.args.get('role', 'all')
+        status = request.args.get('status', 'active')
+        if role not in USER_LIST_ROLES or status not in USER_LIST_STATUSES:
+            return jsonify({'error': 'Invalid role or status filter'}), 400
+        try:
+            limit = max(1, min(int(request.args.get('limit', USERS_PAGE_SIZE)), USERS_MAX_PAGE_SIZE))
+        except ValueError:
+            limit = USERS_PAGE_SIZE
         
+        db = get_db()
+        query = db.collection('users').where('is_admin', '==', False)
+        query = query.where('status', 'in', USER_LIST_STATUSES[status])
+        if role != 'all':
+            query = query.where('role', '==', role)
+        prefix = search_query(request.args.get('q'))
+        if prefix:
+            query = query.where('search_prefixes', 'array_contains', prefix)
+        query = query.order_by('name_lower')
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor_doc = get_loader().get('users', cursor)
+            if not cursor_doc.exists:
+                # A user deleted since; starting over would repeat the pages already seen
+                return jsonify({'error': f"User {cursor} no longer exists; start again from the first page"}), 400
+            query = query.start_after(cursor_doc)
+        
+        docs = list(query.limit(limit).stream())
         users_list = []
-        for doc in users_docs:
+        for doc in docs:
             user = doc.to_dict()
-            uid = doc.id
-            
-            # Skip admin users - they should not appear in user management
-            if user.get('is_admin', False):
-                continue
-            
-            # Skip pending or rejected users - they should be in pending registrations section
-            if user.get('status') in ['pending_approval', 'rejected']:
-                continue
-                
             users_list.append({
-                'uid': uid,
+                'uid': doc.id,
                 'name': user.get('full_name', 'Unknown'),
                 'email': user.get('email', ''),
                 'role': user.get('role', 'resident'),
@@ -234,89 +249,93 @@ def get_admin_users():
                 'status': user.get('status', 'approved')
             })
         
-        # Sort by name
-        users_list.sort(key=lambda x: x.get('name', ''))
-        
-        return jsonify(users_list[:10])  # Return top 10
+        response = jsonify(users_list)
+        if len(docs) == limit:
+            response.headers['X-Next-Cursor'] = docs[-1].id
+        return response
         
     except Exception as e:
         print(f"Error getting admin users: {str(e)}")
         return jsonify([])
 
+def compute_complaint_analytics():
+    """Complaint analytics for admin"""
+    db = get_db()
+    complaints_ref = db.collection('complaints')
+    complaints_docs = complaints_ref.stream()
+    complaints_list = [doc.to_dict() for doc in complaints_docs]
+    
+    if not complaints_list:
+        return {
+            'total': 0,
+            'resolved': 0,
+            'in_progress': 0,
+            'escalated': 0,
+            'resolved_percentage': 0,
+            'in_progress_percentage': 0,
+            'escalated_percentage': 0,
+            'avg_resolution_time': 0,
+            'fastest_resolution': 0,
+            'pending': 0,
+            'sla_compliance': 0
+        }
+    
+    total = len(complaints_list)
+    
+    # Count by status
+    resolved = sum(1 for c in complaints_list if c.get('status') == 'Resolved')
+    in_progress = sum(1 for c in complaints_list if c.get('status') == 'In Progress')
+    escalated = sum(1 for c in complaints_list if c.get('status') == 'Escalated')
+    pending = sum(1 for c in complaints_list if c.get('status') in ['New', 'Pending', 'Pending Review'])
+    
+    # Calculate percentages
+    resolved_pct = round((resolved / total * 100)) if total > 0 else 0
+    in_progress_pct = round((in_progress / total * 100)) if total > 0 else 0
+    escalated_pct = round((escalated / total * 100)) if total > 0 else 0
+    
+    # Calculate resolution times (for resolved complaints)
+    resolution_times = []
+    for complaint in complaints_list:
+        if complaint.get('status') == 'Resolved':
+            submitted = complaint.get('submitted_date')
+            updated = complaint.get('updated_at')
+            if submitted and updated:
+                try:
+                    submit_time = datetime.fromisoformat(submitted)
+                    resolve_time = datetime.fromisoformat(updated)
+                    diff = (resolve_time - submit_time).total_seconds() / 3600  # hours
+                    resolution_times.append(diff)
+                except:
+                    pass
+    
+    avg_resolution = round(sum(resolution_times) / len(resolution_times) / 24, 1) if resolution_times else 0
+    fastest = round(min(resolution_times), 1) if resolution_times else 0
+    
+    # SLA compliance (assuming 7 days is the SLA)
+    sla_compliant = sum(1 for t in resolution_times if t <= 168)  # 7 days = 168 hours
+    sla_compliance = round((sla_compliant / len(resolution_times) * 100)) if resolution_times else 0
+    
+    return {
+        'total': total,
+        'resolved': resolved,
+        'in_progress': in_progress,
+        'escalated': escalated,
+        'resolved_percentage': resolved_pct,
+        'in_progress_percentage': in_progress_pct,
+        'escalated_percentage': escalated_pct,
+        'avg_resolution_time': avg_resolution,
+        'fastest_resolution': fastest,
+        'pending': pending,
+        'sla_compliance': sla_compliance
+    }
+
 @admin_bp.route('/admin/analytics')
 @login_required
 @admin_required
 def get_complaint_analytics():
     """Get complaint analytics for admin"""
     try:
-        db = get_db()
-        complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.stream()
-        complaints_list = [doc.to_dict() for doc in complaints_docs]
-        
-        if not complaints_list:
-            return jsonify({
-                'total': 0,
-                'resolved': 0,
-                'in_progress': 0,
-                'escalated': 0,
-                'resolved_percentage': 0,
-                'in_progress_percentage': 0,
-                'escalated_percentage': 0,
-                'avg_resolution_time': 0,
-                'fastest_resolution': 0,
-                'pending': 0,
-                'sla_compliance': 0
-            })
-        
-        total = len(complaints_list)
-        
-        # Count by status
-        resolved = sum(1 for c in complaints_list if c.get('status') == 'Resolved')
-        in_progress = sum(1 for c in complaints_list if c.get('status') == 'In Progress')
-        escalated = sum(1 for c in complaints_list if c.get('status') == 'Escalated')
-        pending = sum(1 for c in complaints_list if c.get('status') in ['New', 'Pending', 'Pending Review'])
-        
-        # Calculate percentages
-        resolved_pct = round((resolved / total * 100)) if total > 0 else 0
-        in_progress_pct = round((in_progress / total * 100)) if total > 0 else 0
-        escalated_pct = round((escalated / total * 100)) if total > 0 else 0
-        
-        # Calculate resolution times (for resolved complaints)
-        resolution_times = []
-        for complaint in complaints_list:
-            if complaint.get('status') == 'Resolved':
-                submitted = complaint.get('submitted_date')
-                updated = complaint.get('updated_at')
-                if submitted and updated:
-                    try:
-                        submit_time = datetime.fromisoformat(submitted)
-                        resolve_time = datetime.fromisoformat(updated)
-                        diff = (resolve_time - submit_time).total_seconds() / 3600  # hours
-                        resolution_times.append(diff)
-                    except:
-                        pass
-        
-        avg_resolution = round(sum(resolution_times) / len(resolution_times) / 24, 1) if resolution_times else 0
-        fastest = round(min(resolution_times), 1) if resolution_times else 0
-        
-        # SLA compliance (assuming 7 days is the SLA)
-        sla_compliant = sum(1 for t in resolution_times if t <= 168)  # 7 days = 168 hours
-        sla_compliance = round((sla_compliant / len(resolution_times) * 100)) if resolution_times else 0
-        
-        return jsonify({
-            'total': total,
-            'resolved': resolved,
-            'in_progress': in_progress,
-            'escalated': escalated,
-            'resolved_percentage': resolved_pct,
-            'in_progress_percentage': in_progress_pct,
-            'escalated_percentage': escalated_pct,
-            'avg_resolution_time': avg_resolution,
-            'fastest_resolution': fastest,
-            'pending': pending,
-            'sla_compliance': sla_compliance
-        })
+        return jsonify(ADMIN_ANALYTICS_CACHE.get(None, compute_complaint_analytics))
         
     except Exception as e:
         print(f"Error getting complaint analytics: {str(e)}")
@@ -373,20 +392,52 @@ def delete_user():
         if user_uid == session.get('user_uid'):
             return jsonify({'success': False, 'message': 'Cannot delete your own account'}), 400
         
-        # Delete from Firebase Auth
-        firebase_auth.delete_user(user_uid)
+        # 'delete' removes their complaints, feedback and messages too,
+        # 'anonymise' keeps them with the user's details blanked
+        mode = data.get('mode', 'delete')
+        if mode not in CLEANUP_MODES:
+            return jsonify({'success': False, 'message': f"mode must be one of {', '.join(CLEANUP_MODES)}"}), 400
         
-        # Delete from Firestore
         db = get_db()
         user_ref = db.collection('users').document(user_uid)
-        user_ref.delete()
+        user_doc = user_ref.get()
+        user = user_doc.to_dict() if user_doc.exists else {}
+        
+        # Delete from Firebase Auth
+        firebase_auth.delete_user(user_uid)
+        
+        # Delete from Firestore, and queue the cleanup of everything else
+        job_id, job = new_job(user_uid, user, mode, session.get('user_uid'))
+        batch = db.batch()
+        batch.delete(user_ref)
+        batch.set(db.collection(CLEANUP_JOBS_COLLECTION).document(job_id), job)
+        batch.commit()
+        unindex_user(user_uid)
+        invalidate('users')
+        start_cleanup(job_id)
         
-        return jsonify({'success': True, 'message': 'User deleted successfully'})
+        return jsonify({'success': True, 'message': 'User deleted successfully', 'job_id': job_id})
         
     except Exception as e:
         print(f"Error deleting user: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@admin_bp.route('/admin/user/cleanup-jobs')
+@login_required
+@admin_required
+def get_cleanup_jobs():
+    """Get the latest user cleanup jobs and their progress"""
+    try:
+        db = get_db()
+        jobs_query = (db.collection(CLEANUP_JOBS_COLLECTION)
+                      .order_by('created_at', direction=firestore.Query.DESCENDING)
+                      .limit(CLEANUP_JOBS_LIMIT))
+        return jsonify([doc.to_dict() for doc in jobs_query.stream()])
+        
+    except Exception as e:
+        print(f"Error getting cleanup jobs: {str(e)}")
+        return jsonify([])
+
 @admin_bp.route('/admin/complaint/delete', methods=['POST'])
 @login_required
 @admin_required
@@ -406,14 +457,25 @@ def delete_complaint():
         complaint_doc = complaint_ref.get()
         
         if complaint_doc.exists:
-            complaint_ref.delete()
+            # Delete it and leave a tombstone for the dashboards' ?since= deltas
+            batch = db.batch()
+            batch.delete(complaint_ref)
+            write_tombstone(db, batch, complaint_id, complaint_doc.to_dict().get('user_uid'))
+            batch.commit()
+            invalidate('complaints')
+            publish_complaint(complaint_id, complaint_doc.to_dict().get('user_uid'), 'removed')
             return jsonify({'success': True, 'message': 'Complaint deleted successfully'})
         
         # If not found by ID, search by 'id' field
         complaints_query = db.collection('complaints').where('id', '==', complaint_id).limit(1).stream()
         
         for doc in complaints_query:
-            db.collection('complaints').document(doc.id).delete()
+            batch = db.batch()
+            batch.delete(doc.reference)
+            write_tombstone(db, batch, complaint_id, doc.to_dict().get('user_uid'))
+            batch.commit()
+            invalidate('complaints')
+            publish_complaint(complaint_id, doc.to_dict().get('user_uid'), 'removed')
             return jsonify({'success': True, 'message': 'Complaint deleted successfully'})
         
         return jsonify({'success': False, 'message': 'Complaint not found'}), 404
@@ -569,11 +631,16 @@ def approve_registration(uid):
             return jsonify({'success': False, 'message': 'User is not pending approval'}), 400
         
         # Update user status to approved
-        user_ref.update({
+        batch = db.batch()
+        batch.update(user_ref, {
             'status': 'approved',
             'approved_at': datetime.now().isoformat(),
             'approved_by': session.get('user_uid')
         })
+        record_activity('registration_approved', f'Registration approved: {user_data.get("full_name", "Unknown")}',
+                        actor_uid=session.get('user_uid'), subject_id=uid, batch=batch)
+        batch.commit()
+        index_user(uid, {**user_data, 'status': 'approved'})
         
         return jsonify({
             'success': True, 
@@ -603,11 +670,16 @@ def reject_registration(uid):
             return jsonify({'success': False, 'message': 'User is not pending approval'}), 400
         
         # Update user status to rejected
-        user_ref.update({
+        batch = db.batch()
+        batch.update(user_ref, {
             'status': 'rejected',
             'rejected_at': datetime.now().isoformat(),
             'rejected_by': session.get('user_uid')
         })
+        record_activity('registration_rejected', f'Registration rejected: {user_data.get("full_name", "Unknown")}',
+                        actor_uid=session.get('user_uid'), subject_id=uid, batch=batch)
+        batch.commit()
+        index_user(uid, {**user_data, 'status': 'rejected'})
         
         return jsonify({
             'success': True, 
@@ -666,20 +738,26 @@ def toggle_block_user():
         if uid == session.get('user_uid'):
             return jsonify({'success': False, 'message': 'Cannot block yourself'}), 400
         
+        batch = db.batch()
         if action == 'block':
-            user_ref.update({
+            batch.update(user_ref, {
                 'status': 'blocked',
                 'blocked_at': datetime.now().isoformat(),
                 'blocked_by': session.get('user_uid')
             })
             message = f'User {user_data.get("full_name", "Unknown")} has been blocked'
         else:
-            user_ref.update({
+            batch.update(user_ref, {
                 'status': 'approved',
                 'unblocked_at': datetime.now().isoformat(),
                 'unblocked_by': session.get('user_uid')
             })
             message = f'User {user_data.get("full_name", "Unknown")} has been unblocked'
+        record_activity('user_blocked' if action == 'block' else 'user_unblocked', message,
+                        actor_uid=session.get('user_uid'), subject_id=uid, batch=batch)
+        batch.commit()
+        # Blocked users are not suggested as recipients
+        index_user(uid, {**user_data, 'status': 'blocked' if action == 'block' else 'approved'})
         
         return jsonify({'success': True, 'message': message})
         
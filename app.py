@@ -3,7 +3,13 @@ from auth_firebase import auth_bp, create_default_admin, login_required, role_re
 from complaints_firebase import complaint_bp
 from feedback_firebase import feedback_bp
 from admin_firebase import admin_bp
+from async_firestore import init_async_views
 from firebase_config import initialize_firebase
+from response_middleware import init_response_middleware
+from assets import init_assets
+from metrics import init_metrics
+from profiler import init_profiler
+from resilience import init_resilience
 import os
 
 # Initialize Firebase
@@ -21,6 +27,26 @@ app.register_blueprint(complaint_bp)
 app.register_blueprint(feedback_bp)
 app.register_blueprint(admin_bp)
 
+# Per-route latency, status and Firestore usage on /metrics
+# (registered first so its after_request hook sees the final response)
+init_metrics(app)
+
+# Opt-in stack-sampling profiles (X-Profile header or PROFILE_SAMPLE_RATES)
+init_profiler(app)
+
+# Fingerprinted dashboard bundles (built by `python assets.py`)
+init_assets(app)
+
+# ETag/304 and gzip/brotli for API responses
+init_response_middleware(app)
+
+# Async views on the shared I/O loop when running on gevent
+init_async_views(app)
+
+# Stale-result markers and 503s when Firestore is unavailable
+# (registered after the response middleware so it runs before it)
+init_resilience(app)
+
 # Create default admin account
 create_default_admin()
 
@@ -71,5 +97,7 @@ def signup_redirect():
 application = app
 
 if __name__ == '__main__':
+    from user_cleanup import resume_cleanup_jobs
+    resume_cleanup_jobs()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Static asset pipeline for the dashboards.
+
+Build step (run once per deploy, after pip install):
+
+    python assets.py
+
+bundles the dashboard scripts together with messaging.js, strips comments
+and indentation, writes every bundle and stylesheet to static/dist/ under a
+content-hashed name, pre-compresses each file with gzip (and brotli, if
+installed) and records the mapping in static/dist/manifest.json.
+
+At runtime templates call asset_url() / asset_urls(). When the manifest
+exists they get the hashed /assets/... URL, which is served with a one-year
+immutable Cache-Control so browsers never download the same bundle twice.
+Without a build (local development) they fall back to the plain source files
+under /static so nothing has to be rebuilt while editing.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Bundle name -> source files (relative to static/), concatenated in page order
+BUNDLES = {
+    'admindashboard.js': [
+        'js/admindashboard.js',
+        'js/messaging.js',
+        'js/admindashboard-extras.js',
+    ],
+    'barangayofficialsdashboard.js': [
+        'js/barangayofficialsdashboard.js',
+        'js/messaging.js',
+    ],
+    'residentdashboard.js': [
+        'js/residentdashboard.js',
+        'js/messaging.js',
+    ],
+}
+
+# Single files that are fingerprinted as-is (after minification)
+SINGLE_FILES = [
+    'js/firebaseConfig.js',
+    'css/admindashboard.css',
+    'css/auth.css',
+    'css/barangayofficialsdashboard.css',
+    'css/landingpage.css',
+    'css/residentdashboard.css',
+]
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+assets_bp = Blueprint('assets', __name__)
+
+_manifest = None
+
+
+# ============ BUILD ============
+
+# A '/' after one of these (or at the start) begins a regex literal, not a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORD = re.compile(r'\b(?:return|typeof|case|else|in|of|void|yield|await)\s*$')
+
+
+def _template_line_ends(source):
+    """For each line break: True if it falls inside a template literal's text.
+
+    A small scanner over strings, comments, regex literals and nested ${...}
+    expressions, enough to tell template text (which must not be touched)
+    from code.
+    """
+    ends = []
+    in_template = False
+    # Brace depth inside each open ${...} expression, innermost last
+    expressions = []
+    prev = ''
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch == '\n':
+            ends.append(in_template)
+            i += 1
+            continue
+        if in_template:
+            if ch == '\\' and source[i + 1:i + 2] != '\n':
+                i += 1
+            elif ch == '`':
+                in_template = False
+                prev = '`'
+            elif source.startswith('${', i):
+                expressions.append(0)
+                in_template = False
+                prev = '{'
+                i += 1
+            i += 1
+            continue
+
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            ends.extend([False] * source.count('\n', i, n if end == -1 else end))
+            i = n if end == -1 else end + 2
+        elif ch in '\'"':
+            i += 1
+            while i < n and source[i] not in (ch, '\n'):
+                i += 2 if source[i] == '\\' else 1
+            prev = ch
+            i += 1 if i < n and source[i] == ch else 0
+        elif ch == '/' and (prev == '' or prev in REGEX_PRECEDERS or REGEX_KEYWORD.search(source, max(0, i - 12), i)):
+            i += 1
+            in_class = False
+            while i < n and source[i] != '\n' and (in_class or source[i] != '/'):
+                if source[i] == '\\':
+                    i += 1
+                elif source[i] in '[]':
+                    in_class = source[i] == '['
+                i += 1
+            prev = '/'
+            i += 1 if i < n and source[i] == '/' else 0
+        else:
+            if ch == '`':
+                in_template = True
+            elif ch == '{' and expressions:
+                expressions[-1] += 1
+            elif ch == '}' and expressions:
+                if expressions[-1] == 0:
+                    expressions.pop()
+                    in_template = True
+                else:
+                    expressions[-1] -= 1
+            if not ch.isspace():
+                prev = ch
+            i += 1
+    return ends
+
+
+def minify_js(source):
+    """Drop blank lines, whole-line // comments and indentation.
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly
+    as it does in the source files. Lines inside a template literal are
+    part of a string (often generated HTML) and are kept as they are.
+    """
+    ends = _template_line_ends(source)
+    lines = []
+    for number, line in enumerate(source.split('\n')):
+        starts_in_template = number > 0 and ends[number - 1]
+        ends_in_template = number < len(ends) and ends[number]
+        if not starts_in_template:
+            line = line.lstrip()
+            if not line or line.startswith('//'):
+                continue
+        if not ends_in_template:
+            line = line.rstrip()
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def minify_css(source):
+    """Drop comments, blank lines and indentation"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)
+    lines = [line.strip() for line in source.splitlines() if line.strip()]
+    return '\n'.join(lines) + '\n'
+
+
+def _read_static(path):
+    with open(os.path.join(STATIC_DIR, path), encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_fingerprinted(name, content):
+    """Write content under a hashed name plus .gz/.br copies, return the name"""
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    hashed_name = f"{stem}.{digest}{ext}"
+    target = os.path.join(DIST_DIR, hashed_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    with open(target, 'wb') as f:
+        f.write(data)
+    with open(target + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9))
+    if brotli is not None:
+        with open(target + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+    return hashed_name
+
+
+def build():
+    """Build all bundles and write the manifest"""
+    manifest = {}
+
+    for bundle_name, sources in BUNDLES.items():
+        parts = [minify_js(_read_static(src)) for src in sources]
+        # Each source ends with a newline, join with ';' guards against a
+        # file that ends without a semicolon
+        content = ';\n'.join(parts)
+        manifest[bundle_name] = _write_fingerprinted(os.path.join('js', bundle_name), content)
+        print(f"Built {bundle_name} -> {manifest[bundle_name]} ({len(content)} bytes)")
+
+    for path in SINGLE_FILES:
+        source = _read_static(path)
+        content = minify_css(source) if path.endswith('.css') else minify_js(source)
+        manifest[path] = _write_fingerprinted(path, content)
+        print(f"Built {path} -> {manifest[path]} ({len(content)} bytes)")
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Wrote {MANIFEST_PATH}")
+    return manifest
+
+
+# ============ RUNTIME ============
+
+def load_manifest():
+    """Read the build manifest once per process ({} when not built)"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(path):
+    """URL for a single static file, fingerprinted when a build exists"""
+    hashed = load_manifest().get(path)
+    if hashed:
+        return url_for('assets.serve_asset', filename=hashed)
+    return url_for('static', filename=path)
+
+
+def asset_urls(bundle_name):
+    """Script URLs for a bundle: the built file, or its sources unbundled"""
+    hashed = load_manifest().get(bundle_name)
+    if hashed:
+        return [url_for('assets.serve_asset', filename=hashed)]
+    return [url_for('static', filename=src) for src in BUNDLES[bundle_name]]
+
+
+@assets_bp.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Serve a fingerprinted file, preferring a pre-compressed copy"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    served_name = filename
+    accept = request.accept_encodings
+
+    if accept['br'] and os.path.exists(os.path.join(DIST_DIR, filename + '.br')):
+        encoding, served_name = 'br', filename + '.br'
+    elif accept['gzip'] and os.path.exists(os.path.join(DIST_DIR, filename + '.gz')):
+        encoding, served_name = 'gzip', filename + '.gz'
+
+    response = send_from_directory(DIST_DIR, served_name, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Content-Disposition', None)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_assets(app):
+    """Register the /assets route and template helpers"""
+    app.register_blueprint(assets_bp)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+    return app
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,251 @@
+"""
+Firestore AsyncClient for async views.
+
+Flask (installed as Flask[async], which brings asgiref) runs an `async def`
+view in an event loop for that request, so sync and async views coexist and
+routes can be migrated one at a time: the view becomes a coroutine and
+awaits get_async_db() calls, running independent ones concurrently with
+asyncio.gather instead of one after another.
+
+gRPC's asyncio channels belong to the event loop they were created on, and
+a request's loop is gone once it has been answered. So each worker process
+keeps one long-lived I/O loop in a daemon thread, and every RPC an async
+view awaits runs there. All in-flight requests of the worker share that
+loop and the AsyncClient's channel.
+
+On gevent workers (see gunicorn.conf.py) that thread is a greenlet on the
+same OS thread as every request, and asyncio allows only one running loop
+per OS thread. A loop per request, as Flask starts one, would fail with
+"Cannot run the event loop while another loop is running". So there
+init_async_views() runs the async views themselves on the I/O loop: the
+request's greenlet waits for its view's coroutine there, and the other
+greenlets keep running meanwhile.
+
+    db = get_async_db()
+    user, complaint = await asyncio.gather(
+        db.collection('users').document(uid).get(),
+        db.collection('complaints').document(complaint_id).get(),
+    )
+
+As on the sync client, every call is counted on /metrics and gets a deadline
+and the circuit breaker of its collection and operation (resilience.py), and
+reads are retried after transient errors. The stale-result fallback and
+single-flight coalescing are only on the sync client: an async read that
+still fails raises FirestoreUnavailable (a 503).
+
+With the memory backend the async client is the stand-in's AsyncAdapter
+over the same data as get_db().
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from firebase_admin import firestore_async
+from flask import g, has_request_context
+
+from events import _gevent_patched
+from firebase_config import get_db
+from metrics import (
+    FIRESTORE_CALLS, FIRESTORE_DOCS_WRITTEN, FIRESTORE_LATENCY, FIRESTORE_RETRIES, WRAPPED_TYPES,
+    _current_route, _record_read,
+)
+from resilience import (
+    READ_KINDS, READ_RETRIES, READ_TIMEOUT, RETRY_BASE_DELAY, RETRY_MAX_DELAY, STREAM_OPS, STREAM_TIMEOUT,
+    TRANSIENT_ERRORS, WRITE_RPCS, WRITE_TIMEOUT, FirestoreUnavailable, _raw, get_breaker,
+)
+
+# Writes staged on a batch; they reach Firestore with its commit()
+STAGED_WRITES = {'create', 'set', 'update', 'delete'}
+
+# ============ I/O LOOP ============
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def io_loop():
+    """This process's I/O loop, started on first use (and again in a forked worker)"""
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, daemon=True, name='firestore-io').start()
+        return _loop
+
+
+async def on_io_loop(coro):
+    """Await coro on the I/O loop, from whichever loop the caller runs on"""
+    loop = io_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def run_sync(coro):
+    """Run coro on the I/O loop and wait for its result, from outside that loop"""
+    return asyncio.run_coroutine_threadsafe(coro, io_loop()).result()
+
+
+def init_async_views(app):
+    """On gevent, run async views on the I/O loop rather than a loop per request"""
+    if _gevent_patched():
+        app.async_to_sync = lambda func: lambda *args, **kwargs: run_sync(func(*args, **kwargs))
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+# ============ CLIENT WRAPPER ============
+
+def _kind(target):
+    """Class name without the Async prefix: AsyncQuery -> Query"""
+    if type(target).__name__ == 'AsyncAdapter':
+        target = target._target
+    name = type(target).__name__
+    return name[len('Async'):] if name.startswith('Async') else name
+
+
+def _unwrap(value):
+    if isinstance(value, AsyncFirestore):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _unavailable(collection, op, breaker):
+    if has_request_context():
+        g.firestore_unavailable = max(breaker.retry_after(), 1)
+    return FirestoreUnavailable(f"Firestore {op} on {collection} is unavailable")
+
+
+class AsyncFirestore:
+    """Proxy around an async client, reference, query or batch; RPCs run on the I/O loop"""
+
+    __slots__ = ('_target', '_collection', '_kind')
+
+    def __init__(self, target, collection='-'):
+        self._target = target
+        self._collection = collection
+        self._kind = _kind(target)
+
+    def __repr__(self):
+        return f"AsyncFirestore({self._target!r})"
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        if self._kind in READ_KINDS and name in STREAM_OPS:
+            def stream(*args, **kwargs):
+                return self._stream(name, attr, args, kwargs)
+            return stream
+
+        if (self._kind in READ_KINDS and name == 'get') or name in WRITE_RPCS.get(self._kind, ()):
+            async def rpc(*args, **kwargs):
+                return await self._rpc(name, attr, args, kwargs)
+            return rpc
+
+        def call(*args, **kwargs):
+            collection = self._label_for(name, args)
+            result = attr(*_unwrap(args), **kwargs)
+            if self._kind == 'WriteBatch' and name in STAGED_WRITES:
+                FIRESTORE_DOCS_WRITTEN.labels(_current_route(), collection).inc()
+            if _kind(result) in WRAPPED_TYPES:
+                return AsyncFirestore(result, collection)
+            return result
+        return call
+
+    def _label_for(self, name, args):
+        if name in ('collection', 'collection_group') and args:
+            return str(args[0]).split('/')[-1]
+        for arg in args:
+            if isinstance(arg, AsyncFirestore):
+                return arg._collection
+            if isinstance(arg, (list, tuple)) and arg and isinstance(arg[0], AsyncFirestore):
+                return arg[0]._collection
+        return self._collection
+
+    async def _call(self, name, call, collection, read):
+        """Await call() on the I/O loop with the breaker, retrying transient read errors"""
+        breaker = get_breaker(collection, name)
+        route = _current_route()
+        for attempt in range(READ_RETRIES + 1 if read else 1):
+            if not breaker.allow():
+                raise _unavailable(collection, name, breaker)
+            FIRESTORE_CALLS.labels(route, collection, name).inc()
+            start = time.perf_counter()
+            try:
+                result = await on_io_loop(call())
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                if not read:
+                    # A write that timed out may still have been applied
+                    raise
+                if attempt == READ_RETRIES:
+                    raise _unavailable(collection, name, breaker) from e
+                FIRESTORE_RETRIES.labels(collection, name).inc()
+                await asyncio.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)))
+                continue
+            finally:
+                FIRESTORE_LATENCY.labels(collection, name).observe(time.perf_counter() - start)
+            breaker.record_success()
+            if read:
+                _record_read(route, collection, len(result) if isinstance(result, list) else 1)
+            elif name != 'commit':
+                FIRESTORE_DOCS_WRITTEN.labels(route, collection).inc()
+            return result
+
+    async def _rpc(self, name, method, args, kwargs):
+        read = name == 'get'
+        collection = self._label_for(name, args)
+        args = _unwrap(args)
+        kwargs.setdefault('timeout', READ_TIMEOUT if read else WRITE_TIMEOUT)
+        if read:
+            kwargs.setdefault('retry', None)
+        result = await self._call(name, lambda: method(*args, **kwargs), collection, read)
+        if _kind(result) in WRAPPED_TYPES:
+            return AsyncFirestore(result, self._collection)
+        return result
+
+    async def _stream(self, name, method, args, kwargs):
+        # Collected on the I/O loop, then handed out
+        collection = self._label_for(name, args)
+        args = _unwrap(args)
+        kwargs.setdefault('timeout', STREAM_TIMEOUT if name == 'stream' else READ_TIMEOUT)
+        kwargs.setdefault('retry', None)
+        for item in await self._call(name, lambda: _collect(method(*args, **kwargs)), collection, True):
+            yield item
+
+
+_client = None
+_client_for = None
+_client_lock = threading.Lock()
+
+
+def get_async_db():
+    """Async Firestore client for async views, on the same backend as get_db()"""
+    global _client, _client_for
+    db = get_db()
+    with _client_lock:
+        if _client is None or _client_for is not db:
+            raw = _raw(db)
+            if hasattr(raw, 'async_client'):
+                # The memory stand-in: same data as the sync client
+                client = raw.async_client()
+            else:
+                client = firestore_async.client()
+            _client = AsyncFirestore(client)
+            _client_for = db
+        return _client
+
+
+async def stream_dicts(query):
+    """Every matching document as a dict"""
+    return [doc.to_dict() async for doc in query.stream()]
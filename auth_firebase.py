@@ -1,10 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session
 import json
 import os
 from datetime import datetime
 from functools import wraps
 from firebase_admin import auth as firebase_auth, firestore, exceptions
 from firebase_config import initialize_firebase, get_db
+from activity import record_activity
+from loader import get_loader
+from user_search import user_search_fields
+from user_index import index_user
+from stats_cache import invalidate
 
 initialize_firebase()
 
@@ -40,6 +45,7 @@ def create_default_admin():
             'created_at': datetime.now().isoformat(),
             'is_admin': True
         }
+        admin_data.update(user_search_fields(admin_data))
         
         admin_ref.set(admin_data)
         print("✓ Default admin account ready!")
@@ -54,7 +60,8 @@ def login_required(f):
         if 'user_email' not in session:
             flash('Please login to access this page', 'error')
             return redirect(url_for('auth.show_auth', form_type='login'))
-        return f(*args, **kwargs)
+        # ensure_sync runs async views (see async_firestore.py) to completion
+        return current_app.ensure_sync(f)(*args, **kwargs)
     return decorated_function
 
 # Role required decorator
@@ -69,9 +76,9 @@ def role_required(role):
             user_uid = session.get('user_uid')
             
             if user_uid:
-                db = get_db()
-                user_ref = db.collection('users').document(user_uid)
-                user_doc = user_ref.get()
+                # Through the request's loader, so a handler reading the same
+                # user doc does not fetch it again
+                user_doc = get_loader().get('users', user_uid)
                 
                 if not user_doc.exists:
                     flash(f'Access denied. This page is only for {role}s', 'error')
@@ -82,7 +89,7 @@ def role_required(role):
                     flash(f'Access denied. This page is only for {role}s', 'error')
                     return redirect(url_for('home'))
             
-            return f(*args, **kwargs)
+            return current_app.ensure_sync(f)(*args, **kwargs)
         return decorated_function
     return decorator
 
@@ -198,13 +205,19 @@ def signup():
         }
         
         # If signing up as official, set status to pending approval
+        user_data['status'] = 'pending_approval' if role == 'official' else 'approved'
+        user_data.update(user_search_fields(user_data))
+        batch = db.batch()
+        batch.set(user_ref, user_data)
+        record_activity('new_user', f'New {role} registered: {full_name}',
+                        actor_uid=user.uid, subject_id=user.uid, batch=batch)
+        batch.commit()
+        index_user(user.uid, user_data)
+        invalidate('users')
+        
         if role == 'official':
-            user_data['status'] = 'pending_approval'
-            user_ref.set(user_data)
             flash('Registration submitted! Please wait for admin approval before you can login.', 'info')
         else:
-            user_data['status'] = 'approved'
-            user_ref.set(user_data)
             flash('Account created successfully! Please login.', 'success')
         
         return redirect(url_for('auth.show_auth', form_type='login'))
@@ -0,0 +1,289 @@
+"""
+Full backup and restore of the Firestore collections.
+
+`backup` exports every collection (users - including each user's messages
+and notifications arrays - complaints, feedback, notifications, activity and
+the feedback aggregates) to compressed NDJSON shards, one line per document:
+
+    {"id": "<document id>", "data": {...}}
+
+Collections are read with the parallel partitioned scan (scan.py) and each
+scan worker writes its own shard, so shards are written in parallel without
+locking. Shards are zstd-compressed if the optional `zstandard` package is
+installed, gzip otherwise. manifest.json is written last and lists every
+shard with its document count and sha256; a directory without one is an
+incomplete backup.
+
+`restore` checks the shards against the manifest and loads them with one
+BulkWriter per shard, several shards at a time, into Firestore or (with
+FIRESTORE_BACKEND=memory) the local stand-in. A document the BulkWriter
+still cannot write after WRITE_ATTEMPTS tries fails the restore rather than
+being silently left out. benchmark.py --restore loads a
+backup instead of generating a synthetic dataset.
+
+    python backup.py backup backups/2025-06-01
+    python backup.py restore backups/2025-06-01 --collections complaints users
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from firebase_config import FIRESTORE_BACKEND, get_db
+from scan import SCAN_WORKERS, scan_collection
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, gzip is always available
+    zstandard = None
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+# Attempts per document before restore gives up on it (the BulkWriter default)
+WRITE_ATTEMPTS = 15
+EXTENSIONS = {'zstd': '.ndjson.zst', 'gzip': '.ndjson.gz'}
+
+
+def default_compression():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+# ---- value encoding ----
+# Firestore values JSON has no type for are written as {"__type__", "value"}
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__type__': 'timestamp', 'value': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'__type__': 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+    if hasattr(value, 'latitude') and hasattr(value, 'longitude'):
+        return {'__type__': 'geopoint', 'value': [value.latitude, value.longitude]}
+    if hasattr(value, 'path') and hasattr(value, 'id'):
+        return {'__type__': 'reference', 'value': value.path}
+    raise TypeError(f"Cannot back up value of type {type(value).__name__}")
+
+
+def _decoder(db):
+    def decode(obj):
+        if len(obj) != 2 or '__type__' not in obj or 'value' not in obj:
+            return obj
+        kind, value = obj['__type__'], obj['value']
+        if kind == 'timestamp':
+            return datetime.fromisoformat(value)
+        if kind == 'bytes':
+            return base64.b64decode(value)
+        if kind == 'geopoint':
+            from google.cloud.firestore_v1 import GeoPoint
+            return GeoPoint(*value)
+        if kind == 'reference':
+            return db.document(value)
+        return obj
+    return decode
+
+
+# ---- shard files ----
+
+def _open_shard_writer(path, compression):
+    if compression == 'zstd':
+        raw = open(path, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(raw), encoding='utf-8')
+    return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+
+
+def _open_shard_reader(path, compression):
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('This backup is zstd-compressed; pip install zstandard to restore it')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return gzip.open(path, 'rt', encoding='utf-8')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ShardWriter:
+    """One compressed NDJSON shard, written by a single scan worker"""
+
+    def __init__(self, directory, name, compression):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.documents = 0
+        self._file = _open_shard_writer(self.path, compression)
+
+    def write(self, doc_id, data):
+        self._file.write(json.dumps({'id': doc_id, 'data': data}, default=_encode, separators=(',', ':')))
+        self._file.write('\n')
+        self.documents += 1
+
+    def close(self):
+        self._file.close()
+        return {
+            'file': self.name,
+            'documents': self.documents,
+            'bytes': os.path.getsize(self.path),
+            'sha256': _sha256(self.path),
+        }
+
+
+# ---- backup ----
+
+def backup_collection(db, collection, directory, compression, workers=SCAN_WORKERS):
+    """Write one collection to shards, return its manifest entry"""
+    local = threading.local()
+    writers = []
+    lock = threading.Lock()
+
+    def handle(page):
+        writer = getattr(local, 'writer', None)
+        if writer is None:
+            with lock:
+                name = f"{collection}-{len(writers):03d}{EXTENSIONS[compression]}"
+                writer = ShardWriter(directory, name, compression)
+                writers.append(writer)
+            local.writer = writer
+        for doc in page:
+            writer.write(doc.id, doc.to_dict())
+
+    try:
+        summary = scan_collection(db, collection, handle, workers=workers)
+    finally:
+        shards = [writer.close() for writer in writers]
+    return {
+        'documents': sum(shard['documents'] for shard in shards),
+        'seconds': summary['seconds'],
+        'shards': sorted(shards, key=lambda shard: shard['file']),
+    }
+
+
+def backup(db, directory, collections=None, workers=SCAN_WORKERS, compression=None):
+    """Export collections (default: all of them) to directory, return the manifest"""
+    compression = compression or default_compression()
+    if os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+        raise FileExistsError(f"{directory} already holds a backup")
+    os.makedirs(directory, exist_ok=True)
+    collections = collections or sorted(ref.id for ref in db.collections())
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'backend': FIRESTORE_BACKEND,
+        'compression': compression,
+        'collections': {},
+    }
+    for collection in collections:
+        entry = backup_collection(db, collection, directory, compression, workers)
+        manifest['collections'][collection] = entry
+        print(f"Backed up {entry['documents']} {collection} documents "
+              f"to {len(entry['shards'])} shards in {entry['seconds']}s")
+
+    # Written last: a manifest means every shard it lists is complete
+    tmp = os.path.join(directory, MANIFEST_NAME + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+# ---- restore ----
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported backup version {manifest.get('version')}")
+    return manifest
+
+
+def restore_shard(db, directory, collection, shard, compression):
+    """Load one shard through its own BulkWriter, return documents written"""
+    path = os.path.join(directory, shard['file'])
+    if _sha256(path) != shard['sha256']:
+        raise ValueError(f"{shard['file']} does not match the manifest checksum")
+
+    decode = _decoder(db)
+    collection_ref = db.collection(collection)
+    writer = db.bulk_writer()
+    failures = []
+
+    def on_write_error(failure, bulk_writer):
+        # Retried like the default handler, but remembered once it gives up
+        if failure.attempts < WRITE_ATTEMPTS:
+            return True
+        failures.append(failure)
+        return False
+
+    writer.on_write_error(on_write_error)
+    count = 0
+    with _open_shard_reader(path, compression) as f:
+        for line in f:
+            doc = json.loads(line, object_hook=decode)
+            writer.set(collection_ref.document(doc['id']), doc['data'])
+            count += 1
+    writer.close()
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {count} writes from {shard['file']} failed: "
+                           f"{failures[0].message}")
+    if count != shard['documents']:
+        raise ValueError(f"{shard['file']} has {count} documents, manifest lists {shard['documents']}")
+    return count
+
+
+def restore(db, directory, collections=None, workers=SCAN_WORKERS):
+    """Load a backup (default: every collection in it), return documents per collection"""
+    manifest = load_manifest(directory)
+    selected = collections or list(manifest['collections'])
+    missing = set(selected) - set(manifest['collections'])
+    if missing:
+        raise ValueError(f"Not in this backup: {', '.join(sorted(missing))}")
+
+    jobs = [(collection, shard) for collection in selected
+            for shard in manifest['collections'][collection]['shards']]
+    counts = dict.fromkeys(selected, 0)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='restore') as pool:
+        futures = [(collection, pool.submit(restore_shard, db, directory, collection, shard,
+                                            manifest['compression']))
+                   for collection, shard in jobs]
+        for collection, future in futures:
+            counts[collection] += future.result()
+    seconds = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"Restored {total} documents from {len(jobs)} shards in {seconds:.1f}s "
+          f"({total / seconds if seconds else 0:.0f} docs/s)")
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Back up or restore the Firestore collections')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = commands.add_parser('backup', help='export collections to compressed NDJSON shards')
+    backup_parser.add_argument('directory')
+    backup_parser.add_argument('--collections', nargs='*', help='default: every collection')
+    backup_parser.add_argument('--workers', type=int, default=SCAN_WORKERS)
+    backup_parser.add_argument('--compression', choices=sorted(EXTENSIONS), help=f'default: {default_compression()}')
+
+    restore_parser = commands.add_parser('restore', help='load a backup into the configured database')
+    restore_parser.add_argument('directory')
+    restore_parser.add_argument('--collections', nargs='*', help='default: every collection in the backup')
+    restore_parser.add_argument('--workers', type=int, default=SCAN_WORKERS)
+
+    args = parser.parse_args()
+    if args.command == 'backup':
+        if args.compression == 'zstd' and zstandard is None:
+            parser.error('zstd compression needs the zstandard package')
+        backup(get_db(), args.directory, args.collections, args.workers, args.compression)
+    else:
+        restore(get_db(), args.directory, args.collections, args.workers)
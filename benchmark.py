@@ -0,0 +1,201 @@
+"""
+Endpoint benchmark suite.
+
+Seeds the in-memory Firestore stand-in with a synthetic dataset (see
+seed_data.generate) and sends every blueprint route's request from
+test_budgets.ROUTE_BUDGETS through the Flask test client repeatedly,
+recording latency percentiles, throughput, Firestore reads and round trips
+per request. Results are written as JSON keyed by commit so runs can be
+compared across changes:
+
+    python benchmark.py --scale 10000
+    python benchmark.py --scale 100000 --requests 20 --routes admin.
+    python benchmark.py --scale 10000 --compare bench_results/abc1234-10000.json
+
+--latency-ms adds a fixed delay to every Firestore round trip, which makes
+N+1 query patterns show up in latency the way they do against real Firestore.
+Scales from 1k to 1M complaints are supported; at the top end seeding takes
+a few minutes and several GB of memory, so leave --attachment-bytes at 0.
+--restore loads a backup written by backup.py instead, which is faster for
+a large dataset benchmarked repeatedly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault('FIRESTORE_BACKEND', 'memory')
+
+import backup
+import firebase_config
+import memory_firestore
+import seed_data
+from test_budgets import ROUTE_BUDGETS, login_as, send
+
+RESULTS_DIR = 'bench_results'
+
+# Routes that change what they act on; measured once, after everything else
+ONE_SHOT = {
+    'admin.delete_user',
+    'admin.delete_complaint',
+    'admin.approve_registration',
+    'admin.reject_registration',
+}
+
+
+def _commit():
+    try:
+        sha = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                      stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], stderr=subprocess.DEVNULL)
+        return sha + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_route(app, db, ids, endpoint, requests):
+    """Send one route's request `requests` times, return its summary"""
+    budget = ROUTE_BUDGETS[endpoint]
+    client = app.test_client()
+    login_as(client, budget['role'], ids)
+
+    latencies = []
+    statuses = {}
+    response_bytes = 0
+    db.reset_stats()
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response, body = send(client, endpoint, ids)
+        latencies.append(time.perf_counter() - t0)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        response_bytes += len(body)
+    elapsed = time.perf_counter() - started
+
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': requests,
+        'p50_ms': round(_percentile(ms, 50), 3),
+        'p90_ms': round(_percentile(ms, 90), 3),
+        'p99_ms': round(_percentile(ms, 99), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'throughput_rps': round(requests / elapsed, 1) if elapsed else None,
+        'reads_per_request': db.stats['reads'] / requests,
+        'round_trips_per_request': db.stats['round_trips'] / requests,
+        'writes_per_request': db.stats['writes'] / requests,
+        'bytes_per_request': response_bytes // requests,
+        'status': statuses,
+    }
+
+
+def run(scale, requests=50, routes=None, latency_ms=0.0, seed=42,
+        attachment_rate=0.2, attachment_bytes=0, restore_dir=None):
+    """Seed (or restore) one dataset and benchmark the selected routes against it"""
+    import admin_firebase
+    from app import app
+    app.config['TESTING'] = True
+    # Firebase Auth is not part of the stand-in
+    admin_firebase.firebase_auth.delete_user = lambda uid: None
+
+    db = memory_firestore.Client()
+    t0 = time.perf_counter()
+    if restore_dir:
+        print(f"Restoring {restore_dir}...")
+        backup.restore(db, restore_dir)
+        # Probe routes need a backup of a seeded dataset
+        ids = seed_data.probe_ids()
+        scale = len(db._store.get('complaints', {}))
+    else:
+        print(f"Seeding {scale} complaints...")
+        ids = seed_data.seed(db, complaints=scale, seed=seed, attachment_rate=attachment_rate,
+                             attachment_bytes=attachment_bytes)
+    seed_seconds = time.perf_counter() - t0
+    dataset = {name: len(docs) for name, docs in db._store.items()}
+    print(f"Seeded {dataset} in {seed_seconds:.1f}s")
+
+    firebase_config.set_firestore_client(db)
+    db.latency = latency_ms / 1000
+
+    selected = [e for e, b in sorted(ROUTE_BUDGETS.items())
+                if 'skip' not in b and (not routes or any(e.startswith(r) for r in routes))]
+    # Destructive routes last so they do not remove the probes other routes use
+    selected.sort(key=lambda e: e in ONE_SHOT)
+
+    results = {}
+    for endpoint in selected:
+        count = 1 if endpoint in ONE_SHOT else requests
+        results[endpoint] = bench_route(app, db, ids, endpoint, count)
+        r = results[endpoint]
+        print(f"{endpoint:45} p50 {r['p50_ms']:>9.2f}ms  p99 {r['p99_ms']:>9.2f}ms  "
+              f"{r['throughput_rps'] or 0:>8.1f} rps  {r['reads_per_request']:>9.1f} reads")
+
+    return {
+        'commit': _commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'scale': scale,
+        'seed': seed,
+        'latency_ms': latency_ms,
+        'attachment_bytes': attachment_bytes,
+        'dataset': dataset,
+        'seed_seconds': round(seed_seconds, 2),
+        'routes': results,
+    }
+
+
+def compare(old, new):
+    """Print per-route changes between two result files"""
+    print(f"\n{old['commit']} -> {new['commit']} (scale {old['scale']} -> {new['scale']})")
+    print(f"{'route':45} {'p50 ms':>19} {'p99 ms':>19} {'reads/req':>19}")
+    for endpoint, after in sorted(new['routes'].items()):
+        before = old['routes'].get(endpoint)
+        if not before:
+            print(f"{endpoint:45} (new)")
+            continue
+        cells = []
+        for key in ('p50_ms', 'p99_ms', 'reads_per_request'):
+            cells.append(f"{before[key]:>8.1f} -> {after[key]:<8.1f}")
+        print(f"{endpoint:45} " + ' '.join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every route against the Firestore stand-in')
+    parser.add_argument('--scale', type=int, default=1000, help='number of complaints to seed (1k-1M)')
+    parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    parser.add_argument('--routes', nargs='*', help='endpoint prefixes to run, e.g. admin. feedback.get_')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated Firestore round trip')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--attachment-bytes', type=int, default=0,
+                        help='size of each seeded complaint attachment (0 for none)')
+    parser.add_argument('--attachment-rate', type=float, default=0.2)
+    parser.add_argument('--restore', help='load this backup (backup.py) instead of seeding')
+    parser.add_argument('--output', help=f'result file (default {RESULTS_DIR}/<commit>-<scale>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    args = parser.parse_args(argv)
+
+    result = run(args.scale, args.requests, args.routes, args.latency_ms, args.seed,
+                 args.attachment_rate, args.attachment_bytes, args.restore)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{result['commit']}-{result['scale']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == '__main__':
+    main()
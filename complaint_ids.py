@@ -0,0 +1,175 @@
+"""
+Time-sortable complaint ids.
+
+Complaint ids (which are also the document ids) are ULIDs behind the BCMS-
+prefix: a 48-bit millisecond timestamp and 80 random bits, in Crockford
+base32.
+
+    BCMS-01JXQ7ZK3M8F2T5V9W0NB4HC6D
+         ^^^^^^^^^^ ms since epoch
+                   ^^^^^^^^^^^^^^^^ random, +1 for each id in the same ms
+
+So document-id order is submission order, and "latest complaints" and
+cursor pages are key-ordered queries with no submitted_date index or sort.
+Within a worker ids are strictly increasing even if several complaints are
+submitted in the same millisecond or the clock steps back.
+
+Complaints submitted before this have ids like BCMS-2025-1a2b3c4d. They are
+still ordinary document ids, so lookups by id keep working, but they sort
+after every ULID id ("BCMS-2" > "BCMS-0"). Key-ordered queries therefore
+stay below KEY_RANGE_END, and callers top up from the submitted_date order
+while legacy complaints are among the newest (see is_legacy_id).
+"""
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+PREFIX = 'BCMS-'
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TIME_CHARS = 10
+RANDOM_CHARS = 16
+RANDOM_BITS = 80
+# Every ULID id up to the year 10889 starts with PREFIX + '0'..'7', and in
+# practice (before the year 3084) with PREFIX + '0'; legacy ids start with a
+# year, PREFIX + '2'
+KEY_RANGE_END = PREFIX + '1'
+DOCUMENT_ID = '__name__'
+# A ULID id, or a legacy BCMS-<year>-<8 hex> one
+ID_PATTERN = re.compile(r'BCMS-(?:[0-9A-HJKMNP-TV-Z]{26}|\d{4}-[0-9a-f]{8})')
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text.upper():
+        value = value * 32 + CROCKFORD.index(char)
+    return value
+
+
+def _millis(when):
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return int(when.timestamp() * 1000)
+
+
+def format_id(ms, random_part):
+    return PREFIX + _encode(ms, TIME_CHARS) + _encode(random_part, RANDOM_CHARS)
+
+
+def complaint_id_at(when, random_part=0):
+    """Id for a complaint submitted at when (naive datetimes are UTC), e.g. for seed data"""
+    return format_id(_millis(when), random_part)
+
+
+def is_valid_id(complaint_id):
+    """True if complaint_id has the shape of a complaint id (and so is a safe document id)"""
+    return isinstance(complaint_id, str) and ID_PATTERN.fullmatch(complaint_id) is not None
+
+
+def is_legacy_id(complaint_id):
+    """True for BCMS-<year>-<hex> ids issued before ids were time-sortable"""
+    return not (complaint_id.startswith(PREFIX) and complaint_id < KEY_RANGE_END
+                and len(complaint_id) == len(PREFIX) + TIME_CHARS + RANDOM_CHARS)
+
+
+def id_timestamp(complaint_id):
+    """When a ULID complaint id was issued, None for legacy ids"""
+    if is_legacy_id(complaint_id):
+        return None
+    ms = _decode(complaint_id[len(PREFIX):len(PREFIX) + TIME_CHARS])
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+class ComplaintIdGenerator:
+    """Strictly increasing ids within this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new_id(self):
+        with self._lock:
+            ms = int(time.time() * 1000)
+            if ms > self._last_ms:
+                random_part = secrets.randbits(RANDOM_BITS)
+            else:
+                # Same millisecond (or the clock stepped back): keep the last
+                # timestamp and count up, spilling into the next millisecond
+                ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part >> RANDOM_BITS:
+                    ms, random_part = ms + 1, secrets.randbits(RANDOM_BITS)
+            self._last_ms, self._last_random = ms, random_part
+            return format_id(ms, random_part)
+
+
+_generator = ComplaintIdGenerator()
+
+
+def new_complaint_id():
+    """A fresh, time-sortable complaint id"""
+    return _generator.new_id()
+
+
+class CursorNotFound(LookupError):
+    """A legacy page cursor whose complaint was deleted: its position is lost"""
+
+
+def recent_complaints(complaints_ref, limit, cursor=None, filters=()):
+    """One newest-first page of complaints, return (snapshots, next cursor or None).
+
+    filters are (field, '==', value) tuples. ULID complaints are paged by
+    key, starting below cursor (a complaint id from the previous page); when
+    they run out, the page is filled with legacy complaints ordered by
+    submitted_date. Composite indexes on (field, __name__ DESC) and
+    (field, submitted_date DESC) cover the filtered queries.
+
+    Legacy pages start after the cursor's document, so if it has been
+    deleted since, CursorNotFound is raised rather than starting over.
+    """
+    if cursor is not None and not is_valid_id(cursor):
+        raise CursorNotFound(f"Invalid cursor {cursor!r}")
+    query = complaints_ref
+    for field, op, value in filters:
+        query = query.where(field, op, value)
+
+    docs = []
+    if cursor is None or not is_legacy_id(cursor):
+        # Key order needs no snapshot for the cursor: the id is the position
+        upper = complaints_ref.document(cursor or KEY_RANGE_END)
+        docs = list(query.where(DOCUMENT_ID, '<', upper)
+                    .order_by(DOCUMENT_ID, direction=firestore.Query.DESCENDING)
+                    .limit(limit).stream())
+
+    if len(docs) < limit:
+        legacy = query.order_by('submitted_date', direction=firestore.Query.DESCENDING)
+        if cursor is not None and is_legacy_id(cursor):
+            cursor_doc = complaints_ref.document(cursor).get()
+            if not cursor_doc.exists:
+                raise CursorNotFound(f"Complaint {cursor} no longer exists; start again from the first page")
+            legacy = legacy.start_after(cursor_doc)
+        elif docs or cursor is not None:
+            # Every legacy complaint predates the oldest ULID one. When none
+            # are left below the cursor (which may have been deleted since),
+            # that is the oldest one overall
+            oldest = docs[-1] if docs else next(iter(
+                query.where(DOCUMENT_ID, '<', complaints_ref.document(KEY_RANGE_END))
+                .order_by(DOCUMENT_ID).limit(1).stream()), None)
+            if oldest is not None:
+                legacy = legacy.where('submitted_date', '<', oldest.to_dict().get('submitted_date', ''))
+        docs += [doc for doc in legacy.limit(limit - len(docs)).stream() if is_legacy_id(doc.id)]
+
+    next_cursor = docs[-1].id if len(docs) == limit else None
+    return docs, next_cursor
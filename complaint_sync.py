@@ -0,0 +1,137 @@
+"""
+Version stamps and delta reads for the complaint lists.
+
+/complaint/all and /officials/complaints/all send every complaint on each
+call. With ?since=<token> they send only what changed after the token:
+
+    {"changed": [...complaints added or modified...],
+     "removed": ["BCMS-01JXQ7ZK3M8F2T5V9W0NB4HC6D", ...],
+     "token": "1750000000000000",
+     "full": false}
+
+The dashboard keeps its own copy of the list, drops the removed ids, puts
+the changed complaints in and passes the new token next time, so a refresh
+costs as many reads as there were changes. An empty, unreadable or expired
+token gets every complaint with "full": true, and the client replaces its
+copy.
+
+Every complaint write stamps sync_version (stamp()): microseconds since the
+epoch, strictly increasing within a worker. A complaint that is deleted, or
+that leaves its owner's list (anonymised with its owner's account), gets a
+tombstone in complaint_tombstones, written with the change: its id, former
+owner, reason and sync_version. A delta is then two queries, complaints and
+tombstones with sync_version > token; composite indexes on (user_uid,
+sync_version) cover the residents' filtered ones.
+
+The token handed back is SYNC_TOKEN_LAG_SECONDS (default 10) behind the
+read rather than the newest version seen: a write stamped just before the
+read may commit just after it, or come from a worker whose clock runs a
+little behind. Changes in that window are sent again next time, which the
+merge absorbs. Tokens older than SYNC_TOMBSTONE_RETENTION_DAYS (default 30)
+get a full list, so older tombstones are no longer needed and can be
+deleted.
+
+Complaints written before this have no sync_version. A full list includes
+them, and deltas do from their next write on. Restored backups keep the
+versions they were saved with; open dashboards see them on a full reload.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+VERSION_FIELD = 'sync_version'
+TOMBSTONES_COLLECTION = 'complaint_tombstones'
+SYNC_TOKEN_LAG_SECONDS = float(os.environ.get('SYNC_TOKEN_LAG_SECONDS', '10'))
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Tombstone reasons: gone for everyone, or only off the former owner's list
+DELETED = 'deleted'
+UNLINKED = 'unlinked'
+
+
+class VersionClock:
+    """Strictly increasing microsecond versions within this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def next(self):
+        with self._lock:
+            # Same microsecond (or the clock stepped back): count up from the last one
+            self._last = max(int(time.time() * 1_000_000), self._last + 1)
+            return self._last
+
+
+_clock = VersionClock()
+
+
+def stamp(data):
+    """Add the next sync_version to a complaint's data (or update), return it"""
+    data[VERSION_FIELD] = _clock.next()
+    return data
+
+
+def tombstone(complaint_id, owner_uid, reason=DELETED):
+    return stamp({
+        'id': complaint_id,
+        'user_uid': owner_uid,
+        'reason': reason,
+        'removed_at': datetime.now().isoformat(),
+    })
+
+
+def write_tombstone(db, writer, complaint_id, owner_uid, reason=DELETED):
+    """Stage a complaint's tombstone on a batch or BulkWriter"""
+    writer.set(db.collection(TOMBSTONES_COLLECTION).document(complaint_id),
+               tombstone(complaint_id, owner_uid, reason))
+
+
+def _token_now():
+    return int((time.time() - SYNC_TOKEN_LAG_SECONDS) * 1_000_000)
+
+
+def parse_token(token):
+    """The version a since token stands for, None if a full list is needed"""
+    try:
+        version = int(token)
+    except (TypeError, ValueError):
+        return None
+    oldest = (time.time() - SYNC_TOMBSTONE_RETENTION_DAYS * 86400) * 1_000_000
+    return version if version >= oldest else None
+
+
+def changes_since(db, token, owner_uid=None):
+    """Complaints changed after token (the owner's only, if given), as the ?since= response"""
+    since = parse_token(token)
+    new_token = _token_now()
+    complaints_ref = db.collection('complaints')
+    if owner_uid is not None:
+        complaints_ref = complaints_ref.where('user_uid', '==', owner_uid)
+
+    if since is None:
+        changed = [doc.to_dict() for doc in complaints_ref.stream()]
+        removed = []
+    else:
+        changed = [doc.to_dict() for doc in complaints_ref.where(VERSION_FIELD, '>', since).stream()]
+        tombstones_ref = db.collection(TOMBSTONES_COLLECTION)
+        if owner_uid is not None:
+            tombstones_ref = tombstones_ref.where('user_uid', '==', owner_uid)
+        changed_ids = {complaint.get('id') for complaint in changed}
+        removed = []
+        for doc in tombstones_ref.where(VERSION_FIELD, '>', since).stream():
+            dead = doc.to_dict()
+            # An unlinked complaint is still on everyone else's list
+            if owner_uid is None and dead.get('reason') == UNLINKED:
+                continue
+            if dead['id'] not in changed_ids:
+                removed.append(dead['id'])
+
+    changed.sort(key=lambda x: x.get('submitted_date', ''), reverse=True)
+    return {
+        'changed': changed,
+        'removed': removed,
+        'token': str(max(new_token, since or 0)),
+        'full': since is None,
+    }
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, session, flash, redirect, url_for, Response, render_template
+import asyncio
 import time
 import json
 import os
@@ -7,12 +8,29 @@ from functools import wraps
 from auth_firebase import login_required, role_required
 from firebase_admin import firestore
 from firebase_config import initialize_firebase, get_db
+from async_firestore import get_async_db
+from activity import ACTIVITY_COLLECTION, activity_entry, record_activity
+from loader import get_loader
+from complaint_ids import new_complaint_id, recent_complaints
+from complaint_sync import changes_since, stamp
+from user_index import SUGGEST_LIMIT, get_user_index, uid_for_email
+from stats_cache import invalidate, stats_cache
+from events import (
+    ME_STREAM_KEEPALIVE_SECONDS, publish_complaint, publish_to_officials, publish_to_user, streams_enabled,
+    subscribe, unsubscribe,
+)
 import uuid
 
 initialize_firebase()
 
 complaint_bp = Blueprint('complaint', __name__)
 
+RECENT_COMPLAINTS_LIMIT = 5
+
+# Dashboard statistics, recomputed after 15s / 10s (see stats_cache.py)
+OFFICIALS_STATS_CACHE = stats_cache('officials_stats', ttl=15, hard_ttl=120)
+RESIDENT_STATS_CACHE = stats_cache('resident_stats', ttl=10, hard_ttl=60)
+
 def calculate_urgency(category):
     """Calculate urgency level based on category"""
     urgency_map = {
@@ -45,6 +63,7 @@ def add_official_notification(complaint_id, title, message):
             'read': False
         }
         db.collection('notifications').add(notification)
+        publish_to_officials('notification', notification)
     except Exception as e:
         print(f"Error adding notification: {str(e)}")
 
@@ -74,6 +93,44 @@ def complaint_stream():
     
     return Response(event_stream(), mimetype="text/event-stream")
 
+@complaint_bp.route('/me/stream')
+@login_required
+def me_stream():
+    """The user's new messages, notifications and complaint changes via Server-Sent Events"""
+    if not streams_enabled():
+        # The dashboards fall back to polling
+        return '', 204
+    user_uid, user_role = session.get('user_uid'), session.get('user_role')
+    
+    def event_stream():
+        # Subscribed once the response is actually streamed, so the finally
+        # below always runs for it
+        subscription = subscribe(user_uid, user_role)
+        try:
+            # Reconnect after 5s if the connection drops
+            yield "retry: 5000\n\n"
+            last_resync = time.monotonic()
+            while True:
+                event = subscription.get(ME_STREAM_KEEPALIVE_SECONDS)
+                if event is None and subscription.resync_seconds is not None \
+                        and time.monotonic() - last_resync >= subscription.resync_seconds:
+                    event = ('resync', None)
+                if event is None:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                kind, data = event
+                if kind == 'resync':
+                    last_resync = time.monotonic()
+                yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            unsubscribe(subscription)
+    
+    response = Response(event_stream(), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @complaint_bp.route('/complaint/submit', methods=['POST'])
 @login_required
 def submit_complaint():
@@ -85,8 +142,8 @@ def submit_complaint():
         if not user_email or not user_uid:
             return jsonify({'success': False, 'message': 'User not logged in'}), 401
         
-        # Generate unique complaint ID
-        complaint_id = f"BCMS-{datetime.now().strftime('%Y')}-{str(uuid.uuid4())[:8]}"
+        # Time-sortable id: document-id order is submission order
+        complaint_id = new_complaint_id()
         
         # Get form data
         title = request.form.get('title')
@@ -152,9 +209,15 @@ def submit_complaint():
             if images:
                 new_complaint['attachments'] = images
         
-        # Save to Firestore
+        # Save to Firestore, with its activity log entry
         db = get_db()
-        db.collection('complaints').document(complaint_id).set(new_complaint)
+        batch = db.batch()
+        batch.set(db.collection('complaints').document(complaint_id), stamp(new_complaint))
+        record_activity('complaint_submitted', f'New complaint: {title or "Untitled"}',
+                        actor_uid=user_uid, subject_id=complaint_id, batch=batch)
+        batch.commit()
+        invalidate('complaints')
+        publish_complaint(complaint_id, user_uid, 'added')
         
         # Add notification for officials
         add_official_notification(
@@ -188,27 +251,12 @@ def get_recent_complaints():
         db = get_db()
         complaints_ref = db.collection('complaints')
         
-        # Filter based on role
-        if user_role == 'official':
-            # Officials see all complaints
-            complaints_docs = complaints_ref.stream()
-        else:
-            # Residents see only their own
-            complaints_docs = complaints_ref.where('user_uid', '==', user_uid).stream()
+        # Filter based on role: officials see all complaints, residents only their own
+        filters = [] if user_role == 'official' else [('user_uid', '==', user_uid)]
+        # Newest first by document key (complaint ids sort by submission time)
+        complaints_docs, _ = recent_complaints(complaints_ref, RECENT_COMPLAINTS_LIMIT, filters=filters)
         
-        complaints = []
-        for doc in complaints_docs:
-            complaint = doc.to_dict()
-            complaints.append(complaint)
-        
-        # Sort and limit
-        recent_complaints = sorted(
-            complaints,
-            key=lambda x: x.get('submitted_date', ''),
-            reverse=True
-        )[:5]
-        
-        return jsonify(recent_complaints)
+        return jsonify([doc.to_dict() for doc in complaints_docs])
         
     except Exception as e:
         print(f"Error fetching recent complaints: {str(e)}")
@@ -217,7 +265,7 @@ def get_recent_complaints():
 @complaint_bp.route('/complaint/all')
 @login_required
 def get_all_complaints():
-    """Get all complaints for current user"""
+    """Get all complaints for current user (?since=<token>: only what changed, see complaint_sync.py)"""
     try:
         user_email = session.get('user_email')
         user_uid = session.get('user_uid')
@@ -227,6 +275,10 @@ def get_all_complaints():
             return jsonify([])
         
         db = get_db()
+        if 'since' in request.args:
+            owner_uid = None if user_role == 'official' else user_uid
+            return jsonify(changes_since(db, request.args.get('since'), owner_uid))
+        
         complaints_ref = db.collection('complaints')
         
         # Filter based on role
@@ -287,105 +339,109 @@ def get_complaint_details():
         print(f"Error fetching complaint details: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def compute_officials_stats():
+    """Dashboard statistics for officials"""
+    db = get_db()
+    complaints_ref = db.collection('complaints')
+    complaints_docs = complaints_ref.stream()
+    
+    complaints_list = [doc.to_dict() for doc in complaints_docs]
+    
+    if not complaints_list:
+        return {
+            'total': 0,
+            'pending': 0,
+            'new': 0,
+            'in_progress': 0,
+            'escalated': 0,
+            'resolved': 0,
+            'urgent_pending': 0,
+            'avg_resolution_time': 0,
+            'change_from_last_month': {
+                'total': 0,
+                'resolved': 0,
+                'resolution_time': 0
+            }
+        }
+    
+    # Count by status
+    total = len(complaints_list)
+    new_count = sum(1 for c in complaints_list if c.get('status') == 'New')
+    pending = sum(1 for c in complaints_list if c.get('status') in ['Pending', 'Pending Review'])
+    in_progress = sum(1 for c in complaints_list if c.get('status') == 'In Progress')
+    escalated = sum(1 for c in complaints_list if c.get('status') == 'Escalated')
+    resolved = sum(1 for c in complaints_list if c.get('status') == 'Resolved')
+    
+    # Count urgent pending (High urgency that are not resolved)
+    urgent_pending = sum(1 for c in complaints_list 
+                       if c.get('urgency') == 'High' and c.get('status') not in ['Resolved'])
+    
+    # Calculate average resolution time for resolved complaints
+    resolution_times = []
+    for complaint in complaints_list:
+        if complaint.get('status') == 'Resolved' and complaint.get('submitted_date') and complaint.get('updated_at'):
+            try:
+                submitted = datetime.fromisoformat(complaint.get('submitted_date').replace('Z', '+00:00'))
+                resolved_date = datetime.fromisoformat(complaint.get('updated_at').replace('Z', '+00:00'))
+                days = (resolved_date - submitted).days
+                if days >= 0:
+                    resolution_times.append(days)
+            except:
+                pass
+    
+    avg_resolution_time = round(sum(resolution_times) / len(resolution_times), 1) if resolution_times else 0
+    
+    # Calculate changes from last month
+    now = datetime.now()
+    last_month_start = datetime(now.year, now.month - 1 if now.month > 1 else 12, 1)
+    this_month_start = datetime(now.year, now.month, 1)
+    
+    last_month_total = 0
+    last_month_resolved = 0
+    this_month_total = 0
+    this_month_resolved = 0
+    
+    for complaint in complaints_list:
+        try:
+            submitted = datetime.fromisoformat(complaint.get('submitted_date', '').replace('Z', '+00:00'))
+            if last_month_start <= submitted < this_month_start:
+                last_month_total += 1
+                if complaint.get('status') == 'Resolved':
+                    last_month_resolved += 1
+            elif submitted >= this_month_start:
+                this_month_total += 1
+                if complaint.get('status') == 'Resolved':
+                    this_month_resolved += 1
+        except:
+            pass
+    
+    # Calculate percentage changes
+    total_change = round(((this_month_total - last_month_total) / max(last_month_total, 1)) * 100)
+    resolved_change = round(((this_month_resolved - last_month_resolved) / max(last_month_resolved, 1)) * 100)
+    
+    return {
+        'total': total,
+        'pending': pending,
+        'new': new_count,
+        'in_progress': in_progress,
+        'escalated': escalated,
+        'resolved': resolved,
+        'urgent_pending': urgent_pending,
+        'avg_resolution_time': avg_resolution_time,
+        'change_from_last_month': {
+            'total': total_change,
+            'resolved': resolved_change,
+            'resolution_time': 0.5
+        }
+    }
+
 @complaint_bp.route('/officials/stats')
 @login_required
 @role_required('official')
 def get_officials_stats():
     """Get dashboard statistics for officials"""
     try:
-        db = get_db()
-        complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.stream()
-        
-        complaints_list = [doc.to_dict() for doc in complaints_docs]
-        
-        if not complaints_list:
-            return jsonify({
-                'total': 0,
-                'pending': 0,
-                'new': 0,
-                'in_progress': 0,
-                'escalated': 0,
-                'resolved': 0,
-                'urgent_pending': 0,
-                'avg_resolution_time': 0,
-                'change_from_last_month': {
-                    'total': 0,
-                    'resolved': 0,
-                    'resolution_time': 0
-                }
-            })
-        
-        # Count by status
-        total = len(complaints_list)
-        new_count = sum(1 for c in complaints_list if c.get('status') == 'New')
-        pending = sum(1 for c in complaints_list if c.get('status') in ['Pending', 'Pending Review'])
-        in_progress = sum(1 for c in complaints_list if c.get('status') == 'In Progress')
-        escalated = sum(1 for c in complaints_list if c.get('status') == 'Escalated')
-        resolved = sum(1 for c in complaints_list if c.get('status') == 'Resolved')
-        
-        # Count urgent pending (High urgency that are not resolved)
-        urgent_pending = sum(1 for c in complaints_list 
-                           if c.get('urgency') == 'High' and c.get('status') not in ['Resolved'])
-        
-        # Calculate average resolution time for resolved complaints
-        resolution_times = []
-        for complaint in complaints_list:
-            if complaint.get('status') == 'Resolved' and complaint.get('submitted_date') and complaint.get('updated_at'):
-                try:
-                    submitted = datetime.fromisoformat(complaint.get('submitted_date').replace('Z', '+00:00'))
-                    resolved_date = datetime.fromisoformat(complaint.get('updated_at').replace('Z', '+00:00'))
-                    days = (resolved_date - submitted).days
-                    if days >= 0:
-                        resolution_times.append(days)
-                except:
-                    pass
-        
-        avg_resolution_time = round(sum(resolution_times) / len(resolution_times), 1) if resolution_times else 0
-        
-        # Calculate changes from last month
-        now = datetime.now()
-        last_month_start = datetime(now.year, now.month - 1 if now.month > 1 else 12, 1)
-        this_month_start = datetime(now.year, now.month, 1)
-        
-        last_month_total = 0
-        last_month_resolved = 0
-        this_month_total = 0
-        this_month_resolved = 0
-        
-        for complaint in complaints_list:
-            try:
-                submitted = datetime.fromisoformat(complaint.get('submitted_date', '').replace('Z', '+00:00'))
-                if last_month_start <= submitted < this_month_start:
-                    last_month_total += 1
-                    if complaint.get('status') == 'Resolved':
-                        last_month_resolved += 1
-                elif submitted >= this_month_start:
-                    this_month_total += 1
-                    if complaint.get('status') == 'Resolved':
-                        this_month_resolved += 1
-            except:
-                pass
-        
-        # Calculate percentage changes
-        total_change = round(((this_month_total - last_month_total) / max(last_month_total, 1)) * 100)
-        resolved_change = round(((this_month_resolved - last_month_resolved) / max(last_month_resolved, 1)) * 100)
-        
-        return jsonify({
-            'total': total,
-            'pending': pending,
-            'new': new_count,
-            'in_progress': in_progress,
-            'escalated': escalated,
-            'resolved': resolved,
-            'urgent_pending': urgent_pending,
-            'avg_resolution_time': avg_resolution_time,
-            'change_from_last_month': {
-                'total': total_change,
-                'resolved': resolved_change,
-                'resolution_time': 0.5
-            }
-        })
+        return jsonify(OFFICIALS_STATS_CACHE.get(None, compute_officials_stats))
         
     except Exception as e:
         print(f"Error fetching officials stats: {str(e)}")
@@ -396,9 +452,14 @@ def get_officials_stats():
 @login_required
 @role_required('official')
 def get_complaints_by_status(status):
-    """Get complaints filtered by status for officials"""
+    """Get complaints filtered by status for officials (?since=<token> with 'all')"""
     try:
         db = get_db()
+        if 'since' in request.args:
+            if status.lower() != 'all':
+                return jsonify({'error': 'since is only supported for all complaints'}), 400
+            return jsonify(changes_since(db, request.args.get('since')))
+        
         complaints_ref = db.collection('complaints')
         
         # Handle 'all' case
@@ -435,7 +496,7 @@ def get_complaints_by_status(status):
 
 @complaint_bp.route('/complaint/update', methods=['POST'])
 @login_required
-def update_complaint():
+async def update_complaint():
     """Update complaint status or details (officials only)"""
     try:
         user_role = session.get('user_role')
@@ -447,9 +508,9 @@ def update_complaint():
         status = request.json.get('status')
         notes = request.json.get('notes', '')
         
-        db = get_db()
+        db = get_async_db()
         complaint_ref = db.collection('complaints').document(complaint_id)
-        complaint_doc = complaint_ref.get()
+        complaint_doc = await complaint_ref.get()
         
         if not complaint_doc.exists:
             return jsonify({'success': False, 'message': 'Complaint not found'}), 404
@@ -468,33 +529,46 @@ def update_complaint():
         if notes:
             update_data['status_notes'] = notes
         
-        complaint_ref.update(update_data)
-        
-        # Send notification to the resident who filed the complaint
+        batch = db.batch()
+        batch.update(complaint_ref, stamp(update_data))
+        if status != old_status:
+            title = complaint.get('title', 'Untitled')
+            if status == 'Resolved':
+                entry = activity_entry('complaint_resolved', f'Complaint resolved: {title}',
+                                       actor_uid=session.get('user_uid'), subject_id=complaint_id)
+            else:
+                entry = activity_entry('status_changed', f'Complaint status changed from {old_status} to {status}: {title}',
+                                       actor_uid=session.get('user_uid'), subject_id=complaint_id)
+            batch.set(db.collection(ACTIVITY_COLLECTION).document(), entry)
+        
+        # The resident who filed the complaint is looked up while the update commits
         resident_uid = complaint.get('user_uid')
         if resident_uid:
             user_ref = db.collection('users').document(resident_uid)
-            user_doc = user_ref.get()
+            _, user_doc = await asyncio.gather(batch.commit(), user_ref.get())
+        else:
+            await batch.commit()
+            user_doc = None
+        invalidate('complaints')
+        publish_complaint(complaint_id, resident_uid, 'modified')
+        
+        # Send notification to the resident who filed the complaint
+        if user_doc is not None and user_doc.exists:
+            # Create notification
+            notification = {
+                'id': str(uuid.uuid4())[:8],
+                'timestamp': datetime.now().isoformat(),
+                'title': f'Complaint Status Updated: {complaint_id}',
+                'message': f'Your complaint status has been updated from "{old_status}" to "{status}".{" Note: " + notes if notes else ""}',
+                'complaint_id': complaint_id,
+                'read': False
+            }
             
-            if user_doc.exists:
-                resident_data = user_doc.to_dict()
-                
-                # Create notification
-                notification = {
-                    'id': str(uuid.uuid4())[:8],
-                    'timestamp': datetime.now().isoformat(),
-                    'title': f'Complaint Status Updated: {complaint_id}',
-                    'message': f'Your complaint status has been updated from "{old_status}" to "{status}".{" Note: " + notes if notes else ""}',
-                    'complaint_id': complaint_id,
-                    'read': False
-                }
-                
-                # Add notification to resident's notifications
-                resident_notifications = resident_data.get('notifications', [])
-                resident_notifications.append(notification)
-                user_ref.update({'notifications': resident_notifications})
-                
-                print(f'Notification sent to resident {resident_uid} for complaint {complaint_id}')
+            # Append to the resident's notifications without rewriting the list
+            await user_ref.update({'notifications': firestore.ArrayUnion([notification])})
+            publish_to_user(resident_uid, 'notification', notification)
+            
+            print(f'Notification sent to resident {resident_uid} for complaint {complaint_id}')
         
         return jsonify({'success': True, 'message': 'Complaint updated successfully'})
         
@@ -516,6 +590,7 @@ def get_officials_list():
         for doc in users_docs:
             user = doc.to_dict()
             officials.append({
+                'uid': doc.id,
                 'email': user.get('email', ''),
                 'name': user.get('full_name', user.get('email', '')),
                 'role': 'official'
@@ -547,6 +622,7 @@ def get_residents_list():
         for doc in users_docs:
             user = doc.to_dict()
             residents.append({
+                'uid': doc.id,
                 'email': user.get('email', ''),
                 'name': user.get('full_name', user.get('email', '')),
                 'role': 'resident'
@@ -559,6 +635,32 @@ def get_residents_list():
         return jsonify([]), 500
 
 
+# Recipient typeahead for the compose forms
+@complaint_bp.route('/users/suggest')
+@login_required
+def suggest_users():
+    try:
+        user_role = session.get('user_role')
+        is_admin = session.get('is_admin', False)
+        # Residents can only write to officials; officials and admins to either
+        if user_role in ['official', 'admin'] or is_admin:
+            role = request.args.get('role', 'resident')
+            if role not in ('resident', 'official'):
+                return jsonify({'error': 'Invalid role'}), 400
+        else:
+            role = 'official'
+        try:
+            limit = min(max(int(request.args.get('limit', SUGGEST_LIMIT)), 1), 50)
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 400
+
+        matches = get_user_index().suggest(request.args.get('q', ''), role, limit)
+        return jsonify([match for match in matches if match['uid'] != session.get('user_uid')])
+    except Exception as e:
+        print('Error suggesting users:', e)
+        return jsonify([]), 500
+
+
 # Messages & Notifications API
 @complaint_bp.route('/messages')
 @login_required
@@ -567,9 +669,7 @@ def get_messages():
     if not user_uid:
         return jsonify([]), 401
     
-    db = get_db()
-    user_ref = db.collection('users').document(user_uid)
-    user_doc = user_ref.get()
+    user_doc = get_loader().get('users', user_uid)
     
     if not user_doc.exists:
         return jsonify([])
@@ -583,38 +683,38 @@ def get_messages():
 
 @complaint_bp.route('/message/send', methods=['POST'])
 @login_required
-def send_message():
+async def send_message():
     try:
         # Accept JSON or form data
         data = request.get_json() or request.form.to_dict()
+        to_uid = data.get('to_uid')
         to_email = data.get('to') or data.get('to_email')
         subject = data.get('subject', '')
         content = data.get('content', '')
         complaint_id = data.get('complaint_id')
 
-        if not to_email or not content:
+        if not (to_uid or to_email) or not content:
             return jsonify({'success': False, 'error': 'Missing recipient or content'}), 400
 
-        db = get_db()
+        db = get_async_db()
         users_ref = db.collection('users')
-        
-        # Find recipient by email
-        recipient_docs = users_ref.where('email', '==', to_email).limit(1).stream()
-        recipient_uid = None
-        recipient_data = None
-        
-        for doc in recipient_docs:
-            recipient_uid = doc.id
-            recipient_data = doc.to_dict()
-            break
-        
-        if not recipient_uid or not recipient_data:
-            return jsonify({'success': False, 'error': 'Recipient not found'}), 404
-        
         sender_uid = session.get('user_uid')
-        sender_ref = db.collection('users').document(sender_uid)
-        sender_doc = sender_ref.get()
-        sender_data = sender_doc.to_dict() if sender_doc.exists else {}
+        sender_ref = users_ref.document(sender_uid)
+
+        # Only the recipient is read, for their name and to check they exist.
+        # The compose forms send the uid picked from /users/suggest; older
+        # clients send an email, resolved through the user index when possible
+        recipient_uid = to_uid or uid_for_email(to_email)
+        if recipient_uid:
+            recipient_doc = await users_ref.document(recipient_uid).get()
+        else:
+            matches = await users_ref.where('email', '==', to_email).limit(1).get()
+            recipient_doc = matches[0] if matches else None
+            recipient_uid = recipient_doc.id if recipient_doc else None
+        if recipient_doc is None or not recipient_doc.exists:
+            return jsonify({'success': False, 'error': 'Recipient not found'}), 404
+        recipient_data = recipient_doc.to_dict()
+        to_email = recipient_data.get('email', to_email)
 
         msg = {
             'id': str(uuid.uuid4())[:8],
@@ -629,29 +729,32 @@ def send_message():
             'read': False
         }
 
-        # Save message in recipient's inbox
-        recipient_ref = db.collection('users').document(recipient_uid)
-        recipient_messages = recipient_data.get('messages', [])
-        recipient_messages.append(msg)
-        recipient_ref.update({'messages': recipient_messages})
-        
         # Also save message in sender's sent folder (create a copy marked as sent)
         sent_msg = msg.copy()
         sent_msg['isSent'] = True
-        sender_messages = sender_data.get('messages', [])
-        sender_messages.append(sent_msg)
-        sender_ref.update({'messages': sender_messages})
 
         # Optionally add a notification for the recipient
-        recipient_notifications = recipient_data.get('notifications', [])
-        recipient_notifications.append({
+        notification = {
             'id': str(uuid.uuid4())[:8],
             'timestamp': datetime.now().isoformat(),
             'title': f"New message: {subject[:40]}",
             'message': content[:140],
             'read': False
+        }
+
+        # Appended server-side, so concurrent messages to the same inbox are
+        # not lost and the arrays are not sent back in full
+        batch = db.batch()
+        batch.update(users_ref.document(recipient_uid), {
+            'messages': firestore.ArrayUnion([msg]),
+            'notifications': firestore.ArrayUnion([notification]),
         })
-        recipient_ref.update({'notifications': recipient_notifications})
+        batch.update(sender_ref, {'messages': firestore.ArrayUnion([sent_msg])})
+        await batch.commit()
+
+        publish_to_user(recipient_uid, 'message', msg)
+        publish_to_user(recipient_uid, 'notification', notification)
+        publish_to_user(sender_uid, 'message', sent_msg)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -666,9 +769,7 @@ def get_notifications():
     if not user_uid:
         return jsonify([]), 401
 
-    db = get_db()
-    user_ref = db.collection('users').document(user_uid)
-    user_doc = user_ref.get()
+    user_doc = get_loader().get('users', user_uid)
     
     if not user_doc.exists:
         return jsonify([])
@@ -715,6 +816,64 @@ def mark_notification_read():
     return jsonify({'success': False, 'error': 'Notification not found'}), 404
 
 
+def compute_resident_stats(user_email):
+    """Statistics for a resident's dashboard"""
+    db = get_db()
+    complaints_ref = db.collection('complaints')
+    complaints_docs = complaints_ref.where('user_email', '==', user_email).stream()
+    
+    user_complaints = [doc.to_dict() for doc in complaints_docs]
+    
+    stats = {
+        'open_cases': 0,
+        'urgent_open': 0,
+        'resolved': 0,
+        'avg_resolution': 0,
+        'resolution_times': []
+    }
+    
+    for complaint in user_complaints:
+        status = complaint.get('status', '')
+        if status != 'Resolved' and status != 'Closed':
+            stats['open_cases'] += 1
+            urgency = complaint.get('urgency', 'Low')
+            if urgency == 'High':
+                stats['urgent_open'] += 1
+        elif status == 'Resolved':
+            stats['resolved'] += 1
+            # Calculate resolution time if we have both dates
+            submitted_date = complaint.get('submitted_date')
+            updates = complaint.get('updates', [])
+            
+            if submitted_date and updates:
+                # Find when it was resolved
+                resolved_date = None
+                for update in reversed(updates):
+                    if update.get('to_status') == 'Resolved':
+                        resolved_date = update.get('timestamp')
+                        break
+                
+                if resolved_date:
+                    try:
+                        submitted = datetime.fromisoformat(submitted_date.replace('Z', '+00:00'))
+                        resolved = datetime.fromisoformat(resolved_date.replace('Z', '+00:00'))
+                        days = (resolved - submitted).days
+                        if days >= 0:
+                            stats['resolution_times'].append(days)
+                    except Exception as e:
+                        print(f"Error calculating resolution time: {e}")
+    
+    # Calculate average resolution time
+    if stats['resolution_times']:
+        stats['avg_resolution'] = round(sum(stats['resolution_times']) / len(stats['resolution_times']), 1)
+    else:
+        stats['avg_resolution'] = 0
+    
+    # Remove resolution_times from response (not needed in frontend)
+    del stats['resolution_times']
+    
+    return stats
+
 @complaint_bp.route('/resident/stats')
 @login_required
 def get_resident_stats():
@@ -724,61 +883,7 @@ def get_resident_stats():
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = get_db()
-        complaints_ref = db.collection('complaints')
-        complaints_docs = complaints_ref.where('user_email', '==', user_email).stream()
-        
-        user_complaints = [doc.to_dict() for doc in complaints_docs]
-        
-        stats = {
-            'open_cases': 0,
-            'urgent_open': 0,
-            'resolved': 0,
-            'avg_resolution': 0,
-            'resolution_times': []
-        }
-        
-        for complaint in user_complaints:
-            status = complaint.get('status', '')
-            if status != 'Resolved' and status != 'Closed':
-                stats['open_cases'] += 1
-                urgency = complaint.get('urgency', 'Low')
-                if urgency == 'High':
-                    stats['urgent_open'] += 1
-            elif status == 'Resolved':
-                stats['resolved'] += 1
-                # Calculate resolution time if we have both dates
-                submitted_date = complaint.get('submitted_date')
-                updates = complaint.get('updates', [])
-                
-                if submitted_date and updates:
-                    # Find when it was resolved
-                    resolved_date = None
-                    for update in reversed(updates):
-                        if update.get('to_status') == 'Resolved':
-                            resolved_date = update.get('timestamp')
-                            break
-                    
-                    if resolved_date:
-                        try:
-                            submitted = datetime.fromisoformat(submitted_date.replace('Z', '+00:00'))
-                            resolved = datetime.fromisoformat(resolved_date.replace('Z', '+00:00'))
-                            days = (resolved - submitted).days
-                            if days >= 0:
-                                stats['resolution_times'].append(days)
-                        except Exception as e:
-                            print(f"Error calculating resolution time: {e}")
-        
-        # Calculate average resolution time
-        if stats['resolution_times']:
-            stats['avg_resolution'] = round(sum(stats['resolution_times']) / len(stats['resolution_times']), 1)
-        else:
-            stats['avg_resolution'] = 0
-        
-        # Remove resolution_times from response (not needed in frontend)
-        del stats['resolution_times']
-        
-        return jsonify(stats)
+        return jsonify(RESIDENT_STATS_CACHE.get(user_email, lambda: compute_resident_stats(user_email)))
         
     except Exception as e:
         print(f"Error getting resident stats: {e}")
@@ -0,0 +1,73 @@
+"""
+Shared test setup: the app on the in-memory Firestore stand-in.
+
+    seeded          a fresh stand-in seeded with SEED_COMPLAINTS complaints,
+                    installed as the app's client: (db, ids)
+    client_as(role) a test client signed in as one of the seeded probe
+                    accounts ('resident', 'official' or 'admin')
+"""
+import os
+
+os.environ.setdefault('FIRESTORE_BACKEND', 'memory')
+# The test client runs without gevent; streams are exercised regardless
+os.environ.setdefault('ME_STREAM_ENABLED', '1')
+
+import pytest
+
+import firebase_config
+import memory_firestore
+import seed_data
+
+SEED_COMPLAINTS = 100
+
+
+def login_as(client, role, ids):
+    """Put one of the seeded probe accounts in the test client's session"""
+    uid = {'resident': ids['resident_uid'], 'official': ids['official_uid'],
+           'admin': ids['admin_uid']}[role]
+    with client.session_transaction() as session:
+        session['user_uid'] = uid
+        session['user_email'] = f"{uid}@example.com"
+        session['user_name'] = uid
+        session['user_role'] = 'resident' if role == 'resident' else 'official'
+        session['is_admin'] = role == 'admin'
+
+
+def seed(complaints=SEED_COMPLAINTS):
+    """A freshly seeded stand-in, installed as the app's client: (db, ids)"""
+    import resilience
+    db = memory_firestore.Client()
+    ids = seed_data.seed(db, complaints=complaints)
+    firebase_config.set_firestore_client(db)
+    resilience.reset()
+    db.reset_stats()
+    return db, ids
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    import admin_firebase
+    app.config['TESTING'] = True
+    patch = pytest.MonkeyPatch()
+    # Firebase Auth is not part of the stand-in; the routes only need the call to succeed
+    patch.setattr(admin_firebase.firebase_auth, 'delete_user', lambda uid: None)
+    yield app
+    patch.undo()
+
+
+@pytest.fixture
+def seeded(app):
+    import resilience
+    db, ids = seed()
+    yield db, ids
+    resilience.reset()
+
+
+@pytest.fixture
+def client_as(app, seeded):
+    def signed_in(role):
+        client = app.test_client()
+        login_as(client, role, seeded[1])
+        return client
+    return signed_in
@@ -0,0 +1,249 @@
+"""
+Per-user event hub behind /me/stream.
+
+Each dashboard keeps one Server-Sent Events connection open to /me/stream
+instead of polling /messages, /notifications and the complaint lists. Handlers
+publish what they changed to the people it concerns:
+
+    message       a message was delivered to / sent by the user
+    notification  the user got a notification
+    complaint     one of the user's own complaints was filed, updated or
+                  deleted (officials get every complaint change)
+    resync        events may have been missed; reload everything
+
+Subscribers and their queues live in this process, so a write is pushed at
+once to the streams this worker holds. For writes made through other
+workers, each user with an open stream also gets Firestore listeners (on
+their user document and on their complaints) while the backend supports
+them; the memory stand-in does not, and there every stream is sent a resync
+every ME_STREAM_RESYNC_SECONDS (default 120) instead. Officials' complaint
+events always come from the hub plus that periodic resync.
+
+Each open stream holds a connection (and, per user, two watch streams) for
+as long as the dashboard is visible. That only scales on gevent workers, so
+ME_STREAM_ENABLED defaults to on when gevent has patched the process and
+off otherwise (gthread would pin a thread per dashboard); while off,
+/me/stream answers 204 and the dashboards poll. Set it to 1 or 0 to
+override. A worker keeps listeners for at most ME_STREAM_MAX_LISTENERS
+users; streams beyond that get the periodic resync instead.
+"""
+import os
+import queue
+import threading
+
+from firebase_config import get_db
+from resilience import _raw
+
+ME_STREAM_QUEUE_SIZE = 100
+ME_STREAM_KEEPALIVE_SECONDS = float(os.environ.get('ME_STREAM_KEEPALIVE_SECONDS', '15'))
+ME_STREAM_RESYNC_SECONDS = float(os.environ.get('ME_STREAM_RESYNC_SECONDS', '120'))
+ME_STREAM_MAX_LISTENERS = int(os.environ.get('ME_STREAM_MAX_LISTENERS', '500'))
+OFFICIALS_TOPIC = 'officials'
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def streams_enabled():
+    """Whether /me/stream holds connections open, or answers 204 so the dashboards poll"""
+    setting = os.environ.get('ME_STREAM_ENABLED', 'auto').lower()
+    if setting == 'auto':
+        return _gevent_patched()
+    return setting in ('1', 'true', 'yes', 'on')
+
+
+def user_topic(uid):
+    return f'user:{uid}'
+
+
+class Subscription:
+    """One open stream: a bounded queue of (kind, data) events"""
+
+    def __init__(self, topics, uid=None):
+        self.topics = tuple(topics)
+        self.uid = uid
+        self.listening = False
+        # Seconds between resync events, None when listeners cover other workers
+        self.resync_seconds = ME_STREAM_RESYNC_SECONDS
+        self._events = queue.Queue(maxsize=ME_STREAM_QUEUE_SIZE)
+        self._overflowed = False
+
+    def put(self, kind, data):
+        try:
+            self._events.put_nowait((kind, data))
+        except queue.Full:
+            # A stalled client; it reloads everything once it catches up
+            self._overflowed = True
+
+    def get(self, timeout):
+        """The next event, or None if there was none within timeout"""
+        if self._overflowed:
+            self._overflowed = False
+            with self._events.mutex:
+                self._events.queue.clear()
+            return 'resync', None
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """Subscriptions by topic within this process"""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, uid=None):
+        subscription = Subscription(topics, uid)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscriptions.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[topic]
+
+    def publish(self, topic, kind, data=None):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(topic, ()))
+        for subscription in subscribers:
+            subscription.put(kind, data)
+
+    def subscribers(self, topic):
+        with self._lock:
+            return len(self._subscriptions.get(topic, ()))
+
+
+_hub = EventHub()
+
+
+# ============ FIRESTORE LISTENERS ============
+
+class UserListener:
+    """Firestore listeners feeding one user's topic with writes from any worker"""
+
+    def __init__(self, db, uid):
+        self.uid = uid
+        self.streams = 0
+        self._counts = None
+        self._complaints_seen = False
+        self._watches = [
+            db.collection('users').document(uid).on_snapshot(self._on_user),
+            db.collection('complaints').where('user_uid', '==', uid).on_snapshot(self._on_complaints),
+        ]
+
+    def _on_user(self, snapshots, changes, read_time):
+        for snapshot in snapshots:
+            data = snapshot.to_dict() or {}
+            counts = len(data.get('messages', [])), len(data.get('notifications', []))
+            previous, self._counts = self._counts, counts
+            if previous is None:
+                continue
+            if counts[0] > previous[0]:
+                _hub.publish(user_topic(self.uid), 'message')
+            if counts[1] > previous[1]:
+                _hub.publish(user_topic(self.uid), 'notification')
+
+    def _on_complaints(self, snapshots, changes, read_time):
+        if not self._complaints_seen:
+            # The first snapshot is the current state, not a change
+            self._complaints_seen = True
+            return
+        for change in changes:
+            _hub.publish(user_topic(self.uid), 'complaint',
+                         {'id': change.document.id, 'change': change.type.name.lower()})
+
+    def close(self):
+        for watch in self._watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"Error closing listener for {self.uid}: {str(e)}")
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def _supports_listeners(db):
+    return hasattr(_raw(db).collection('users').document('-'), 'on_snapshot')
+
+
+def _listen(uid):
+    """Start (or share) the user's listeners, False if the backend has none"""
+    db = get_db()
+    if not _supports_listeners(db):
+        return False
+    with _listeners_lock:
+        listener = _listeners.get(uid)
+        if listener is None:
+            if len(_listeners) >= ME_STREAM_MAX_LISTENERS:
+                return False
+            try:
+                listener = _listeners[uid] = UserListener(db, uid)
+            except Exception as e:
+                print(f"Error starting listeners for {uid}: {str(e)}")
+                return False
+        listener.streams += 1
+    return True
+
+
+def _unlisten(uid):
+    with _listeners_lock:
+        listener = _listeners.get(uid)
+        if listener is None:
+            return
+        listener.streams -= 1
+        if listener.streams > 0:
+            return
+        del _listeners[uid]
+    listener.close()
+
+
+# ============ PUBLIC API ============
+
+def subscribe(uid, role):
+    """Open a stream for the user (and the officials' topic for officials)"""
+    topics = [user_topic(uid)]
+    if role == 'official':
+        topics.append(OFFICIALS_TOPIC)
+    subscription = _hub.subscribe(topics, uid)
+    subscription.listening = _listen(uid)
+    if subscription.listening and role != 'official':
+        subscription.resync_seconds = None
+    return subscription
+
+
+def unsubscribe(subscription):
+    _hub.unsubscribe(subscription)
+    if subscription.listening:
+        _unlisten(subscription.uid)
+
+
+def publish_to_user(uid, kind, data=None):
+    if uid:
+        _hub.publish(user_topic(uid), kind, data)
+
+
+def publish_to_officials(kind, data=None):
+    _hub.publish(OFFICIALS_TOPIC, kind, data)
+
+
+def publish_complaint(complaint_id, owner_uid, change):
+    """A complaint was 'added', 'modified' or 'removed': tell its owner and the officials"""
+    data = {'id': complaint_id, 'change': change}
+    publish_to_user(owner_uid, 'complaint', data)
+    publish_to_officials('complaint', data)
@@ -3,10 +3,157 @@ from firebase_admin import firestore
 from firebase_config import get_db
 from datetime import datetime
 from auth_firebase import login_required
+from complaint_ids import is_valid_id
 import json
 
 feedback_bp = Blueprint('feedback', __name__, url_prefix='/feedback')
 
+# Feedback listings are paged newest first; the cursor for the next page is
+# returned in the X-Next-Cursor header and passed back as ?cursor=
+FEEDBACK_PAGE_SIZE = 50
+FEEDBACK_MAX_PAGE_SIZE = 100
+RECENT_FEEDBACK_LIMIT = 10
+
+# Ratings matched by each filter. 'in' keeps these equality filters, so they
+# combine with order_by('submitted_date') on the (rating, submitted_date)
+# composite index in firestore.indexes.json
+RATING_FILTERS = {
+    'positive': [4, 5],
+    'neutral': [3],
+    'negative': [1, 2],
+}
+
+
+# The feedback-type options of the resident's feedback form; each one gets a
+# by_type entry in the summary
+FEEDBACK_TYPES = (
+    'complaint-process',
+    'response-time',
+    'staff-courtesy',
+    'resolution-quality',
+    'system-usability',
+    'other',
+)
+
+
+# Aggregates kept up to date by submit_feedback and reply_to_feedback so
+# /feedback/stats is a single document read:
+#   feedback_stats/summary                overall, plus by_type breakdown
+#   feedback_stats/complaint_<id>         feedback linked to one complaint
+FEEDBACK_STATS_COLLECTION = 'feedback_stats'
+FEEDBACK_SUMMARY_DOC = 'summary'
+
+
+def complaint_stats_doc_id(complaint_id):
+    return f"complaint_{complaint_id}"
+
+
+def _rating_increments(rating):
+    """Counter increments for one new rating"""
+    return {
+        'count': firestore.Increment(1),
+        'rating_sum': firestore.Increment(rating),
+        'distribution': {str(rating): firestore.Increment(1)},
+    }
+
+
+def _reply_increments(latency_seconds):
+    """Counter increments for the first reply to a feedback"""
+    return {
+        'replied_count': firestore.Increment(1),
+        'reply_seconds_sum': firestore.Increment(latency_seconds),
+    }
+
+
+def removal_stats_updates(feedback):
+    """(document id, merge data) taking a deleted feedback back out of its aggregates"""
+    increments = {}
+    if feedback.get('rating') in (1, 2, 3, 4, 5):
+        increments = {
+            'count': firestore.Increment(-1),
+            'rating_sum': firestore.Increment(-feedback['rating']),
+            'distribution': {str(feedback['rating']): firestore.Increment(-1)},
+        }
+    if feedback.get('status') == 'replied':
+        try:
+            latency = max(0.0, (datetime.fromisoformat(feedback['replied_date'])
+                                - datetime.fromisoformat(feedback['submitted_date'])).total_seconds())
+        except (KeyError, TypeError, ValueError):
+            latency = 0.0
+        increments.update({
+            'replied_count': firestore.Increment(-1),
+            'reply_seconds_sum': firestore.Increment(-latency),
+        })
+    return _stats_updates(feedback, increments) if increments else []
+
+
+def _stats_updates(feedback, increments):
+    """(document id, merge data) for every aggregate a feedback counts towards"""
+    now = datetime.now().isoformat()
+    updates = [(FEEDBACK_SUMMARY_DOC, dict(
+        increments,
+        by_type={feedback.get('feedback_type') or 'other': increments},
+        updated_at=now,
+    ))]
+    if feedback.get('complaint_id'):
+        updates.append((complaint_stats_doc_id(feedback['complaint_id']), dict(
+            increments,
+            complaint_id=feedback['complaint_id'],
+            updated_at=now,
+        )))
+    return updates
+
+
+def _summarize_stats(stats):
+    """Add averages to a stored aggregate (or a by_type entry)"""
+    count = stats.get('count', 0)
+    replied = stats.get('replied_count', 0)
+    return {
+        'count': count,
+        'average_rating': round(stats.get('rating_sum', 0) / count, 2) if count else None,
+        'distribution': {str(r): stats.get('distribution', {}).get(str(r), 0) for r in range(1, 6)},
+        'replied_count': replied,
+        'average_reply_hours': round(stats.get('reply_seconds_sum', 0) / replied / 3600, 2) if replied else None,
+    }
+
+
+def _page_size(default=FEEDBACK_PAGE_SIZE):
+    """Page size from ?limit=, capped at FEEDBACK_MAX_PAGE_SIZE"""
+    try:
+        size = int(request.args.get('limit', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, FEEDBACK_MAX_PAGE_SIZE))
+
+
+def _feedback_page(query, limit):
+    """Run a feedback query newest first from ?cursor=, return a JSON response"""
+    query = query.order_by('submitted_date', direction=firestore.Query.DESCENDING)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        cursor_doc = get_db().collection('feedback').document(cursor).get()
+        if not cursor_doc.exists:
+            # Its position is lost; starting over would repeat the pages already seen
+            return jsonify({
+                'success': False,
+                'message': f'Feedback {cursor} no longer exists; start again from the first page'
+            }), 400
+        query = query.start_after(cursor_doc)
+
+    docs = list(query.limit(limit).stream())
+    feedback_list = []
+    for doc in docs:
+        feedback = doc.to_dict()
+        feedback['id'] = doc.id
+        feedback_list.append(feedback)
+
+    response = jsonify(feedback_list)
+    if len(docs) == limit:
+        response.headers['X-Next-Cursor'] = docs[-1].id
+    return response, 200
+
+
 @feedback_bp.route('/submit', methods=['POST'])
 @login_required
 def submit_feedback():
@@ -26,14 +173,37 @@ def submit_feedback():
                 'message': 'Please fill in all required fields'
             }), 400
         
+        if rating not in ('1', '2', '3', '4', '5'):
+            return jsonify({
+                'success': False,
+                'message': 'Rating must be between 1 and 5'
+            }), 400
+        
+        if feedback_type not in FEEDBACK_TYPES:
+            return jsonify({
+                'success': False,
+                'message': 'Unknown feedback type'
+            }), 400
+        
+        db = get_db()
+        
+        # The complaint id becomes part of a stats document id, so it must
+        # be a real complaint's
+        if complaint_id and not (is_valid_id(complaint_id)
+                                 and db.collection('complaints').document(complaint_id).get().exists):
+            return jsonify({
+                'success': False,
+                'message': 'Complaint not found'
+            }), 400
+        
         # Get user information from session
-        user_id = session.get('user_id')
+        user_uid = session.get('user_uid')
         user_name = session.get('user_name', 'Anonymous')
         user_email = session.get('user_email', '')
         
-        # Create feedback object
+        # Create feedback object (keyed by the submitter's uid for /my-feedback)
         feedback_data = {
-            'user_id': user_id,
+            'user_uid': user_uid,
             'user_name': user_name,
             'user_email': user_email if contact_me else '',
             'feedback_type': feedback_type,
@@ -45,13 +215,18 @@ def submit_feedback():
             'status': 'new'
         }
         
-        # Save to Firestore
-        db = get_db()
-        doc_ref = db.collection('feedback').add(feedback_data)
-        feedback_id = doc_ref[1].id
+        # Save the feedback (id generated up front) and bump the aggregates
+        # in one atomic batch
+        doc_ref = db.collection('feedback').document()
+        feedback_id = doc_ref.id
+        feedback_data['id'] = feedback_id
         
-        # Update the feedback with its ID
-        db.collection('feedback').document(feedback_id).update({'id': feedback_id})
+        batch = db.batch()
+        batch.set(doc_ref, feedback_data)
+        stats_ref = db.collection(FEEDBACK_STATS_COLLECTION)
+        for doc_id, updates in _stats_updates(feedback_data, _rating_increments(feedback_data['rating'])):
+            batch.set(stats_ref.document(doc_id), updates, merge=True)
+        batch.commit()
         
         return jsonify({
             'success': True,
@@ -82,24 +257,9 @@ def get_recent_feedback():
                 'message': 'Access denied'
             }), 403
         
-        # Get feedback from Firestore
+        # One page of feedback, most recent first
         db = get_db()
-        feedback_ref = db.collection('feedback')
-        feedback_docs = feedback_ref.stream()
-        
-        feedback_list = []
-        for doc in feedback_docs:
-            feedback = doc.to_dict()
-            feedback['id'] = doc.id
-            feedback_list.append(feedback)
-        
-        if not feedback_list:
-            return jsonify([]), 200
-        
-        # Sort by submitted_date (most recent first)
-        feedback_list.sort(key=lambda x: x.get('submitted_date', ''), reverse=True)
-        
-        return jsonify(feedback_list), 200
+        return _feedback_page(db.collection('feedback'), _page_size())
         
     except Exception as e:
         print(f"Error getting feedback: {str(e)}")
@@ -114,30 +274,15 @@ def get_recent_feedback():
 def get_my_feedback():
     """Get feedback submitted by the current user"""
     try:
-        user_id = session.get('user_id')
+        user_uid = session.get('user_uid')
+        if not user_uid:
+            return jsonify([]), 200
         
-        # Get all feedback from Firestore
+        # One page of this user's feedback, most recent first
+        # (index: user_uid, submitted_date desc)
         db = get_db()
-        feedback_ref = db.collection('feedback')
-        
-        # Filter by user_id if available
-        if user_id:
-            feedback_docs = feedback_ref.where('user_id', '==', user_id).stream()
-        else:
-            # Fallback to getting all and filtering
-            feedback_docs = feedback_ref.stream()
-        
-        my_feedback = []
-        for doc in feedback_docs:
-            feedback = doc.to_dict()
-            feedback['id'] = doc.id
-            if not user_id or feedback.get('user_id') == user_id:
-                my_feedback.append(feedback)
-        
-        # Sort by submitted_date (most recent first)
-        my_feedback.sort(key=lambda x: x.get('submitted_date', ''), reverse=True)
-        
-        return jsonify(my_feedback), 200
+        query = db.collection('feedback').where('user_uid', '==', user_uid)
+        return _feedback_page(query, _page_size())
         
     except Exception as e:
         print(f"Error getting my feedback: {str(e)}")
@@ -170,15 +315,41 @@ def reply_to_feedback():
                 'message': 'Feedback ID and reply message are required'
             }), 400
         
-        # Update feedback with reply in Firestore
+        # Update feedback with reply; the first reply also records the reply
+        # latency in the aggregates, in the same transaction
         db = get_db()
         feedback_ref = db.collection('feedback').document(feedback_id)
-        feedback_ref.update({
-            'reply': reply_message,
-            'replied_by': session.get('user_name'),
-            'replied_date': datetime.now().isoformat(),
-            'status': 'replied'
-        })
+        stats_ref = db.collection(FEEDBACK_STATS_COLLECTION)
+        replied_by = session.get('user_name')
+        
+        @firestore.transactional
+        def record_reply(transaction):
+            snapshot = feedback_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            feedback = snapshot.to_dict()
+            now = datetime.now()
+            
+            transaction.update(feedback_ref, {
+                'reply': reply_message,
+                'replied_by': replied_by,
+                'replied_date': now.isoformat(),
+                'status': 'replied'
+            })
+            if feedback.get('status') != 'replied':
+                try:
+                    latency = max(0.0, (now - datetime.fromisoformat(feedback['submitted_date'])).total_seconds())
+                except (KeyError, TypeError, ValueError):
+                    latency = 0.0
+                for doc_id, updates in _stats_updates(feedback, _reply_increments(latency)):
+                    transaction.set(stats_ref.document(doc_id), updates, merge=True)
+            return True
+        
+        if not record_reply(db.transaction()):
+            return jsonify({
+                'success': False,
+                'message': 'Feedback not found'
+            }), 404
         
         return jsonify({
             'success': True,
@@ -208,38 +379,64 @@ def filter_feedback():
         
         filter_type = request.args.get('type', 'all')
         
-        # Get feedback from Firestore
+        # Filter by rating in Firestore, most recent first
         db = get_db()
-        feedback_ref = db.collection('feedback')
-        feedback_docs = feedback_ref.stream()
+        query = db.collection('feedback')
+        if filter_type in RATING_FILTERS:
+            query = query.where('rating', 'in', RATING_FILTERS[filter_type])
         
-        feedback_list = []
-        for doc in feedback_docs:
-            feedback = doc.to_dict()
-            feedback['id'] = doc.id
-            feedback_list.append(feedback)
+        if filter_type == 'recent':
+            return _feedback_page(query, _page_size(RECENT_FEEDBACK_LIMIT))
+        return _feedback_page(query, _page_size())
         
-        if not feedback_list:
-            return jsonify([]), 200
+    except Exception as e:
+        print(f"Error filtering feedback: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }), 500
+
+
+@feedback_bp.route('/stats', methods=['GET'])
+@login_required
+def get_feedback_stats():
+    """Satisfaction metrics from the feedback aggregates (for officials)"""
+    try:
+        # Check if user is an official
+        user_role = session.get('user_role')
+        if user_role != 'official':
+            return jsonify({
+                'success': False,
+                'message': 'Access denied'
+            }), 403
         
-        # Filter based on rating
-        if filter_type == 'positive':
-            feedback_list = [f for f in feedback_list if f.get('rating', 0) >= 4]
-        elif filter_type == 'neutral':
-            feedback_list = [f for f in feedback_list if f.get('rating', 0) == 3]
-        elif filter_type == 'negative':
-            feedback_list = [f for f in feedback_list if f.get('rating', 0) <= 2]
-        elif filter_type == 'recent':
-            # Already sorted by date, just limit to 10
-            pass
+        # One aggregate document: overall, or for a single complaint
+        complaint_id = request.args.get('complaint_id')
+        if complaint_id and not is_valid_id(complaint_id):
+            # It becomes part of a stats document id
+            return jsonify({
+                'success': False,
+                'message': 'Invalid complaint ID'
+            }), 400
+        doc_id = complaint_stats_doc_id(complaint_id) if complaint_id else FEEDBACK_SUMMARY_DOC
+        db = get_db()
+        doc = db.collection(FEEDBACK_STATS_COLLECTION).document(doc_id).get()
+        stats = doc.to_dict() if doc.exists else {}
         
-        # Sort by submitted_date (most recent first)
-        feedback_list.sort(key=lambda x: x.get('submitted_date', ''), reverse=True)
+        result = _summarize_stats(stats)
+        if complaint_id:
+            result['complaint_id'] = complaint_id
+        else:
+            result['by_type'] = {
+                feedback_type: _summarize_stats(type_stats)
+                for feedback_type, type_stats in sorted(stats.get('by_type', {}).items())
+            }
+        result['updated_at'] = stats.get('updated_at')
         
-        return jsonify(feedback_list), 200
+        return jsonify(result), 200
         
     except Exception as e:
-        print(f"Error filtering feedback: {str(e)}")
+        print(f"Error getting feedback stats: {str(e)}")
         return jsonify({
             'success': False,
             'message': f'An error occurred: {str(e)}'
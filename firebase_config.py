@@ -6,16 +6,38 @@ import firebase_admin
 from firebase_admin import credentials, firestore, auth as firebase_auth
 import json
 import os
+from metrics import instrument_client
+from resilience import guard_client
 
 # Path to your Firebase service account key
 FIREBASE_CREDENTIALS_PATH = 'firebase-key.json'
 
+# 'memory' runs against the in-process stand-in (memory_firestore.py) instead
+# of a Firebase project - used by the budget harness and benchmarks
+FIRESTORE_BACKEND = os.environ.get('FIRESTORE_BACKEND', 'firebase')
+# With the memory backend, each process seeds this many synthetic complaints
+# (seed_data.py) and adds this much latency to every round trip - used when
+# load testing a local gunicorn instance (loadtest.py)
+MEMORY_SEED_COMPLAINTS = int(os.environ.get('MEMORY_SEED_COMPLAINTS', '0'))
+MEMORY_LATENCY_MS = float(os.environ.get('MEMORY_LATENCY_MS', '0'))
+
 # Global Firestore client
 _firestore_client = None
 
 def initialize_firebase():
     """Initialize Firebase Admin SDK with Firestore"""
     global _firestore_client
+    if FIRESTORE_BACKEND == 'memory':
+        if _firestore_client is None:
+            from memory_firestore import Client as MemoryClient
+            client = MemoryClient(latency=MEMORY_LATENCY_MS / 1000)
+            if MEMORY_SEED_COMPLAINTS:
+                import seed_data
+                seed_data.seed(client, complaints=MEMORY_SEED_COMPLAINTS)
+                print(f"Seeded memory backend with {MEMORY_SEED_COMPLAINTS} complaints")
+            _firestore_client = guard_client(instrument_client(client))
+        return _firestore_client
+
     try:
         # Check if Firebase is already initialized
         firebase_admin.get_app()
@@ -58,9 +80,10 @@ def initialize_firebase():
         firebase_admin.initialize_app(cred)
         print("Firebase initialized successfully with Firestore!")
     
-    # Initialize Firestore client
+    # Initialize Firestore client (wrapped so every call shows up on /metrics,
+    # and gets a deadline, retries and a circuit breaker - see resilience.py)
     if _firestore_client is None:
-        _firestore_client = firestore.client()
+        _firestore_client = guard_client(instrument_client(firestore.client()))
     
     return _firestore_client
 
@@ -71,6 +94,12 @@ def get_db():
         initialize_firebase()
     return _firestore_client
 
+def set_firestore_client(client):
+    """Use the given client (e.g. a seeded memory_firestore.Client) for get_db()"""
+    global _firestore_client
+    _firestore_client = guard_client(instrument_client(client))
+    return _firestore_client
+
 def get_users_collection():
     """Get users collection reference"""
     return get_db().collection('users')
@@ -0,0 +1,97 @@
+"""
+Gunicorn production configuration.
+Loaded automatically by `gunicorn app:app` from the project root; every
+setting can be overridden with the environment variables below.
+
+    WEB_CONCURRENCY         number of worker processes (default: 2 * CPUs + 1)
+    GUNICORN_WORKER_CLASS   'gevent' (default) or 'gthread'
+    GUNICORN_THREADS        threads per gthread worker (default: 4 * CPUs, min 8)
+    GUNICORN_CONNECTIONS    open connections per gevent worker (default: 2000)
+    GUNICORN_TIMEOUT        worker timeout in seconds (default: 120)
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests
+                            (default: 0, never)
+    PROMETHEUS_MULTIPROC_DIR  where workers share /metrics samples
+                            (default: a fresh directory under /tmp)
+
+The event streams (/stream, /me/stream) keep their connection open for as
+long as the dashboard is visible. gevent workers hold one greenlet per open
+stream and can keep thousands of idle connections per worker, so they are
+the default. gthread workers would pin one of their few threads per stream;
+under them /me/stream is turned off (see events.py) and the dashboards poll.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', max(8, cpu_count * 4)))
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 2000))
+
+# SSE responses send nothing between changes, so the timeout only applies to
+# the worker heartbeat (gthread/gevent), not to a single request.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# The app is not preloaded: importing it initializes Firebase (gRPC channels
+# must not cross fork()), creates the default admin and seeds the memory
+# backend, all of which belong in each worker rather than the master.
+preload_app = False
+
+# Recycling a worker drops its open streams (the dashboards reconnect) and
+# interrupts its user cleanup jobs (resumed once their lease runs out by the
+# next worker to start, see user_cleanup.py), so it is off unless asked for
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+# Workers write metric samples here so /metrics can aggregate all of them.
+# Must be set before prometheus_client is imported by the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'bccms-metrics'))
+
+if worker_class == 'gevent':
+    # Before anything imports threading or grpc, including the hooks below
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def on_starting(server):
+    """Start every deploy with an empty metrics directory"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    server.log.info(f"Starting {workers} {worker_class} workers")
+
+
+def post_fork(server, worker):
+    """Make gRPC cooperate with gevent before the worker imports the app"""
+    if worker_class == 'gevent':
+        import grpc.experimental.gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+
+
+def post_worker_init(worker):
+    """Pick up user cleanup jobs a recycled or crashed worker left unfinished"""
+    from user_cleanup import resume_cleanup_jobs
+    try:
+        resume_cleanup_jobs()
+    except Exception as e:
+        worker.log.warning(f"Could not resume user cleanup jobs: {e}")
+
+
+def child_exit(server, worker):
+    """Fold a dead worker's live samples into the aggregated totals"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,74 @@
+"""
+Request-scoped batched document loader.
+
+Handlers that join documents (complaints to the residents who filed them,
+the signed-in user checked by role_required and read again by the handler)
+register the ids they need with prime() and then look each one up with
+get(). Pending ids are fetched with one get_all() per collection,
+deduplicated, and the snapshots are memoized for the rest of the request,
+so asking for the same document twice costs a single read.
+
+    loader = get_loader()
+    loader.prime('users', [c.get('user_uid') for c in complaints])
+    for complaint in complaints:
+        user = loader.get('users', complaint.get('user_uid'))
+
+The memo lives on flask.g and is dropped with the request. A handler that
+writes a document it loaded should call forget() before reading it again.
+"""
+from flask import g, has_request_context
+
+from firebase_config import get_db
+
+
+class DocumentLoader:
+    """Batches and memoizes document reads by (collection, id)"""
+
+    def __init__(self, db):
+        self.db = db
+        self._pending = {}    # collection -> ids registered but not fetched
+        self._snapshots = {}  # (collection, id) -> DocumentSnapshot
+
+    def prime(self, collection, ids):
+        """Register ids to fetch with the next get() from collection"""
+        pending = self._pending.setdefault(collection, set())
+        for doc_id in ids:
+            if doc_id and (collection, doc_id) not in self._snapshots:
+                pending.add(doc_id)
+
+    def get(self, collection, doc_id):
+        """Snapshot of one document, fetching everything pending in its collection"""
+        key = (collection, doc_id)
+        if key not in self._snapshots:
+            self.prime(collection, [doc_id])
+            self._load(collection)
+        return self._snapshots[key]
+
+    def get_many(self, collection, ids):
+        """{id: snapshot} for ids, in one round trip for those not yet loaded"""
+        ids = [doc_id for doc_id in ids if doc_id]
+        self.prime(collection, ids)
+        self._load(collection)
+        return {doc_id: self._snapshots[(collection, doc_id)] for doc_id in ids}
+
+    def forget(self, collection, doc_id):
+        """Drop a memoized document, e.g. after the handler wrote it"""
+        self._snapshots.pop((collection, doc_id), None)
+
+    def _load(self, collection):
+        ids = self._pending.pop(collection, None)
+        if not ids:
+            return
+        collection_ref = self.db.collection(collection)
+        refs = [collection_ref.document(doc_id) for doc_id in sorted(ids)]
+        for snapshot in self.db.get_all(refs):
+            self._snapshots[(collection, snapshot.id)] = snapshot
+
+
+def get_loader():
+    """The current request's loader (a fresh one outside a request)"""
+    if not has_request_context():
+        return DocumentLoader(get_db())
+    if 'document_loader' not in g:
+        g.document_loader = DocumentLoader(get_db())
+    return g.document_loader
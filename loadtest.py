@@ -0,0 +1,485 @@
+"""
+Multi-role load generator that replays dashboard traffic.
+
+Models a population of residents, officials and admins with the request
+patterns their dashboards actually produce (see static/js/):
+
+  resident   page load; messaging.js polls /messages and /notifications
+             every 30s and on focus; residentdashboard.js refreshes
+             /complaint/recent every 5 minutes and on focus; occasional
+             complaint and feedback submissions
+  official   page load; keeps the complaint SSE stream open; messaging.js
+             polling and focus refreshes; occasional status updates
+  admin      page load of every panel; admindashboard.js polls /messages and
+             /notifications/list every 30s, messaging.js polls /messages and
+             /notifications every 30s and on focus
+
+Virtual users are scheduled on one timeline and their requests executed by a
+pool of client threads, so when the server cannot keep up the requests start
+late ("lag") instead of the offered rate silently dropping. Sessions are
+signed locally with SECRET_KEY, so the server must use the same key.
+
+Run against a local instance on the seeded stand-in backend:
+
+    FIRESTORE_BACKEND=memory MEMORY_SEED_COMPLAINTS=10000 \\
+        gunicorn -c gunicorn.conf.py app:app
+    python loadtest.py --residents 2000 --officials 10 --admins 2 --duration 60
+
+--speedup N compresses every interval N times, which offers the load of a
+population N times larger. --find-saturation doubles the speedup until the
+p99 or error-rate SLO is broken, and reports the saturation throughput and
+the number of gunicorn workers needed for the --target-* population.
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+
+import seed_data
+
+# The officials dashboard opens EventSource('/complaint/stream'), but the
+# route is registered as /stream; replay the stream the handler serves.
+STREAM_PATH = '/stream'
+STREAM_RECONNECT_SECONDS = 5
+
+# role -> what one open dashboard does
+#   page_load   requests sent when the dashboard is opened
+#   periodic    (interval seconds, requests) timers
+#   focus       requests sent every time the window regains focus
+#   actions     (per hour, method, path, body) user-initiated writes
+#   stream      keeps the SSE stream open
+SCENARIOS = {
+    'resident': {
+        'page_load': ['/resident/stats', '/complaint/recent', '/messages', '/notifications',
+                      '/officials/list', '/complaint/all'],
+        'periodic': [
+            (30, ['/messages', '/notifications']),     # messaging.js
+            (300, ['/complaint/recent']),               # residentdashboard.js
+        ],
+        'focus': ['/messages', '/notifications', '/complaint/recent'],
+        'actions': [
+            (0.5, 'POST', '/complaint/submit', {
+                'form': {'title': 'Broken streetlight', 'category': 'road', 'description': 'Dark at night',
+                         'location': 'Purok 3', 'incident-date': '2025-06-01'}}),
+            (0.25, 'POST', '/feedback/submit', {
+                'form': {'feedback-type': 'response-time', 'rating': '5', 'feedback-message': 'Great work'}}),
+        ],
+        'stream': False,
+    },
+    'official': {
+        'page_load': ['/officials/stats', '/complaint/recent', '/officials/complaints/pending',
+                      '/messages', '/notifications', '/residents/list', '/complaint/all'],
+        'periodic': [
+            (30, ['/messages', '/notifications']),     # messaging.js
+        ],
+        'focus': ['/messages', '/notifications'],
+        'actions': [
+            (4, 'POST', '/complaint/update', {
+                'json': {'complaint_id': '{complaint_id}', 'status': 'In Progress', 'notes': 'On it'}}),
+        ],
+        'stream': True,
+    },
+    'admin': {
+        'page_load': ['/admin/stats', '/admin/recent-activity', '/admin/complaints',
+                      '/admin/pending-registrations', '/admin/users', '/admin/analytics',
+                      '/messages', '/notifications/list', '/notifications', '/residents/list',
+                      '/complaint/all'],
+        'periodic': [
+            (30, ['/messages', '/notifications/list']),  # admindashboard.js
+            (30, ['/messages', '/notifications']),       # messaging.js
+        ],
+        'focus': ['/messages', '/notifications'],
+        'actions': [],
+        'stream': False,
+    },
+}
+
+
+def offered_rate(role, focus_per_hour, reloads_per_hour):
+    """Requests per second one user of a role sends (streams excluded)"""
+    scenario = SCENARIOS[role]
+    rate = len(scenario['page_load']) * reloads_per_hour / 3600
+    rate += sum(len(paths) / interval for interval, paths in scenario['periodic'])
+    rate += len(scenario['focus']) * focus_per_hour / 3600
+    rate += sum(per_hour for per_hour, _, _, _ in scenario['actions']) / 3600
+    return rate
+
+
+def population_rate(population, focus_per_hour, reloads_per_hour):
+    return sum(count * offered_rate(role, focus_per_hour, reloads_per_hour)
+               for role, count in population.items())
+
+
+def session_cookie(secret_key, uid, role):
+    """Signed Flask session cookie for a seeded user, as login would set it"""
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    serializer = SecureCookieSessionInterface().get_signing_serializer(signer)
+    return serializer.dumps({
+        'user_uid': uid,
+        'user_email': f"{uid}@example.com",
+        'user_name': uid,
+        'user_role': 'resident' if role == 'resident' else 'official',
+        'is_admin': role == 'admin',
+    })
+
+
+def build_users(population, secret_key, seeded_complaints):
+    """One (role, cookie) per virtual user, spread over the seeded accounts"""
+    resident_count = max(1, int(seeded_complaints * 0.25))
+    officials = [seed_data.PROBE_OFFICIAL_UID] + [f"official-{i:03d}" for i in range(seed_data.OFFICIAL_COUNT)]
+    users = []
+    for i in range(population.get('resident', 0)):
+        uid = f"resident-{i % resident_count:07d}"
+        users.append(('resident', session_cookie(secret_key, uid, 'resident')))
+    for i in range(population.get('official', 0)):
+        uid = officials[i % len(officials)]
+        users.append(('official', session_cookie(secret_key, uid, 'official')))
+    for _ in range(population.get('admin', 0)):
+        users.append(('admin', session_cookie(secret_key, seed_data.PROBE_ADMIN_UID, 'admin')))
+    return users
+
+
+class Recorder:
+    """Thread-safe collection of request samples"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []          # (route, seconds, status)
+        self.lags = []
+        self.streams = {'opened': 0, 'failed': 0, 'events': 0}
+        self.recording = False
+
+    def add(self, route, seconds, status, lag):
+        if not self.recording:
+            return
+        with self.lock:
+            self.samples.append((route, seconds, status))
+            self.lags.append(lag)
+
+    def stream(self, key, count=1):
+        with self.lock:
+            self.streams[key] += count
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(latencies, errors):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'p50_ms': round(_percentile(ordered, 50) * 1000, 1) if ordered else None,
+        'p95_ms': round(_percentile(ordered, 95) * 1000, 1) if ordered else None,
+        'p99_ms': round(_percentile(ordered, 99) * 1000, 1) if ordered else None,
+        'max_ms': round(ordered[-1] * 1000, 1) if ordered else None,
+    }
+
+
+class LoadTest:
+    """One run of a population against a base URL"""
+
+    def __init__(self, base_url, users, speedup=1.0, concurrency=64, focus_per_hour=12,
+                 reloads_per_hour=2, complaint_id=None, seed=1):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.speedup = speedup
+        self.concurrency = concurrency
+        self.focus_per_hour = focus_per_hour
+        self.reloads_per_hour = reloads_per_hour
+        self.ids = {'complaint_id': complaint_id or seed_data.probe_ids()['complaint_id']}
+        self.rng = random.Random(seed)
+        self.recorder = Recorder()
+        self.stop = threading.Event()
+        self.local = threading.local()
+        self.queue = []
+        self.sequence = 0
+        self.open_streams = []
+
+    # ---- scheduling ----
+
+    def _push(self, due, user, kind, item):
+        self.sequence += 1
+        heapq.heappush(self.queue, (due, self.sequence, user, kind, item))
+
+    def _next_poisson(self, now, per_hour):
+        return now + self.rng.expovariate(per_hour / 3600) / self.speedup
+
+    def _schedule_user(self, index, start, ramp):
+        role, _ = self.users[index]
+        scenario = SCENARIOS[role]
+        arrival = start + self.rng.uniform(0, ramp)
+        self._push(arrival, index, 'page_load', None)
+        for timer, (interval, _) in enumerate(scenario['periodic']):
+            self._push(arrival + interval / self.speedup, index, 'periodic', timer)
+        if self.focus_per_hour:
+            self._push(self._next_poisson(arrival, self.focus_per_hour), index, 'focus', None)
+        if self.reloads_per_hour:
+            self._push(self._next_poisson(arrival, self.reloads_per_hour), index, 'page_load', None)
+        for action, (per_hour, _, _, _) in enumerate(scenario['actions']):
+            self._push(self._next_poisson(arrival, per_hour), index, 'action', action)
+
+    def _reschedule(self, due, user, kind, item):
+        scenario = SCENARIOS[self.users[user][0]]
+        if kind == 'periodic':
+            self._push(due + scenario['periodic'][item][0] / self.speedup, user, kind, item)
+        elif kind == 'focus':
+            self._push(self._next_poisson(due, self.focus_per_hour), user, kind, item)
+        elif kind == 'page_load':
+            self._push(self._next_poisson(due, self.reloads_per_hour), user, kind, item)
+        elif kind == 'action':
+            self._push(self._next_poisson(due, scenario['actions'][item][0]), user, kind, item)
+
+    def _requests_for(self, user, kind, item):
+        scenario = SCENARIOS[self.users[user][0]]
+        if kind == 'page_load':
+            return [('GET', path, {}) for path in scenario['page_load']]
+        if kind == 'periodic':
+            return [('GET', path, {}) for path in scenario['periodic'][item][1]]
+        if kind == 'focus':
+            return [('GET', path, {}) for path in scenario['focus']]
+        _, method, path, body = scenario['actions'][item]
+        body = {key: {k: v.format(**self.ids) for k, v in value.items()} for key, value in body.items()}
+        return [(method, path, body)]
+
+    # ---- execution ----
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _send(self, due, user, kind, item):
+        lag = time.monotonic() - due
+        cookie = self.users[user][1]
+        for method, path, body in self._requests_for(user, kind, item):
+            if self.stop.is_set():
+                return
+            started = time.monotonic()
+            try:
+                response = self._session().request(method, self.base_url + path, cookies={'session': cookie},
+                                                   timeout=30, **body)
+                status = response.status_code
+            except requests.RequestException:
+                status = 0
+            self.recorder.add(path, time.monotonic() - started, status, lag)
+
+    def _hold_stream(self, user):
+        """Keep an SSE connection open like EventSource does, reconnecting on errors"""
+        cookie = self.users[user][1]
+        while not self.stop.is_set():
+            try:
+                # No read timeout: the handler only writes when complaints change
+                response = requests.get(self.base_url + STREAM_PATH, cookies={'session': cookie},
+                                        stream=True, timeout=(5, None))
+                with self.recorder.lock:
+                    self.open_streams.append(response)
+                if response.status_code != 200:
+                    self.recorder.stream('failed')
+                    # EventSource gives up on a non-200 response
+                    return
+                self.recorder.stream('opened')
+                for line in response.iter_lines():
+                    if line.startswith(b'data:'):
+                        self.recorder.stream('events')
+            except Exception:
+                # Includes the error raised when run() closes the connection
+                pass
+            self.stop.wait(STREAM_RECONNECT_SECONDS)
+
+    def run(self, duration, warmup=10, ramp=None):
+        """Replay the population for warmup + duration seconds, return the report"""
+        ramp = min(30.0, 30 / self.speedup) if ramp is None else ramp
+        start = time.monotonic()
+        for index in range(len(self.users)):
+            self._schedule_user(index, start, ramp)
+
+        stream_threads = []
+        for index, (role, _) in enumerate(self.users):
+            if SCENARIOS[role]['stream']:
+                thread = threading.Thread(target=self._hold_stream, args=(index,), daemon=True)
+                thread.start()
+                stream_threads.append(thread)
+
+        # Measure after every user has arrived and sent its first page load
+        measure_from = start + max(warmup, ramp)
+        end = measure_from + duration
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if not self.recorder.recording and now >= measure_from:
+                self.recorder.recording = True
+            if not self.queue or self.queue[0][0] > now:
+                time.sleep(min(0.01, end - now))
+                continue
+            due, _, user, kind, item = heapq.heappop(self.queue)
+            self._reschedule(due, user, kind, item)
+            pool.submit(self._send, due, user, kind, item)
+
+        self.recorder.recording = False
+        self.stop.set()
+        for response in self.open_streams:
+            response.close()
+        pool.shutdown(wait=True, cancel_futures=True)
+        return self.report(duration)
+
+    def report(self, duration):
+        samples = self.recorder.samples
+        by_route = {}
+        for route, seconds, status in samples:
+            by_route.setdefault(route, ([], [0]))
+            by_route[route][0].append(seconds)
+            if status == 0 or status >= 500:
+                by_route[route][1][0] += 1
+
+        errors = sum(errors[0] for _, errors in by_route.values())
+        lags = sorted(self.recorder.lags)
+        population = {}
+        for role, _ in self.users:
+            population[role] = population.get(role, 0) + 1
+
+        return {
+            'population': population,
+            'speedup': self.speedup,
+            'duration_s': duration,
+            'offered_rps': round(population_rate(population, self.focus_per_hour,
+                                                 self.reloads_per_hour) * self.speedup, 1),
+            'throughput_rps': round(len(samples) / duration, 1),
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+            'overall': _summary([s[1] for s in samples], errors),
+            'lag_p95_ms': round(_percentile(lags, 95) * 1000, 1) if lags else None,
+            'streams': dict(self.recorder.streams),
+            'routes': {route: _summary(latencies, errs[0])
+                       for route, (latencies, errs) in sorted(by_route.items())},
+        }
+
+
+def _passes(report, slo_ms, max_error_rate, max_lag_ms):
+    overall = report['overall']
+    return (overall['requests'] > 0
+            and overall['p99_ms'] <= slo_ms
+            and report['error_rate'] <= max_error_rate
+            and (report['lag_p95_ms'] or 0) <= max_lag_ms)
+
+
+def workers_needed(target_rps, saturation_rps, workers, target_streams, threads, utilisation):
+    """Workers to serve target_rps at the given utilisation and hold every stream"""
+    per_worker = saturation_rps / workers if workers else 0
+    for_requests = math.ceil(target_rps / (per_worker * utilisation)) if per_worker else None
+    # Each open SSE stream holds one gthread thread for its whole lifetime
+    for_streams = math.ceil(target_streams / max(1, threads - 1)) if target_streams else 0
+    return {
+        'per_worker_rps': round(per_worker, 1),
+        'for_requests': for_requests,
+        'for_streams': for_streams,
+        'workers': max(for_requests or 0, for_streams, 1),
+    }
+
+
+def _print_report(report):
+    overall = report['overall']
+    print(f"\nspeedup {report['speedup']}x  population {report['population']}")
+    print(f"offered {report['offered_rps']} rps, served {report['throughput_rps']} rps, "
+          f"errors {report['error_rate']:.2%}, lag p95 {report['lag_p95_ms']} ms, streams {report['streams']}")
+    print(f"{'route':32} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, r in list(report['routes'].items()) + [('(all)', overall)]:
+        print(f"{route:32} {r['requests']:>8} {r['errors']:>6} {r['p50_ms']!s:>8} "
+              f"{r['p95_ms']!s:>8} {r['p99_ms']!s:>8} {r['max_ms']!s:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay dashboard traffic against a running instance')
+    parser.add_argument('--base-url', default=f"http://127.0.0.1:{os.environ.get('PORT', '5000')}")
+    parser.add_argument('--secret-key', default=os.environ.get('SECRET_KEY', 'your-secret-key-here'),
+                        help="the server's SECRET_KEY, used to sign session cookies")
+    parser.add_argument('--residents', type=int, default=500)
+    parser.add_argument('--officials', type=int, default=5)
+    parser.add_argument('--admins', type=int, default=1)
+    parser.add_argument('--seeded-complaints', type=int,
+                        default=int(os.environ.get('MEMORY_SEED_COMPLAINTS', '1000')),
+                        help='MEMORY_SEED_COMPLAINTS of the server, to pick existing resident accounts')
+    parser.add_argument('--focus-per-hour', type=float, default=12, help='window focus events per user')
+    parser.add_argument('--reloads-per-hour', type=float, default=2, help='dashboard page loads per user')
+    parser.add_argument('--speedup', type=float, default=1.0, help='compress all intervals by this factor')
+    parser.add_argument('--duration', type=float, default=60, help='measured seconds per stage')
+    parser.add_argument('--warmup', type=float, default=10, help='unmeasured seconds before each stage')
+    parser.add_argument('--concurrency', type=int, default=64, help='client threads sending requests')
+    parser.add_argument('--find-saturation', action='store_true',
+                        help='double --speedup until the SLO breaks')
+    parser.add_argument('--max-stages', type=int, default=8)
+    parser.add_argument('--slo-p99-ms', type=float, default=1000)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--max-lag-ms', type=float, default=1000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', '1')),
+                        help='gunicorn workers of the instance under test')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('GUNICORN_THREADS', '8')),
+                        help='gunicorn threads per worker (gthread)')
+    parser.add_argument('--utilisation', type=float, default=0.7,
+                        help='fraction of saturation throughput to plan for')
+    parser.add_argument('--target-residents', type=int)
+    parser.add_argument('--target-officials', type=int)
+    parser.add_argument('--target-admins', type=int)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args(argv)
+
+    population = {'resident': args.residents, 'official': args.officials, 'admin': args.admins}
+    users = build_users(population, args.secret_key, args.seeded_complaints)
+
+    def stage(speedup):
+        test = LoadTest(args.base_url, users, speedup, args.concurrency,
+                        args.focus_per_hour, args.reloads_per_hour)
+        report = test.run(args.duration, args.warmup)
+        _print_report(report)
+        return report
+
+    stages = [stage(args.speedup)]
+    if args.find_saturation:
+        while _passes(stages[-1], args.slo_p99_ms, args.max_error_rate, args.max_lag_ms) \
+                and len(stages) < args.max_stages:
+            stages.append(stage(stages[-1]['speedup'] * 2))
+
+    passing = [s for s in stages if _passes(s, args.slo_p99_ms, args.max_error_rate, args.max_lag_ms)]
+    result = {'base_url': args.base_url, 'stages': stages}
+    if passing:
+        saturation_rps = max(s['throughput_rps'] for s in passing)
+        target = {
+            'resident': args.residents if args.target_residents is None else args.target_residents,
+            'official': args.officials if args.target_officials is None else args.target_officials,
+            'admin': args.admins if args.target_admins is None else args.target_admins,
+        }
+        target_rps = population_rate(target, args.focus_per_hour, args.reloads_per_hour)
+        result['saturation_rps'] = saturation_rps
+        result['saturated'] = len(passing) < len(stages)
+        result['target'] = {'population': target, 'offered_rps': round(target_rps, 1),
+                            **workers_needed(target_rps, saturation_rps, args.workers,
+                                             target['official'], args.threads, args.utilisation)}
+        qualifier = '' if result['saturated'] else ' (SLO never broken - at least)'
+        print(f"\nSaturation throughput{qualifier}: {saturation_rps} rps on {args.workers} worker(s)")
+        print(f"Target {target} offers {target_rps:.1f} rps -> "
+              f"{result['target']['workers']} worker(s) at {args.utilisation:.0%} utilisation")
+    else:
+        print('\nThe first stage already breaks the SLO; lower --speedup or the population')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
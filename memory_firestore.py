@@ -0,0 +1,854 @@
+"""
+In-memory stand-in for the Firestore client.
+
+Implements the part of the google-cloud-firestore API this app uses
+(collections, documents, where/order_by/limit/cursor queries, get_all,
+partition queries, batches, bulk writers and transactions) on top of plain
+dicts, so routes can be exercised locally, in the budget harness and in
+benchmarks without a Firebase project.
+
+Select it with FIRESTORE_BACKEND=memory (see firebase_config.py).
+
+Every client keeps Firestore-style usage counters in `client.stats`:
+    reads        documents billed as read (an empty query still costs 1)
+    writes       documents written or deleted
+    round_trips  calls that would be one RPC against real Firestore
+Pass latency=<seconds> to add a fixed delay to every round trip; calls given
+a shorter timeout= fail with DeadlineExceeded, and setting
+`client.unavailable = True` makes every round trip fail with
+ServiceUnavailable.
+
+client.async_client() is the same data behind the firestore.AsyncClient API
+(see AsyncAdapter), for async views.
+"""
+import asyncio
+import copy
+import functools
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+DOCUMENT_ID = '__name__'
+
+# Firestore orders values of different types by type first
+_TYPE_ORDER = {type(None): 0, bool: 1, int: 2, float: 2, datetime: 3, str: 4, bytes: 5, list: 8, dict: 9}
+
+_MISSING = object()
+
+
+def _compare_values(a, b):
+    rank_a, rank_b = _TYPE_ORDER.get(type(a), 7), _TYPE_ORDER.get(type(b), 7)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if isinstance(a, list):
+        for x, y in zip(a, b):
+            result = _compare_values(x, y)
+            if result:
+                return result
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if isinstance(a, dict):
+        return _compare_values(sorted(a.items()), sorted(b.items()))
+    return (a > b) - (a < b)
+
+
+def _get_field(data, path):
+    """Look up a dotted field path, _MISSING if absent"""
+    value = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_value(data, parts, value):
+    """Write one field (given as path parts), resolving sentinels and transforms"""
+    parent = data
+    for part in parts[:-1]:
+        if not isinstance(parent.get(part), dict):
+            parent[part] = {}
+        parent = parent[part]
+    key = parts[-1]
+    current = parent.get(key)
+
+    if value is transforms.DELETE_FIELD:
+        parent.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        parent[key] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        parent[key] = (current if isinstance(current, (int, float)) else 0) + value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        current = list(current) if isinstance(current, list) else []
+        current.extend(v for v in value.values if v not in current)
+        parent[key] = current
+    elif isinstance(value, transforms.ArrayRemove):
+        current = list(current) if isinstance(current, list) else []
+        parent[key] = [v for v in current if v not in value.values]
+    elif isinstance(value, dict):
+        nested = {}
+        for nested_key, item in value.items():
+            _apply_value(nested, [nested_key], item)
+        parent[key] = nested
+    else:
+        parent[key] = copy.deepcopy(value)
+
+
+def _merge(data, updates):
+    """set(merge=True): deep-merge maps, replace everything else"""
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            _merge(data[key], value)
+        else:
+            _apply_value(data, [key], value)
+
+
+def _doc_id_value(value):
+    """Document-id filters accept ids, paths or references"""
+    if isinstance(value, DocumentReference):
+        return value.id
+    if isinstance(value, str):
+        return value.split('/')[-1]
+    return value
+
+
+def _matches(data, doc_id, field, op, value):
+    if field == DOCUMENT_ID:
+        actual = doc_id
+        value = [_doc_id_value(v) for v in value] if op in ('in', 'not-in') else _doc_id_value(value)
+    else:
+        actual = _get_field(data, field)
+        if actual is _MISSING:
+            return False
+
+    if op == '==':
+        return actual == value
+    if op == '!=':
+        return actual != value
+    if op == 'in':
+        return actual in value
+    if op == 'not-in':
+        return actual not in value
+    if op == 'array_contains':
+        return isinstance(actual, list) and value in actual
+    if op == 'array_contains_any':
+        return isinstance(actual, list) and any(v in actual for v in value)
+
+    if _TYPE_ORDER.get(type(actual), 7) != _TYPE_ORDER.get(type(value), 7):
+        return False
+    result = _compare_values(actual, value)
+    return {'<': result < 0, '<=': result <= 0, '>': result > 0, '>=': result >= 0}[op]
+
+
+class DocumentSnapshot:
+    """Read-only copy of a document as returned by get()/stream()"""
+
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+        self.create_time = update_time
+        self.read_time = datetime.now(timezone.utc)
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class AggregationResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+
+class AggregationQuery:
+    """Result of query.count(); billed as one read per 1000 matches"""
+
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias or 'field_1'
+
+    def get(self, transaction=None, retry=None, timeout=None):
+        client = self._query._client
+        client._round_trip(timeout)
+        count = len(self._query._run())
+        client._count_reads(max(1, -(-count // 1000)))
+        return [[AggregationResult(self._alias, count)]]
+
+    def stream(self, transaction=None, retry=None, timeout=None):
+        yield from self.get(transaction, timeout=timeout)
+
+
+class Query:
+    """Immutable query over one collection"""
+
+    def __init__(self, client, path, filters=(), orders=(), limit=None,
+                 limit_to_last=False, offset=0, start=None, end=None, projection=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._offset = offset
+        self._start = start
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **changes):
+        fields = dict(
+            filters=self._filters, orders=self._orders, limit=self._limit,
+            limit_to_last=self._limit_to_last, offset=self._offset,
+            start=self._start, end=self._end, projection=self._projection,
+        )
+        fields.update(changes)
+        return Query(self._client, self._path, **fields)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if hasattr(field_path, 'to_api_repr'):
+            field_path = field_path.to_api_repr()
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        if hasattr(field_path, 'to_api_repr'):
+            field_path = field_path.to_api_repr()
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count):
+        return self._copy(limit=count, limit_to_last=True)
+
+    def offset(self, num_to_skip):
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy(projection=tuple(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def count(self, alias=None):
+        return AggregationQuery(self, alias)
+
+    # ---- execution ----
+
+    def _effective_orders(self):
+        """Explicit orders, plus inequality fields, plus the document id"""
+        orders = list(self._orders)
+        ordered = {field for field, _ in orders}
+        for field, op, _ in self._filters:
+            if op in ('<', '<=', '>', '>=', '!=', 'not-in') and field not in ordered:
+                orders.append((field, ASCENDING))
+                ordered.add(field)
+        if DOCUMENT_ID not in ordered:
+            direction = orders[-1][1] if orders else ASCENDING
+            orders.append((DOCUMENT_ID, direction))
+        return orders
+
+    def _sort_key(self, orders):
+        def compare(a, b):
+            for field, direction in orders:
+                if field == DOCUMENT_ID:
+                    result = _compare_values(a[0], b[0])
+                else:
+                    result = _compare_values(_get_field(a[1], field), _get_field(b[1], field))
+                if result:
+                    return -result if direction == DESCENDING else result
+            return 0
+        return functools.cmp_to_key(compare)
+
+    def _cursor_values(self, cursor, orders):
+        if isinstance(cursor, DocumentSnapshot):
+            data = cursor._data or {}
+            return [cursor.id if f == DOCUMENT_ID else _get_field(data, f) for f, _ in orders]
+        if isinstance(cursor, dict):
+            return [_get_field(cursor, f) for f, _ in orders if _get_field(cursor, f) is not _MISSING]
+        return list(cursor)
+
+    def _compare_to_cursor(self, item, values, orders):
+        for (field, direction), value in zip(orders, values):
+            if field == DOCUMENT_ID:
+                result = _compare_values(item[0], _doc_id_value(value))
+            else:
+                result = _compare_values(_get_field(item[1], field), value)
+            if result:
+                return -result if direction == DESCENDING else result
+        return 0
+
+    def _run(self):
+        """Matching (doc_id, data, update_time) tuples in query order"""
+        with self._client._lock:
+            docs = [(doc_id, data, self._client._update_times.get((self._path, doc_id)))
+                    for doc_id, data in self._client._store.get(self._path, {}).items()]
+
+        for field, op, value in self._filters:
+            docs = [d for d in docs if _matches(d[1], d[0], field, op, value)]
+
+        orders = self._effective_orders()
+        # Ordering on a field excludes documents that do not have it
+        for field, _ in orders:
+            if field != DOCUMENT_ID:
+                docs = [d for d in docs if _get_field(d[1], field) is not _MISSING]
+        docs.sort(key=self._sort_key(orders))
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            values = self._cursor_values(cursor, orders)
+            docs = [d for d in docs
+                    if (self._compare_to_cursor(d, values, orders) >= 0 if inclusive
+                        else self._compare_to_cursor(d, values, orders) > 0)]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            values = self._cursor_values(cursor, orders)
+            docs = [d for d in docs
+                    if (self._compare_to_cursor(d, values, orders) <= 0 if inclusive
+                        else self._compare_to_cursor(d, values, orders) < 0)]
+
+        docs = docs[self._offset:]
+        if self._limit is not None:
+            docs = docs[-self._limit:] if self._limit_to_last else docs[:self._limit]
+        return docs
+
+    def _snapshots(self, docs):
+        collection = self._client.collection(self._path)
+        snapshots = []
+        for doc_id, data, update_time in docs:
+            data = copy.deepcopy(data)
+            if self._projection is not None:
+                data = {k: v for k, v in data.items() if k in self._projection}
+            snapshots.append(DocumentSnapshot(collection.document(doc_id), data, update_time))
+        return snapshots
+
+    def get(self, transaction=None, retry=None, timeout=None):
+        return list(self.stream(transaction=transaction, timeout=timeout))
+
+    def stream(self, transaction=None, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        docs = self._run()
+        self._client._count_reads(max(1, len(docs)))
+        if transaction is not None:
+            transaction._record_reads(self._path, [d[0] for d in docs])
+        yield from self._snapshots(docs)
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+
+    @property
+    def id(self):
+        return self._path.split('/')[-1]
+
+    @property
+    def parent(self):
+        parts = self._path.split('/')
+        if len(parts) == 1:
+            return None
+        return DocumentReference(self._client, '/'.join(parts[:-2]), parts[-2])
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, self._path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data, document_id=None, retry=None, timeout=None):
+        ref = self.document(document_id)
+        ref.create(document_data, timeout=timeout)
+        return ref._client._update_times[(self._path, ref.id)], ref
+
+    def list_documents(self, page_size=None):
+        with self._client._lock:
+            ids = list(self._client._store.get(self._path, {}))
+        return [self.document(doc_id) for doc_id in ids]
+
+
+class QueryPartition:
+    """Document-id range of a collection, as yielded by get_partitions()"""
+
+    def __init__(self, query, start_at, end_at):
+        self._query = query
+        self.start_at = start_at
+        self.end_at = end_at
+
+    def query(self):
+        query = Query(self._query._client, self._query._path).order_by(DOCUMENT_ID)
+        if self.start_at is not None:
+            query = query.start_at([self.start_at])
+        if self.end_at is not None:
+            query = query.end_before([self.end_at])
+        return query
+
+
+class CollectionGroup(Query):
+    """Collection group query; the stand-in only covers top-level collections"""
+
+    def get_partitions(self, partition_count, retry=None, timeout=None):
+        """Split the collection by document id into ranges of similar size"""
+        self._client._round_trip()
+        with self._client._lock:
+            ids = sorted(self._client._store.get(self._path, {}))
+        count = max(1, min(partition_count, len(ids)))
+        self._client._count_reads(count)
+        collection = self._client.collection(self._path)
+        boundaries = sorted({ids[i * len(ids) // count] for i in range(1, count)})
+        start = None
+        for boundary in boundaries:
+            end = collection.document(boundary)
+            yield QueryPartition(self, start, end)
+            start = end
+        yield QueryPartition(self, start, None)
+
+
+class DocumentReference:
+    def __init__(self, client, collection_path, document_id):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and self.path == other.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def path(self):
+        return f"{self._collection_path}/{self.id}"
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self._collection_path)
+
+    def collection(self, collection_id):
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def _snapshot(self):
+        with self._client._lock:
+            data = self._client._store.get(self._collection_path, {}).get(self.id)
+            return DocumentSnapshot(self, copy.deepcopy(data),
+                                    self._client._update_times.get((self._collection_path, self.id)))
+
+    def get(self, field_paths=None, transaction=None, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        self._client._count_reads(1)
+        if transaction is not None:
+            transaction._record_reads(self._collection_path, [self.id])
+        return self._snapshot()
+
+    def create(self, document_data, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        self._client._commit([('create', self, document_data)])
+
+    def set(self, document_data, merge=False, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        self._client._commit([('set_merge' if merge else 'set', self, document_data)])
+
+    def update(self, field_updates, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        self._client._commit([('update', self, field_updates)])
+
+    def delete(self, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        self._client._commit([('delete', self, None)])
+
+
+class WriteBatch:
+    """Writes applied atomically on commit(), one round trip for all"""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data))
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set_merge' if merge else 'set', reference, document_data))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference, field_updates))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None))
+
+    def commit(self, retry=None, timeout=None):
+        self._client._round_trip(timeout)
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class BulkWriteFailure:
+    """A failed write, as passed to BulkWriter.on_write_error callbacks"""
+
+    def __init__(self, operation, error, attempts):
+        self.operation = operation
+        self.code = error.grpc_status_code
+        self.message = error.message
+        self.attempts = attempts
+
+
+class BulkWriter:
+    """Non-atomic writes sent in batches of 20, several batches at a time.
+
+    Like the real BulkWriter, a failed write (including a batch that could
+    not be sent) does not affect the others in its batch; it is retried
+    while the on_write_error callback returns True (by default up to 15
+    attempts) and then counted in `failed` instead of raised.
+    """
+
+    BATCH_SIZE = 20
+    MAX_ATTEMPTS = 15
+
+    def __init__(self, client, max_in_flight=10):
+        self._client = client
+        self._pending = []
+        self._futures = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='bulk-writer')
+        self._error_callback = self._default_on_error
+        self.failed = 0
+
+    @classmethod
+    def _default_on_error(cls, failure, bulk_writer):
+        return failure.attempts < cls.MAX_ATTEMPTS
+
+    def on_write_error(self, callback):
+        self._error_callback = callback or self._default_on_error
+
+    def _enqueue(self, kind, reference, data):
+        with self._lock:
+            self._pending.append((kind, reference, data))
+            if len(self._pending) >= self.BATCH_SIZE:
+                self._send()
+
+    def _send(self):
+        writes, self._pending = self._pending, []
+        if writes:
+            self._futures.append(self._pool.submit(self._write_batch, writes))
+
+    def _write_batch(self, writes):
+        attempts = 1
+        while writes:
+            errors = []
+            try:
+                self._client._round_trip()
+            except exceptions.GoogleAPICallError as error:
+                errors = [(write, error) for write in writes]
+            else:
+                for write in writes:
+                    try:
+                        self._client._commit([write])
+                    except exceptions.GoogleAPICallError as error:
+                        errors.append((write, error))
+            writes = []
+            for write, error in errors:
+                if self._error_callback(BulkWriteFailure(write, error, attempts), self):
+                    writes.append(write)
+                else:
+                    with self._lock:
+                        self.failed += 1
+            attempts += 1
+
+    def create(self, reference, document_data):
+        self._enqueue('create', reference, document_data)
+
+    def set(self, reference, document_data, merge=False):
+        self._enqueue('set_merge' if merge else 'set', reference, document_data)
+
+    def update(self, reference, field_updates):
+        self._enqueue('update', reference, field_updates)
+
+    def delete(self, reference):
+        self._enqueue('delete', reference, None)
+
+    def flush(self):
+        with self._lock:
+            self._send()
+            futures, self._futures = self._futures, []
+        wait(futures)
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown()
+
+
+class Transaction(WriteBatch):
+    """Optimistic transaction compatible with firestore.transactional.
+
+    Reads record the version of each document; commit raises Aborted (and
+    the transactional decorator retries) if any of them changed meanwhile.
+    """
+
+    def __init__(self, client, max_attempts=5, read_only=False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions = {}
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    def _record_reads(self, collection_path, doc_ids):
+        with self._client._lock:
+            for doc_id in doc_ids:
+                key = (collection_path, doc_id)
+                self._read_versions.setdefault(key, self._client._versions.get(key, 0))
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        self._client._round_trip()
+        writes = self._writes
+        try:
+            return self._client._commit(writes, expected_versions=self._read_versions)
+        finally:
+            self._clean_up()
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, DocumentReference):
+            yield ref_or_query.get(transaction=self)
+        else:
+            yield from ref_or_query.stream(transaction=self)
+
+    def get_all(self, references):
+        return self._client.get_all(references, transaction=self)
+
+
+class Client:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        # Set to True to make every round trip fail, as in an outage
+        self.unavailable = False
+        self.stats = {'reads': 0, 'writes': 0, 'round_trips': 0}
+        self._store = {}
+        self._update_times = {}
+        self._versions = {}
+        self._lock = threading.RLock()
+        self._version_counter = itertools.count(1)
+
+    # ---- usage accounting ----
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def _round_trip(self, timeout=None):
+        with self._lock:
+            self.stats['round_trips'] += 1
+        if self.unavailable:
+            raise exceptions.ServiceUnavailable('The memory backend is unavailable')
+        if self.latency:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise exceptions.DeadlineExceeded(f'Deadline of {timeout}s exceeded')
+            time.sleep(self.latency)
+
+    def _count_reads(self, count):
+        with self._lock:
+            self.stats['reads'] += count
+
+    # ---- public API ----
+
+    def collection(self, collection_path):
+        return CollectionReference(self, collection_path)
+
+    def collection_group(self, collection_id):
+        return CollectionGroup(self, collection_id)
+
+    def document(self, document_path):
+        collection_path, _, document_id = document_path.rpartition('/')
+        return DocumentReference(self, collection_path, document_id)
+
+    def collections(self):
+        with self._lock:
+            names = [path for path in self._store if '/' not in path]
+        return [CollectionReference(self, name) for name in names]
+
+    def get_all(self, references, field_paths=None, transaction=None, retry=None, timeout=None):
+        references = list(dict.fromkeys(references))
+        self._round_trip(timeout)
+        self._count_reads(len(references))
+        for ref in references:
+            if transaction is not None:
+                transaction._record_reads(ref._collection_path, [ref.id])
+            yield ref._snapshot()
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def bulk_writer(self, options=None):
+        return BulkWriter(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return Transaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def close(self):
+        pass
+
+    def async_client(self):
+        """This client's data behind the firestore.AsyncClient API"""
+        return AsyncAdapter(self)
+
+    # ---- storage ----
+
+    def _commit(self, writes, expected_versions=None):
+        """Apply a list of (kind, ref, data) writes atomically"""
+        with self._lock:
+            for key, version in (expected_versions or {}).items():
+                if self._versions.get(key, 0) != version:
+                    raise exceptions.Aborted('Document changed during transaction')
+
+            staged = {}
+            for kind, ref, data in writes:
+                key = (ref._collection_path, ref.id)
+                current = staged.get(key, self._store.get(ref._collection_path, {}).get(ref.id))
+
+                if kind == 'create' and current is not None:
+                    raise exceptions.AlreadyExists(f'Document already exists: {ref.path}')
+                if kind == 'update' and current is None:
+                    raise exceptions.NotFound(f'No document to update: {ref.path}')
+
+                if kind == 'delete':
+                    staged[key] = None
+                    continue
+
+                if kind == 'update':
+                    new = copy.deepcopy(current)
+                    for field, value in data.items():
+                        _apply_value(new, field.split('.'), value)
+                elif kind == 'set_merge':
+                    new = copy.deepcopy(current) if current else {}
+                    _merge(new, data)
+                else:
+                    new = {}
+                    for field, value in data.items():
+                        _apply_value(new, [field], value)
+                staged[key] = new
+
+            write_time = datetime.now(timezone.utc)
+            for (collection_path, doc_id), data in staged.items():
+                collection = self._store.setdefault(collection_path, {})
+                if data is None:
+                    collection.pop(doc_id, None)
+                    self._update_times.pop((collection_path, doc_id), None)
+                else:
+                    collection[doc_id] = data
+                    self._update_times[(collection_path, doc_id)] = write_time
+                self._versions[(collection_path, doc_id)] = next(self._version_counter)
+
+            self.stats['writes'] += len(writes)
+            return write_time
+
+
+# ---- async API ----
+
+def _sync_value(value):
+    if isinstance(value, AsyncAdapter):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_sync_value(v) for v in value)
+    return value
+
+
+def _async_value(value):
+    if isinstance(value, (Client, Query, DocumentReference, WriteBatch, AggregationQuery)):
+        return AsyncAdapter(value)
+    return value
+
+
+class AsyncAdapter:
+    """A stand-in object behind the async API (AsyncClient, AsyncQuery, ...).
+
+    RPCs become coroutines, and stream()/get_all() async generators, that
+    run the sync call in a thread, so concurrent calls overlap their latency.
+    Batch methods other than commit() only stage a write and stay sync.
+    """
+
+    RPCS = {'get', 'create', 'set', 'update', 'delete', 'add', 'commit'}
+    STREAMS = {'stream', 'get_all'}
+
+    def __init__(self, target):
+        self._target = target
+
+    def __repr__(self):
+        return f"AsyncAdapter({self._target!r})"
+
+    def __eq__(self, other):
+        return _sync_value(other) == self._target
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __len__(self):
+        return len(self._target)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_'):
+            return attr
+        if not callable(attr):
+            return _async_value(attr)
+        staging = isinstance(self._target, WriteBatch) and name != 'commit'
+
+        if name in self.STREAMS:
+            async def stream(*args, **kwargs):
+                items = await asyncio.to_thread(
+                    lambda: list(attr(*_sync_value(args), **kwargs)))
+                for item in items:
+                    yield item
+            return stream
+
+        if name in self.RPCS and not staging:
+            async def rpc(*args, **kwargs):
+                return _async_value(await asyncio.to_thread(attr, *_sync_value(args), **kwargs))
+            return rpc
+
+        def call(*args, **kwargs):
+            return _async_value(attr(*_sync_value(args), **kwargs))
+        return call
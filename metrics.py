@@ -0,0 +1,254 @@
+"""
+Request and Firestore instrumentation exposed in Prometheus format on /metrics.
+
+For every route we record a latency histogram, status-code counts and
+response bytes. The Firestore client handed out by get_db() is wrapped so
+every call records its latency and the number of documents read or written,
+labelled with the collection and the route that issued it.
+
+Under gunicorn each worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set up in gunicorn.conf.py) and /metrics aggregates all workers. Without
+that variable (python app.py) the in-process registry is used.
+
+/metrics shows per-route traffic and Firestore usage, so it is closed by
+default: set METRICS_TOKEN and scrape with `Authorization: Bearer <token>`.
+Without a token only requests from this machine (loopback) are answered.
+"""
+import hmac
+import os
+import time
+import types
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'bccms_request_duration_seconds',
+    'Request latency by route',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_COUNT = Counter(
+    'bccms_requests_total',
+    'Requests by route and status code',
+    ['route', 'method', 'status'],
+)
+RESPONSE_BYTES = Counter(
+    'bccms_response_bytes_total',
+    'Response body bytes by route',
+    ['route'],
+)
+FIRESTORE_LATENCY = Histogram(
+    'bccms_firestore_call_duration_seconds',
+    'Firestore call latency by collection and operation',
+    ['collection', 'op'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+FIRESTORE_CALLS = Counter(
+    'bccms_firestore_calls_total',
+    'Firestore calls by route, collection and operation',
+    ['route', 'collection', 'op'],
+)
+FIRESTORE_DOCS_READ = Counter(
+    'bccms_firestore_documents_read_total',
+    'Firestore documents read by route and collection',
+    ['route', 'collection'],
+)
+FIRESTORE_DOCS_WRITTEN = Counter(
+    'bccms_firestore_documents_written_total',
+    'Firestore documents written by route and collection',
+    ['route', 'collection'],
+)
+FIRESTORE_RETRIES = Counter(
+    'bccms_firestore_retries_total',
+    'Firestore reads retried after a transient error, by collection and operation',
+    ['collection', 'op'],
+)
+FIRESTORE_CIRCUIT_OPENED = Counter(
+    'bccms_firestore_circuit_opened_total',
+    'Times a Firestore circuit breaker opened, by collection and operation',
+    ['collection', 'op'],
+)
+FIRESTORE_COALESCED = Counter(
+    'bccms_firestore_coalesced_reads_total',
+    'Reads answered by an identical call already in flight, by collection and operation',
+    ['collection', 'op'],
+)
+FIRESTORE_STALE_SERVED = Counter(
+    'bccms_firestore_stale_results_total',
+    'Cached results served because Firestore failed or its circuit was open',
+    ['route', 'collection'],
+)
+STATS_CACHE_LOOKUPS = Counter(
+    'bccms_stats_cache_lookups_total',
+    'Dashboard statistics cache lookups by cache and result (hit, stale or miss)',
+    ['cache', 'result'],
+)
+STATS_CACHE_REFRESHES = Counter(
+    'bccms_stats_cache_refreshes_total',
+    'Background refreshes of stale dashboard statistics, by cache and outcome',
+    ['cache', 'outcome'],
+)
+
+# ============ FIRESTORE CLIENT WRAPPER ============
+
+# Objects returned by the client that are wrapped in turn
+WRAPPED_TYPES = {
+    'CollectionReference', 'DocumentReference', 'Query', 'CollectionGroup',
+    'WriteBatch', 'Transaction', 'BulkWriter', 'AggregationQuery',
+}
+READ_OPS = {'get', 'stream', 'get_all'}
+WRITE_OPS = {'set', 'update', 'delete', 'create', 'add'}
+
+
+def _current_route():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+def _unwrap(value):
+    """Give the SDK the real object back when it is passed as an argument"""
+    if isinstance(value, InstrumentedFirestore):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _record_read(route, collection, count):
+    if count:
+        FIRESTORE_DOCS_READ.labels(route, collection).inc(count)
+
+
+def _counting(iterator, route, collection, op, start):
+    """Pass a streamed result through, counting documents as they arrive"""
+    count = 0
+    try:
+        for item in iterator:
+            count += 1
+            yield item
+    finally:
+        FIRESTORE_LATENCY.labels(collection, op).observe(time.perf_counter() - start)
+        _record_read(route, collection, count)
+
+
+class InstrumentedFirestore:
+    """Transparent proxy around a Firestore client, reference, query or batch"""
+
+    __slots__ = ('_target', '_collection')
+
+    def __init__(self, target, collection='-'):
+        self._target = target
+        self._collection = collection
+
+    def __repr__(self):
+        return f"InstrumentedFirestore({self._target!r})"
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+        return call
+
+    def _label_for(self, name, args):
+        """Collection label for the object returned by / affected by a call"""
+        if name in ('collection', 'collection_group') and args:
+            return str(args[0]).split('/')[-1]
+        for arg in args:
+            if isinstance(arg, InstrumentedFirestore):
+                return arg._collection
+            if isinstance(arg, (list, tuple)) and arg and isinstance(arg[0], InstrumentedFirestore):
+                return arg[0]._collection
+        return self._collection
+
+    def _call(self, name, method, args, kwargs):
+        collection = self._label_for(name, args)
+        args = tuple(_unwrap(a) for a in args)
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+
+        if name not in READ_OPS and name not in WRITE_OPS:
+            result = method(*args, **kwargs)
+            if type(result).__name__ in WRAPPED_TYPES:
+                return InstrumentedFirestore(result, collection)
+            return result
+
+        route = _current_route()
+        FIRESTORE_CALLS.labels(route, collection, name).inc()
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+
+        if name in WRITE_OPS:
+            FIRESTORE_LATENCY.labels(collection, name).observe(time.perf_counter() - start)
+            FIRESTORE_DOCS_WRITTEN.labels(route, collection).inc()
+            return result
+
+        if isinstance(result, types.GeneratorType):
+            return _counting(result, route, collection, name, start)
+
+        FIRESTORE_LATENCY.labels(collection, name).observe(time.perf_counter() - start)
+        _record_read(route, collection, len(result) if isinstance(result, list) else 1)
+        return result
+
+
+def instrument_client(client):
+    """Wrap a Firestore client so all calls made through it are recorded"""
+    if isinstance(client, InstrumentedFirestore):
+        return client
+    return InstrumentedFirestore(client)
+
+# ============ FLASK MIDDLEWARE ============
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def metrics_view():
+    """Prometheus text exposition of all recorded metrics"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('Unauthorized', status=401)
+    elif request.remote_addr not in LOOPBACK_ADDRESSES:
+        return Response('Forbidden: set METRICS_TOKEN to scrape /metrics remotely', status=403)
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Register request timing hooks and the /metrics endpoint"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started_at', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+
+        route = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(route, request.method).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(route, request.method, str(response.status_code)).inc()
+        if not response.is_streamed:
+            RESPONSE_BYTES.labels(route).inc(response.calculate_content_length() or 0)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return app
@@ -0,0 +1,71 @@
+"""
+Backfill `user_uid` on feedback submitted before it was recorded.
+
+Feedback used to store only the submitter's name and (when they asked to be
+contacted) email, so /feedback/my-feedback could not find it with the
+indexed `user_uid` query. This matches each such document's `user_email`
+against the users collection and writes the uid in batches. Feedback
+without an email cannot be attributed and is left as is.
+
+    python migrate_feedback_uids.py --dry-run
+    python migrate_feedback_uids.py
+"""
+import argparse
+
+from firebase_config import get_db
+
+BATCH_SIZE = 500
+
+
+def backfill_feedback_uids(db, dry_run=False):
+    """Set user_uid on feedback by matching user_email, return counts"""
+    # email -> uid for every user (one pass over users, not one query per feedback)
+    uids_by_email = {}
+    for doc in db.collection('users').select(['email']).stream():
+        email = (doc.to_dict() or {}).get('email')
+        if email:
+            uids_by_email[email.lower()] = doc.id
+
+    counts = {'scanned': 0, 'already_set': 0, 'updated': 0, 'no_email': 0, 'unknown_email': 0}
+    batch = db.batch()
+    pending = 0
+    for doc in db.collection('feedback').select(['user_uid', 'user_email']).stream():
+        counts['scanned'] += 1
+        feedback = doc.to_dict() or {}
+        if feedback.get('user_uid'):
+            counts['already_set'] += 1
+            continue
+        email = (feedback.get('user_email') or '').lower()
+        if not email:
+            counts['no_email'] += 1
+            continue
+        uid = uids_by_email.get(email)
+        if not uid:
+            counts['unknown_email'] += 1
+            continue
+
+        counts['updated'] += 1
+        if dry_run:
+            continue
+        batch.update(doc.reference, {'user_uid': uid})
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill user_uid on feedback by email')
+    parser.add_argument('--dry-run', action='store_true', help='count matches without writing')
+    args = parser.parse_args()
+
+    counts = backfill_feedback_uids(get_db(), dry_run=args.dry_run)
+    action = 'Would update' if args.dry_run else 'Updated'
+    print(f"Scanned {counts['scanned']} feedback documents")
+    print(f"{action} {counts['updated']}; {counts['already_set']} already had a uid")
+    print(f"Skipped {counts['no_email']} without an email and {counts['unknown_email']} with an unknown email")
@@ -0,0 +1,54 @@
+"""
+Backfill the search fields (name_lower, search_prefixes, is_admin) on users.
+
+/admin/users filters, searches and sorts users on these fields, so users
+created before they existed do not show up there until this has run. Users
+whose fields are already current are skipped, so it is safe to run again.
+
+    python migrate_user_search.py --dry-run
+    python migrate_user_search.py
+"""
+import argparse
+import threading
+
+from firebase_config import get_db
+from scan import scan_collection
+from user_search import user_search_fields
+
+
+def backfill_user_search(db, dry_run=False):
+    """Write missing or stale search fields, return counts"""
+    counts = {'scanned': 0, 'current': 0, 'updated': 0}
+    lock = threading.Lock()
+
+    def handle(page):
+        batch = db.batch()
+        updated = 0
+        for doc in page:
+            user = doc.to_dict() or {}
+            fields = user_search_fields(user)
+            if all(user.get(key) == value for key, value in fields.items()):
+                continue
+            updated += 1
+            batch.update(doc.reference, fields)
+        if updated and not dry_run:
+            batch.commit()
+        with lock:
+            counts['scanned'] += len(page)
+            counts['updated'] += updated
+            counts['current'] += len(page) - updated
+
+    scan_collection(db, 'users', handle,
+                    select=['full_name', 'email', 'is_admin', 'name_lower', 'search_prefixes'])
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill user search fields')
+    parser.add_argument('--dry-run', action='store_true', help='count users without writing')
+    args = parser.parse_args()
+
+    counts = backfill_user_search(get_db(), dry_run=args.dry_run)
+    action = 'Would update' if args.dry_run else 'Updated'
+    print(f"Scanned {counts['scanned']} users")
+    print(f"{action} {counts['updated']}; {counts['current']} were already current")
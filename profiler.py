@@ -0,0 +1,276 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+A request is profiled when
+
+  - an admin sends the `X-Profile: 1` header, or
+  - its endpoint is listed in PROFILE_SAMPLE_RATES with a sampling rate, e.g.
+    PROFILE_SAMPLE_RATES="admin.get_recent_activity=0.05,complaint.get_officials_stats=0.01"
+
+While a profiled request runs, a background thread samples the handling
+thread's stack every PROFILE_INTERVAL_MS (default 5ms) with
+sys._current_frames(), so the handler itself runs unmodified and the
+overhead is one stack walk per interval. The folded stacks are written to
+PROFILE_DIR (default /tmp/bccms-profiles) as a collapsed-stack file, which
+flamegraph.pl, speedscope and most flamegraph viewers read; only the newest
+PROFILE_KEEP files are kept. The response carries the file name in
+`X-Profile-Id`.
+
+Admins list recent profiles at /admin/profiles and download one at
+/admin/profiles/<name> (add ?format=speedscope for speedscope JSON).
+
+On gevent workers every request is a greenlet on the worker's one OS
+thread, so the sampler samples the request's greenlet instead: its
+suspended frame (gr_frame) while other greenlets run, the thread's stack
+while it runs itself. The sampler is a real OS thread there, started with
+the functions gevent's monkey-patching replaced, so it keeps sampling while
+the request holds the thread.
+"""
+import collections
+import json
+import os
+import random
+import sys
+import time
+
+from flask import Blueprint, Response, abort, g, jsonify, request, send_from_directory, session
+
+from admin_firebase import admin_required
+from auth_firebase import login_required
+from events import _gevent_patched
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/bccms-profiles')
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '200'))
+PROFILE_HEADER = 'X-Profile'
+COLLAPSED_SUFFIX = '.collapsed'
+
+
+def _parse_rates(value):
+    """'endpoint=rate,endpoint=rate' -> {endpoint: rate}"""
+    rates = {}
+    for item in value.split(','):
+        if '=' in item:
+            endpoint, rate = item.split('=', 1)
+            try:
+                rates[endpoint.strip()] = float(rate)
+            except ValueError:
+                print(f"Ignoring invalid profile sample rate: {item}")
+    return rates
+
+
+PROFILE_SAMPLE_RATES = _parse_rates(os.environ.get('PROFILE_SAMPLE_RATES', ''))
+
+profiler_bp = Blueprint('profiler', __name__)
+
+
+def _original(module, name):
+    """module.name as it was before gevent's monkey-patching, if gevent is installed"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(__import__(module), name)
+    return monkey.get_original(module, name)
+
+
+# OS threads, locks and sleeps even on gevent workers
+_start_new_thread = _original('_thread', 'start_new_thread')
+_allocate_lock = _original('_thread', 'allocate_lock')
+_get_ident = _original('_thread', 'get_ident')
+_sleep = _original('time', 'sleep')
+
+
+class StackSampler:
+    """Samples the calling thread's (or greenlet's) stack at a fixed interval into folded-stack counts"""
+
+    def __init__(self, interval):
+        self.thread_id = _get_ident()
+        self.greenlet = None
+        if _gevent_patched():
+            # The request's greenlet rather than the whole thread
+            import greenlet
+            self.greenlet = greenlet.getcurrent()
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stopped = False
+        self._finished = _allocate_lock()
+
+    def start(self):
+        self._finished.acquire()
+        _start_new_thread(self._run, ())
+
+    def _frame(self):
+        if self.greenlet is not None and self.greenlet.gr_frame is not None:
+            # Suspended while another greenlet runs
+            return self.greenlet.gr_frame
+        return sys._current_frames().get(self.thread_id)
+
+    def _run(self):
+        try:
+            while not self._stopped:
+                _sleep(self.interval)
+                frame = self._frame()
+                if frame is None:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(names))] += 1
+                self.samples += 1
+        finally:
+            self._finished.release()
+
+    def stop(self):
+        self._stopped = True
+        with self._finished:
+            return self.stacks
+
+
+def _should_profile():
+    if request.headers.get(PROFILE_HEADER) == '1' and session.get('is_admin'):
+        return True
+    rate = PROFILE_SAMPLE_RATES.get(request.endpoint)
+    return bool(rate) and random.random() < rate
+
+
+def _prune():
+    """Keep only the newest PROFILE_KEEP profiles"""
+    names = list_profiles()
+    for entry in names[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, entry['name']))
+        except OSError:
+            pass
+
+
+def profile_name(endpoint):
+    """Unique file name for a profile of endpoint started now"""
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+    return f"{stamp}-{endpoint}-{os.getpid()}-{random.randrange(16 ** 6):06x}{COLLAPSED_SUFFIX}"
+
+
+def write_profile(name, stacks):
+    """Write folded stacks as '<stack> <count>' lines"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, name), 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    _prune()
+
+
+def list_profiles():
+    """Profiles on disk, newest first"""
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if n.endswith(COLLAPSED_SUFFIX)]
+    except OSError:
+        return []
+    entries = []
+    for name in names:
+        try:
+            stat = os.stat(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            continue
+        entries.append({'name': name, 'bytes': stat.st_size, 'created_at': stat.st_mtime})
+    entries.sort(key=lambda e: e['created_at'], reverse=True)
+    return entries
+
+
+def to_speedscope(name, collapsed, interval_ms=PROFILE_INTERVAL_MS):
+    """Convert collapsed-stack text to a speedscope 'sampled' profile"""
+    frames, index, samples, weights = [], {}, [], []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if not stack:
+            continue
+        sample = []
+        for frame in stack.split(';'):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({'name': frame})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(int(count) * interval_ms)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'bccms-profiler',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+@profiler_bp.route('/admin/profiles')
+@login_required
+@admin_required
+def get_profiles():
+    """List recent request profiles"""
+    return jsonify({'profiles': list_profiles()[:100], 'sample_rates': PROFILE_SAMPLE_RATES})
+
+
+@profiler_bp.route('/admin/profiles/<name>')
+@login_required
+@admin_required
+def download_profile(name):
+    """Download a profile as collapsed stacks or speedscope JSON"""
+    if not name.endswith(COLLAPSED_SUFFIX) or os.path.basename(name) != name:
+        abort(404)
+    if request.args.get('format') == 'speedscope':
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                collapsed = f.read()
+        except OSError:
+            abort(404)
+        return Response(
+            json.dumps(to_speedscope(name, collapsed)),
+            mimetype='application/json',
+            headers={'Content-Disposition': f'attachment; filename="{name[:-len(COLLAPSED_SUFFIX)]}.speedscope.json"'},
+        )
+    return send_from_directory(PROFILE_DIR, name, mimetype='text/plain', as_attachment=True)
+
+
+def init_profiler(app):
+    """Register the profiling hooks and the /admin/profiles endpoints"""
+
+    @app.before_request
+    def start_profile():
+        if request.endpoint and _should_profile():
+            sampler = StackSampler(PROFILE_INTERVAL_MS / 1000)
+            g.profile_sampler = sampler
+            g.profile_name = profile_name(request.endpoint)
+            g.profile_started_at = time.perf_counter()
+            sampler.start()
+
+    @app.after_request
+    def tag_profile(response):
+        if 'profile_name' in g:
+            response.headers['X-Profile-Id'] = g.profile_name
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        # Teardown runs after every after_request hook, so response
+        # compression and metrics are part of the profile too
+        sampler = g.pop('profile_sampler', None)
+        if sampler is None:
+            return
+        stacks = sampler.stop()
+        elapsed = time.perf_counter() - g.profile_started_at
+        try:
+            write_profile(g.profile_name, stacks)
+            print(f"Profiled {request.endpoint} ({elapsed * 1000:.0f}ms, {sampler.samples} samples) -> {g.profile_name}")
+        except Exception as e:
+            print(f"Error writing profile: {str(e)}")
+
+    app.register_blueprint(profiler_bp)
+    return app
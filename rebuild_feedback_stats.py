@@ -0,0 +1,92 @@
+"""
+Recompute the feedback aggregates (feedback_stats/*) from the feedback
+collection.
+
+submit_feedback and reply_to_feedback keep the aggregates current; run this
+once to count feedback submitted before they existed, or to repair them.
+It overwrites every aggregate document it computes.
+
+    python rebuild_feedback_stats.py --dry-run
+    python rebuild_feedback_stats.py
+"""
+import argparse
+from datetime import datetime
+
+from feedback_firebase import (
+    FEEDBACK_STATS_COLLECTION, FEEDBACK_SUMMARY_DOC, complaint_stats_doc_id,
+)
+from firebase_config import get_db
+
+BATCH_SIZE = 500
+
+
+def _add(stats, feedback, reply_seconds):
+    rating = feedback.get('rating')
+    if rating in (1, 2, 3, 4, 5):
+        stats['count'] = stats.get('count', 0) + 1
+        stats['rating_sum'] = stats.get('rating_sum', 0) + rating
+        distribution = stats.setdefault('distribution', {})
+        distribution[str(rating)] = distribution.get(str(rating), 0) + 1
+    if reply_seconds is not None:
+        stats['replied_count'] = stats.get('replied_count', 0) + 1
+        stats['reply_seconds_sum'] = stats.get('reply_seconds_sum', 0) + reply_seconds
+
+
+def _reply_seconds(feedback):
+    if feedback.get('status') != 'replied':
+        return None
+    try:
+        submitted = datetime.fromisoformat(feedback['submitted_date'])
+        replied = datetime.fromisoformat(feedback['replied_date'])
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+    return max(0.0, (replied - submitted).total_seconds())
+
+
+def compute_feedback_stats(feedback_docs):
+    """{aggregate document id: data} for an iterable of feedback dicts"""
+    now = datetime.now().isoformat()
+    aggregates = {FEEDBACK_SUMMARY_DOC: {'by_type': {}, 'updated_at': now}}
+    summary = aggregates[FEEDBACK_SUMMARY_DOC]
+    for feedback in feedback_docs:
+        reply_seconds = _reply_seconds(feedback)
+        _add(summary, feedback, reply_seconds)
+        feedback_type = feedback.get('feedback_type') or 'other'
+        _add(summary['by_type'].setdefault(feedback_type, {}), feedback, reply_seconds)
+        if feedback.get('complaint_id'):
+            doc_id = complaint_stats_doc_id(feedback['complaint_id'])
+            stats = aggregates.setdefault(doc_id, {'complaint_id': feedback['complaint_id'], 'updated_at': now})
+            _add(stats, feedback, reply_seconds)
+    return aggregates
+
+
+def rebuild_feedback_stats(db, dry_run=False):
+    """Recompute and write every aggregate, return how many were written"""
+    feedback_docs = (doc.to_dict() or {} for doc in db.collection('feedback').stream())
+    aggregates = compute_feedback_stats(feedback_docs)
+    if dry_run:
+        return len(aggregates)
+
+    stats_ref = db.collection(FEEDBACK_STATS_COLLECTION)
+    batch = db.batch()
+    pending = 0
+    for doc_id, data in aggregates.items():
+        batch.set(stats_ref.document(doc_id), data)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    return len(aggregates)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recompute feedback aggregates from the feedback collection')
+    parser.add_argument('--dry-run', action='store_true', help='compute without writing')
+    args = parser.parse_args()
+
+    written = rebuild_feedback_stats(get_db(), dry_run=args.dry_run)
+    action = 'Would write' if args.dry_run else 'Wrote'
+    print(f"{action} {written} feedback aggregate documents")
@@ -0,0 +1,490 @@
+"""
+Deadlines, retries, circuit breakers and a stale-result fallback for Firestore.
+
+get_db() hands out the client wrapped in GuardedFirestore (around the
+metrics wrapper), so a slow or failing Firestore no longer blocks worker
+threads indefinitely:
+
+    reads   every get/get_all has a FIRESTORE_READ_TIMEOUT deadline (default
+            5s) and every stream() FIRESTORE_STREAM_TIMEOUT (default 30s).
+            After a transient error (unavailable, deadline exceeded, ...)
+            a read is retried up to FIRESTORE_READ_RETRIES times (default 2)
+            with full-jitter exponential backoff. A stream is only retried
+            if it failed before its first document.
+    writes  FIRESTORE_WRITE_TIMEOUT deadline (default 10s), never retried: a
+            write that timed out may still have been applied.
+
+Each (collection, operation) pair has a circuit breaker. After
+CIRCUIT_FAILURE_THRESHOLD consecutive transient failures (default 5) it
+opens and calls fail at once for CIRCUIT_RESET_SECONDS (default 30); then a
+single trial call is let through, and its success closes the circuit.
+
+The last result of each read is kept per query shape: the chain of
+collection/where/order_by/limit/... calls plus the operation and its
+arguments. The cache is an LRU holding at most STALE_CACHE_DOCS documents
+(default 10000). When a read fails or its circuit is open, the cached result
+is returned if it is at most STALE_MAX_AGE seconds old (default 900). The
+response is then marked with `Warning: 110 - "Response is Stale"` and
+X-Data-Stale-Seconds. With nothing cached the read raises
+FirestoreUnavailable, and the request gets a 503 with Retry-After - also
+when the handler caught the error and built a JSON response (usually an
+empty list, which users would read as data loss).
+
+Identical reads issued concurrently in a worker share one Firestore call
+(singleflight.py), keyed by the same query shape.
+
+Reads and writes inside transactions, and bulk writers, are passed through
+unchanged.
+"""
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_request_context, jsonify
+from google.api_core import exceptions
+
+from metrics import (
+    FIRESTORE_CIRCUIT_OPENED, FIRESTORE_COALESCED, FIRESTORE_RETRIES, FIRESTORE_STALE_SERVED, WRAPPED_TYPES,
+    InstrumentedFirestore, _current_route,
+)
+from singleflight import SINGLE_FLIGHT_MAX_DOCS, FlightGroup
+
+READ_TIMEOUT = float(os.environ.get('FIRESTORE_READ_TIMEOUT', '5'))
+STREAM_TIMEOUT = float(os.environ.get('FIRESTORE_STREAM_TIMEOUT', '30'))
+WRITE_TIMEOUT = float(os.environ.get('FIRESTORE_WRITE_TIMEOUT', '10'))
+READ_RETRIES = int(os.environ.get('FIRESTORE_READ_RETRIES', '2'))
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.environ.get('CIRCUIT_RESET_SECONDS', '30'))
+STALE_CACHE_DOCS = int(os.environ.get('STALE_CACHE_DOCS', '10000'))
+STALE_MAX_AGE = float(os.environ.get('STALE_MAX_AGE', '900'))
+
+TRANSIENT_ERRORS = (
+    exceptions.DeadlineExceeded, exceptions.ServiceUnavailable,
+    exceptions.InternalServerError, exceptions.ResourceExhausted,
+    TimeoutError, ConnectionError,
+)
+# Read RPCs, by the kind of object they are called on
+READ_KINDS = {'Client', 'CollectionReference', 'Query', 'CollectionGroup',
+              'DocumentReference', 'AggregationQuery'}
+STREAM_OPS = {'stream', 'get_all'}
+READ_OPS = {'get'} | STREAM_OPS
+# Write RPCs (WriteBatch.set and friends only stage a write; commit sends it)
+WRITE_RPCS = {
+    'DocumentReference': {'create', 'set', 'update', 'delete'},
+    'CollectionReference': {'add'},
+    'WriteBatch': {'commit'},
+}
+
+
+class FirestoreUnavailable(exceptions.ServiceUnavailable):
+    """A read failed or its circuit is open, and there was no cached result"""
+
+
+# ============ CIRCUIT BREAKERS ============
+
+class CircuitBreaker:
+    """Closed, open after consecutive failures, half-open (one trial) after a pause"""
+
+    def __init__(self, collection, op):
+        self.collection = collection
+        self.op = op
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.retry_after() == 0 else 'open'
+
+    def retry_after(self):
+        """Seconds until a trial call is allowed (0 when closed or due)"""
+        if self.opened_at is None:
+            return 0
+        return max(0.0, self.opened_at + CIRCUIT_RESET_SECONDS - time.monotonic())
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or self.retry_after() > 0:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= CIRCUIT_FAILURE_THRESHOLD):
+                self.opened_at = time.monotonic()
+                FIRESTORE_CIRCUIT_OPENED.labels(self.collection, self.op).inc()
+                print(f"Firestore circuit for {self.op} on {self.collection} opened "
+                      f"after {self.failures} failures")
+            self._trial = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(collection, op):
+    key = (collection, op)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(key, CircuitBreaker(collection, op))
+    return breaker
+
+
+# ============ STALE RESULTS ============
+
+class StaleCache:
+    """LRU of the last result per query shape, bounded by documents held"""
+
+    def __init__(self, max_docs):
+        self.max_docs = max_docs
+        self.docs = 0
+        self._entries = OrderedDict()  # key -> (stored_at, size, result)
+        self._lock = threading.Lock()
+
+    def put(self, key, result, size):
+        if size > self.max_docs:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.docs -= old[1]
+            self._entries[key] = (time.monotonic(), size, result)
+            self.docs += size
+            while self.docs > self.max_docs:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.docs -= evicted
+
+    def get(self, key):
+        """(age in seconds, result), or None if missing or too old"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        return (age, entry[2]) if age <= STALE_MAX_AGE else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.docs = 0
+
+
+_stale = StaleCache(STALE_CACHE_DOCS)
+
+
+def reset():
+    """Close every circuit and drop cached results (used by tests)"""
+    with _breakers_lock:
+        _breakers.clear()
+    _stale.clear()
+
+
+def _fallback(key, collection, op, breaker, error):
+    cached = _stale.get(key)
+    if cached is not None:
+        age, result = cached
+        FIRESTORE_STALE_SERVED.labels(_current_route(), collection).inc()
+        if has_request_context():
+            g.firestore_stale_age = max(g.get('firestore_stale_age', 0), age)
+        print(f"Serving {age:.0f}s old {op} result for {collection}: {error or 'circuit open'}")
+        return result
+    if has_request_context():
+        g.firestore_unavailable = max(breaker.retry_after(), 1)
+    raise FirestoreUnavailable(f"Firestore {op} on {collection} is unavailable") from error
+
+
+class SharedFailure(Exception):
+    """The identical in-flight call a read joined failed with error"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+_flights = FlightGroup()
+
+
+def _coalesced(key, collection, op, call, timeout):
+    """Result of call, or of an identical call already in flight in this worker"""
+    flight, leader = _flights.begin(key)
+    if not leader:
+        if flight.wait(timeout):
+            FIRESTORE_COALESCED.labels(collection, op).inc()
+            if flight.error is not None:
+                raise SharedFailure(flight.error)
+            return flight.result
+        return call()
+    try:
+        result = call()
+    except Exception as e:
+        _flights.finish(key, flight, error=e)
+        raise
+    _flights.finish(key, flight, result=result)
+    return result
+
+
+def _backoff(attempt, collection, op):
+    FIRESTORE_RETRIES.labels(collection, op).inc()
+    time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)))
+
+
+# ============ CLIENT WRAPPER ============
+
+def _raw(target):
+    while isinstance(target, (GuardedFirestore, InstrumentedFirestore)):
+        target = target._target
+    return target
+
+
+def _unwrap(value):
+    if isinstance(value, GuardedFirestore):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _shape_value(value):
+    """Hashable description of a call argument, for query-shape keys"""
+    if isinstance(value, GuardedFirestore):
+        return value._shape
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_shape_value(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _shape_value(v)) for k, v in value.items()))
+    if hasattr(value, 'reference') and hasattr(value, 'exists'):
+        return ('snapshot', value.reference.path)
+    if hasattr(value, 'field_path') and hasattr(value, 'op_string'):
+        return ('filter', value.field_path, value.op_string, _shape_value(value.value))
+    if hasattr(value, 'path') and isinstance(getattr(value, 'path'), str):
+        return ('ref', value.path)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _collection_of(shape):
+    """Collection a query shape reads from, for breaker keys and labels"""
+    for step, args, _ in reversed(shape):
+        if not args or not isinstance(args[0], str):
+            continue
+        if step in ('collection', 'collection_group'):
+            return args[0].split('/')[-1]
+        if step == 'document' and '/' in args[0]:
+            return args[0].split('/')[-2]
+    return '-'
+
+
+class GuardedFirestore:
+    """Proxy adding deadlines, retries, breakers and stale fallback to RPCs"""
+
+    __slots__ = ('_target', '_shape', '_kind')
+
+    def __init__(self, target, shape=()):
+        self._target = target
+        self._shape = shape
+        self._kind = type(_raw(target)).__name__
+
+    def __repr__(self):
+        return f"GuardedFirestore({self._target!r})"
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(name, attr, args, kwargs)
+        return call
+
+    def _call(self, name, method, args, kwargs):
+        if name == 'get_all' and args:
+            args = (list(args[0]),) + args[1:]
+        in_transaction = kwargs.get('transaction') is not None
+        plain_args = tuple(_unwrap(a) for a in args)
+        plain_kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+
+        if not in_transaction and name in READ_OPS and self._kind in READ_KINDS:
+            return self._read(name, method, args, plain_args, plain_kwargs)
+        if not in_transaction and name in WRITE_RPCS.get(self._kind, ()):
+            return self._write(name, method, plain_args, plain_kwargs)
+
+        result = method(*plain_args, **plain_kwargs)
+        if isinstance(result, InstrumentedFirestore) or type(result).__name__ in WRAPPED_TYPES:
+            step = (name, _shape_value(args), _shape_value(kwargs))
+            return GuardedFirestore(result, self._shape + (step,))
+        return result
+
+    def _read(self, name, method, args, plain_args, kwargs):
+        if name == 'get_all':
+            refs = args[0] if args else []
+            shape = refs[0]._shape if refs and isinstance(refs[0], GuardedFirestore) else ()
+        else:
+            shape = self._shape
+        collection = _collection_of(shape)
+        key = self._shape + ((name, _shape_value(args), _shape_value(kwargs)),)
+        breaker = get_breaker(collection, name)
+        kwargs.setdefault('timeout', STREAM_TIMEOUT if name == 'stream' else READ_TIMEOUT)
+        kwargs.setdefault('retry', None)
+
+        if name in STREAM_OPS:
+            return self._stream(method, plain_args, kwargs, key, collection, name, breaker)
+
+        for attempt in range(READ_RETRIES + 1):
+            if not breaker.allow():
+                return _fallback(key, collection, name, breaker, None)
+            try:
+                result = _coalesced(key, collection, name, lambda: method(*plain_args, **kwargs),
+                                    kwargs['timeout'])
+            except SharedFailure as e:
+                # The identical call this one joined failed; its caller counted it
+                error = e.error
+                if not isinstance(error, TRANSIENT_ERRORS):
+                    raise error
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                error = e
+            else:
+                breaker.record_success()
+                _stale.put(key, result, len(result) if isinstance(result, list) else 1)
+                return result
+            if attempt < READ_RETRIES:
+                _backoff(attempt, collection, name)
+                continue
+            return _fallback(key, collection, name, breaker, error)
+
+    def _stream(self, method, args, kwargs, key, collection, name, breaker):
+        for attempt in range(READ_RETRIES + 1):
+            if not breaker.allow():
+                yield from _fallback(key, collection, name, breaker, None)
+                return
+            flight, leader = _flights.begin(key)
+            if not leader and flight.wait(kwargs['timeout']):
+                FIRESTORE_COALESCED.labels(collection, name).inc()
+                if flight.error is None:
+                    yield from flight.result
+                    return
+                # The identical stream this one joined failed; its caller counted it
+                error = flight.error
+                if not isinstance(error, TRANSIENT_ERRORS):
+                    raise error
+            else:
+                # Leading (or the leader was too slow): run it, keeping the
+                # documents so followers can replay them
+                publish = flight if leader else None
+                started = False
+                kept = []
+                try:
+                    for item in method(*args, **kwargs):
+                        started = True
+                        if kept is not None:
+                            kept.append(item)
+                            if len(kept) > SINGLE_FLIGHT_MAX_DOCS:
+                                kept = None
+                        yield item
+                except TRANSIENT_ERRORS as e:
+                    breaker.record_failure()
+                    if publish:
+                        _flights.finish(key, publish, error=e, shared=not started)
+                    if started:
+                        raise
+                    error = e
+                except GeneratorExit:
+                    # The caller stopped reading part-way
+                    if publish:
+                        _flights.finish(key, publish, shared=False)
+                    raise
+                except Exception as e:
+                    if publish:
+                        _flights.finish(key, publish, error=e)
+                    raise
+                else:
+                    breaker.record_success()
+                    if publish:
+                        _flights.finish(key, publish, result=kept, shared=kept is not None)
+                    if kept is not None:
+                        _stale.put(key, kept, len(kept))
+                    return
+            if attempt < READ_RETRIES:
+                _backoff(attempt, collection, name)
+                continue
+            yield from _fallback(key, collection, name, breaker, error)
+            return
+
+    def _write(self, name, method, args, kwargs):
+        collection = _collection_of(self._shape)
+        breaker = get_breaker(collection, name)
+        if not breaker.allow():
+            raise FirestoreUnavailable(f"Firestore {name} on {collection} is unavailable "
+                                       f"(retry in {breaker.retry_after():.0f}s)")
+        kwargs.setdefault('timeout', WRITE_TIMEOUT)
+        try:
+            result = method(*args, **kwargs)
+        except TRANSIENT_ERRORS:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+
+def guard_client(client):
+    """Wrap a (metrics-wrapped) Firestore client with deadlines, retries and breakers"""
+    if isinstance(client, GuardedFirestore):
+        return client
+    return GuardedFirestore(client)
+
+
+# ============ FLASK HOOK ============
+
+def _unavailable_response(retry_after):
+    response = jsonify({'error': 'The database is temporarily unavailable, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def init_resilience(app):
+    """Mark responses built from stale results; turn unavailable reads into 503s"""
+
+    @app.errorhandler(FirestoreUnavailable)
+    def firestore_unavailable(error):
+        return _unavailable_response(g.pop('firestore_unavailable', 1))
+
+    @app.after_request
+    def mark_degraded_response(response):
+        retry_after = g.pop('firestore_unavailable', None)
+        stale_age = g.pop('firestore_stale_age', None)
+        if retry_after is not None and response.is_json and not response.is_streamed:
+            return _unavailable_response(retry_after)
+        if stale_age is not None:
+            response.headers['Warning'] = '110 - "Response is Stale"'
+            response.headers['X-Data-Stale-Seconds'] = str(int(stale_age))
+        return response
+
+    return app
@@ -0,0 +1,124 @@
+"""
+Conditional and compressed responses for the JSON API.
+
+The dashboards poll /messages, /notifications, /notifications/list,
+/complaint/recent and the stats endpoints every 30 seconds and on every
+window focus, and almost every poll returns exactly what the previous one
+did. After each request we:
+
+1. tag GET responses with an ETag (hash of the body) and answer a matching
+   If-None-Match with an empty 304, which the browser's HTTP cache turns
+   back into the previous body for fetch() transparently;
+2. compress larger bodies with brotli (if installed) or gzip, lowering the
+   compression level as the payload grows so big complaint lists do not
+   cost more CPU than they save in transfer time.
+"""
+import gzip
+import hashlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent as-is (headers would cost more than we save)
+MIN_COMPRESS_SIZE = 1024
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/javascript',
+    'text/javascript',
+)
+
+# (max body size, gzip level, brotli quality) - first matching row wins
+COMPRESSION_LEVELS = (
+    (64 * 1024, 6, 5),
+    (1024 * 1024, 4, 4),
+    (None, 1, 1),
+)
+
+
+def _compression_level(size):
+    """Pick gzip level and brotli quality for a body of the given size"""
+    for max_size, gzip_level, brotli_quality in COMPRESSION_LEVELS:
+        if max_size is None or size <= max_size:
+            return gzip_level, brotli_quality
+
+
+def _body_etag(data):
+    """Cheap content hash used as a weak ETag"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _is_eligible(response):
+    """Only touch complete, successful, uncompressed bodies"""
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSIBLE_TYPES
+    )
+
+
+def _apply_etag(response):
+    """Add an ETag and turn the response into a 304 if the client has it"""
+    if request.method not in ('GET', 'HEAD') or response.headers.get('ETag'):
+        return response
+
+    etag = _body_etag(response.get_data())
+    response.set_etag(etag, weak=True)
+    # Per-user data: may be cached by the browser but must be revalidated
+    response.headers.setdefault('Cache-Control', 'private, no-cache')
+
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        response.set_data(b'')
+        response.headers.pop('Content-Type', None)
+        response.headers.pop('Content-Length', None)
+    return response
+
+
+def _apply_compression(response):
+    """Compress the body with the best encoding the client accepts"""
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    accept = request.accept_encodings
+    gzip_level, brotli_quality = _compression_level(len(data))
+
+    if brotli is not None and accept['br']:
+        compressed = brotli.compress(data, quality=brotli_quality)
+        encoding = 'br'
+    elif accept['gzip']:
+        compressed = gzip.compress(data, compresslevel=gzip_level)
+        encoding = 'gzip'
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_response_middleware(app):
+    """Register the ETag and compression handlers on the Flask app"""
+
+    @app.after_request
+    def conditional_and_compressed(response):
+        if not _is_eligible(response):
+            return response
+
+        response.vary.update(('Cookie', 'Accept-Encoding'))
+        response = _apply_etag(response)
+        if response.status_code == 200:
+            response = _apply_compression(response)
+        return response
+
+    return app
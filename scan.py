@@ -0,0 +1,192 @@
+"""
+Parallel partitioned collection scan for bulk jobs.
+
+Backups, migrations, counter rebuilds and consistency checks need a full
+pass over a collection, which a single collection.stream() does one page
+after another. scan_collection() splits the collection into document-id
+ranges with a Firestore partition query (the memory stand-in splits its
+sorted ids the same way) and reads the ranges concurrently:
+
+    def handle(page):
+        for doc in page:
+            ...
+
+    scan_collection(get_db(), 'complaints', handle, workers=16)
+
+Each worker reads one page of its range, passes it to handle() and only
+then reads the next page, so a slow handler slows the reads down instead
+of letting pages pile up in memory (at most workers * page_size documents
+are held at once). handle() is called from several threads at a time and
+must be thread-safe.
+
+With a checkpoint file, the last document id handled in every range is
+saved after each page; running the same scan again after an interruption
+skips what was already handled. The file is removed once the scan
+completes. A page that was being handled when the job stopped is handled
+again on resume, so handlers should be idempotent.
+
+    python scan.py complaints users --workers 16
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from firebase_config import get_db
+
+SCAN_WORKERS = int(os.environ.get('SCAN_WORKERS', '8'))
+SCAN_PAGE_SIZE = 500
+# Ranges per worker, so one slow range does not leave the others idle
+PARTITIONS_PER_WORKER = 4
+# Field path Firestore orders and filters document ids by
+DOCUMENT_ID = '__name__'
+
+
+def partition_ranges(db, collection, partitions):
+    """[(start_id, end_id)] covering the collection; None is open-ended"""
+    if partitions <= 1:
+        return [(None, None)]
+    ranges = []
+    for partition in db.collection_group(collection).get_partitions(partitions):
+        start = partition.start_at.id if partition.start_at is not None else None
+        end = partition.end_at.id if partition.end_at is not None else None
+        ranges.append((start, end))
+    return ranges or [(None, None)]
+
+
+class Checkpoint:
+    """Per-range progress of one scan, saved to a JSON file"""
+
+    def __init__(self, path, collection, ranges):
+        self.path = path
+        self.collection = collection
+        self.ranges = ranges
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, collection):
+        """Saved progress for collection, or None to start a new scan"""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('collection') != collection:
+            raise ValueError(f"Checkpoint {path} is for {state.get('collection')}, not {collection}")
+        return cls(path, collection, state['ranges'])
+
+    @classmethod
+    def new(cls, path, collection, bounds):
+        ranges = [{'start': start, 'end': end, 'last': None, 'done': False, 'documents': 0}
+                  for start, end in bounds]
+        checkpoint = cls(path, collection, ranges)
+        checkpoint.save()
+        return checkpoint
+
+    def advance(self, index, last_id, documents, done=False):
+        with self._lock:
+            entry = self.ranges[index]
+            entry['last'] = last_id or entry['last']
+            entry['documents'] += documents
+            entry['done'] = done
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'collection': self.collection, 'ranges': self.ranges}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def documents(self):
+        return sum(entry['documents'] for entry in self.ranges)
+
+
+def _range_query(db, collection, entry, page_size, select):
+    collection_ref = db.collection(collection)
+    query = collection_ref.order_by(DOCUMENT_ID)
+    if select is not None:
+        query = query.select(select)
+    if entry['last'] is not None:
+        query = query.start_after([collection_ref.document(entry['last'])])
+    elif entry['start'] is not None:
+        query = query.start_at([collection_ref.document(entry['start'])])
+    if entry['end'] is not None:
+        query = query.end_before([collection_ref.document(entry['end'])])
+    return query.limit(page_size)
+
+
+def _scan_range(db, collection, index, checkpoint, handle, page_size, select, stop):
+    entry = checkpoint.ranges[index]
+    while not entry['done'] and not stop.is_set():
+        page = list(_range_query(db, collection, entry, page_size, select).stream())
+        if page:
+            handle(page)
+        checkpoint.advance(index, page[-1].id if page else None, len(page),
+                           done=len(page) < page_size)
+
+
+def scan_collection(db, collection, handle, workers=SCAN_WORKERS, partitions=None,
+                    page_size=SCAN_PAGE_SIZE, checkpoint=None, select=None):
+    """Call handle(page) for every page of documents in collection, return a summary"""
+    started = time.perf_counter()
+    progress = Checkpoint.load(checkpoint, collection)
+    resumed = progress is not None
+    if progress is None:
+        partitions = partitions or workers * PARTITIONS_PER_WORKER
+        progress = Checkpoint.new(checkpoint, collection, partition_ranges(db, collection, partitions))
+    already_handled = progress.documents
+
+    stop = threading.Event()
+    pending = [i for i, entry in enumerate(progress.ranges) if not entry['done']]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'scan-{collection}') as pool:
+        futures = [pool.submit(_scan_range, db, collection, i, progress, handle, page_size, select, stop)
+                   for i in pending]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            # Let running ranges finish their page; progress stays in the checkpoint
+            stop.set()
+            raise
+
+    progress.remove()
+    seconds = time.perf_counter() - started
+    documents = progress.documents - already_handled
+    return {
+        'collection': collection,
+        'documents': documents,
+        'ranges': len(progress.ranges),
+        'resumed': resumed,
+        'seconds': round(seconds, 3),
+        'docs_per_second': round(documents / seconds, 1) if seconds else None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count the documents in collections with a parallel scan')
+    parser.add_argument('collections', nargs='+')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS)
+    parser.add_argument('--partitions', type=int, help=f'ranges to split into (default workers x {PARTITIONS_PER_WORKER})')
+    parser.add_argument('--page-size', type=int, default=SCAN_PAGE_SIZE)
+    parser.add_argument('--checkpoint-dir', help='save progress here so an interrupted scan resumes')
+    args = parser.parse_args()
+
+    db = get_db()
+    for name in args.collections:
+        path = os.path.join(args.checkpoint_dir, f'scan-{name}.json') if args.checkpoint_dir else None
+        if path:
+            os.makedirs(args.checkpoint_dir, exist_ok=True)
+        summary = scan_collection(db, name, lambda page: None, workers=args.workers,
+                                  partitions=args.partitions, page_size=args.page_size,
+                                  checkpoint=path, select=[])
+        print(f"{name}: {summary['documents']} documents in {summary['ranges']} ranges, "
+              f"{summary['seconds']}s ({summary['docs_per_second']} docs/s)"
+              f"{' (resumed)' if summary['resumed'] else ''}")
@@ -0,0 +1,285 @@
+"""
+Deterministic synthetic data for the Firestore stand-in.
+
+generate(complaints=N) yields users, complaints (with status histories and
+optional base64 attachments), feedback and notifications in the same shapes
+the blueprints write them, scaled from the number of complaints, plus a fixed
+set of "probe" accounts whose own history does not grow with the dataset.
+seed(db, complaints=N) writes that dataset to a client in batches. The budget
+harness and benchmarks log in as the probes so per-user routes can be told
+apart from whole-collection scans.
+"""
+import base64
+import random
+from datetime import datetime, timedelta, timezone
+
+from complaint_ids import complaint_id_at
+from user_search import user_search_fields
+
+CATEGORIES = ['security', 'emergency', 'waste', 'road', 'water', 'others']
+URGENCY = {'security': 'High', 'emergency': 'High', 'waste': 'Medium',
+           'road': 'Medium', 'water': 'Medium', 'others': 'Low'}
+RESOLUTION = {'High': '24 hours', 'Medium': '3 days', 'Low': '7 days'}
+STATUSES = ['New', 'Pending', 'In Progress', 'Escalated', 'Resolved']
+STATUS_WEIGHTS = [20, 10, 20, 5, 45]
+# Status history each final status went through
+STATUS_PATHS = {
+    'New': [],
+    'Pending': ['Pending'],
+    'In Progress': ['Pending', 'In Progress'],
+    'Escalated': ['Pending', 'In Progress', 'Escalated'],
+    'Resolved': ['Pending', 'In Progress', 'Resolved'],
+}
+FEEDBACK_TYPES = ['complaint-process', 'response-time', 'staff-courtesy', 'resolution-quality',
+                  'system-usability', 'other']
+
+# Barangays have a handful of officials however many residents they serve
+OFFICIAL_COUNT = 5
+
+PROBE_RESIDENT_UID = 'probe-resident'
+PROBE_OTHER_RESIDENT_UID = 'probe-resident-2'
+PROBE_OFFICIAL_UID = 'probe-official'
+PROBE_ADMIN_UID = 'probe-admin'
+PROBE_PENDING_UID = 'probe-pending-official'
+PROBE_COMPLAINTS = 3
+PROBE_FEEDBACK = 2
+PROBE_MESSAGES = 5
+PROBE_NOTIFICATIONS = 5
+
+BASE_TIME = datetime(2025, 6, 1, 8, 0, 0)
+
+
+def _user(uid, role, index, created_at, **extra):
+    user = {
+        'full_name': f"{role.title()} {index:05d}",
+        'email': f"{uid}@example.com",
+        'phone': f"0917{index:07d}",
+        'role': role,
+        'created_at': created_at.isoformat(),
+        'status': 'approved',
+    }
+    user.update(extra)
+    user.update(user_search_fields(user))
+    return user
+
+
+def _message(rng, index, from_email, to_email, timestamp):
+    return {
+        'id': f"m{index:07d}",
+        'from_email': from_email,
+        'from_name': from_email.split('@')[0],
+        'to_email': to_email,
+        'to_name': to_email.split('@')[0],
+        'subject': f"Follow-up #{index}",
+        'content': 'Any update on my complaint? ' * rng.randint(1, 4),
+        'complaint_id': None,
+        'timestamp': timestamp.isoformat(),
+        'read': rng.random() < 0.5,
+    }
+
+
+def _notification(index, complaint_id, timestamp):
+    return {
+        'id': f"n{index:07d}",
+        'timestamp': timestamp.isoformat(),
+        'title': f"Complaint Status Updated: {complaint_id}",
+        'message': 'Your complaint status has been updated.',
+        'complaint_id': complaint_id,
+        'read': False,
+    }
+
+
+def _attachment(rng, index, size):
+    return {
+        'filename': f"photo_{index}.jpg",
+        'data': base64.b64encode(rng.randbytes(size)).decode('ascii'),
+        'mime_type': 'image/jpeg',
+    }
+
+
+def _complaint(rng, index, user_uid, user, submitted, attachment_rate=0.0, attachment_bytes=0):
+    category = rng.choice(CATEGORIES)
+    urgency = URGENCY[category]
+    status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+    complaint_id = complaint_id_at(submitted, index)
+    complaint = {
+        'id': complaint_id,
+        'title': f"{category.title()} issue near purok {rng.randint(1, 12)}",
+        'category': category,
+        'description': 'Residents report the problem has persisted for days. ' * rng.randint(1, 5),
+        'location': f"Purok {rng.randint(1, 12)}, Street {rng.randint(1, 40)}",
+        'incident_date': (submitted - timedelta(days=rng.randint(0, 3))).date().isoformat(),
+        'submitted_date': submitted.isoformat(),
+        'user_email': user['email'],
+        'user_uid': user_uid,
+        'user_name': user['full_name'],
+        'status': status,
+        'urgency': urgency,
+        'estimated_resolution': RESOLUTION[urgency],
+        'escalated': status == 'Escalated',
+        'assigned_to': None,
+        'notifications_sent': [],
+        'updates': [],
+    }
+
+    # Walk the status history up to the current status
+    timestamp = submitted
+    previous = 'New'
+    for step in STATUS_PATHS[status]:
+        timestamp += timedelta(hours=rng.randint(2, 96))
+        complaint['updates'].append({
+            'from_status': previous,
+            'to_status': step,
+            'timestamp': timestamp.isoformat(),
+            'updated_by': PROBE_OFFICIAL_UID,
+            'notes': 'Forwarded to the responsible team.' if rng.random() < 0.5 else '',
+        })
+        previous = step
+    if complaint['updates']:
+        complaint['updated_at'] = timestamp.isoformat()
+        complaint['updated_by'] = PROBE_OFFICIAL_UID
+
+    if attachment_bytes and rng.random() < attachment_rate:
+        complaint['attachments'] = [_attachment(rng, i, attachment_bytes)
+                                    for i in range(rng.randint(1, 3))]
+    return complaint
+
+
+def _activity(activity_type, icon, message, actor_uid, subject_id, timestamp):
+    return {
+        'type': activity_type,
+        'icon': icon,
+        'message': message,
+        'ts': timestamp.replace(tzinfo=timezone.utc).isoformat(),
+        'actor_uid': actor_uid,
+        'subject_id': subject_id,
+    }
+
+
+def _feedback(rng, feedback_id, uid, user, complaint_id, submitted):
+    return {
+        'id': feedback_id,
+        'user_uid': uid,
+        'user_name': user['full_name'],
+        'user_email': user['email'],
+        'feedback_type': rng.choice(FEEDBACK_TYPES),
+        'rating': rng.choices([1, 2, 3, 4, 5], [5, 5, 15, 35, 40])[0],
+        'message': 'Thank you for the quick response. ' * rng.randint(1, 3),
+        'contact_me': True,
+        'complaint_id': complaint_id,
+        'submitted_date': submitted.isoformat(),
+        'status': 'new',
+    }
+
+
+def probe_ids():
+    """Ids of the probe accounts and documents they own (same for every dataset)"""
+    return {
+        'resident_uid': PROBE_RESIDENT_UID,
+        'other_resident_uid': PROBE_OTHER_RESIDENT_UID,
+        'official_uid': PROBE_OFFICIAL_UID,
+        'admin_uid': PROBE_ADMIN_UID,
+        'pending_uid': PROBE_PENDING_UID,
+        'resident_email': f"{PROBE_RESIDENT_UID}@example.com",
+        'official_email': f"{PROBE_OFFICIAL_UID}@example.com",
+        'complaint_id': complaint_id_at(BASE_TIME, 0),
+        'feedback_id': 'probe-feedback-0',
+        'message_id': 'm0000000',
+        'notification_id': 'n0000000',
+        'admin_notification_id': 'notif-0000000',
+    }
+
+
+def generate(complaints=100, seed=42, attachment_rate=0.2, attachment_bytes=0,
+             users_per_complaint=0.25, feedback_per_complaint=0.5):
+    """Yield (collection, document_id, data) for a dataset of the given size.
+
+    Residents, feedback and admin notifications scale with the number of
+    complaints; attachments are off by default (attachment_bytes=0) because
+    they dominate memory at large scales.
+    """
+    rng = random.Random(seed)
+
+    # Probe accounts
+    resident = _user(PROBE_RESIDENT_UID, 'resident', 0, BASE_TIME)
+    other_resident = _user(PROBE_OTHER_RESIDENT_UID, 'resident', 1, BASE_TIME)
+    official = _user(PROBE_OFFICIAL_UID, 'official', 0, BASE_TIME)
+    admin = _user(PROBE_ADMIN_UID, 'official', 1, BASE_TIME, is_admin=True)
+    pending = _user(PROBE_PENDING_UID, 'official', 2, BASE_TIME, status='pending_approval')
+
+    resident['messages'] = [
+        _message(rng, i, official['email'], resident['email'], BASE_TIME + timedelta(hours=i))
+        for i in range(PROBE_MESSAGES)
+    ]
+    probe_complaints = []
+    for i in range(PROBE_COMPLAINTS):
+        complaint = _complaint(rng, i, PROBE_RESIDENT_UID, resident, BASE_TIME + timedelta(days=i))
+        probe_complaints.append(complaint['id'])
+        yield 'complaints', complaint['id'], complaint
+    resident['notifications'] = [
+        _notification(i, probe_complaints[i % PROBE_COMPLAINTS], BASE_TIME + timedelta(hours=i))
+        for i in range(PROBE_NOTIFICATIONS)
+    ]
+    for i in range(PROBE_FEEDBACK):
+        feedback_id = f"probe-feedback-{i}"
+        yield 'feedback', feedback_id, _feedback(rng, feedback_id, PROBE_RESIDENT_UID, resident,
+                                                 probe_complaints[0], BASE_TIME + timedelta(days=i))
+
+    for uid, user in ((PROBE_RESIDENT_UID, resident), (PROBE_OTHER_RESIDENT_UID, other_resident),
+                      (PROBE_OFFICIAL_UID, official), (PROBE_ADMIN_UID, admin), (PROBE_PENDING_UID, pending)):
+        yield 'users', uid, user
+
+    # Background population
+    for i in range(OFFICIAL_COUNT):
+        uid = f"official-{i:03d}"
+        yield 'users', uid, _user(uid, 'official', i + 10, BASE_TIME - timedelta(days=400))
+
+    resident_count = max(1, int(complaints * users_per_complaint))
+    residents = []
+    for i in range(resident_count):
+        uid = f"resident-{i:07d}"
+        created = BASE_TIME - timedelta(days=rng.randint(0, 365))
+        user = _user(uid, 'resident', i + 10, created)
+        official_email = f"official-{rng.randrange(OFFICIAL_COUNT):03d}@example.com"
+        user['messages'] = [
+            _message(rng, j, official_email, user['email'], created + timedelta(days=j))
+            for j in range(rng.choice((0, 0, 1, 2, 4)))
+        ]
+        user['notifications'] = []
+        residents.append((uid, user))
+        yield 'users', uid, user
+        yield 'activity', f"activity-u{i:07d}", _activity(
+            'new_user', 'user-plus', f"New resident registered: {user['full_name']}", uid, uid, created)
+
+    for i in range(complaints):
+        uid, user = residents[rng.randrange(resident_count)]
+        submitted = BASE_TIME + timedelta(minutes=rng.randint(0, 60 * 24 * 180))
+        complaint = _complaint(rng, i + PROBE_COMPLAINTS, uid, user, submitted,
+                               attachment_rate, attachment_bytes)
+        yield 'complaints', complaint['id'], complaint
+        yield 'activity', f"activity-c{i:07d}", _activity(
+            'complaint_submitted', 'file-alt', f"New complaint: {complaint['title']}", uid,
+            complaint['id'], submitted)
+        yield 'notifications', f"notif-{i:07d}", {
+            'complaint_id': complaint['id'],
+            'title': 'New complaint submitted',
+            'message': f"A new {complaint['urgency']} urgency complaint has been submitted",
+            'created_at': submitted.isoformat(),
+            'read': rng.random() < 0.7,
+        }
+        if rng.random() < feedback_per_complaint or (i == 0 and feedback_per_complaint):
+            feedback_id = f"feedback-{i:07d}"
+            yield 'feedback', feedback_id, _feedback(rng, feedback_id, uid, user, complaint['id'],
+                                                     submitted + timedelta(days=1))
+
+
+def seed(db, complaints=100, seed=42, **options):
+    """Write a generated dataset to db in batches, return probe_ids()"""
+    batch = db.batch()
+    for collection, doc_id, data in generate(complaints, seed, **options):
+        batch.set(db.collection(collection).document(doc_id), data)
+        if len(batch) >= 500:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return probe_ids()
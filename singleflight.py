@@ -0,0 +1,69 @@
+"""
+Single-flight coalescing of identical concurrent reads within a worker.
+
+When every official opens the dashboard at once, each request runs the same
+queries (all complaints for /officials/stats, the newest complaints for
+/complaint/recent, ...) at the same moment. GuardedFirestore (resilience.py)
+runs each read through a FlightGroup keyed by its query shape: the first
+caller (the leader) issues the Firestore call, and callers asking for the
+same shape while it is in flight (followers) wait for it and get the same
+result instead of issuing their own.
+
+The result is shared, not copied. That is safe because it is read-only in
+practice: snapshots hand out a fresh dict from to_dict(), and lists of
+snapshots are only iterated.
+
+A follower runs its own call if the leader does not finish within the
+call's deadline, stops reading a stream part-way, or streams more than
+SINGLE_FLIGHT_MAX_DOCS documents (they are not kept for sharing). If the
+leader's call fails, followers get the same error.
+"""
+import os
+import threading
+
+SINGLE_FLIGHT_MAX_DOCS = int(os.environ.get('SINGLE_FLIGHT_MAX_DOCS', '50000'))
+
+
+class Flight:
+    """One in-flight call and, once done, its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.shared = False   # True once result/error may be used by followers
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+    def wait(self, timeout=None):
+        """True if the leader finished in time with an outcome followers can use"""
+        return self.done.wait(timeout) and self.shared
+
+
+class FlightGroup:
+    """In-flight calls by key"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """(flight, True) for the new leader, (flight, False) to follow one in flight"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None, shared=True):
+        """Publish the leader's outcome (shared=False: followers must run their own call)"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result, flight.error, flight.shared = result, error, shared
+        flight.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,30 @@
+
+// Mobile Menu Toggle
+function toggleMobileMenu() {
+    const menu = document.querySelector('.menu');
+    const overlay = document.querySelector('.mobile-overlay');
+    const toggle = document.querySelector('.mobile-menu-toggle');
+
+    menu.classList.toggle('active');
+    overlay.classList.toggle('active');
+    toggle.classList.toggle('active');
+    document.body.style.overflow = menu.classList.contains('active') ? 'hidden' : '';
+}
+
+function closeMobileMenu() {
+    const menu = document.querySelector('.menu');
+    const overlay = document.querySelector('.mobile-overlay');
+    const toggle = document.querySelector('.mobile-menu-toggle');
+
+    menu.classList.remove('active');
+    overlay.classList.remove('active');
+    toggle.classList.remove('active');
+    document.body.style.overflow = '';
+}
+
+// Close menu on window resize
+window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
+        closeMobileMenu();
+    }
+});
@@ -0,0 +1,1605 @@
+// Close modal helper function
+function closeModal(modalId) {
+    const modal = document.getElementById(modalId);
+    if (modal) {
+        modal.style.display = 'none';
+        document.body.style.overflow = 'auto';
+    }
+}
+
+// Close modal when clicking outside
+window.addEventListener('click', function(e) {
+    if (e.target.classList.contains('modal')) {
+        e.target.style.display = 'none';
+        document.body.style.overflow = 'auto';
+    }
+});
+
+// Open modal helper function
+function openModal(modalId) {
+    const modal = document.getElementById(modalId);
+    if (modal) {
+        modal.style.display = 'block';
+        document.body.style.overflow = 'hidden';
+    }
+}
+
+// Load messages
+async function loadMessages() {
+    try {
+        const response = await fetch('/messages');
+        const messages = await response.json();
+
+        const messagesList = document.getElementById('admin-messages-list');
+        if (!messagesList) return;
+
+        if (!messages || messages.length === 0) {
+            messagesList.innerHTML = '<p style="text-align: center; padding: 20px; color: #666;">No messages yet</p>';
+            return;
+        }
+
+        // Group messages by conversation partner
+        const conversations = {};
+
+        messages.forEach(msg => {
+            let partnerEmail, partnerName;
+
+            if (msg.isSent) {
+                partnerEmail = msg.to_email;
+                partnerName = msg.to_name || msg.to_email;
+            } else {
+                partnerEmail = msg.from_email;
+                partnerName = msg.from_name || msg.from_email;
+            }
+
+            if (!conversations[partnerEmail]) {
+                conversations[partnerEmail] = {
+                    name: partnerName,
+                    email: partnerEmail,
+                    messages: [],
+                    latestTimestamp: msg.timestamp
+                };
+            }
+
+            conversations[partnerEmail].messages.push({
+                ...msg,
+                isFromMe: msg.isSent === true
+            });
+            conversations[partnerEmail].latestTimestamp = msg.timestamp;
+        });
+
+        // Sort conversations by latest message
+        const sortedConversations = Object.values(conversations).sort((a, b) => {
+            return new Date(b.latestTimestamp) - new Date(a.latestTimestamp);
+        });
+
+        messagesList.innerHTML = '';
+
+        // Display conversations
+        sortedConversations.forEach(convo => {
+            const latestMsg = convo.messages[convo.messages.length - 1];
+            const unreadCount = convo.messages.filter(m => !m.read && !m.isSent).length;
+
+            const card = document.createElement('div');
+            card.className = `message-card ${unreadCount > 0 ? 'unread' : ''}`;
+            card.style.cssText = 'background: white; padding: 15px; margin-bottom: 10px; border-radius: 8px; border-left: 4px solid #0466c8; box-shadow: 0 2px 4px rgba(0,0,0,0.1); cursor: pointer;';
+
+            const unreadIndicator = unreadCount > 0 ? `<span style="background: #ff6b6b; color: white; border-radius: 50%; width: 22px; height: 22px; display: inline-flex; align-items: center; justify-content: center; font-size: 11px; font-weight: bold;">${unreadCount}</span>` : '';
+
+            card.innerHTML = `
+                <div style="display: flex; justify-content: space-between; align-items: start;">
+                    <div style="flex: 1;">
+                        <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 5px;">
+                            <i class="fas fa-user-circle" style="font-size: 24px; color: #0466c8;"></i>
+                            <h4 style="margin: 0; color: #333; font-size: 16px;">${convo.name}</h4>
+                            ${unreadIndicator}
+                        </div>
+                        <p style="margin: 5px 0; color: #666; font-size: 13px;">${latestMsg.subject || 'No Subject'}</p>
+                        <p style="margin: 5px 0; color: #999; font-size: 12px;">${convo.messages.length} message(s) • ${formatMessageDate(latestMsg.timestamp)}</p>
+                    </div>
+                </div>
+            `;
+
+            messagesList.appendChild(card);
+
+            // Add click to view conversation
+            card.addEventListener('click', () => showConversationAdmin(convo));
+        });
+
+        updateMessagesBadge(messages);
+    } catch (error) {
+        console.error('Error loading messages:', error);
+        const messagesList = document.getElementById('admin-messages-list');
+        if (messagesList) {
+            messagesList.innerHTML = '<p style="text-align: center; padding: 20px; color: #e74c3c;">Error loading messages</p>';
+        }
+    }
+}
+
+// Show conversation modal for admin
+function showConversationAdmin(conversation) {
+    const modal = document.createElement('div');
+    modal.className = 'modal';
+    modal.style.display = 'block';
+
+    let messagesHTML = '';
+
+    // Sort messages by timestamp (oldest first)
+    const sortedMessages = [...conversation.messages].sort((a, b) => {
+        return new Date(a.timestamp) - new Date(b.timestamp);
+    });
+
+    sortedMessages.forEach(msg => {
+        const timestamp = new Date(msg.timestamp).toLocaleString();
+        const isFromMe = msg.isSent === true;
+        const senderName = isFromMe ? 'You (Admin)' : (msg.from_name || msg.from_email);
+
+        if (isFromMe) {
+            messagesHTML += `
+                <div style="display: flex; justify-content: flex-end; margin: 15px 0;">
+                    <div style="max-width: 70%; background: #0466c8; color: white; border-radius: 15px 15px 5px 15px; padding: 12px 16px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                        <p style="margin: 0 0 5px 0; font-size: 13px; opacity: 0.9; font-weight: 600;">${senderName}</p>
+                        ${msg.subject ? `<p style="margin: 0 0 8px 0; font-size: 13px; opacity: 0.85; font-weight: 500; border-bottom: 1px solid rgba(255,255,255,0.3); padding-bottom: 5px;">Subject: ${msg.subject}</p>` : ''}
+                        <p style="margin: 0 0 8px 0; white-space: pre-wrap; font-size: 14px; line-height: 1.4;">${msg.content}</p>
+                        <p style="margin: 0; font-size: 11px; opacity: 0.75; text-align: right;">${timestamp}</p>
+                    </div>
+                </div>
+            `;
+        } else {
+            messagesHTML += `
+                <div style="display: flex; justify-content: flex-start; margin: 15px 0;">
+                    <div style="max-width: 70%; background: #f0f0f0; color: #333; border-radius: 15px 15px 15px 5px; padding: 12px 16px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                        <p style="margin: 0 0 5px 0; font-size: 13px; font-weight: 600; color: #0466c8;">${senderName}</p>
+                        ${msg.subject ? `<p style="margin: 0 0 8px 0; font-size: 13px; color: #666; font-weight: 500; border-bottom: 1px solid #ddd; padding-bottom: 5px;">Subject: ${msg.subject}</p>` : ''}
+                        <p style="margin: 0 0 8px 0; white-space: pre-wrap; font-size: 14px; line-height: 1.4;">${msg.content}</p>
+                        <p style="margin: 0; font-size: 11px; color: #999; text-align: left;">${timestamp}</p>
+                    </div>
+                </div>
+            `;
+        }
+    });
+
+    modal.innerHTML = `
+        <div class="modal-content" style="max-width: 750px; max-height: 85vh; display: flex; flex-direction: column; overflow: hidden;">
+            <div style="border-bottom: 2px solid #0466c8; padding: 15px 20px; background: linear-gradient(135deg, #0466c8 0%, #0353a4 100%);">
+                <h2 style="margin: 0; display: flex; align-items: center; justify-content: space-between; color: white;">
+                    <span style="display: flex; align-items: center; gap: 10px;">
+                        <i class="fas fa-comments"></i>
+                        <span>${conversation.name}</span>
+                    </span>
+                    <button class="close-btn" style="background: none; border: none; font-size: 28px; cursor: pointer; color: white; opacity: 0.9; transition: opacity 0.2s;" onmouseover="this.style.opacity='1'" onmouseout="this.style.opacity='0.9'">&times;</button>
+                </h2>
+                <p style="margin: 5px 0 0 0; font-size: 13px; color: rgba(255,255,255,0.9);">${conversation.email}</p>
+            </div>
+
+            <div style="flex: 1; overflow-y: auto; padding: 20px; background: linear-gradient(to bottom, #f8f9fa 0%, #ffffff 100%);">
+                ${messagesHTML}
+            </div>
+
+            <div style="border-top: 2px solid #e9ecef; padding: 20px; background: #f8f9fa;">
+                <h4 style="margin: 0 0 12px 0; font-size: 15px; color: #333;"><i class="fas fa-reply"></i> Send Reply</h4>
+                <form id="admin-reply-form" style="display: flex; flex-direction: column; gap: 12px;">
+                    <input type="text" id="admin-reply-subject" placeholder="Subject" style="padding: 12px; border: 2px solid #dee2e6; border-radius: 8px; font-size: 14px; transition: border-color 0.2s;" required onfocus="this.style.borderColor='#0466c8'" onblur="this.style.borderColor='#dee2e6'">
+                    <textarea id="admin-reply-content" placeholder="Type your message here..." style="padding: 12px; border: 2px solid #dee2e6; border-radius: 8px; font-size: 14px; resize: vertical; min-height: 100px; transition: border-color 0.2s;" required onfocus="this.style.borderColor='#0466c8'" onblur="this.style.borderColor='#dee2e6'"></textarea>
+                    <div style="display: flex; gap: 10px; justify-content: flex-end;">
+                        <button type="button" class="btn-secondary" style="padding: 10px 20px; border: none; background: #6c757d; color: white; border-radius: 6px; cursor: pointer; font-size: 14px; font-weight: 500; transition: background 0.2s;" onmouseover="this.style.background='#5a6268'" onmouseout="this.style.background='#6c757d'">Cancel</button>
+                        <button type="submit" class="btn-primary" style="padding: 10px 24px; background: #0466c8; color: white; border: none; border-radius: 6px; cursor: pointer; font-size: 14px; font-weight: 500; display: flex; align-items: center; gap: 8px; transition: background 0.2s;" onmouseover="this.style.background='#0353a4'" onmouseout="this.style.background='#0466c8'">
+                            <i class="fas fa-paper-plane"></i> Send
+                        </button>
+                    </div>
+                </form>
+            </div>
+        </div>
+    `;
+
+    document.body.appendChild(modal);
+    document.body.style.overflow = 'hidden';
+
+    // Close button handler
+    modal.querySelector('.close-btn').addEventListener('click', () => {
+        modal.remove();
+        document.body.style.overflow = 'auto';
+    });
+
+    // Cancel button handler
+    modal.querySelector('.btn-secondary').addEventListener('click', () => {
+        modal.remove();
+        document.body.style.overflow = 'auto';
+    });
+
+    // Form submission
+    modal.querySelector('#admin-reply-form').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const subject = modal.querySelector('#admin-reply-subject').value;
+        const content = modal.querySelector('#admin-reply-content').value;
+
+        if (!subject || !content) {
+            alert('Please fill in all fields');
+            return;
+        }
+
+        try {
+            const response = await fetch('/messages/send', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    recipient: conversation.email,
+                    subject: subject,
+                    content: content,
+                    complaint_id: null
+                })
+            });
+
+            const result = await response.json();
+            if (result.success) {
+                alert('Message sent successfully!');
+                modal.remove();
+                document.body.style.overflow = 'auto';
+                loadMessages();
+            } else {
+                alert('Error: ' + (result.message || 'Failed to send message'));
+            }
+        } catch (error) {
+            console.error('Error sending message:', error);
+            alert('Failed to send message');
+        }
+    });
+
+    // Click outside to close
+    modal.addEventListener('click', function(e) {
+        if (e.target === this) {
+            this.remove();
+            document.body.style.overflow = 'auto';
+        }
+    });
+}
+
+// Load notifications
+async function loadNotifications() {
+    try {
+        const response = await fetch('/notifications/list');
+        const notifications = await response.json();
+
+        const notificationsList = document.getElementById('admin-notifications-list');
+        if (!notificationsList) return;
+
+        if (!notifications || notifications.length === 0) {
+            notificationsList.innerHTML = '<p style="text-align: center; padding: 20px; color: #666;">No notifications yet</p>';
+            return;
+        }
+
+        notificationsList.innerHTML = '';
+        notifications.forEach(notification => {
+            const notifCard = document.createElement('div');
+            notifCard.className = `notification-card ${notification.read ? '' : 'unread'}`;
+            notifCard.style.cssText = 'background: white; padding: 15px; margin-bottom: 10px; border-radius: 8px; border-left: 4px solid #f57c00; box-shadow: 0 2px 4px rgba(0,0,0,0.1);';
+
+            const unreadIndicator = notification.read ? '' : '<span style="display: inline-block; width: 8px; height: 8px; background: #f44336; border-radius: 50%; margin-left: 8px;"></span>';
+
+            notifCard.innerHTML = `
+                <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 8px;">
+                    <h4 style="margin: 0; color: #333;">${notification.title}${unreadIndicator}</h4>
+                    <span style="font-size: 12px; color: #999;">${formatMessageDate(notification.timestamp || notification.created_at)}</span>
+                </div>
+                <p style="margin: 5px 0; color: #555; font-size: 14px;">${notification.message}</p>
+                ${!notification.read ? `<button onclick="markNotificationRead('${notification.id}')" style="margin-top: 8px; padding: 6px 12px; background: #6c757d; color: white; border: none; border-radius: 4px; cursor: pointer; font-size: 13px;">
+                    <i class="fas fa-check"></i> Mark as Read
+                </button>` : ''}
+            `;
+            notificationsList.appendChild(notifCard);
+        });
+
+        updateNotificationsBadge(notifications);
+    } catch (error) {
+        console.error('Error loading notifications:', error);
+        const notificationsList = document.getElementById('admin-notifications-list');
+        if (notificationsList) {
+            notificationsList.innerHTML = '<p style="text-align: center; padding: 20px; color: #e74c3c;">Error loading notifications</p>';
+        }
+    }
+}
+
+// Format message date
+function formatMessageDate(dateString) {
+    if (!dateString) return 'N/A';
+    const date = new Date(dateString);
+    const now = new Date();
+    const diffTime = Math.abs(now - date);
+    const diffDays = Math.floor(diffTime / (1000 * 60 * 60 * 24));
+
+    if (diffDays === 0) {
+        const diffHours = Math.floor(diffTime / (1000 * 60 * 60));
+        if (diffHours === 0) {
+            const diffMinutes = Math.floor(diffTime / (1000 * 60));
+            return diffMinutes <= 1 ? 'Just now' : `${diffMinutes} min ago`;
+        }
+        return `${diffHours} hour${diffHours > 1 ? 's' : ''} ago`;
+    } else if (diffDays === 1) {
+        return 'Yesterday';
+    } else if (diffDays < 7) {
+        return `${diffDays} days ago`;
+    } else {
+        return date.toLocaleDateString();
+    }
+}
+
+// Update messages badge
+function updateMessagesBadge(messages) {
+    const badge = document.getElementById('messages-badge');
+    if (badge) {
+        // Count only received messages (not sent) that are unread
+        const unreadCount = messages.filter(m => !m.read && !m.isSent).length;
+        badge.textContent = unreadCount;
+        badge.style.display = unreadCount > 0 ? 'inline-block' : 'none';
+    }
+}
+
+// Update notifications badge
+function updateNotificationsBadge(notifications) {
+    const badge = document.getElementById('notifications-badge');
+    if (badge) {
+        const unreadCount = notifications.filter(n => !n.read).length;
+        badge.textContent = unreadCount;
+        badge.style.display = unreadCount > 0 ? 'inline-block' : 'none';
+    }
+}
+
+// View message details
+function viewMessageDetails(messageId) {
+    alert('View message details: ' + messageId + '\n\nThis will show full message content.');
+}
+
+// Mark notification as read
+async function markNotificationRead(notificationId) {
+    try {
+        const response = await fetch('/notifications/mark-read', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ notification_id: notificationId })
+        });
+
+        if (response.ok) {
+            loadNotifications();
+        }
+    } catch (error) {
+        console.error('Error marking notification as read:', error);
+    }
+}
+
+// Mark all notifications as read
+async function markAllNotificationsRead() {
+    try {
+        const response = await fetch('/notifications/mark-all-read', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+
+        if (response.ok) {
+            loadNotifications();
+        }
+    } catch (error) {
+        console.error('Error marking all notifications as read:', error);
+    }
+}
+
+// Load admin dashboard data
+document.addEventListener('DOMContentLoaded', function() {
+    loadStats();
+    loadRecentActivity();
+    loadComplaints();
+    loadPendingRegistrations();
+    loadUsers();
+    loadCleanupJobs();
+    loadAnalytics();
+    loadMessages();
+    loadNotifications();
+
+    // Quick Navigation functionality
+    function switchQuickNavSection(sectionName) {
+        // Hide all quick nav content sections
+        document.querySelectorAll('.quick-nav-content').forEach(content => {
+            content.classList.remove('active');
+        });
+
+        // Show the selected section
+        const targetSection = document.getElementById(sectionName + '-section');
+        if (targetSection) {
+            targetSection.classList.add('active');
+        }
+
+        // Update sidebar active state
+        document.querySelectorAll('.quick-nav-link').forEach(link => {
+            link.classList.remove('active');
+            if (link.dataset.section === sectionName) {
+                link.classList.add('active');
+            }
+        });
+    }
+
+    // Quick navigation sidebar links
+    document.querySelectorAll('.quick-nav-link').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            const sectionName = this.dataset.section;
+            switchQuickNavSection(sectionName);
+        });
+    });
+
+    // Messages navigation link handler
+    document.querySelectorAll('a[href="#messages"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('messages-modal');
+            loadMessages();
+        });
+    });
+
+    // Notifications navigation link handler
+    document.querySelectorAll('a[href="#notifications"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('notifications-modal');
+            loadNotifications();
+        });
+    });
+
+    // Feedback navigation link handler
+    document.querySelectorAll('a[href="#feedback"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('feedback-modal');
+            loadFeedback();
+        });
+    });
+
+    // Recipients are suggested as the admin types, for the chosen recipient type
+    setupRecipientTypeahead('message-recipient-search', 'message-recipient', adminRecipientType);
+
+    // Compose message button handler
+    const composeMessageBtn = document.getElementById('compose-message-btn-admin');
+    if (composeMessageBtn) {
+        composeMessageBtn.addEventListener('click', function() {
+            closeModal('messages-modal');
+            openModal('message-modal');
+
+            // Reset recipient type to resident
+            const recipientType = document.getElementById('recipient-type');
+            if (recipientType) {
+                recipientType.value = 'resident';
+            }
+
+            // Suggest residents by default
+            loadAdminRecipients('');
+
+            // Load all complaints initially using shared function
+            if (typeof loadComplaintsForMessaging === 'function') {
+                loadComplaintsForMessaging(false); // false = not official dashboard
+            }
+        });
+    }
+
+    // Add event listener for recipient type change
+    const recipientTypeSelect = document.getElementById('recipient-type');
+    if (recipientTypeSelect) {
+        recipientTypeSelect.addEventListener('change', function() {
+            const selectedType = this.value;
+
+            // Suggestions of the new type, from an empty search
+            loadAdminRecipients('');
+            if (selectedType === 'resident') {
+                // Show complaint dropdown
+                const complaintGroup = document.getElementById('message-complaint-select')?.closest('.form-group');
+                if (complaintGroup) complaintGroup.style.display = 'block';
+            } else if (selectedType === 'official') {
+                // Hide complaint dropdown (officials don't have complaints)
+                const complaintGroup = document.getElementById('message-complaint-select')?.closest('.form-group');
+                if (complaintGroup) complaintGroup.style.display = 'none';
+            }
+        });
+    }
+
+    // Add event listener for resident selection to filter complaints
+    const recipientSelect = document.getElementById('message-recipient');
+    if (recipientSelect) {
+        recipientSelect.addEventListener('change', function() {
+            const selectedEmail = this.value;
+            // Use shared filtering function from messaging.js
+            if (typeof filterComplaintsByResident === 'function') {
+                filterComplaintsByResident(selectedEmail, false); // false = not official dashboard
+            }
+        });
+    }
+
+    // Mark all notifications as read button handler
+    const markAllReadBtn = document.getElementById('mark-all-read-btn');
+    if (markAllReadBtn) {
+        markAllReadBtn.addEventListener('click', function() {
+            markAllNotificationsRead();
+        });
+    }
+
+    // Messages and notifications are refreshed by messaging.js when
+    // /me/stream reports a change
+
+    // Status update form submission
+    const statusUpdateForm = document.getElementById('status-update-form');
+    if (statusUpdateForm) {
+        statusUpdateForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+
+            const complaintId = document.getElementById('complaint-id-status').value;
+            const status = document.getElementById('status-select').value;
+            const notes = document.getElementById('status-notes').value;
+            const notifyResident = document.getElementById('notify-resident').checked;
+
+            try {
+                const response = await fetch('/complaint/update', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({
+                        complaint_id: complaintId,
+                        status: status,
+                        notes: notes,
+                        notify_resident: notifyResident
+                    })
+                });
+
+                const data = await response.json();
+
+                if (data.success) {
+                    alert('Complaint status updated successfully!');
+                    closeModal('status-update-modal');
+                    loadComplaints();
+                    loadStats();
+                    loadAnalytics();
+                } else {
+                    alert('Error updating complaint: ' + data.message);
+                }
+            } catch (error) {
+                console.error('Error:', error);
+                alert('Error updating complaint status');
+            }
+        });
+    }
+
+    // Message form submission
+    const messageForm = document.getElementById('message-form');
+    if (messageForm) {
+        messageForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+
+            const recipientSelect = document.getElementById('message-recipient');
+            const toEmail = recipientSelect.value;
+            const subject = document.getElementById('message-subject').value;
+            const content = document.getElementById('message-content').value;
+            const complaintId = document.getElementById('message-complaint-select').value || null;
+
+            if (!toEmail) {
+                alert('Please select a resident');
+                return;
+            }
+
+            if (!subject || !content) {
+                alert('Please fill in all required fields');
+                return;
+            }
+
+            try {
+                const response = await fetch('/message/send', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-Requested-With': 'XMLHttpRequest'
+                    },
+                    credentials: 'same-origin',
+                    body: JSON.stringify({
+                        to_uid: selectedRecipientUid(recipientSelect),
+                        to_email: toEmail,
+                        subject: subject,
+                        content: content,
+                        complaint_id: complaintId
+                    })
+                });
+
+                const data = await response.json();
+
+                if (data.success) {
+                    alert('Message sent successfully!');
+                    closeModal('message-modal');
+                    messageForm.reset();
+                    loadMessages(); // Refresh messages list
+                } else {
+                    alert('Error sending message: ' + (data.error || data.message || 'Unknown error'));
+                }
+            } catch (error) {
+                console.error('Error:', error);
+                alert('Error sending message');
+            }
+        });
+    }
+});
+
+// Load dashboard statistics
+function loadStats() {
+    fetch('/admin/stats')
+        .then(response => response.json())
+        .then(data => {
+            document.getElementById('total-residents').textContent = data.total_residents || 0;
+            document.getElementById('total-officials').textContent = data.total_officials || 0;
+            document.getElementById('pending-requests').textContent = data.pending_requests || 0;
+            document.getElementById('upcoming-events').textContent = data.upcoming_events || 0;
+
+            // Update complaints badge
+            const badge = document.getElementById('complaints-badge');
+            if (badge) {
+                badge.textContent = data.pending_requests || 0;
+            }
+        })
+        .catch(error => {
+            console.error('Error loading stats:', error);
+        });
+}
+
+// Activity types shown with the user icon style
+const USER_ACTIVITY_TYPES = ['new_user', 'registration_approved', 'registration_rejected', 'user_blocked', 'user_unblocked'];
+
+// "5 minutes ago" / "2 hours ago" / "3 days ago" from an ISO timestamp
+function formatRelativeTime(isoString) {
+    const then = new Date(isoString);
+    if (isNaN(then)) return '';
+    const seconds = Math.max(0, Math.floor((Date.now() - then.getTime()) / 1000));
+    const days = Math.floor(seconds / 86400);
+    const hours = Math.floor(seconds / 3600);
+    const minutes = Math.floor(seconds / 60);
+
+    if (days > 0) return `${days} day${days > 1 ? 's' : ''} ago`;
+    if (hours > 0) return `${hours} hour${hours > 1 ? 's' : ''} ago`;
+    return `${minutes} minute${minutes > 1 ? 's' : ''} ago`;
+}
+
+// Load recent activity
+function loadRecentActivity() {
+    fetch('/admin/recent-activity')
+        .then(response => response.json())
+        .then(activities => {
+            const activityList = document.getElementById('activity-list');
+
+            if (activities.length === 0) {
+                activityList.innerHTML = '<p class="loading">No recent activity</p>';
+                return;
+            }
+
+            activityList.innerHTML = '';
+            activities.forEach(activity => {
+                const activityItem = document.createElement('div');
+                activityItem.className = 'activity-item';
+
+                const iconClass = USER_ACTIVITY_TYPES.includes(activity.type) ? 'new-user' : 'document';
+
+                activityItem.innerHTML = `
+                    <div class="activity-icon ${iconClass}">
+                        <i class="fas fa-${activity.icon}"></i>
+                    </div>
+                    <div class="activity-details">
+                        <p>${activity.message}</p>
+                        <span class="timestamp">${formatRelativeTime(activity.ts)}</span>
+                    </div>
+                `;
+                activityList.appendChild(activityItem);
+            });
+        })
+        .catch(error => {
+            console.error('Error loading activity:', error);
+            document.getElementById('activity-list').innerHTML = '<p class="loading">Error loading activities</p>';
+        });
+}
+
+// Store all complaints for filtering
+let allComplaints = [];
+
+// Load complaints
+function loadComplaints() {
+    fetch('/admin/complaints')
+        .then(response => response.json())
+        .then(complaints => {
+            allComplaints = complaints; // Store for filtering
+            displayComplaints(complaints);
+        })
+        .catch(error => {
+            console.error('Error loading complaints:', error);
+            document.getElementById('complaints-table-body').innerHTML = 
+                '<tr><td colspan="6" class="loading">Error loading complaints</td></tr>';
+        });
+}
+
+// Display complaints in the table
+function displayComplaints(complaints) {
+    const tbody = document.getElementById('complaints-table-body');
+
+    if (complaints.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" class="loading">No complaints found</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = '';
+    complaints.forEach(complaint => {
+        const row = document.createElement('tr');
+        row.setAttribute('data-status', complaint.status.toLowerCase().replace(/\s+/g, '-'));
+
+        // Format date
+        let formattedDate = 'N/A';
+        if (complaint.date) {
+            try {
+                const date = new Date(complaint.date);
+                formattedDate = date.toLocaleDateString('en-US', { 
+                    year: 'numeric', 
+                    month: 'short', 
+                    day: 'numeric' 
+                });
+            } catch (e) {
+                formattedDate = complaint.date;
+            }
+        }
+
+        // Determine status class
+        const statusClass = complaint.status.toLowerCase().replace(/\s+/g, '-');
+
+        row.innerHTML = `
+            <td>${complaint.id}</td>
+            <td>${complaint.title}</td>
+            <td>${complaint.resident}</td>
+            <td>${formattedDate}</td>
+            <td><span class="status ${statusClass}">${complaint.status}</span></td>
+            <td>
+                <div class="action-buttons">
+                    <button class="btn view" onclick="viewComplaint('${complaint.id}')" title="View Details"><i class="fas fa-eye"></i></button>
+                    <button class="btn edit" onclick="updateComplaintStatus('${complaint.id}')" title="Update Status"><i class="fas fa-edit"></i></button>
+                    <button class="btn message" onclick="messageResident('${complaint.id}', '${complaint.resident_email}')" title="Message Resident"><i class="fas fa-envelope"></i></button>
+                    <button class="btn delete" onclick="deleteComplaint('${complaint.id}')" title="Delete Complaint"><i class="fas fa-trash"></i></button>
+                </div>
+            </td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
+// Filter complaints by status
+function filterComplaintsByStatus() {
+    const filter = document.getElementById('complaint-status-filter').value;
+    let filteredComplaints = allComplaints;
+
+    if (filter !== 'all') {
+        filteredComplaints = allComplaints.filter(complaint => {
+            const statusKey = complaint.status.toLowerCase().replace(/\s+/g, '-');
+            return statusKey === filter || statusKey.includes(filter);
+        });
+    }
+
+    displayComplaints(filteredComplaints);
+}
+
+// Users shown so far and the cursor of the next page (/admin/users pages by name)
+let allUsers = [];
+let usersCursor = null;
+let userSearchTimer = null;
+
+// Load users matching the role filter and search box; append loads the next page
+function loadUsers(append = false) {
+    const params = new URLSearchParams({ role: document.getElementById('user-role-filter')?.value || 'all' });
+    const query = document.getElementById('user-search')?.value.trim();
+    if (query) params.set('q', query);
+    if (append && usersCursor) params.set('cursor', usersCursor);
+
+    fetch('/admin/users?' + params.toString())
+        .then(response => {
+            if (append && response.status === 400) {
+                // The last user shown was deleted since; start again from the first page
+                loadUsers();
+                return null;
+            }
+            usersCursor = response.headers.get('X-Next-Cursor');
+            return response.json();
+        })
+        .then(users => {
+            if (users === null) return;
+            allUsers = append ? allUsers.concat(users) : users;
+            displayUsers(allUsers, 'users-table-body');
+            const loadMore = document.getElementById('users-load-more');
+            if (loadMore) loadMore.style.display = usersCursor ? '' : 'none';
+        })
+        .catch(error => {
+            console.error('Error loading users:', error);
+            document.getElementById('users-table-body').innerHTML = 
+                '<tr><td colspan="4" class="loading">Error loading users</td></tr>';
+        });
+}
+
+// Search runs in Firestore by name/email prefix, once typing pauses
+function searchUsers() {
+    clearTimeout(userSearchTimer);
+    userSearchTimer = setTimeout(() => loadUsers(), 300);
+}
+
+// Display users in a table body
+function displayUsers(users, tbodyId) {
+    const tbody = document.getElementById(tbodyId);
+
+    if (users.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="4" class="loading">No users found</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = '';
+    users.forEach(user => {
+        const row = document.createElement('tr');
+        row.setAttribute('data-role', user.role);
+
+        // Determine role display
+        let roleClass = user.role;
+        let roleText = user.role;
+        if (user.is_admin) {
+            roleClass = 'admin';
+            roleText = 'Admin';
+        }
+
+        // Determine if user is blocked
+        const isBlocked = user.status === 'blocked';
+        const blockBtnClass = isBlocked ? 'unblock' : 'block';
+        const blockBtnIcon = isBlocked ? 'fa-unlock' : 'fa-ban';
+        const blockBtnTitle = isBlocked ? 'Unblock User' : 'Block User';
+
+        row.innerHTML = `
+            <td>${user.name}</td>
+            <td>${user.email}</td>
+            <td><span class="role ${roleClass}">${roleText}</span></td>
+            <td>
+                <div class="action-buttons">
+                    <button class="btn view" onclick="viewUserDetails('${user.uid}')" title="View Details"><i class="fas fa-eye"></i></button>
+                    <button class="btn message" onclick="openMessageToUser('${user.uid}', '${user.name}', '${user.email}', '${user.role}')" title="Send Message"><i class="fas fa-envelope"></i></button>
+                    <button class="btn ${blockBtnClass}" onclick="toggleBlockUser('${user.uid}', '${user.name}', ${isBlocked})" title="${blockBtnTitle}"><i class="fas ${blockBtnIcon}"></i></button>
+                    <button class="btn delete" onclick="deleteUser('${user.uid}', '${user.name}')"><i class="fas fa-trash"></i></button>
+                </div>
+            </td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
+// Filter users by role
+function filterUsersByRole() {
+    loadUsers();
+}
+
+// Load pending registrations
+function loadPendingRegistrations() {
+    fetch('/admin/pending-registrations')
+        .then(response => response.json())
+        .then(registrations => {
+            const tbody = document.getElementById('pending-registrations-body');
+            const badge = document.getElementById('pending-reg-badge');
+            const section = document.getElementById('pending-registrations-section');
+
+            if (registrations.length === 0) {
+                tbody.innerHTML = '<tr><td colspan="5" class="loading">No pending registrations</td></tr>';
+                badge.style.display = 'none';
+                return;
+            }
+
+            // Show badge with count
+            badge.textContent = registrations.length;
+            badge.style.display = 'inline-block';
+
+            tbody.innerHTML = '';
+            registrations.forEach(reg => {
+                const row = document.createElement('tr');
+
+                // Format date
+                let dateDisplay = 'N/A';
+                if (reg.created_at) {
+                    const date = new Date(reg.created_at);
+                    dateDisplay = date.toLocaleDateString('en-US', {
+                        year: 'numeric',
+                        month: 'short',
+                        day: 'numeric'
+                    });
+                }
+
+                row.innerHTML = `
+                    <td>${reg.name}</td>
+                    <td>${reg.email}</td>
+                    <td>${reg.phone || 'N/A'}</td>
+                    <td>${dateDisplay}</td>
+                    <td>
+                        <div class="action-buttons" style="display: flex; gap: 12px; justify-content: center;">
+                            <button class="btn approve" onclick="approveRegistration('${reg.uid}', '${reg.name}')" title="Approve" style="background-color: #28a745; color: white; width: 36px; height: 36px; border: none; border-radius: 50%; cursor: pointer; display: flex; align-items: center; justify-content: center; font-size: 16px;">
+                                <i class="fas fa-check"></i>
+                            </button>
+                            <button class="btn reject" onclick="rejectRegistration('${reg.uid}', '${reg.name}')" title="Reject" style="background-color: #dc3545; color: white; width: 36px; height: 36px; border: none; border-radius: 50%; cursor: pointer; display: flex; align-items: center; justify-content: center; font-size: 16px;">
+                                <i class="fas fa-times"></i>
+                            </button>
+                        </div>
+                    </td>
+                `;
+                tbody.appendChild(row);
+            });
+        })
+        .catch(error => {
+            console.error('Error loading pending registrations:', error);
+            document.getElementById('pending-registrations-body').innerHTML = 
+                '<tr><td colspan="5" class="loading">Error loading pending registrations</td></tr>';
+        });
+}
+
+// Approve registration
+function approveRegistration(uid, name) {
+    if (!confirm(`Are you sure you want to approve ${name}'s registration as Barangay Official?`)) {
+        return;
+    }
+
+    fetch(`/admin/approve-registration/${uid}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            loadPendingRegistrations();
+            loadUsers();
+            loadStats();
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error approving registration:', error);
+        alert('Error approving registration');
+    });
+}
+
+// Reject registration
+function rejectRegistration(uid, name) {
+    if (!confirm(`Are you sure you want to reject ${name}'s registration?`)) {
+        return;
+    }
+
+    fetch(`/admin/reject-registration/${uid}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            loadPendingRegistrations();
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error rejecting registration:', error);
+        alert('Error rejecting registration');
+    });
+}
+
+// Load analytics
+function loadAnalytics() {
+    fetch('/admin/analytics')
+        .then(response => response.json())
+        .then(data => {
+            document.getElementById('analytics-total').textContent = data.total || 0;
+            document.getElementById('analytics-resolved').textContent = data.resolved || 0;
+            document.getElementById('analytics-resolved-pct').textContent = data.resolved_percentage || 0;
+            document.getElementById('analytics-in-progress').textContent = data.in_progress || 0;
+            document.getElementById('analytics-in-progress-pct').textContent = data.in_progress_percentage || 0;
+            document.getElementById('analytics-escalated').textContent = data.escalated || 0;
+            document.getElementById('analytics-escalated-pct').textContent = data.escalated_percentage || 0;
+            document.getElementById('analytics-avg-time').textContent = data.avg_resolution_time || 0;
+            document.getElementById('analytics-fastest').textContent = data.fastest_resolution || 0;
+            document.getElementById('analytics-pending').textContent = data.pending || 0;
+            document.getElementById('analytics-sla').textContent = data.sla_compliance || 0;
+        })
+        .catch(error => {
+            console.error('Error loading analytics:', error);
+        });
+}
+
+// View complaint details
+function viewComplaint(complaintId) {
+    showComplaintDetails(complaintId);
+}
+
+// Show complaint details modal
+async function showComplaintDetails(complaintId) {
+    try {
+        const response = await fetch(`/complaint/details?id=${complaintId}`, {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            credentials: 'same-origin'
+        });
+
+        if (!response.ok) throw new Error('Failed to fetch complaint details');
+        const complaint = await response.json();
+
+        const detailsContent = document.getElementById('complaint-details-content');
+        detailsContent.innerHTML = `
+            <h2>Complaint Details - ${complaint.id}</h2>
+            <div class="complaint-details-card">
+                <div class="detail-row">
+                    <p><strong>Status:</strong> <span class="status ${complaint.status.toLowerCase().replace(' ', '-')}">${complaint.status}</span></p>
+                    <p><strong>Urgency:</strong> <span class="urgency ${complaint.urgency ? complaint.urgency.toLowerCase() : 'low'}">${complaint.urgency || 'N/A'}</span></p>
+                </div>
+                <div class="detail-row">
+                    <p><strong>Submitted by:</strong> ${complaint.user_name}</p>
+                    <p><strong>Submitted on:</strong> ${new Date(complaint.submitted_date).toLocaleDateString()}</p>
+                </div>
+                <div class="detail-row">
+                    <p><strong>Category:</strong> ${complaint.category || 'N/A'}</p>
+                    <p><strong>Location:</strong> ${complaint.location || 'N/A'}</p>
+                </div>
+                <div class="detail-row">
+                    <h3>Description</h3>
+                    <p>${complaint.description}</p>
+                </div>
+                ${complaint.attachments?.length ? `
+                <div class="detail-row">
+                    <h3>Uploaded Evidence</h3>
+                    <div class="complaint-images">
+                        ${complaint.attachments.map(attachment => `
+                            <div class="image-item">
+                                <img src="data:${attachment.mime_type};base64,${attachment.data}" alt="${attachment.filename}" style="max-width: 300px; max-height: 300px; margin: 10px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                                <p style="font-size: 0.85em; color: #666; text-align: center;">${attachment.filename}</p>
+                            </div>
+                        `).join('')}
+                    </div>
+                </div>` : ''}
+                ${complaint.updates?.length ? `
+                <div class="detail-row">
+                    <h3>Update History</h3>
+                    <div class="update-history">
+                        ${complaint.updates.map(update => `
+                            <div class="update-item">
+                                <p><strong>${new Date(update.timestamp).toLocaleString()}</strong></p>
+                                <p>Status changed from ${update.from_status} to ${update.to_status}</p>
+                                ${update.action_note ? `<p>Notes: ${update.action_note}</p>` : ''}
+                                <p>Updated by: ${update.by_official || 'System'}</p>
+                            </div>
+                        `).join('')}
+                    </div>
+                </div>` : ''}
+                <div class="detail-actions">
+                    <button class="btn-secondary close-details">Close</button>
+                </div>
+            </div>
+        `;
+
+        const modal = document.getElementById('complaint-details-modal');
+        modal.style.display = 'block';
+        document.body.style.overflow = 'hidden';
+
+        detailsContent.querySelector('.close-details')?.addEventListener('click', () => {
+            modal.style.display = 'none';
+            document.body.style.overflow = 'auto';
+        });
+    } catch (error) {
+        console.error('Error loading complaint details:', error);
+        alert('Failed to load complaint details. Please try again.');
+    }
+}
+
+// Update complaint status
+function updateComplaintStatus(complaintId) {
+    const modal = document.getElementById('status-update-modal');
+    if (!modal) return;
+
+    // Set complaint ID in hidden field
+    const complaintIdField = document.getElementById('complaint-id-status');
+    if (complaintIdField) {
+        complaintIdField.value = complaintId;
+    }
+
+    // Reset form fields
+    const statusSelect = document.getElementById('status-select');
+    const statusNotes = document.getElementById('status-notes');
+
+    if (statusSelect) statusSelect.selectedIndex = 0;
+    if (statusNotes) statusNotes.value = '';
+
+    // Show the modal
+    modal.style.display = 'block';
+    document.body.style.overflow = 'hidden';
+}
+
+// Message resident
+async function messageResident(complaintId, residentEmail) {
+    const modal = document.getElementById('message-modal');
+    if (!modal) return;
+
+    const recipientType = document.getElementById('recipient-type');
+    if (recipientType) recipientType.value = 'resident';
+
+    // Load all complaints initially
+    if (typeof loadComplaintsForMessaging === 'function') {
+        loadComplaintsForMessaging(false); // false = not official dashboard
+    }
+
+    // Search for the resident by email and pre-select them and the complaint
+    loadAdminRecipients(residentEmail || '').then(() => {
+        const recipientSelect = document.getElementById('message-recipient');
+        if (recipientSelect && residentEmail) {
+            // Find and select the option with matching email
+            const options = Array.from(recipientSelect.options);
+            const matchingOption = options.find(opt => opt.value === residentEmail);
+            if (matchingOption) {
+                recipientSelect.value = residentEmail;
+
+                // Trigger change event to filter complaints by this resident
+                if (typeof filterComplaintsByResident === 'function') {
+                    filterComplaintsByResident(residentEmail, false);
+                }
+            }
+        }
+
+        // Pre-select the complaint in dropdown after filtering
+        setTimeout(() => {
+            const complaintSelect = document.getElementById('message-complaint-select');
+            if (complaintSelect && complaintId) {
+                const options = Array.from(complaintSelect.options);
+                const matchingOption = options.find(opt => opt.textContent.includes(complaintId));
+                if (matchingOption) {
+                    complaintSelect.value = matchingOption.value;
+                }
+            }
+        }, 300);
+    });
+
+    // Show the modal
+    modal.style.display = 'block';
+    document.body.style.overflow = 'hidden';
+}
+
+// Delete complaint
+function deleteComplaint(complaintId) {
+    if (!confirm('Are you sure you want to delete this complaint?')) {
+        return;
+    }
+
+    fetch('/admin/complaint/delete', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ id: complaintId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Complaint deleted successfully');
+            loadComplaints();
+            loadStats();
+            loadAnalytics();
+        } else {
+            alert('Error deleting complaint: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error deleting complaint');
+    });
+}
+
+// Edit user
+// View user details
+function viewUserDetails(userId) {
+    openModal('user-details-modal');
+    document.getElementById('user-details-content').innerHTML = 
+        '<p style="text-align: center; color: #666;">Loading user details...</p>';
+
+    fetch(`/admin/user/${userId}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const user = data.user;
+
+                // Format dates
+                let createdDate = 'N/A';
+                if (user.created_at) {
+                    const date = new Date(user.created_at);
+                    createdDate = date.toLocaleDateString('en-US', {
+                        year: 'numeric',
+                        month: 'long',
+                        day: 'numeric',
+                        hour: '2-digit',
+                        minute: '2-digit'
+                    });
+                }
+
+                let approvedDate = 'N/A';
+                if (user.approved_at) {
+                    const date = new Date(user.approved_at);
+                    approvedDate = date.toLocaleDateString('en-US', {
+                        year: 'numeric',
+                        month: 'long',
+                        day: 'numeric',
+                        hour: '2-digit',
+                        minute: '2-digit'
+                    });
+                }
+
+                // Determine role display
+                let roleDisplay = user.role.charAt(0).toUpperCase() + user.role.slice(1);
+                let roleColor = user.role === 'official' ? '#28a745' : '#17a2b8';
+
+                // Determine status display
+                let statusDisplay = user.status ? user.status.replace('_', ' ').charAt(0).toUpperCase() + user.status.slice(1).replace('_', ' ') : 'Approved';
+                let statusColor = user.status === 'approved' ? '#28a745' : (user.status === 'blocked' ? '#dc3545' : '#ffc107');
+                let statusIcon = user.status === 'blocked' ? 'fa-ban' : 'fa-check-circle';
+
+                document.getElementById('user-details-content').innerHTML = `
+                    <div style="display: flex; flex-direction: column; gap: 15px;">
+                        <div style="text-align: center; padding-bottom: 15px; border-bottom: 1px solid #eee;">
+                            <div style="width: 80px; height: 80px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 50%; margin: 0 auto 10px; display: flex; align-items: center; justify-content: center;">
+                                <i class="fas fa-user" style="font-size: 36px; color: white;"></i>
+                            </div>
+                            <h3 style="margin: 0; color: #333;">${user.full_name}</h3>
+                            <span style="background: ${roleColor}; color: white; padding: 3px 10px; border-radius: 12px; font-size: 12px;">${roleDisplay}</span>
+                        </div>
+
+                        <div style="display: grid; gap: 12px;">
+                            <div style="display: flex; align-items: center; gap: 10px;">
+                                <i class="fas fa-envelope" style="color: #667eea; width: 20px;"></i>
+                                <div>
+                                    <small style="color: #999;">Email</small>
+                                    <p style="margin: 0; color: #333;">${user.email}</p>
+                                </div>
+                            </div>
+
+                            <div style="display: flex; align-items: center; gap: 10px;">
+                                <i class="fas fa-phone" style="color: #667eea; width: 20px;"></i>
+                                <div>
+                                    <small style="color: #999;">Phone</small>
+                                    <p style="margin: 0; color: #333;">${user.phone || 'N/A'}</p>
+                                </div>
+                            </div>
+
+                            <div style="display: flex; align-items: center; gap: 10px;">
+                                <i class="fas ${statusIcon}" style="color: ${statusColor}; width: 20px;"></i>
+                                <div>
+                                    <small style="color: #999;">Status</small>
+                                    <p style="margin: 0; color: ${statusColor}; font-weight: ${user.status === 'blocked' ? 'bold' : 'normal'};">${statusDisplay}</p>
+                                </div>
+                            </div>
+
+                            <div style="display: flex; align-items: center; gap: 10px;">
+                                <i class="fas fa-calendar-plus" style="color: #667eea; width: 20px;"></i>
+                                <div>
+                                    <small style="color: #999;">Registered On</small>
+                                    <p style="margin: 0; color: #333;">${createdDate}</p>
+                                </div>
+                            </div>
+
+                            ${user.approved_at ? `
+                            <div style="display: flex; align-items: center; gap: 10px;">
+                                <i class="fas fa-calendar-check" style="color: #28a745; width: 20px;"></i>
+                                <div>
+                                    <small style="color: #999;">Approved On</small>
+                                    <p style="margin: 0; color: #333;">${approvedDate}</p>
+                                </div>
+                            </div>
+                            ` : ''}
+                        </div>
+                    </div>
+                `;
+            } else {
+                document.getElementById('user-details-content').innerHTML = 
+                    '<p style="text-align: center; color: #dc3545;">Error loading user details</p>';
+            }
+        })
+        .catch(error => {
+            console.error('Error loading user details:', error);
+            document.getElementById('user-details-content').innerHTML = 
+                '<p style="text-align: center; color: #dc3545;">Error loading user details</p>';
+        });
+}
+
+// Delete user
+function deleteUser(userId, userName) {
+    if (!confirm('Are you sure you want to delete user: ' + userName + '?')) {
+        return;
+    }
+    // Their complaints, feedback and messages are removed, or kept anonymised
+    const mode = confirm('Also delete ' + userName + "'s complaints, feedback and messages?\n\n" +
+        'OK: delete them\nCancel: keep them without the user\'s name and email') ? 'delete' : 'anonymise';
+
+    fetch('/admin/user/delete', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ uid: userId, mode: mode })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('User deleted successfully');
+            loadUsers();
+            loadStats();
+            loadCleanupJobs();
+        } else {
+            alert('Error deleting user: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error deleting user');
+    });
+}
+
+// Progress of background cleanups after deleting users; polls while any is running
+const CLEANUP_POLL_MS = 3000;
+let cleanupPollTimer = null;
+
+function loadCleanupJobs() {
+    fetch('/admin/user/cleanup-jobs')
+        .then(response => response.json())
+        .then(jobs => {
+            const container = document.getElementById('cleanup-jobs');
+            if (!container) return;
+            // Finished jobs stay listed for an hour
+            const recent = jobs.filter(job => job.status === 'queued' || job.status === 'running' ||
+                Date.now() - new Date(job.finished_at || job.created_at).getTime() < 60 * 60 * 1000);
+            container.innerHTML = '';
+            recent.forEach(job => {
+                const verb = job.mode === 'anonymise' ? 'Anonymising' : 'Deleting';
+                const total = job.total || 0;
+                const processed = job.processed || 0;
+                let state = `${processed} / ${total} records`;
+                if (job.status === 'queued') state = 'waiting to start';
+                if (job.status === 'completed') state = `done, ${total} records`;
+                if (job.status === 'failed') state = `failed: ${job.error || 'unknown error'}`;
+
+                const row = document.createElement('div');
+                row.className = `cleanup-job ${job.status}`;
+                row.innerHTML = `<i class="fas fa-${job.status === 'completed' ? 'check-circle' : 'broom'}"></i><span></span>`;
+                row.querySelector('span').textContent = `${verb} data of ${job.name || job.uid}: ${state}`;
+                if (job.status === 'running') {
+                    const bar = document.createElement('progress');
+                    bar.max = total || 1;
+                    bar.value = processed;
+                    row.appendChild(bar);
+                }
+                container.appendChild(row);
+            });
+
+            clearTimeout(cleanupPollTimer);
+            if (jobs.some(job => job.status === 'queued' || job.status === 'running')) {
+                cleanupPollTimer = setTimeout(loadCleanupJobs, CLEANUP_POLL_MS);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading cleanup jobs:', error);
+        });
+}
+
+// Recipient type chosen in the admin's message modal
+function adminRecipientType() {
+    const recipientType = document.getElementById('recipient-type');
+    return recipientType && recipientType.value === 'official' ? 'official' : 'resident';
+}
+
+// Suggest recipients of the chosen type, optionally searching for query first
+function loadAdminRecipients(query = null) {
+    const select = document.getElementById('message-recipient');
+    const search = document.getElementById('message-recipient-search');
+    if (!select) return Promise.resolve();
+    if (search && query !== null) search.value = query;
+    return loadRecipientSuggestions(select, adminRecipientType(), search ? search.value.trim() : '');
+}
+
+// Open message modal for a specific user
+function openMessageToUser(userId, userName, userEmail, userRole) {
+    openModal('message-modal');
+
+    const recipientTypeSelect = document.getElementById('recipient-type');
+    const recipientSelect = document.getElementById('message-recipient');
+    const complaintGroup = document.getElementById('message-complaint-select')?.closest('.form-group');
+
+    // Always hide complaint dropdown when messaging from User Management
+    if (complaintGroup) complaintGroup.style.display = 'none';
+
+    // Search for the user and select them
+    recipientTypeSelect.value = userRole === 'official' ? 'official' : 'resident';
+    loadAdminRecipients(userEmail).then(() => {
+        let option = Array.from(recipientSelect.options).find(opt => opt.value === userEmail);
+        // The index may not have them yet (e.g. signed up through another worker)
+        if (!option) {
+            option = document.createElement('option');
+            option.value = userEmail;
+            option.dataset.uid = userId;
+            option.textContent = `${userName} (${userEmail})`;
+            recipientSelect.appendChild(option);
+        }
+        recipientSelect.value = userEmail;
+    });
+
+    // Clear and focus on subject
+    document.getElementById('message-subject').value = '';
+    document.getElementById('message-content').value = '';
+    document.getElementById('message-subject').focus();
+}
+
+// Toggle block/unblock user
+function toggleBlockUser(userId, userName, isCurrentlyBlocked) {
+    const action = isCurrentlyBlocked ? 'unblock' : 'block';
+    const actionText = isCurrentlyBlocked ? 'unblock' : 'block';
+
+    if (!confirm(`Are you sure you want to ${actionText} user: ${userName}?`)) {
+        return;
+    }
+
+    fetch('/admin/user/toggle-block', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ 
+            uid: userId,
+            action: action 
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            loadUsers();
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error toggling user block status');
+    });
+}
+
+// Load feedback
+async function loadFeedback(filterType = 'all') {
+    try {
+        // Rating filters run in Firestore; both endpoints return one page, newest first
+        const url = filterType === 'all' ? '/feedback/recent' : `/feedback/filter?type=${filterType}`;
+
+        const response = await fetch(url, {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            credentials: 'same-origin'
+        });
+
+        if (response.redirected) {
+            window.location.href = response.url;
+            return;
+        }
+
+        const feedbackList = await response.json();
+        const feedbackContainer = document.getElementById('feedback-list');
+
+        if (!feedbackContainer) return;
+
+        feedbackContainer.innerHTML = '';
+
+        if (feedbackList.length === 0) {
+            feedbackContainer.innerHTML = '<p style="text-align: center; padding: 20px; color: #666;">No feedback available</p>';
+        } else {
+            feedbackList.forEach(feedback => {
+                const feedbackCard = createFeedbackCard(feedback);
+                feedbackContainer.appendChild(feedbackCard);
+            });
+        }
+
+    } catch (error) {
+        console.error('Error loading feedback:', error);
+        const feedbackContainer = document.getElementById('feedback-list');
+        if (feedbackContainer) {
+            feedbackContainer.innerHTML = '<p style="text-align: center; padding: 20px; color: #e74c3c;">Error loading feedback</p>';
+        }
+    }
+}
+
+// Create feedback card element
+function createFeedbackCard(feedback) {
+    const card = document.createElement('div');
+
+    // Determine card class based on rating
+    let cardClass = 'neutral';
+    let cardColor = '#f0f0f0';
+    if (feedback.rating >= 4) {
+        cardClass = 'positive';
+        cardColor = '#e8f5e9';
+    } else if (feedback.rating <= 2) {
+        cardClass = 'negative';
+        cardColor = '#ffebee';
+    }
+
+    card.style.cssText = `background: ${cardColor}; padding: 15px; margin-bottom: 10px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);`;
+
+    // Generate star rating HTML
+    const starsHTML = generateStars(feedback.rating);
+
+    // Format date
+    const feedbackDate = new Date(feedback.submitted_date).toLocaleDateString();
+
+    // Get feedback type display name
+    const feedbackTypeDisplay = getFeedbackTypeDisplay(feedback.feedback_type);
+
+    card.innerHTML = `
+        <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 10px;">
+            <div style="display: flex; align-items: center; gap: 10px;">
+                <i class="fas fa-user-circle" style="font-size: 32px; color: #0466c8;"></i>
+                <div>
+                    <h4 style="margin: 0; color: #333;">${feedback.user_name || 'Anonymous'}</h4>
+                    <div style="color: #ffc107; font-size: 14px; margin-top: 4px;">
+                        ${starsHTML}
+                    </div>
+                </div>
+            </div>
+            <span style="color: #999; font-size: 12px;">${feedbackDate}</span>
+        </div>
+        <div>
+            <p style="margin: 5px 0; font-size: 13px;"><strong>Type:</strong> ${feedbackTypeDisplay}</p>
+            <p style="margin: 10px 0; color: #555; line-height: 1.5;">${feedback.message}</p>
+            ${feedback.complaint_id ? `<span style="display: inline-block; background: #0466c8; color: white; padding: 4px 8px; border-radius: 4px; font-size: 11px; margin-top: 5px;">${feedback.complaint_id}</span>` : ''}
+        </div>
+    `;
+
+    return card;
+}
+
+// Generate star rating HTML
+function generateStars(rating) {
+    let starsHTML = '';
+    for (let i = 1; i <= 5; i++) {
+        if (i <= rating) {
+            starsHTML += '<i class="fas fa-star"></i>';
+        } else {
+            starsHTML += '<i class="far fa-star"></i>';
+        }
+    }
+    return starsHTML;
+}
+
+// Get feedback type display name
+function getFeedbackTypeDisplay(type) {
+    const types = {
+        'complaint-process': 'Complaint Process',
+        'response-time': 'Response Time',
+        'staff-courtesy': 'Staff Courtesy',
+        'resolution-quality': 'Resolution Quality',
+        'system-usability': 'System Usability',
+        'other': 'Other'
+    };
+    return types[type] || type;
+}
+
+// Feedback filter change handler
+const feedbackFilter = document.getElementById('feedback-filter');
+if (feedbackFilter) {
+    feedbackFilter.addEventListener('change', function(e) {
+        const filterType = e.target.value;
+        loadFeedback(filterType);
+    });
+}
@@ -0,0 +1,1188 @@
+// View Complaint Details Functionality
+document.addEventListener('click', function(e) {
+    // Handle View Details click in table
+    if (e.target.closest('.btn-view')) {
+        e.preventDefault();
+        const row = e.target.closest('tr');
+        const complaintId = row.querySelector('td:first-child').textContent;
+        showComplaintDetails(complaintId);
+    }
+});
+
+async function showComplaintDetails(complaintId) {
+    try {
+        const response = await fetch(`/complaint/details?id=${complaintId}`, {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            credentials: 'same-origin'
+        });
+
+        if (!response.ok) throw new Error('Failed to fetch complaint details');
+        const complaint = await response.json();
+
+        const detailsContent = document.getElementById('complaint-details-content');
+        detailsContent.innerHTML = `
+            <h2>Complaint Details - ${complaint.id}</h2>
+            <div class="complaint-details-card">
+                <div class="detail-row">
+                    <p><strong>Status:</strong> <span class="status ${complaint.status.toLowerCase().replace(' ', '-')}">${complaint.status}</span></p>
+                    <p><strong>Urgency:</strong> <span class="urgency ${complaint.urgency.toLowerCase()}">${complaint.urgency}</span></p>
+                </div>
+                <div class="detail-row">
+                    <p><strong>Submitted by:</strong> ${complaint.user_name}</p>
+                    <p><strong>Submitted on:</strong> ${new Date(complaint.submitted_date).toLocaleDateString()}</p>
+                </div>
+                <div class="detail-row">
+                    <p><strong>Category:</strong> ${complaint.category}</p>
+                    <p><strong>Location:</strong> ${complaint.location}</p>
+                </div>
+                <div class="detail-row">
+                    <h3>Description</h3>
+                    <p>${complaint.description}</p>
+                </div>
+                ${complaint.attachments?.length ? `
+                <div class="detail-row">
+                    <h3>Uploaded Evidence</h3>
+                    <div class="complaint-images">
+                        ${complaint.attachments.map(attachment => `
+                            <div class="image-item">
+                                <img src="data:${attachment.mime_type};base64,${attachment.data}" alt="${attachment.filename}" style="max-width: 300px; max-height: 300px; margin: 10px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                                <p style="font-size: 0.85em; color: #666; text-align: center;">${attachment.filename}</p>
+                            </div>
+                        `).join('')}
+                    </div>
+                </div>` : ''}
+                ${complaint.updates?.length ? `
+                <div class="detail-row">
+                    <h3>Update History</h3>
+                    <div class="update-history">
+                        ${complaint.updates.map(update => `
+                            <div class="update-item">
+                                <p><strong>${new Date(update.timestamp).toLocaleString()}</strong></p>
+                                <p>Status changed from ${update.from_status} to ${update.to_status}</p>
+                                ${update.action_note ? `<p>Notes: ${update.action_note}</p>` : ''}
+                                <p>Updated by: ${update.by_official || 'System'}</p>
+                            </div>
+                        `).join('')}
+                    </div>
+                </div>` : ''}
+                <div class="detail-actions">
+                    <button class="btn-secondary close-details">Close</button>
+                </div>
+            </div>
+        `;
+
+        const modal = document.getElementById('complaint-details-modal');
+        modal.style.display = 'block';
+        document.body.style.overflow = 'hidden';
+
+        detailsContent.querySelector('.close-details')?.addEventListener('click', () => {
+            modal.style.display = 'none';
+            document.body.style.overflow = 'auto';
+        });
+    } catch (error) {
+        console.error('Error loading complaint details:', error);
+        alert('Failed to load complaint details. Please try again.');
+    }
+}
+document.addEventListener("DOMContentLoaded", function() {
+    // Mobile menu toggle
+    const mobileMenuToggle = document.querySelector(".mobile-menu-toggle");
+    const mobileMenu = document.querySelector(".mobile-menu");
+    const contentArea = document.querySelector('.content-area');
+    if (contentArea) {
+        contentArea.addEventListener('click', function(e) {
+            const toggleButton = e.target.closest('.btn-link');
+            if (!toggleButton) return;
+
+            e.preventDefault();
+
+            // Get current state
+            const isShowingAll = toggleButton.getAttribute('data-showing-all') === 'true';
+
+            // Get current view
+            const currentView = getCurrentViewFromSidebar() || 'all';
+
+            // Toggle the view
+            loadComplaints(currentView, !isShowingAll);
+        });
+    }
+
+    const viewAllModal = document.createElement('div');
+    viewAllModal.id = 'view-all-modal';
+    viewAllModal.className = 'modal';
+    viewAllModal.innerHTML = `
+        <div class="modal-content large-modal">
+            <span class="close-btn">&times;</span>
+            <h2 id="view-all-title"><i class="fas fa-list"></i> All Complaints</h2>
+            <div class="modal-body">
+                <table class="complaints-table full-width">
+                    <thead>
+                        <tr>
+                            <th>ID</th>
+                            <th>Type</th>
+                            <th>Submitted</th>
+                            <th>Resident</th>
+                            <th>Status</th>
+                            <th>Urgency</th>
+                            <th>Actions</th>
+                        </tr>
+                    </thead>
+                    <tbody id="view-all-complaints">
+                        <!-- Complaints will be loaded here -->
+                    </tbody>
+                </table>
+            </div>
+        </div>
+    `;
+    document.body.appendChild(viewAllModal);
+
+    if (mobileMenuToggle && mobileMenu) {
+        mobileMenuToggle.addEventListener("click", () => {
+            mobileMenu.style.display = mobileMenu.style.display === "block" ? "none" : "block";
+        });
+    }
+
+    // Mark as read buttons
+    const markReadButtons = document.querySelectorAll(".btn-mark-read");
+    markReadButtons.forEach(btn => {
+        btn.addEventListener("click", function() {
+            const card = this.closest(".message-card, .notification-card");
+            if (card) {
+                card.classList.remove("unread");
+                updateNotificationCounts();
+            }
+        });
+    });
+
+    // Update notification counts
+    function updateNotificationCounts() {
+        const unreadMessages = document.querySelectorAll(".message-card.unread").length;
+        const unreadNotifications = document.querySelectorAll(".notification-card.unread").length;
+
+        document.querySelectorAll(".notification-count").forEach(el => {
+            if (el.closest("#messages")) {
+                el.textContent = unreadMessages;
+            } else if (el.closest("#notifications")) {
+                el.textContent = unreadNotifications;
+            }
+        });
+    }
+
+    // Initialize counts on page load
+    updateNotificationCounts();
+
+    // Handle navigation links for modals (Messages, Notifications, Feedback)
+    document.querySelectorAll('a[href="#messages"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('messages-modal');
+        });
+    });
+
+    document.querySelectorAll('a[href="#notifications"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('notifications-modal');
+        });
+    });
+
+    document.querySelectorAll('a[href="#feedback"]').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            openModal('feedback-modal');
+            loadFeedback(); // Load feedback when modal opens
+        });
+    });
+
+    // Modal control
+    const statusUpdateModal = document.getElementById("status-update-modal");
+    const messageModal = document.getElementById("message-modal");
+    const notificationSettingsModal = document.getElementById("notification-settings-modal");
+    const feedbackReplyModal = document.getElementById("feedback-reply-modal");
+    const openMessageButtons = document.querySelectorAll('a[href="#new-message"], .btn-reply');
+    const openNotificationSettingsButton = document.querySelector('a[href="#notification-settings"]');
+    const closeButtons = document.querySelectorAll(".close-btn");
+    const cancelButtons = document.querySelectorAll(".cancel-btn");
+
+    // Add logout functionality
+    const logoutLinks = document.querySelectorAll('a[href*="login"]');
+    logoutLinks.forEach(link => {
+        link.addEventListener('click', async (e) => {
+            e.preventDefault();
+            try {
+                await fetch('/auth/logout');
+                window.location.href = '/auth/login';
+            } catch (error) {
+                console.error('Logout error:', error);
+                window.location.href = '/auth/login';
+            }
+        });
+    });
+
+    function openModal(modal) {
+        const elem = typeof modal === 'string' ? document.getElementById(modal) : modal;
+        if (elem) {
+            elem.style.display = "block";
+            document.body.style.overflow = "hidden";
+        }
+    }
+
+    function closeModal(modal) {
+        const elem = typeof modal === 'string' ? document.getElementById(modal) : modal;
+        if (elem) {
+            elem.style.display = "none";
+            document.body.style.overflow = "auto";
+        }
+    }
+
+    // Open message modal
+    if (openMessageButtons) {
+        openMessageButtons.forEach(btn => {
+            btn.addEventListener("click", (e) => {
+                e.preventDefault();
+                openModal(messageModal);
+            });
+        });
+    }
+
+    // Open notification settings modal
+    if (openNotificationSettingsButton) {
+        openNotificationSettingsButton.addEventListener("click", (e) => {
+            e.preventDefault();
+            openModal(notificationSettingsModal);
+        });
+    }
+
+    // Open feedback reply modal
+    if (document.querySelectorAll('.btn-reply')) {
+        document.querySelectorAll('.btn-reply').forEach(btn => {
+            btn.addEventListener('click', (e) => {
+                e.preventDefault();
+                openModal(feedbackReplyModal);
+            });
+        });
+    }
+
+    // Close buttons for modals
+    if (closeButtons) {
+        closeButtons.forEach(btn => {
+            btn.addEventListener("click", () => {
+                const modal = btn.closest(".modal");
+                closeModal(modal);
+            });
+        });
+    }
+
+    // Cancel buttons for modals
+    if (cancelButtons) {
+        cancelButtons.forEach(btn => {
+            btn.addEventListener("click", () => {
+                const modal = btn.closest(".modal");
+                closeModal(modal);
+            });
+        });
+    }
+
+    // Close modal when clicking outside
+    window.addEventListener("click", (e) => {
+        if (e.target.classList.contains("modal")) {
+            closeModal(e.target);
+        }
+    });
+
+    // Status Update Form Submission
+    const statusUpdateForm = document.getElementById("status-update-form");
+    if (statusUpdateForm) {
+        statusUpdateForm.addEventListener("submit", function(e) {
+            e.preventDefault();
+
+            const complaintId = document.getElementById("complaint-id").value;
+            const status = document.getElementById("status").value;
+            const notes = document.getElementById("status-notes").value;
+            const notifyResident = document.getElementById("notify-resident").checked;
+
+            // Make API request to update complaint status
+            fetch('/complaint/update', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    complaint_id: complaintId,
+                    status: status,
+                    notes: notes,
+                    notify_resident: notifyResident
+                })
+            })
+            .then(response => {
+                if (!response.ok) throw new Error('Failed to update status');
+                return response.json();
+            })
+            .then(data => {
+                // Success! Update the UI
+                updateDashboard();
+
+                // Add notification
+                showNotification('success', `Complaint ${complaintId} status updated to ${status}${notifyResident ? ' - Resident notified' : ''}`);
+
+                // Close the modal
+                closeModal(statusUpdateModal);
+            })
+            .catch(error => {
+                console.error('Error updating complaint status:', error);
+                showNotification('error', `Failed to update complaint status: ${error.message}`);
+            });
+        });
+    }
+
+    // Other Form submissions
+    const messageForm = document.getElementById("message-form");
+    if (messageForm) {
+        messageForm.addEventListener("submit", async function(e) {
+            e.preventDefault();
+            // Here you would send the message data to the server
+            alert("Message sent successfully!");
+            closeModal(messageModal);
+        });
+    }
+
+    const notificationSettingsForm = document.getElementById("notification-settings-form");
+    if (notificationSettingsForm) {
+        notificationSettingsForm.addEventListener("submit", function(e) {
+            e.preventDefault();
+            // Here you would save the notification settings
+            alert("Notification settings saved!");
+            closeModal(notificationSettingsModal);
+        });
+    }
+
+    const feedbackReplyForm = document.getElementById("feedback-reply-form");
+    if (feedbackReplyForm) {
+        feedbackReplyForm.addEventListener("submit", function(e) {
+            e.preventDefault();
+            // Here you would send the feedback response
+            alert("Response sent successfully!");
+            closeModal(feedbackReplyModal);
+        });
+    }
+
+    // Initialize real-time updates
+    initializeRealTimeUpdates();
+
+    // Initialize dashboard
+    if (document.querySelector('.stat-card')) {
+        loadStats();
+        loadComplaintsForOfficials();
+    }
+
+    // Sidebar filter click handler for Quick Actions
+    const quickActionsList = document.querySelector('.sidebar ul');
+    if (quickActionsList) {
+        quickActionsList.addEventListener('click', function(e) {
+            e.preventDefault();
+            const link = e.target.closest('.filter-link');
+            if (!link) return;
+
+            // Get the status from data-status attribute
+            const filterStatus = link.getAttribute('data-status');
+
+            // Remove active class from all links and add to clicked link
+            quickActionsList.querySelectorAll('.filter-link').forEach(a => a.classList.remove('active'));
+            link.classList.add('active');
+
+            // Map filter status values to endpoint status values
+            const statusMap = {
+                'all': 'all',
+                'New': 'new',
+                'Pending': 'pending',
+                'In Progress': 'in-progress',
+                'Escalated': 'escalated',
+                'Resolved': 'resolved'
+            };
+
+            const endpointStatus = statusMap[filterStatus] || filterStatus;
+
+            // Update section header
+            const sectionHeader = document.querySelector('.section-header h2');
+            if (sectionHeader) {
+                const statusLabel = filterStatus === 'all' ? 'Recent Complaints' : `${filterStatus} Complaints`;
+                sectionHeader.innerHTML = `<i class="fas fa-list"></i> ${statusLabel}`;
+            }
+
+            // Load filtered complaints
+            loadComplaints(endpointStatus, false);
+        });
+    }
+
+
+    // Handle action buttons in the complaints table
+    const complaintsTable = document.querySelector('.complaints-table');
+    if (complaintsTable) {
+        complaintsTable.addEventListener('click', function(e) {
+            e.preventDefault();
+            const target = e.target.closest('.btn-action');
+            if (!target) return;
+
+            const row = target.closest('tr');
+            const complaintId = row.getAttribute('data-complaint-id') || row.cells[0].textContent;
+            const residentEmail = row.getAttribute('data-resident-email') || '';
+
+            // View complaint details
+            if (target.classList.contains('btn-view')) {
+                viewComplaintDetails(complaintId);
+            }
+
+            // Assign complaint
+            if (target.classList.contains('btn-assign')) {
+                showAssignModal(complaintId);
+            }
+
+            // Message resident
+            if (target.classList.contains('btn-message')) {
+                showMessageModal(complaintId, residentEmail);
+            }
+
+            // Update status
+            if (target.classList.contains('btn-update')) {
+                showStatusUpdateModal(complaintId);
+            }
+
+            // Escalate complaint
+            if (target.classList.contains('btn-escalate')) {
+                showEscalateModal(complaintId);
+            }
+
+            // Resolve escalated complaint
+            if (target.classList.contains('btn-resolve-escalated')) {
+                resolveEscalatedComplaint(complaintId);
+            }
+        });
+    }
+});
+
+// Define utility functions outside the DOM ready handler
+function initializeRealTimeUpdates() {
+    // Complaint changes are pushed to officials over /me/stream
+    onMeStreamEvent('complaint', updateDashboard);
+    onMeStreamEvent('resync', updateDashboard);
+    openMeStream(() => {
+        // Without a stream, refresh the data periodically
+        setInterval(() => {
+            updateDashboard();
+        }, 300000); // Refresh every 5 minutes
+
+        // Also refresh when the window gains focus
+        window.addEventListener('focus', () => {
+            updateDashboard();
+        });
+    });
+}
+
+// Update dashboard with real-time data
+function updateDashboard() {
+    updateNotificationCounts();
+
+    // If on dashboard page with stats
+    if (document.querySelector('.stat-card')) {
+        loadStats();
+
+        // Reload complaints for current view
+        const currentView = getCurrentViewFromSidebar() || 'all';
+
+        // Maintain current view state (all or limited)
+        const toggleButton = document.querySelector('.btn-link');
+        const isShowingAll = toggleButton ? 
+            toggleButton.getAttribute('data-showing-all') === 'true' : 
+            false;
+
+        loadComplaints(currentView, isShowingAll);
+    }
+}
+
+// Get the current active view from sidebar
+function getCurrentViewFromSidebar() {
+    const activeLink = document.querySelector('.sidebar a.active');
+    if (!activeLink) return 'all';
+
+    const href = activeLink.getAttribute('href');
+    switch(href) {
+        case '#all-complaints': return 'all';
+        case '#new-complaints': return 'new';
+        case '#pending': return 'pending-review';
+        case '#in-progress': return 'in-progress';
+        case '#escalated': return 'escalated';
+        case '#resolved': return 'resolved';
+        default: return 'all';
+    }
+}
+
+// Update notification counts
+function updateNotificationCounts() {
+    const unreadMessages = document.querySelectorAll(".message-card.unread").length;
+    const unreadNotifications = document.querySelectorAll(".notification-card.unread").length;
+
+    document.querySelectorAll(".notification-count").forEach(el => {
+        if (el.closest("#messages")) {
+            el.textContent = unreadMessages;
+        } else if (el.closest("#notifications")) {
+            el.textContent = unreadNotifications;
+        }
+    });
+}
+
+// Load dashboard statistics and update badge counts
+function loadStats() {
+    fetch('/officials/stats')
+        .then(response => response.json())
+        .then(data => {
+            const statCards = document.querySelectorAll('.stat-card');
+            if (statCards.length >= 4) {
+                // Total Complaints
+                const totalCard = document.querySelector('.stat-card:nth-child(1)');
+                totalCard.querySelector('.stat-number').textContent = data.total;
+                const totalChange = data.change_from_last_month?.total || 0;
+                const totalChangeEl = totalCard.querySelector('.stat-change');
+                if (totalChangeEl) {
+                    const arrowIcon = totalChange >= 0 ? 'fa-arrow-up' : 'fa-arrow-down';
+                    const changeColor = totalChange >= 0 ? '#28a745' : '#dc3545';
+                    totalChangeEl.innerHTML = `<i class="fas ${arrowIcon}" style="color: ${changeColor}"></i> ${Math.abs(totalChange)}% from last month`;
+                    totalChangeEl.style.color = changeColor;
+                }
+
+                // Pending
+                const pendingCard = document.querySelector('.stat-card:nth-child(2)');
+                pendingCard.querySelector('.stat-number').textContent = data.pending + data.new;
+                pendingCard.querySelector('.stat-urgent').innerHTML = 
+                    `<i class="fas fa-exclamation-triangle"></i> ${data.urgent_pending} urgent`;
+
+                // Resolved
+                const resolvedCard = document.querySelector('.stat-card:nth-child(3)');
+                resolvedCard.querySelector('.stat-number').textContent = data.resolved;
+                const resolvedChange = data.change_from_last_month?.resolved || 0;
+                const resolvedChangeEl = resolvedCard.querySelector('.stat-change');
+                if (resolvedChangeEl) {
+                    const arrowIcon = resolvedChange >= 0 ? 'fa-arrow-up' : 'fa-arrow-down';
+                    const changeColor = resolvedChange >= 0 ? '#28a745' : '#dc3545';
+                    resolvedChangeEl.innerHTML = `<i class="fas ${arrowIcon}" style="color: ${changeColor}"></i> ${Math.abs(resolvedChange)}% from last month`;
+                    resolvedChangeEl.style.color = changeColor;
+                }
+
+                // Avg Resolution Time
+                const avgCard = document.querySelector('.stat-card:nth-child(4)');
+                avgCard.querySelector('.stat-number').textContent = `${data.avg_resolution_time} days`;
+                const resTimeChange = data.change_from_last_month?.resolution_time || 0;
+                const resTimeChangeEl = avgCard.querySelector('.stat-change');
+                if (resTimeChangeEl) {
+                    // For resolution time, lower is better, so arrow down is green
+                    const arrowIcon = resTimeChange >= 0 ? 'fa-arrow-down' : 'fa-arrow-up';
+                    const changeColor = resTimeChange >= 0 ? '#28a745' : '#dc3545';
+                    resTimeChangeEl.innerHTML = `<i class="fas ${arrowIcon}" style="color: ${changeColor}"></i> ${Math.abs(resTimeChange)} days from last month`;
+                    resTimeChangeEl.style.color = changeColor;
+                }
+            }
+
+            // Update sidebar badges
+            updateBadgeCount('a[href="#all-complaints"] .badge', data.total);
+            updateBadgeCount('a[href="#new-complaints"] .badge', data.new);
+            updateBadgeCount('a[href="#pending"] .badge', data.pending);
+            updateBadgeCount('a[href="#in-progress"] .badge', data.in_progress);
+            updateBadgeCount('a[href="#escalated"] .badge', data.escalated || 0);
+            updateBadgeCount('a[href="#resolved"] .badge', data.resolved);
+        })
+        .catch(error => {
+            console.error('Error loading stats:', error);
+        });
+}
+
+// Helper function to update badge counts
+function updateBadgeCount(selector, count) {
+    const badge = document.querySelector(selector);
+    if (badge) {
+        badge.textContent = count;
+        // Add visual feedback for badge count changes
+        badge.style.transition = 'background-color 0.3s ease';
+        badge.style.backgroundColor = '#ff5722';
+        setTimeout(() => {
+            badge.style.backgroundColor = '';
+        }, 1000);
+    }
+}
+
+// Sidebar filters -> complaint status
+const COMPLAINT_STATUS_FILTERS = {
+    'new': 'New',
+    'pending': 'Pending',
+    'pending-review': 'Pending',
+    'in-progress': 'In Progress',
+    'escalated': 'Escalated',
+    'resolved': 'Resolved'
+};
+
+// Load complaints by status, filtering a local copy of all complaints that
+// is brought up to date with only what changed since the last refresh
+function loadComplaints(status, showAll = false) {
+    syncComplaints('/officials/complaints/all')
+        .then(allComplaints => {
+            const target = COMPLAINT_STATUS_FILTERS[status.toLowerCase()] || status;
+            const complaints = status.toLowerCase() === 'all' ?
+                allComplaints : allComplaints.filter(complaint => complaint.status === target);
+            const tableBody = document.querySelector('.complaints-table tbody');
+            if (!tableBody) return;
+
+            tableBody.innerHTML = ''; // Clear current entries
+
+            if (complaints.length === 0) {
+                // Display a message when no complaints match the filter
+                const emptyRow = document.createElement('tr');
+                emptyRow.innerHTML = `
+                    <td colspan="7" class="empty-state">
+                        <div class="empty-message">
+                            <i class="fas fa-inbox"></i>
+                            <p>No ${status === 'all' ? '' : status.replace('-', ' ')} complaints found</p>
+                        </div>
+                    </td>
+                `;
+                tableBody.appendChild(emptyRow);
+            } else {
+                // Either show all complaints or limit to 4
+                const displayComplaints = showAll ? complaints : complaints.slice(0, 4);
+
+                displayComplaints.forEach(complaint => {
+                    appendComplaintRow(tableBody, complaint);
+                });
+            }
+
+            // Update heading to reflect the status
+            updateSectionHeader(status);
+
+            // Update the toggle button text based on current state
+            updateToggleButtonText(complaints.length, showAll);
+
+            // Highlight the active filter in sidebar
+            highlightActiveSidebarItem(status);
+
+            // Update badge counts with ALL complaints (not just filtered)
+            // Need to fetch all complaints to update counts accurately
+            fetch('/complaint/recent')
+                .then(res => res.json())
+                .then(allComplaints => {
+                    updateBadgeCounts(allComplaints);
+                })
+                .catch(err => console.error('Error updating badge counts:', err));
+        })
+        .catch(error => {
+            console.error(`Error loading ${status} complaints:`, error);
+        });
+}
+
+// New function to update the toggle button text
+function updateToggleButtonText(totalCount, showingAll) {
+    const toggleButton = document.querySelector('.btn-link');
+    if (!toggleButton) return;
+
+    if (totalCount <= 4) {
+        // Hide the button if there are 4 or fewer complaints
+        toggleButton.style.display = 'none';
+        return;
+    }
+
+    // Show the button
+    toggleButton.style.display = 'inline-block';
+
+    // Update text based on current state
+    if (showingAll) {
+        toggleButton.innerHTML = '<i class="fas fa-chevron-up"></i> Show Less';
+        toggleButton.setAttribute('data-showing-all', 'true');
+    } else {
+        toggleButton.innerHTML = '<i class="fas fa-list"></i> View All';
+        toggleButton.setAttribute('data-showing-all', 'false');
+    }
+}
+
+// Helper function to create and append a complaint row
+function appendComplaintRow(tableBody, complaint) {
+    const row = document.createElement('tr');
+    row.setAttribute('data-complaint-id', complaint.id);
+    row.setAttribute('data-resident-email', complaint.user_email);
+    row.setAttribute('data-status', complaint.status);
+
+    // Format date for display
+    const dateDisplay = formatDate(complaint.submitted_date);
+
+    // Create action buttons based on status
+    const actionButtons = createActionButtons(complaint);
+
+    row.innerHTML = `
+        <td>${complaint.id}</td>
+        <td>${complaint.category}</td>
+        <td>${dateDisplay}</td>
+        <td>${complaint.user_name || 'Resident'}</td>
+        <td><span class="status ${complaint.status.toLowerCase().replace(' ', '-')}">${complaint.status}</span></td>
+        <td><span class="urgency ${complaint.urgency.toLowerCase()}">${complaint.urgency}</span></td>
+        <td>
+            <div class="action-buttons">
+                ${actionButtons}
+            </div>
+        </td>
+    `;
+
+    tableBody.appendChild(row);
+}
+
+// Format date for display
+function formatDate(dateString) {
+    const submittedDate = new Date(dateString);
+    const now = new Date();
+    const diffTime = Math.abs(now - submittedDate);
+    const diffDays = Math.floor(diffTime / (1000 * 60 * 60 * 24));
+
+    if (diffDays === 0) {
+        return 'Today';
+    } else if (diffDays === 1) {
+        return 'Yesterday';
+    } else {
+        return `${diffDays} days ago`;
+    }
+}
+
+// Create action buttons based on complaint status
+function createActionButtons(complaint) {
+    let actionButtons = `
+        <a href="#view" class="btn-action btn-view"><i class="fas fa-eye"></i></a>
+        <a href="#update" class="btn-action btn-update"><i class="fas fa-edit"></i></a>
+        <a href="#message" class="btn-action btn-message"><i class="fas fa-envelope"></i></a>
+    `;
+
+    return actionButtons;
+}
+
+// Update section header based on current view
+function updateSectionHeader(status) {
+    const sectionHeader = document.querySelector('.content-area .section-header h2');
+    if (sectionHeader) {
+        let statusText = status === 'all' ? 'All' : status.replace(/-/g, ' ');
+        statusText = statusText.charAt(0).toUpperCase() + statusText.slice(1);
+
+        let icon = 'fa-list';
+        if (status === 'escalated') icon = 'fa-exclamation-triangle';
+
+        sectionHeader.innerHTML = `<i class="fas ${icon}"></i> ${statusText} Complaints`;
+    }
+}
+
+// Highlight active sidebar item
+function highlightActiveSidebarItem(status) {
+    const sidebar = document.querySelector('.sidebar');
+    if (sidebar) {
+        sidebar.querySelectorAll('a').forEach(a => {
+            a.classList.remove('active');
+
+            const href = a.getAttribute('href');
+            if ((status === 'all' && href === '#all-complaints') ||
+                (status === 'new' && href === '#new-complaints') ||
+                (status === 'pending-review' && href === '#pending') ||
+                (status === 'in-progress' && href === '#in-progress') ||
+                (status === 'escalated' && href === '#escalated') ||
+                (status === 'resolved' && href === '#resolved')) {
+                a.classList.add('active');
+            }
+        });
+    }
+}
+
+// Show notification toast
+function showNotification(type, message) {
+    const notification = document.createElement('div');
+    notification.className = `notification-toast ${type}`;
+
+    const icon = type === 'success' ? 'fa-check-circle' : 'fa-exclamation-circle';
+
+    notification.innerHTML = `
+        <i class="fas ${icon}"></i>
+        <span>${message}</span>
+        <button class="close-toast">&times;</button>
+    `;
+    document.body.appendChild(notification);
+
+    // Add click event to close button
+    notification.querySelector('.close-toast').addEventListener('click', () => {
+        notification.classList.add('fade-out');
+        setTimeout(() => notification.remove(), 500);
+    });
+
+    // Auto-remove notification after 3 seconds
+    setTimeout(() => {
+        notification.classList.add('fade-out');
+        setTimeout(() => notification.remove(), 500);
+    }, 3000);
+}
+
+// View complaint details
+function viewComplaintDetails(complaintId) {
+    // Instead of navigating to a new page, use the existing modal functionality
+    showComplaintDetails(complaintId);
+}
+
+// Show modal to assign complaint to an official
+function showAssignModal(complaintId) {
+    // Implement assignment modal display
+    alert(`Assign complaint: ${complaintId}`);
+}
+
+// Show modal to message a resident
+function showMessageModal(complaintId, residentEmail) {
+    const composeModal = document.getElementById("compose-message-modal-official");
+    if (!composeModal) return;
+
+    // Load residents list first
+    if (typeof loadResidentsForMessaging === 'function') {
+        loadResidentsForMessaging();
+    }
+
+    // Pre-select the resident email after a short delay to allow residents to load
+    setTimeout(() => {
+        const recipientSelect = document.getElementById("message-recipient-official");
+        if (recipientSelect && residentEmail) {
+            // Find and select the option with matching email
+            const options = Array.from(recipientSelect.options);
+            const matchingOption = options.find(opt => opt.value === residentEmail);
+            if (matchingOption) {
+                recipientSelect.value = residentEmail;
+            }
+        }
+
+        // Pre-select the complaint if available
+        const complaintSelect = document.getElementById("message-complaint-official");
+        if (complaintSelect && complaintId) {
+            const options = Array.from(complaintSelect.options);
+            const matchingOption = options.find(opt => opt.textContent.includes(complaintId));
+            if (matchingOption) {
+                complaintSelect.value = matchingOption.value;
+            }
+        }
+    }, 500);
+
+    // Show the compose modal
+    composeModal.style.display = "block";
+    document.body.style.overflow = "hidden";
+}
+
+// Show modal to update complaint status
+function showStatusUpdateModal(complaintId) {
+    const modal = document.getElementById("status-update-modal");
+    if (!modal) return;
+
+    // Set complaint ID in hidden field
+    const complaintIdField = document.getElementById("complaint-id");
+    if (complaintIdField) {
+        complaintIdField.value = complaintId;
+    }
+
+    // Reset form fields
+    const statusSelect = document.getElementById("status");
+    const statusNotes = document.getElementById("status-notes");
+
+    if (statusSelect) statusSelect.selectedIndex = 0;
+    if (statusNotes) statusNotes.value = '';
+
+    // Show the modal
+    modal.style.display = "block";
+    document.body.style.overflow = "hidden";
+}
+
+// Show modal to escalate a complaint
+function showEscalateModal(complaintId) {
+    if (confirm(`Are you sure you want to escalate complaint ${complaintId}?`)) {
+        fetch('/officials/escalate', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                complaint_id: complaintId,
+                escalate_note: 'Escalated for further attention'
+            })
+        })
+        .then(response => {
+            if (!response.ok) throw new Error('Failed to escalate complaint');
+            return response.json();
+        })
+        .then(data => {
+            showNotification('success', `Complaint ${complaintId} has been escalated`);
+            updateDashboard();
+        })
+        .catch(error => {
+            console.error('Error escalating complaint:', error);
+            showNotification('error', `Failed to escalate complaint: ${error.message}`);
+        });
+    }
+}
+
+// Resolve an escalated complaint
+function resolveEscalatedComplaint(complaintId) {
+    if (confirm(`Are you sure you want to resolve escalated complaint ${complaintId}?`)) {
+        fetch('/officials/resolve-escalated', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                complaint_id: complaintId,
+                resolution: 'Issue has been resolved'
+            })
+        })
+        .then(response => {
+            if (!response.ok) throw new Error('Failed to resolve complaint');
+            return response.json();
+        })
+        .then(data => {
+            showNotification('success', `Escalated complaint ${complaintId} has been resolved`);
+            updateDashboard();
+        })
+        .catch(error => {
+            console.error('Error resolving complaint:', error);
+            showNotification('error', `Failed to resolve complaint: ${error.message}`);
+        });
+    }
+}
+
+// Load complaints for officials dashboard
+async function loadComplaintsForOfficials(filterStatus = 'all') {
+    try {
+        const response = await fetch('/complaint/recent', {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            credentials: 'same-origin'
+        });
+
+        if (response.redirected) {
+            window.location.href = response.url;
+            return;
+        }
+
+        const complaints = await response.json();
+        const tableBody = document.getElementById('complaints-table-body');
+
+        if (!tableBody) return;
+
+        tableBody.innerHTML = '';
+
+        // Filter complaints based on status
+        let filteredComplaints = complaints;
+        if (filterStatus !== 'all') {
+            filteredComplaints = complaints.filter(c => c.status === filterStatus);
+        }
+
+        if (filteredComplaints.length === 0) {
+            const emptyRow = document.createElement('tr');
+            emptyRow.innerHTML = '<td colspan="7" style="text-align: center; padding: 20px;">No complaints found</td>';
+            tableBody.appendChild(emptyRow);
+        } else {
+            // Display filtered complaints
+            filteredComplaints.forEach(complaint => {
+                const row = document.createElement('tr');
+                row.setAttribute('data-complaint-id', complaint.id);
+
+                const dateDisplay = formatDateForTable(complaint.submitted_date);
+                const categoryDisplay = complaint.category || 'N/A';
+
+                row.innerHTML = `
+                    <td>${complaint.id}</td>
+                    <td>${categoryDisplay}</td>
+                    <td>${dateDisplay}</td>
+                    <td>${complaint.user_name || 'Resident'}</td>
+                    <td><span class="status ${complaint.status.toLowerCase().replace(/\s/g, '-')}">${complaint.status}</span></td>
+                    <td><span class="urgency ${complaint.urgency.toLowerCase()}">${complaint.urgency}</span></td>
+                    <td>
+                        <div class="action-buttons">
+                            <a href="#view" class="btn-action btn-view" onclick="showComplaintDetails('${complaint.id}')"><i class="fas fa-eye"></i></a>
+                            <a href="#update" class="btn-action btn-update" onclick="showStatusUpdateModal('${complaint.id}')"><i class="fas fa-edit"></i></a>
+                            <a href="#message" class="btn-action btn-message" onclick="showMessageModal('${complaint.id}', '${complaint.user_email}')"><i class="fas fa-envelope"></i></a>
+                        </div>
+                    </td>
+                `;
+
+                tableBody.appendChild(row);
+            });
+        }
+
+        // Update all badge counts
+        updateBadgeCounts(complaints);
+
+    } catch (error) {
+        console.error('Error loading complaints:', error);
+        const tableBody = document.getElementById('complaints-table-body');
+        if (tableBody) {
+            tableBody.innerHTML = '<tr><td colspan="7" style="text-align: center; padding: 20px;">Error loading complaints</td></tr>';
+        }
+    }
+}
+
+// Update badge counts for all Quick Action filters
+function updateBadgeCounts(complaints) {
+    const statusGroups = {
+        'all': complaints.length,
+        'New': complaints.filter(c => c.status === 'New').length,
+        'Pending Review': complaints.filter(c => c.status === 'Pending Review').length,
+        'In Progress': complaints.filter(c => c.status === 'In Progress').length,
+        'Escalated': complaints.filter(c => c.status === 'Escalated').length,
+        'Resolved': complaints.filter(c => c.status === 'Resolved').length
+    };
+
+    // Update each badge
+    Object.keys(statusGroups).forEach(status => {
+        const badge = document.querySelector(`.badge[data-status="${status}"]`);
+        if (badge) {
+            badge.textContent = statusGroups[status];
+        }
+    });
+}
+
+// Format date for table display
+function formatDateForTable(dateString) {
+    const date = new Date(dateString);
+    const now = new Date();
+    const diffTime = Math.abs(now - date);
+    const diffDays = Math.floor(diffTime / (1000 * 60 * 60 * 24));
+
+    if (diffDays === 0) {
+        return 'Today';
+    } else if (diffDays === 1) {
+        return 'Yesterday';
+    } else {
+        return `${diffDays} days ago`;
+    }
+}
+
+// Load feedback from Firebase
+async function loadFeedback(filterType = 'all') {
+    try {
+        const url = filterType === 'all' ? '/feedback/recent' : `/feedback/filter?type=${filterType}`;
+
+        const response = await fetch(url, {
+            method: 'GET',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            credentials: 'same-origin'
+        });
+
+        if (response.redirected) {
+            window.location.href = response.url;
+            return;
+        }
+
+        const feedbackList = await response.json();
+        const feedbackContainer = document.getElementById('feedback-list');
+
+        if (!feedbackContainer) return;
+
+        feedbackContainer.innerHTML = '';
+
+        if (feedbackList.length === 0) {
+            feedbackContainer.innerHTML = '<p style="text-align: center; padding: 20px; color: #666;">No feedback available</p>';
+        } else {
+            feedbackList.forEach(feedback => {
+                const feedbackCard = createFeedbackCard(feedback);
+                feedbackContainer.appendChild(feedbackCard);
+            });
+        }
+
+    } catch (error) {
+        console.error('Error loading feedback:', error);
+        const feedbackContainer = document.getElementById('feedback-list');
+        if (feedbackContainer) {
+            feedbackContainer.innerHTML = '<p style="text-align: center; padding: 20px; color: #e74c3c;">Error loading feedback</p>';
+        }
+    }
+}
+
+// Create feedback card element
+function createFeedbackCard(feedback) {
+    const card = document.createElement('div');
+
+    // Determine card class based on rating
+    let cardClass = 'neutral';
+    if (feedback.rating >= 4) {
+        cardClass = 'positive';
+    } else if (feedback.rating <= 2) {
+        cardClass = 'negative';
+    }
+
+    card.className = `feedback-card ${cardClass}`;
+
+    // Generate star rating HTML
+    const starsHTML = generateStars(feedback.rating);
+
+    // Format date
+    const feedbackDate = formatDateForTable(feedback.submitted_date);
+
+    // Get feedback type display name
+    const feedbackTypeDisplay = getFeedbackTypeDisplay(feedback.feedback_type);
+
+    card.innerHTML = `
+        <div class="feedback-header">
+            <div class="resident-avatar">
+                <i class="fas fa-user"></i>
+            </div>
+            <div class="resident-info">
+                <h3>${feedback.user_name || 'Anonymous'}</h3>
+                <div class="rating-stars">
+                    ${starsHTML}
+                </div>
+            </div>
+            <span class="feedback-date">${feedbackDate}</span>
+        </div>
+        <div class="feedback-content">
+            <p><strong>Type:</strong> ${feedbackTypeDisplay}</p>
+            <p>${feedback.message}</p>
+        </div>
+        ${feedback.complaint_id ? `<div class="feedback-meta">
+            <span class="complaint-reference">${feedback.complaint_id}</span>
+        </div>` : ''}
+    `;
+
+    return card;
+}
+
+// Generate star rating HTML
+function generateStars(rating) {
+    let starsHTML = '';
+    for (let i = 1; i <= 5; i++) {
+        if (i <= rating) {
+            starsHTML += '<i class="fas fa-star"></i>';
+        } else {
+            starsHTML += '<i class="far fa-star"></i>';
+        }
+    }
+    return starsHTML;
+}
+
+// Get feedback type display name
+function getFeedbackTypeDisplay(type) {
+    const types = {
+        'complaint-process': 'Complaint Process',
+        'response-time': 'Response Time',
+        'staff-courtesy': 'Staff Courtesy',
+        'resolution-quality': 'Resolution Quality',
+        'system-usability': 'System Usability',
+        'other': 'Other'
+    };
+    return types[type] || type;
+}
+
+// Feedback filter change handler
+document.getElementById('feedback-filter')?.addEventListener('change', function(e) {
+    const filterType = e.target.value;
+    loadFeedback(filterType);
+});
+
+// Initialize - Load complaints on page load
+document.addEventListener('DOMContentLoaded', function() {
+    loadComplaintsForOfficials();
+});
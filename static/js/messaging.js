@@ -3,10 +3,38 @@
 
 const IS_OFFICIAL_DASHBOARD = !!document.getElementById('status-update-modal');
 
-// Load list of residents for official's compose message modal
-function loadResidentsForMessaging() {
-    console.log('Loading residents for messaging...');
-    fetch('/residents/list', {
+// One /me/stream connection per page pushes the user's new messages,
+// notifications and complaint changes; the dashboards only poll when the
+// browser has no EventSource or the server does not stream (it answers 204
+// when its workers cannot hold idle connections, see events.py)
+const ME_STREAM_DEBOUNCE_MS = 250;
+const meStreamHandlers = { message: [], notification: [], complaint: [], resync: [] };
+let meStream = null;
+let meStreamRefused = false;
+let meStreamFallbacks = [];
+
+function onMeStreamEvent(kind, handler) {
+    let timer = null;
+    meStreamHandlers[kind].push(data => {
+        // A burst of events (a message and its notification) reloads once
+        clearTimeout(timer);
+        timer = setTimeout(() => handler(data), ME_STREAM_DEBOUNCE_MS);
+    });
+}
+
+function dispatchMeStreamEvent(kind, data) {
+    meStreamHandlers[kind].forEach(handler => handler(data));
+}
+
+// Local copies of the complaint lists, by URL. Each refresh asks only for
+// what changed since the last one (?since=<token>) and merges it in
+const complaintCopies = {};
+
+function syncComplaints(url) {
+    const copy = complaintCopies[url] || (complaintCopies[url] = { token: '', byId: new Map(), pending: null });
+    if (copy.pending) return copy.pending;
+
+    copy.pending = fetch(`${url}?since=${encodeURIComponent(copy.token)}`, {
         method: 'GET',
         headers: {
             'X-Requested-With': 'XMLHttpRequest'
@@ -14,74 +42,152 @@ function loadResidentsForMessaging() {
         credentials: 'same-origin'
     })
     .then(response => {
-        console.log('Residents response status:', response.status);
+        // Session expired: the request was sent to the login page
+        if (response.redirected) {
+            window.location.href = response.url;
+            throw new Error('Not logged in');
+        }
+        if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
         return response.json();
     })
-    .then(residents => {
-        console.log('Residents received:', residents);
-        
-        // Try both admin and official dashboard IDs
-        const select = document.getElementById('message-recipient-official') || 
-                      document.getElementById('message-recipient');
-        if (!select) {
-            console.error('Recipient select element not found!');
-            return;
-        }
+    .then(delta => {
+        if (delta.full) copy.byId.clear();
+        delta.removed.forEach(id => copy.byId.delete(id));
+        delta.changed.forEach(complaint => copy.byId.set(complaint.id, complaint));
+        copy.token = delta.token;
+        // Newest first, as the full list is sent
+        return Array.from(copy.byId.values())
+            .sort((a, b) => (b.submitted_date || '').localeCompare(a.submitted_date || ''));
+    })
+    .finally(() => {
+        copy.pending = null;
+    });
+    return copy.pending;
+}
 
-        // Clear existing options except the first one
-        while (select.options.length > 1) {
-            select.remove(1);
-        }
+function runMeStreamFallbacks() {
+    const fallbacks = meStreamFallbacks;
+    meStreamFallbacks = [];
+    fallbacks.forEach(fallback => fallback());
+}
 
-        // Add resident options
-        residents.forEach(resident => {
-            const option = document.createElement('option');
-            option.value = resident.email;
-            option.textContent = `${resident.name} (${resident.email})`;
-            select.appendChild(option);
-        });
-        console.log(`Added ${residents.length} residents to dropdown`);
-    })
-    .catch(error => console.error('Error loading residents:', error));
+// Open the page's /me/stream; fallback (e.g. start polling) runs instead if
+// there will be no stream
+function openMeStream(fallback) {
+    if (fallback) meStreamFallbacks.push(fallback);
+    if (!window.EventSource || meStreamRefused) {
+        runMeStreamFallbacks();
+        return;
+    }
+    if (meStream) return;
+
+    meStream = new EventSource('/me/stream');
+    let connected = false;
+    meStream.onopen = () => {
+        // Anything sent while the connection was down was missed
+        if (connected) dispatchMeStreamEvent('resync', null);
+        connected = true;
+    };
+    meStream.onerror = () => {
+        // A dropped connection is retried (CONNECTING); a 204 or an error
+        // status closes the EventSource for good
+        if (meStream.readyState === EventSource.CLOSED) {
+            meStreamRefused = true;
+            runMeStreamFallbacks();
+        }
+    };
+    Object.keys(meStreamHandlers).forEach(kind => {
+        meStream.addEventListener(kind, event => dispatchMeStreamEvent(kind, JSON.parse(event.data)));
+    });
 }
 
-// Load list of officials for resident's compose message modal
-function loadOfficialsForMessaging() {
-    console.log('Loading officials for messaging...');
-    fetch('/officials/list', {
+// Recipients are suggested by /users/suggest as the sender types, instead of
+// loading every resident into the dropdown; the dropdown holds the matches
+const RECIPIENT_SUGGEST_DELAY_MS = 150;
+const RECIPIENT_SUGGEST_LIMIT = 20;
+let recipientSuggestSeq = 0;
+
+function loadRecipientSuggestions(select, role, query = '') {
+    const requestSeq = ++recipientSuggestSeq;
+    const params = new URLSearchParams({ q: query, role: role, limit: RECIPIENT_SUGGEST_LIMIT });
+    return fetch(`/users/suggest?${params}`, {
         method: 'GET',
         headers: {
             'X-Requested-With': 'XMLHttpRequest'
         },
         credentials: 'same-origin'
     })
-    .then(response => {
-        console.log('Officials response status:', response.status);
-        return response.json();
-    })
-    .then(officials => {
-        console.log('Officials received:', officials);
-        const select = document.getElementById('message-recipient');
-        if (!select) {
-            console.error('message-recipient select not found!');
-            return;
-        }
+    .then(response => response.json())
+    .then(users => {
+        // A newer keystroke already asked again
+        if (requestSeq !== recipientSuggestSeq) return;
 
         // Clear existing options except the first one
         while (select.options.length > 1) {
             select.remove(1);
         }
 
-        // Add official options
-        officials.forEach(official => {
+        users.forEach(user => {
             const option = document.createElement('option');
-            option.value = official.email;
-            option.textContent = `${official.name} (${official.email})`;
+            option.value = user.email;
+            option.dataset.uid = user.uid;
+            option.textContent = `${user.name} (${user.email})`;
             select.appendChild(option);
         });
-        console.log(`Added ${officials.length} officials to dropdown`);
+
+        // Pick the best match while typing, so Enter sends to it
+        if (query && users.length) {
+            select.selectedIndex = 1;
+            select.dispatchEvent(new Event('change'));
+        }
     })
-    .catch(error => console.error('Error loading officials:', error));
+    .catch(error => console.error('Error loading recipient suggestions:', error));
+}
+
+// role is 'resident', 'official', or a function returning one (the admin
+// modal lets the sender switch between them)
+function setupRecipientTypeahead(searchId, selectId, role) {
+    const search = document.getElementById(searchId);
+    const select = document.getElementById(selectId);
+    if (!search || !select) return;
+
+    const currentRole = typeof role === 'function' ? role : () => role;
+    let timer = null;
+    search.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => loadRecipientSuggestions(select, currentRole(), search.value.trim()),
+                           RECIPIENT_SUGGEST_DELAY_MS);
+    });
+}
+
+// uid of the chosen recipient, so the server can fetch them without a query
+function selectedRecipientUid(select) {
+    const option = select.options[select.selectedIndex];
+    return option ? option.dataset.uid || null : null;
+}
+
+// Suggest residents in the official's (or the admin's) compose message modal
+function loadResidentsForMessaging() {
+    const select = document.getElementById('message-recipient-official') ||
+                   document.getElementById('message-recipient');
+    const search = document.getElementById('message-recipient-search-official') ||
+                   document.getElementById('message-recipient-search');
+    if (!select) {
+        console.error('Recipient select element not found!');
+        return;
+    }
+    loadRecipientSuggestions(select, 'resident', search ? search.value.trim() : '');
+}
+
+// Suggest officials in the resident's compose message modal
+function loadOfficialsForMessaging() {
+    const select = document.getElementById('message-recipient');
+    const search = document.getElementById('message-recipient-search');
+    if (!select) {
+        console.error('message-recipient select not found!');
+        return;
+    }
+    loadRecipientSuggestions(select, 'official', search ? search.value.trim() : '');
 }
 
 // Store all complaints data for filtering
@@ -92,14 +198,7 @@ let allComplaintsData = {
 
 // Load list of complaints for message modal
 function loadComplaintsForMessaging(isOfficial = false, filterByEmail = null) {
-    fetch('/complaint/all', {
-        method: 'GET',
-        headers: {
-            'X-Requested-With': 'XMLHttpRequest'
-        },
-        credentials: 'same-origin'
-    })
-    .then(response => response.json())
+    syncComplaints('/complaint/all')
     .then(complaints => {
         // Store all complaints for later filtering
         if (isOfficial) {
@@ -699,7 +798,8 @@ function sendMessage(toEmail, subject, content, complaintId) {
     });
 }
 
-// Poll for new messages and notifications every 30 seconds
+// Load messages and notifications, then reload them when /me/stream says they
+// changed (or every 30 seconds without a stream)
 function startMessagingPoller() {
     // Initial load
     loadMessages();
@@ -714,16 +814,24 @@ function startMessagingPoller() {
         loadComplaintsForMessaging(false);
     }
 
-    // Poll every 30 seconds
-    setInterval(() => {
+    onMeStreamEvent('message', loadMessages);
+    onMeStreamEvent('notification', loadNotifications);
+    onMeStreamEvent('resync', () => {
         loadMessages();
         loadNotifications();
-    }, 30000);
+    });
+    openMeStream(() => {
+        // Poll every 30 seconds
+        setInterval(() => {
+            loadMessages();
+            loadNotifications();
+        }, 30000);
 
-    // Also reload when window regains focus
-    window.addEventListener('focus', () => {
-        loadMessages();
-        loadNotifications();
+        // Also reload when window regains focus
+        window.addEventListener('focus', () => {
+            loadMessages();
+            loadNotifications();
+        });
     });
 }
 
@@ -745,6 +853,8 @@ function setupResidentComposeForm() {
     const cancelBtn = composeModal?.querySelector('.cancel-btn');
     const closeBtn = composeModal?.querySelector('.close-btn');
 
+    setupRecipientTypeahead('message-recipient-search', 'message-recipient', 'official');
+
     if (composeBtn) {
         composeBtn.addEventListener('click', (e) => {
             e.preventDefault();
@@ -790,7 +900,8 @@ function setupResidentComposeForm() {
         composeForm.addEventListener('submit', async (e) => {
             e.preventDefault();
 
-            const toEmail = document.getElementById('message-recipient').value;
+            const recipientSelect = document.getElementById('message-recipient');
+            const toEmail = recipientSelect.value;
             const subject = document.getElementById('message-subject').value;
             const content = document.getElementById('message-content').value;
             const complaintId = document.getElementById('message-complaint').value;
@@ -814,6 +925,7 @@ function setupResidentComposeForm() {
                     },
                     credentials: 'same-origin',
                     body: JSON.stringify({
+                        to_uid: selectedRecipientUid(recipientSelect),
                         to_email: toEmail,
                         subject: subject,
                         content: content,
@@ -855,6 +967,8 @@ function setupOfficialComposeForm() {
     const closeBtn = composeModal?.querySelector('.close-btn');
     const recipientSelect = document.getElementById('message-recipient-official');
 
+    setupRecipientTypeahead('message-recipient-search-official', 'message-recipient-official', 'resident');
+
     // Add event listener to filter complaints when resident is selected
     if (recipientSelect) {
         recipientSelect.addEventListener('change', function() {
@@ -908,7 +1022,7 @@ function setupOfficialComposeForm() {
         composeForm.addEventListener('submit', async (e) => {
             e.preventDefault();
 
-            const toEmail = document.getElementById('message-recipient-official').value;
+            const toEmail = recipientSelect.value;
             const subject = document.getElementById('message-subject-official').value;
             const content = document.getElementById('message-content-official').value;
             const complaintId = document.getElementById('message-complaint-official').value;
@@ -932,6 +1046,7 @@ function setupOfficialComposeForm() {
                     },
                     credentials: 'same-origin',
                     body: JSON.stringify({
+                        to_uid: selectedRecipientUid(recipientSelect),
                         to_email: toEmail,
                         subject: subject,
                         content: content,
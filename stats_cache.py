@@ -0,0 +1,156 @@
+"""
+Stale-while-revalidate cache for the dashboard statistics endpoints.
+
+/admin/stats, /admin/analytics, /officials/stats and /resident/stats each
+aggregate whole collections (or all of a resident's complaints) on every
+call, and the dashboards call them on every load. The numbers may lag a few
+seconds, so each route keeps its last result per key (the resident's email
+for /resident/stats) with two ages:
+
+    fresh   younger than the soft TTL: served as is
+    stale   between the soft and the hard TTL: served as is, and one
+            background thread recomputes it (other requests keep getting the
+            stale value meanwhile)
+    expired older than the hard TTL, or missing: computed in the request
+
+TTLs are per route, in seconds, from <NAME>_CACHE_TTL and
+<NAME>_CACHE_HARD_TTL (e.g. OFFICIALS_STATS_CACHE_TTL); a soft TTL of 0
+turns the cache off for that route.
+
+Each cache names the collections its numbers come from. A write to one of
+them handled by this worker (invalidate('complaints')) drops the cached
+entries at once, so the next request recomputes. Writes through other
+workers show up once the entries go stale.
+
+Lookups are counted in bccms_stats_cache_lookups_total by cache and result
+(hit, stale, miss) on /metrics.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from async_firestore import run_sync
+from firebase_config import get_db
+from metrics import STATS_CACHE_LOOKUPS, STATS_CACHE_REFRESHES
+
+STATS_CACHE_MAX_ENTRIES = int(os.environ.get('STATS_CACHE_MAX_ENTRIES', '10000'))
+
+
+class CacheEntry:
+    __slots__ = ('value', 'stored_at', 'refreshing')
+
+    def __init__(self, value):
+        self.value = value
+        self.stored_at = time.monotonic()
+        self.refreshing = False
+
+
+class StatsCache:
+    """Last computed value per key for one route, served stale while it refreshes"""
+
+    def __init__(self, name, ttl, hard_ttl, depends_on):
+        prefix = name.upper()
+        self.name = name
+        self.ttl = float(os.environ.get(f'{prefix}_CACHE_TTL', ttl))
+        self.hard_ttl = max(float(os.environ.get(f'{prefix}_CACHE_HARD_TTL', hard_ttl)), self.ttl)
+        self.depends_on = set(depends_on)
+        self._entries = OrderedDict()
+        self._client = None
+        # Bumped by invalidate(); a computation started before it is not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """compute()'s value for key, from the cache if it is not expired"""
+        if self.ttl <= 0:
+            return compute()
+        cached, value = self._lookup(key, compute)
+        if cached:
+            return value
+        generation, value = value, compute()
+        self._store(key, value, generation)
+        return value
+
+    async def get_async(self, key, compute):
+        """get() for an async view: compute is a coroutine function"""
+        if self.ttl <= 0:
+            return await compute()
+        cached, value = self._lookup(key, lambda: run_sync(compute()))
+        if cached:
+            return value
+        generation, value = value, await compute()
+        self._store(key, value, generation)
+        return value
+
+    def _lookup(self, key, refresh):
+        """(True, value) if key can be served, starting a refresh if stale; else (False, generation)"""
+        now = time.monotonic()
+        with self._lock:
+            db = get_db()
+            if self._client is not db:
+                # A different client (tests, reconfiguration) means different data
+                self._entries.clear()
+                self._client = db
+            entry = self._entries.get(key)
+            age = now - entry.stored_at if entry else None
+            if entry is not None and age < self.hard_ttl:
+                self._entries.move_to_end(key)
+                if age < self.ttl:
+                    STATS_CACHE_LOOKUPS.labels(self.name, 'hit').inc()
+                    return True, entry.value
+                STATS_CACHE_LOOKUPS.labels(self.name, 'stale').inc()
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(target=self._refresh, args=(key, entry, refresh, self._generation),
+                                     daemon=True, name=f'{self.name}-refresh').start()
+                return True, entry.value
+            STATS_CACHE_LOOKUPS.labels(self.name, 'miss').inc()
+            return False, self._generation
+
+    def _refresh(self, key, entry, compute, generation):
+        try:
+            self._store(key, compute(), generation)
+            STATS_CACHE_REFRESHES.labels(self.name, 'ok').inc()
+        except Exception as e:
+            # Keep serving the stale value; the request after the hard TTL recomputes
+            STATS_CACHE_REFRESHES.labels(self.name, 'error').inc()
+            print(f"Error refreshing {self.name} cache: {str(e)}")
+        finally:
+            entry.refreshing = False
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = CacheEntry(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > STATS_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+_caches = []
+
+
+def stats_cache(name, ttl, hard_ttl, depends_on=('complaints',)):
+    """Register the cache for one statistics route"""
+    cache = StatsCache(name, ttl, hard_ttl, depends_on)
+    _caches.append(cache)
+    return cache
+
+
+def invalidate(collection):
+    """Drop cached statistics computed from collection after a write to it in this worker"""
+    for cache in _caches:
+        if collection in cache.depends_on:
+            cache.clear()
+
+
+def reset():
+    for cache in _caches:
+        cache.clear()
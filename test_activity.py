@@ -0,0 +1,29 @@
+"""
+The admin dashboard's activity log (activity.py, /admin/recent-activity).
+"""
+from activity import ACTIVITY_COLLECTION
+
+
+def test_pages_cover_the_log_newest_first(seeded, client_as):
+    db, _ = seeded
+    client = client_as('admin')
+    seen, cursor = [], None
+    while True:
+        response = client.get('/admin/recent-activity?limit=9' + (f"&cursor={cursor}" if cursor else ''))
+        seen += [entry['id'] for entry in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    everything = sorted(db.collection(ACTIVITY_COLLECTION).stream(), key=lambda doc: doc.to_dict()['ts'], reverse=True)
+    assert seen == [doc.id for doc in everything]
+
+
+def test_deleted_cursor_does_not_restart_paging(seeded, client_as):
+    db, _ = seeded
+    client = client_as('admin')
+    cursor = client.get('/admin/recent-activity?limit=5').headers['X-Next-Cursor']
+    # e.g. a signup entry removed by a user cleanup
+    db.collection(ACTIVITY_COLLECTION).document(cursor).delete()
+
+    response = client.get(f"/admin/recent-activity?limit=5&cursor={cursor}")
+    assert response.status_code == 400 and 'first page' in response.get_json()['error']
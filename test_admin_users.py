@@ -0,0 +1,107 @@
+"""
+The admin user list (/admin/users). Every page is followed to the end and
+compared with the list worked out directly from the seeded users, so a
+filter, search or cursor that skips or repeats someone shows up as a diff.
+"""
+import pytest
+
+import admin_firebase
+from admin_firebase import USERS_PAGE_SIZE
+from user_search import normalize
+
+
+def expected(db, statuses=('approved', 'blocked'), role=None, q=None):
+    """uids the list should hold, in its order, worked out from every user"""
+    users = []
+    for doc in db.collection('users').stream():
+        user = doc.to_dict()
+        if user.get('is_admin') or user.get('status') not in statuses:
+            continue
+        if role and user.get('role') != role:
+            continue
+        if q and not any(term.startswith(normalize(q)) for term in
+                         [normalize(user['full_name'])] + normalize(user['full_name']).split(' ')
+                         + [normalize(user['email'])]):
+            continue
+        users.append((user['name_lower'], doc.id))
+    return [uid for _, uid in sorted(users)]
+
+
+def every_page(client, query, limit=7):
+    """Follow X-Next-Cursor to the end, return the uids and the number of pages"""
+    uids, pages, cursor = [], 0, None
+    while True:
+        url = f"/admin/users?{query}&limit={limit}" + (f"&cursor={cursor}" if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        uids += [user['uid'] for user in page]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return uids, pages
+
+
+def test_pages_cover_every_active_user_once(seeded, client_as):
+    db, ids = seeded
+    uids, pages = every_page(client_as('admin'), 'role=all')
+    assert uids == expected(db)
+    assert pages >= len(uids) // 7
+    assert ids['admin_uid'] not in uids and ids['pending_uid'] not in uids
+
+
+@pytest.mark.parametrize('role', ['resident', 'official'])
+def test_role_filter(seeded, client_as, role):
+    db, _ = seeded
+    uids, _ = every_page(client_as('admin'), f"role={role}")
+    assert uids and uids == expected(db, role=role)
+
+
+def test_status_filters(seeded, client_as):
+    db, ids = seeded
+    db.collection('users').document(ids['other_resident_uid']).update({'status': 'blocked'})
+    client = client_as('admin')
+
+    blocked, _ = every_page(client, 'status=blocked')
+    assert blocked == [ids['other_resident_uid']]
+    approved, _ = every_page(client, 'status=approved')
+    assert ids['other_resident_uid'] not in approved and approved == expected(db, ('approved',))
+    active, _ = every_page(client, 'status=active')
+    assert ids['other_resident_uid'] in active
+    pending, _ = every_page(client, 'status=pending_approval')
+    assert pending == [ids['pending_uid']]
+
+
+@pytest.mark.parametrize('q', ['Resident 0001', 'official', 'PROBE-', '0002', 'nobody-by-this-name'])
+def test_search_matches_name_or_email_prefixes(seeded, client_as, q):
+    db, _ = seeded
+    uids, _ = every_page(client_as('admin'), f"q={q}", limit=5)
+    assert uids == expected(db, q=q)
+
+
+def test_search_combines_with_filters(seeded, client_as):
+    db, _ = seeded
+    uids, _ = every_page(client_as('admin'), 'role=official&q=official-00', limit=3)
+    assert uids and uids == expected(db, role='official', q='official-00')
+
+
+def test_invalid_filters_and_limits(client_as, monkeypatch):
+    client = client_as('admin')
+    assert client.get('/admin/users?role=admin').status_code == 400
+    assert client.get('/admin/users?status=everyone').status_code == 400
+    assert len(client.get('/admin/users?limit=nonsense').get_json()) == USERS_PAGE_SIZE
+    monkeypatch.setattr(admin_firebase, 'USERS_MAX_PAGE_SIZE', 4)
+    response = client.get('/admin/users?limit=100000')
+    assert len(response.get_json()) == 4 and response.headers['X-Next-Cursor']
+    assert client_as('official').get('/admin/users').status_code == 403
+
+
+def test_deleted_cursor_does_not_restart_paging(seeded, client_as):
+    db, _ = seeded
+    client = client_as('admin')
+    cursor = client.get('/admin/users?limit=5').headers['X-Next-Cursor']
+    db.collection('users').document(cursor).delete()
+
+    response = client.get(f"/admin/users?limit=5&cursor={cursor}")
+    assert response.status_code == 400 and 'first page' in response.get_json()['error']
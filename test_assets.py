@@ -0,0 +1,54 @@
+"""
+minify_js (assets.py) on a small sample script: comments and indentation
+go, while template literals and regex literals that look like comments or
+quotes come through untouched.
+"""
+from assets import minify_js
+
+SOURCE = '''
+// Render one row
+function row(item) {
+    const url = "http://example.com/" + item.id;  // not a comment line
+    return `
+        <tr>
+            // shown as text, not a comment
+            <td>${item.title}</td>
+            <td>${item.tags.map(tag => `
+                <span>${tag}</span>`).join('')}</td>
+
+            <td>${url}</td>
+        </tr>   `;
+}
+    const pattern = /`[^/]*\\//g;
+    // gone
+    const after = `  kept  `;
+'''
+
+
+def test_code_lines_lose_comments_and_indentation():
+    lines = minify_js(SOURCE).split('\n')
+    assert lines[0] == 'function row(item) {'
+    assert 'const url = "http://example.com/" + item.id;  // not a comment line' in lines
+    assert '// Render one row' not in lines and '// gone' not in lines
+
+
+def test_template_literals_are_kept_as_written():
+    minified = minify_js(SOURCE)
+    assert '''return `
+        <tr>
+            // shown as text, not a comment
+            <td>${item.title}</td>
+''' in minified
+    # Text of a template nested in a ${...} expression, and the blank line after it
+    assert '''
+                <span>${tag}</span>`).join('')}</td>
+
+            <td>${url}</td>
+        </tr>   `;''' in minified
+
+
+def test_regex_literals_do_not_open_templates():
+    lines = minify_js(SOURCE).split('\n')
+    # The backtick in the regex is not a template, so the lines after it are code
+    assert 'const pattern = /`[^/]*\\//g;' in lines
+    assert 'const after = `  kept  `;' in lines
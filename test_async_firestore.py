@@ -0,0 +1,108 @@
+"""
+Async views on the AsyncClient (async_firestore.py).
+
+The stand-in's latency makes overlapping reads visible in the timings. The
+gevent test runs in a subprocess, since monkey-patching can't be undone
+inside this one.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import stats_cache
+
+
+def test_async_views_overlap_independent_calls(seeded, client_as):
+    db, ids = seeded
+    db.latency = 0.2
+    stats_cache.reset()
+    client = client_as('admin')
+
+    start = time.perf_counter()
+    response = client.get('/admin/stats')
+    elapsed = time.perf_counter() - start
+    # The users and complaints scans run at the same time (one after the other would take 0.4s)
+    assert response.status_code == 200 and response.get_json()['total_residents'] > 0
+    assert db.stats['round_trips'] == 2 and elapsed < 0.35
+
+
+def test_send_message_appends_without_reading_the_sender(seeded, client_as):
+    db, ids = seeded
+    official_ref = db.collection('users').document(ids['official_uid'])
+    resident_ref = db.collection('users').document(ids['resident_uid'])
+    inbox = len(official_ref.get().to_dict().get('messages', []))
+    sent = len(resident_ref.get().to_dict().get('messages', []))
+    db.reset_stats()
+
+    resident = client_as('resident')
+    response = resident.post('/message/send', json={'to': ids['official_email'], 'content': 'Hi'})
+    assert response.get_json() == {'success': True}
+    # The recipient lookup, then one batch appending to both arrays
+    assert db.stats['reads'] == 1 and db.stats['round_trips'] == 2
+
+    official = official_ref.get().to_dict()
+    assert len(official['messages']) == inbox + 1 and official['messages'][-1]['content'] == 'Hi'
+    assert official['notifications'][-1]['title'].startswith('New message')
+    messages = resident_ref.get().to_dict()['messages']
+    assert len(messages) == sent + 1 and messages[-1]['isSent']
+
+    missing = resident.post('/message/send', json={'to_uid': 'no-such-user', 'content': 'Hi'})
+    assert missing.status_code == 404
+
+
+def test_concurrent_messages_to_one_inbox_are_all_kept(seeded, client_as):
+    db, ids = seeded
+    official_ref = db.collection('users').document(ids['official_uid'])
+    inbox = len(official_ref.get().to_dict().get('messages', []))
+    db.latency = 0.05
+
+    def send(role, content):
+        client_as(role).post('/message/send', json={'to_uid': ids['official_uid'], 'content': content})
+    threads = [threading.Thread(target=send, args=(role, role)) for role in ('resident', 'admin')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    messages = official_ref.get().to_dict()['messages']
+    assert len(messages) == inbox + 2
+    assert {message['content'] for message in messages[-2:]} == {'resident', 'admin'}
+
+
+GEVENT_SCRIPT = """
+from gevent import monkey
+monkey.patch_all()
+
+import gevent
+from conftest import login_as, seed
+from app import app
+
+db, ids = seed()
+db.latency = 0.05
+
+
+def dashboard(role, method, url, body=None):
+    client = app.test_client()
+    login_as(client, role, ids)
+    response = client.open(url, method=method, json=body)
+    assert response.status_code == 200, (url, response.status_code)
+
+
+requests = [gevent.spawn(dashboard, 'admin', 'GET', '/admin/stats') for _ in range(3)] + [
+    gevent.spawn(dashboard, 'resident', 'POST', '/message/send', {'to': ids['official_email'], 'content': 'Hi'}),
+    gevent.spawn(dashboard, 'official', 'POST', '/complaint/update',
+                 {'complaint_id': ids['complaint_id'], 'status': 'Resolved'}),
+]
+gevent.joinall(requests, raise_error=True)
+print('ok')
+"""
+
+
+def test_async_views_run_on_gevent():
+    # A gevent worker: patched before the app is imported, as gunicorn.conf.py does
+    env = dict(os.environ, FIRESTORE_BACKEND='memory')
+    result = subprocess.run([sys.executable, '-c', GEVENT_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0 and result.stdout.splitlines()[-1] == 'ok', result.stderr
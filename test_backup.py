@@ -0,0 +1,106 @@
+"""
+Backup and restore (backup.py). A seeded stand-in is backed up to a
+temporary directory and restored into an empty one; the rest checks that
+damaged backups and failing writes are refused rather than half-restored.
+"""
+import json
+import os
+
+import pytest
+from google.api_core import exceptions
+
+import memory_firestore
+import seed_data
+from backup import MANIFEST_NAME, backup, restore
+
+
+@pytest.fixture
+def source():
+    db = memory_firestore.Client()
+    seed_data.seed(db, complaints=150)
+    return db
+
+
+def contents(db):
+    return {ref.id: {doc.id: doc.to_dict() for doc in ref.stream()} for ref in db.collections()}
+
+
+def test_restore_recreates_every_document(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    manifest = backup(source, directory, workers=4, compression='gzip')
+    assert os.path.exists(os.path.join(directory, MANIFEST_NAME))
+
+    target = memory_firestore.Client()
+    counts = restore(target, directory, workers=4)
+    assert counts == {name: entry['documents'] for name, entry in manifest['collections'].items()}
+    assert contents(target) == contents(source)
+
+
+def test_restore_of_selected_collections(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    backup(source, directory, compression='gzip')
+    target = memory_firestore.Client()
+    restore(target, directory, collections=['complaints'])
+    assert [ref.id for ref in target.collections()] == ['complaints']
+    with pytest.raises(ValueError):
+        restore(target, directory, collections=['no-such-collection'])
+
+
+def test_backup_refuses_to_overwrite(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    backup(source, directory, collections=['users'], compression='gzip')
+    with pytest.raises(FileExistsError):
+        backup(source, directory, collections=['users'], compression='gzip')
+
+
+def test_tampered_shard_is_refused(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    manifest = backup(source, directory, collections=['complaints'], compression='gzip')
+    shard = manifest['collections']['complaints']['shards'][0]
+    with open(os.path.join(directory, shard['file']), 'ab') as f:
+        f.write(b'\0')
+    with pytest.raises(ValueError, match='checksum'):
+        restore(memory_firestore.Client(), directory)
+
+
+def test_manifest_document_count_is_checked(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    backup(source, directory, collections=['complaints'], compression='gzip')
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest['collections']['complaints']['shards'][0]['documents'] += 1
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match='documents'):
+        restore(memory_firestore.Client(), directory)
+
+
+def test_transient_write_errors_are_retried(source, tmp_path, monkeypatch):
+    directory = str(tmp_path / 'backup')
+    backup(source, directory, compression='gzip')
+    target = memory_firestore.Client()
+
+    # Every third batch the BulkWriter sends fails once
+    calls = {'count': 0}
+    round_trip = target._round_trip
+
+    def flaky(timeout=None):
+        calls['count'] += 1
+        if calls['count'] % 3 == 0:
+            raise exceptions.ServiceUnavailable('try again')
+        return round_trip(timeout)
+    monkeypatch.setattr(target, '_round_trip', flaky)
+
+    restore(target, directory)
+    monkeypatch.undo()
+    assert contents(target) == contents(source)
+
+
+def test_writes_that_keep_failing_fail_the_restore(source, tmp_path):
+    directory = str(tmp_path / 'backup')
+    backup(source, directory, collections=['complaints'], compression='gzip')
+    target = memory_firestore.Client()
+    target.unavailable = True
+    with pytest.raises(RuntimeError, match='writes from complaints-'):
+        restore(target, directory)
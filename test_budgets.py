@@ -0,0 +1,357 @@
+"""
+Per-route resource budgets.
+
+Runs every route of the complaint, admin and feedback blueprints against the
+in-memory Firestore stand-in, seeded at several dataset sizes, and records
+for each request the documents read, Firestore round trips, tracemalloc peak
+memory and response bytes. A test fails when a route exceeds its declared
+budget, or when a route declared CONSTANT grows with the dataset.
+
+    python -m pytest -q test_budgets.py     # assert budgets
+    python test_budgets.py                  # print the measurements
+
+Every route must have an entry in ROUTE_BUDGETS, so a new handler cannot
+ship without declaring what it is allowed to cost.
+"""
+import tracemalloc
+
+import pytest
+
+import seed_data
+from conftest import login_as, seed
+
+# Dataset sizes (number of complaints; users, feedback and notifications scale with it)
+SIZES = (100, 400, 1600)
+
+CONSTANT = 'constant'   # cost must not depend on dataset size
+LINEAR = 'linear'       # allowed to grow with the dataset, but with a fixed number of round trips
+
+BLUEPRINTS = ('complaint', 'admin', 'feedback')
+
+# Slack for CONSTANT routes between the smallest and largest dataset
+CONSTANT_BYTES_SLACK = 1024
+CONSTANT_PEAK_SLACK = 256 * 1024
+
+# endpoint -> request to send and budget it must stay within
+#   path / method / role / json / form   the request (ids filled from the seed)
+#   scaling          CONSTANT or LINEAR
+#   reads            max documents read (CONSTANT routes)
+#   reads_per_item   max documents read per seeded complaint (LINEAR routes)
+#   round_trips      max Firestore round trips
+#   round_trips_per_item  max round trips per seeded complaint (known N+1 routes)
+#   reads_growth     reads a CONSTANT route may add between the smallest and largest
+#                    dataset (deduplicated joins read fewer docs when ids repeat)
+#   stream           read only the first event of a streaming response
+#   skip             reason the route cannot be exercised
+ROUTE_BUDGETS = {
+    # ---- complaints_firebase ----
+    'complaint.complaint_stream': {
+        'path': '/stream', 'role': 'official', 'stream': True,
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips': 1,
+    },
+    'complaint.me_stream': {
+        'path': '/me/stream', 'role': 'resident', 'stream': True,
+        'scaling': CONSTANT, 'reads': 0, 'round_trips': 0,
+    },
+    'complaint.submit_complaint': {
+        'path': '/complaint/submit', 'method': 'POST', 'role': 'resident',
+        'form': {'title': 'Broken streetlight', 'category': 'road', 'description': 'Dark at night',
+                 'location': 'Purok 3', 'incident-date': '2025-06-01'},
+        'scaling': CONSTANT, 'reads': 0, 'round_trips': 2,
+    },
+    'complaint.get_recent_complaints': {
+        'path': '/complaint/recent', 'role': 'official',
+        'scaling': CONSTANT, 'reads': 5, 'round_trips': 1,
+    },
+    'complaint.get_all_complaints': {
+        'path': '/complaint/all', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': seed_data.PROBE_COMPLAINTS, 'round_trips': 1,
+    },
+    'complaint.get_complaint_details': {
+        'path': '/complaint/details?id={complaint_id}', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'complaint.get_officials_stats': {
+        'path': '/officials/stats', 'role': 'official',
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips': 2,
+    },
+    'complaint.get_complaints_by_status': {
+        'path': '/officials/complaints/resolved', 'role': 'official',
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips': 2,
+    },
+    'complaint.update_complaint': {
+        'path': '/complaint/update', 'method': 'POST', 'role': 'official',
+        'json': {'complaint_id': '{complaint_id}', 'status': 'In Progress', 'notes': 'On it'},
+        'scaling': CONSTANT, 'reads': 2, 'round_trips': 4,
+    },
+    'complaint.get_officials_list': {
+        'path': '/officials/list', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': seed_data.OFFICIAL_COUNT + 3, 'round_trips': 1,
+    },
+    'complaint.get_residents_list': {
+        'path': '/residents/list', 'role': 'official',
+        'scaling': LINEAR, 'reads_per_item': 0.5, 'round_trips': 1,
+    },
+    'complaint.get_messages': {
+        'path': '/messages', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'complaint.send_message': {
+        'path': '/message/send', 'method': 'POST', 'role': 'resident',
+        'json': {'to_uid': '{official_uid}', 'subject': 'Hello', 'content': 'Any update?'},
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    # The first request in a worker builds the user index from one users scan;
+    # later ones are answered from memory (test_user_index_answers_from_memory)
+    'complaint.suggest_users': {
+        'path': '/users/suggest?q=off', 'role': 'resident',
+        'scaling': LINEAR, 'reads_per_item': 0.5, 'round_trips': 1,
+    },
+    'complaint.get_notifications': {
+        'path': '/notifications', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'complaint.mark_notification_read': {
+        'path': '/notifications/mark_read', 'method': 'POST', 'role': 'resident',
+        'json': {'id': '{notification_id}'},
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    'complaint.get_resident_stats': {
+        'path': '/resident/stats', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': seed_data.PROBE_COMPLAINTS, 'round_trips': 1,
+    },
+
+    # ---- admin_firebase ----
+    'admin.get_admin_stats': {
+        'path': '/admin/stats', 'role': 'admin',
+        'scaling': LINEAR, 'reads_per_item': 1.5, 'round_trips': 2,
+    },
+    'admin.get_recent_activity': {
+        'path': '/admin/recent-activity?limit=10&cursor=activity-c0000000', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 11, 'round_trips': 2,
+    },
+    'admin.get_admin_complaints': {
+        'path': '/admin/complaints', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 20, 'round_trips': 2, 'reads_growth': 10,
+    },
+    'admin.get_admin_users': {
+        'path': '/admin/users?role=resident&q=resident&cursor={resident_uid}', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 11, 'round_trips': 2,
+    },
+    'admin.get_complaint_analytics': {
+        'path': '/admin/analytics', 'role': 'admin',
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips': 1,
+    },
+    'admin.get_user_details': {
+        'path': '/admin/user/{resident_uid}', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'admin.delete_user': {
+        'path': '/admin/user/delete', 'method': 'POST', 'role': 'admin',
+        'json': {'uid': '{other_resident_uid}'},
+        'scaling': CONSTANT, 'reads': 8, 'round_trips': 13,
+    },
+    'admin.get_cleanup_jobs': {
+        'path': '/admin/user/cleanup-jobs', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'admin.delete_complaint': {
+        'path': '/admin/complaint/delete', 'method': 'POST', 'role': 'admin',
+        'json': {'id': '{complaint_id}'},
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    'admin.get_residents_list': {
+        'skip': '/residents/list is shadowed by complaint.get_residents_list',
+    },
+    'admin.get_notifications_list': {
+        'path': '/notifications/list', 'role': 'admin',
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips': 1,
+    },
+    'admin.mark_notification_read': {
+        'path': '/notifications/mark-read', 'method': 'POST', 'role': 'admin',
+        'json': {'notification_id': '{admin_notification_id}'},
+        'scaling': CONSTANT, 'reads': 0, 'round_trips': 1,
+    },
+    'admin.mark_all_notifications_read': {
+        'path': '/notifications/mark-all-read', 'method': 'POST', 'role': 'admin',
+        'scaling': LINEAR, 'reads_per_item': 1.0, 'round_trips_per_item': 1.0,
+    },
+    'admin.get_pending_registrations': {
+        'path': '/admin/pending-registrations', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'admin.approve_registration': {
+        'path': '/admin/approve-registration/{pending_uid}', 'method': 'POST', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    'admin.reject_registration': {
+        'path': '/admin/reject-registration/{pending_uid}', 'method': 'POST', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    'admin.get_pending_count': {
+        'path': '/admin/pending-count', 'role': 'admin',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'admin.toggle_block_user': {
+        'path': '/admin/user/toggle-block', 'method': 'POST', 'role': 'admin',
+        'json': {'uid': '{other_resident_uid}', 'action': 'block'},
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+
+    # ---- feedback_firebase ----
+    'feedback.submit_feedback': {
+        'path': '/feedback/submit', 'method': 'POST', 'role': 'resident',
+        'form': {'feedback-type': 'response-time', 'rating': '5', 'feedback-message': 'Great work'},
+        'scaling': CONSTANT, 'reads': 0, 'round_trips': 1,
+    },
+    'feedback.get_recent_feedback': {
+        'path': '/feedback/recent?limit=20', 'role': 'official',
+        'scaling': CONSTANT, 'reads': 20, 'round_trips': 1,
+    },
+    'feedback.get_my_feedback': {
+        'path': '/feedback/my-feedback', 'role': 'resident',
+        'scaling': CONSTANT, 'reads': seed_data.PROBE_FEEDBACK, 'round_trips': 1,
+    },
+    'feedback.reply_to_feedback': {
+        'path': '/feedback/reply', 'method': 'POST', 'role': 'official',
+        'json': {'feedback_id': '{feedback_id}', 'reply_message': 'Thanks!'},
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 2,
+    },
+    'feedback.get_feedback_stats': {
+        'path': '/feedback/stats', 'role': 'official',
+        'scaling': CONSTANT, 'reads': 1, 'round_trips': 1,
+    },
+    'feedback.filter_feedback': {
+        'path': '/feedback/filter?type=positive&limit=20&cursor={feedback_id}', 'role': 'official',
+        'scaling': CONSTANT, 'reads': 21, 'round_trips': 2,
+    },
+}
+
+# Fixed cost every LINEAR route may add on top of reads_per_item * size
+# (and round_trips_per_item * size)
+LINEAR_READS_SLACK = 20
+
+
+def fill_ids(value, ids):
+    """Substitute {placeholders} in a request spec with seeded ids"""
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: fill_ids(v, ids) for k, v in value.items()}
+    return value
+
+
+def send(client, endpoint, ids):
+    """Send the route's request from ROUTE_BUDGETS, return (response, body)"""
+    budget = ROUTE_BUDGETS[endpoint]
+    kwargs = {}
+    if 'json' in budget:
+        kwargs['json'] = fill_ids(budget['json'], ids)
+    if 'form' in budget:
+        kwargs['data'] = fill_ids(budget['form'], ids)
+
+    response = client.open(fill_ids(budget['path'], ids), method=budget.get('method', 'GET'),
+                           buffered=not budget.get('stream'), **kwargs)
+    if budget.get('stream'):
+        body = next(iter(response.response))
+        response.close()
+    else:
+        body = response.get_data()
+    return response, body
+
+
+def measure(app, endpoint, size):
+    """Seed a fresh stand-in, send the route's request once, return its cost"""
+    budget = ROUTE_BUDGETS[endpoint]
+    db, ids = seed(complaints=size)
+
+    client = app.test_client()
+    login_as(client, budget['role'], ids)
+
+    tracemalloc.start()
+    try:
+        response, body = send(client, endpoint, ids)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'reads': db.stats['reads'],
+        'writes': db.stats['writes'],
+        'round_trips': db.stats['round_trips'],
+        'peak_bytes': peak,
+        'response_bytes': len(body),
+    }
+
+
+def _run_cleanup_inline(monkeypatch):
+    """Run user cleanup jobs inside the request so their cost is part of its budget"""
+    import admin_firebase
+    import firebase_config
+    import user_cleanup
+    monkeypatch.setattr(admin_firebase, 'start_cleanup', lambda job_id: user_cleanup.run_cleanup(
+        firebase_config.get_db(), job_id))
+
+
+@pytest.fixture(autouse=True)
+def cleanup_inline(monkeypatch):
+    _run_cleanup_inline(monkeypatch)
+
+
+def test_every_route_has_a_budget(app):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.split('.')[0] in BLUEPRINTS}
+    assert endpoints - set(ROUTE_BUDGETS) == set()
+    assert set(ROUTE_BUDGETS) - endpoints == set()
+
+
+@pytest.mark.parametrize('endpoint', sorted(e for e, b in ROUTE_BUDGETS.items() if 'skip' not in b))
+def test_route_budget(app, endpoint):
+    budget = ROUTE_BUDGETS[endpoint]
+    results = {size: measure(app, endpoint, size) for size in SIZES}
+    smallest, largest = results[SIZES[0]], results[SIZES[-1]]
+
+    for size, result in results.items():
+        assert result['status'] < 500, f"{endpoint} failed at {size}: {result}"
+        if 'round_trips_per_item' in budget:
+            allowed = budget['round_trips_per_item'] * size + LINEAR_READS_SLACK
+        else:
+            allowed = budget['round_trips']
+        assert result['round_trips'] <= allowed, \
+            f"{endpoint} made {result['round_trips']} round trips at {size} (budget {allowed:.0f})"
+        if budget['scaling'] == CONSTANT:
+            assert result['reads'] <= budget['reads'], \
+                f"{endpoint} read {result['reads']} documents at {size} (budget {budget['reads']})"
+        else:
+            allowed = budget['reads_per_item'] * size + LINEAR_READS_SLACK
+            assert result['reads'] <= allowed, \
+                f"{endpoint} read {result['reads']} documents at {size} (budget {allowed:.0f})"
+
+    # Growth checks between the smallest and largest dataset
+    if 'round_trips_per_item' not in budget:
+        assert largest['round_trips'] <= smallest['round_trips'], \
+            f"{endpoint} round trips grow with the dataset: {smallest['round_trips']} -> {largest['round_trips']}"
+    if budget['scaling'] == CONSTANT:
+        assert largest['reads'] <= smallest['reads'] + budget.get('reads_growth', 0), \
+            f"{endpoint} reads grow with the dataset: {smallest['reads']} -> {largest['reads']}"
+        assert largest['response_bytes'] <= smallest['response_bytes'] * 2 + CONSTANT_BYTES_SLACK, \
+            f"{endpoint} response grows with the dataset: {smallest['response_bytes']} -> {largest['response_bytes']}"
+        assert largest['peak_bytes'] <= smallest['peak_bytes'] * 2 + CONSTANT_PEAK_SLACK, \
+            f"{endpoint} memory grows with the dataset: {smallest['peak_bytes']} -> {largest['peak_bytes']}"
+
+
+if __name__ == '__main__':
+    import admin_firebase
+    from app import app as flask_app
+    admin_firebase.firebase_auth.delete_user = lambda uid: None
+    _run_cleanup_inline(pytest.MonkeyPatch())
+    print(f"{'route':45} {'size':>6} {'status':>6} {'reads':>7} {'trips':>5} {'peak KB':>8} {'bytes':>8}")
+    for endpoint, budget in sorted(ROUTE_BUDGETS.items()):
+        if 'skip' in budget:
+            print(f"{endpoint:45} skipped: {budget['skip']}")
+            continue
+        for size in SIZES:
+            r = measure(flask_app, endpoint, size)
+            print(f"{endpoint:45} {size:>6} {r['status']:>6} {r['reads']:>7} {r['round_trips']:>5} "
+                  f"{r['peak_bytes'] / 1024:>8.0f} {r['response_bytes']:>8}")
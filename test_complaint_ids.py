@@ -0,0 +1,80 @@
+"""
+Complaint ids (complaint_ids.py): new ULID-style ids sort in the order they
+were issued, and /complaint/recent pages through them by key and then on
+through the legacy random ids, even when the cursor document is gone.
+"""
+from datetime import datetime
+
+from admin_firebase import ADMIN_COMPLAINTS_LIMIT
+from complaint_ids import complaint_id_at, id_timestamp, is_legacy_id, is_valid_id, new_complaint_id
+
+
+def test_new_ids_sort_in_issue_order():
+    ids = [new_complaint_id() for _ in range(1000)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert all(is_valid_id(complaint_id) and not is_legacy_id(complaint_id) for complaint_id in ids)
+    when = datetime(2025, 6, 1, 8, 30)
+    assert id_timestamp(complaint_id_at(when)).replace(tzinfo=None) == when
+
+
+def test_legacy_and_malformed_ids():
+    assert is_valid_id('BCMS-2024-1a2b3c4d') and is_legacy_id('BCMS-2024-1a2b3c4d')
+    assert not is_valid_id('BCMS-2024/../users') and not is_valid_id('')
+
+
+def test_recent_complaints_page_by_key_then_legacy_ids(seeded, client_as):
+    db, ids = seeded
+    # Complaints filed before ids were time-sortable
+    for i in range(7):
+        db.collection('complaints').document(f"BCMS-2024-{i:08x}").set({
+            'id': f"BCMS-2024-{i:08x}", 'user_uid': ids['resident_uid'], 'status': 'New',
+            'submitted_date': f"2024-0{i + 1}-01T08:00:00",
+        })
+    client = client_as('admin')
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f"/admin/complaints?cursor={cursor}" if cursor else '/admin/complaints')
+        seen += [complaint['id'] for complaint in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+    everything = sorted(db.collection('complaints').stream(),
+                        key=lambda doc: doc.to_dict()['submitted_date'], reverse=True)
+    assert seen == [doc.id for doc in everything]
+    assert client.get('/complaint/details?id=BCMS-2024-00000000').status_code == 200
+
+
+def test_deleted_legacy_cursor_does_not_restart_paging(seeded, client_as):
+    db, ids = seeded
+    for i in range(2 * ADMIN_COMPLAINTS_LIMIT):
+        db.collection('complaints').document(f"BCMS-2024-{i:08x}").set({
+            'id': f"BCMS-2024-{i:08x}", 'user_uid': ids['resident_uid'], 'status': 'New',
+            'submitted_date': f"2024-01-01T08:{i // 60:02d}:{i % 60:02d}",
+        })
+    client = client_as('admin')
+
+    cursor = None
+    while cursor is None or not is_legacy_id(cursor):
+        response = client.get(f"/admin/complaints?cursor={cursor}" if cursor else '/admin/complaints')
+        cursor = response.headers['X-Next-Cursor']
+    db.collection('complaints').document(cursor).delete()
+
+    response = client.get(f"/admin/complaints?cursor={cursor}")
+    assert response.status_code == 400 and 'first page' in response.get_json()['error']
+    assert client.get('/admin/complaints?cursor=not-a-complaint').status_code == 400
+
+
+def test_deleted_ulid_cursor_continues_with_legacy_ids(seeded, client_as):
+    db, ids = seeded
+    for i in range(7):
+        db.collection('complaints').document(f"BCMS-2024-{i:08x}").set({
+            'id': f"BCMS-2024-{i:08x}", 'user_uid': ids['resident_uid'], 'status': 'New',
+            'submitted_date': f"2024-0{i + 1}-01T08:00:00",
+        })
+    client = client_as('admin')
+    # The oldest ULID complaint, deleted after it ended a page
+    oldest = min(doc.id for doc in db.collection('complaints').stream() if not is_legacy_id(doc.id))
+    db.collection('complaints').document(oldest).delete()
+
+    response = client.get(f"/admin/complaints?cursor={oldest}")
+    assert response.status_code == 200
+    assert [complaint['id'] for complaint in response.get_json()] == [f"BCMS-2024-{i:08x}" for i in range(6, -1, -1)]
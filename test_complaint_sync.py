@@ -0,0 +1,131 @@
+"""
+?since= deltas for the complaint lists (complaint_sync.py).
+
+no_lag turns off the window in which recent writes are sent again, so a
+test can write and ask for changes straight away.
+"""
+import time
+
+import pytest
+
+import complaint_sync
+import events
+import seed_data
+from complaint_sync import changes_since, parse_token
+from user_cleanup import CLEANUP_JOBS_COLLECTION, new_job, run_cleanup
+
+COMPLAINT_FORM = {'title': 'Broken streetlight', 'category': 'road', 'description': 'Dark at night',
+                  'location': 'Purok 3', 'incident-date': '2025-06-01'}
+
+
+@pytest.fixture
+def no_lag(monkeypatch):
+    monkeypatch.setattr(complaint_sync, 'SYNC_TOKEN_LAG_SECONDS', 0)
+
+
+def test_complaint_lists_send_only_changes_since_a_token(seeded, client_as, no_lag):
+    db, ids = seeded
+    resident, official, admin = client_as('resident'), client_as('official'), client_as('admin')
+
+    # No token: every complaint, and a token to continue from
+    full = official.get('/officials/complaints/all?since=').get_json()
+    assert full['full'] and full['removed'] == []
+    assert len(full['changed']) == len(official.get('/officials/complaints/all').get_json())
+    mine = resident.get('/complaint/all?since=').get_json()
+    assert len(mine['changed']) == seed_data.PROBE_COMPLAINTS
+
+    new_id = resident.post('/complaint/submit', data=COMPLAINT_FORM).get_json()['complaint_id']
+    official.post('/complaint/update', json={'complaint_id': ids['complaint_id'], 'status': 'Resolved'})
+    admin.post('/admin/complaint/delete', json={'id': new_id})
+
+    db.reset_stats()
+    delta = official.get(f"/officials/complaints/all?since={full['token']}").get_json()
+    assert not delta['full']
+    assert [c['id'] for c in delta['changed']] == [ids['complaint_id']]
+    assert delta['changed'][0]['status'] == 'Resolved'
+    assert delta['removed'] == [new_id]
+    # The role check, one changed complaint and one tombstone, whatever the dataset size
+    assert db.stats['reads'] == 3 and db.stats['round_trips'] == 3
+
+    delta = resident.get(f"/complaint/all?since={mine['token']}").get_json()
+    assert [c['id'] for c in delta['changed']] == [ids['complaint_id']] and delta['removed'] == [new_id]
+
+    # Nothing changed since the new token (an empty query is billed as one read)
+    db.reset_stats()
+    quiet = official.get(f"/officials/complaints/all?since={delta['token']}").get_json()
+    assert quiet['changed'] == [] and quiet['removed'] == [] and db.stats['reads'] == 3
+    assert official.get('/officials/complaints/resolved?since=1').status_code == 400
+
+
+def test_writes_inside_the_lag_window_are_sent_again(seeded, client_as):
+    db, ids = seeded
+    official = client_as('official')
+    full = official.get('/officials/complaints/all?since=').get_json()
+    assert int(full['token']) <= (time.time() - complaint_sync.SYNC_TOKEN_LAG_SECONDS) * 1_000_000
+
+    official.post('/complaint/update', json={'complaint_id': ids['complaint_id'], 'status': 'Resolved'})
+    first = official.get(f"/officials/complaints/all?since={full['token']}").get_json()
+    # Still inside the window on the next call, so it comes again and the merge absorbs it
+    again = official.get(f"/officials/complaints/all?since={first['token']}").get_json()
+    assert [c['id'] for c in first['changed']] == [c['id'] for c in again['changed']] == [ids['complaint_id']]
+
+    # A write stamped by a worker whose clock is behind, committed after the last read
+    late = int((time.time() - complaint_sync.SYNC_TOKEN_LAG_SECONDS / 2) * 1_000_000)
+    other_id = next(c['id'] for c in full['changed'] if c['id'] != ids['complaint_id'])
+    db.collection('complaints').document(other_id).update({'status': 'In Progress',
+                                                           complaint_sync.VERSION_FIELD: late})
+    caught = official.get(f"/officials/complaints/all?since={again['token']}").get_json()
+    assert other_id in [c['id'] for c in caught['changed']]
+
+
+def test_unlinked_complaints_leave_only_the_owners_list(seeded, no_lag):
+    db, ids = seeded
+    owner = ids['resident_uid']
+    token = changes_since(db, '')['token']
+    mine = changes_since(db, '', owner_uid=owner)
+    assert len(mine['changed']) == seed_data.PROBE_COMPLAINTS
+
+    # The owner's account is deleted with its complaints kept, anonymised
+    user = db.collection('users').document(owner).get().to_dict()
+    job_id, job = new_job(owner, user, 'anonymise', ids['admin_uid'])
+    db.collection(CLEANUP_JOBS_COLLECTION).document(job_id).set(job)
+    run_cleanup(db, job_id)
+    probe_ids = sorted(c['id'] for c in mine['changed'])
+
+    owners_delta = changes_since(db, mine['token'], owner_uid=owner)
+    assert owners_delta['changed'] == [] and sorted(owners_delta['removed']) == probe_ids
+    # Everyone else sees them changed (now anonymous), not removed
+    officials_delta = changes_since(db, token)
+    assert officials_delta['removed'] == []
+    assert probe_ids == sorted(c['id'] for c in officials_delta['changed'] if c['id'] in probe_ids)
+    assert all(c['user_uid'] is None for c in officials_delta['changed'] if c['id'] in probe_ids)
+
+
+@pytest.mark.parametrize('token', ['', 'garbage', '-', str(int((time.time() - 31 * 86400) * 1_000_000))])
+def test_unusable_tokens_get_the_full_list(seeded, client_as, token):
+    db, ids = seeded
+    resident = client_as('resident')
+    response = resident.get(f"/complaint/all?since={token}").get_json()
+    assert response['full'] and response['removed'] == []
+    assert len(response['changed']) == seed_data.PROBE_COMPLAINTS
+    assert parse_token(response['token']) is not None
+
+
+def test_complaint_stored_under_another_document_id_is_removed_by_its_id(seeded, client_as, no_lag):
+    db, ids = seeded
+    official = client_as('official')
+    db.collection('complaints').document('imported-0001').set({
+        'id': 'BCMS-2024-0000abcd', 'user_uid': ids['resident_uid'], 'status': 'New',
+        'submitted_date': '2024-01-01T08:00:00',
+    })
+    token = official.get('/officials/complaints/all?since=').get_json()['token']
+    subscription = events._hub.subscribe([events.OFFICIALS_TOPIC])
+    try:
+        response = client_as('admin').post('/admin/complaint/delete', json={'id': 'BCMS-2024-0000abcd'})
+        assert response.get_json()['success']
+        # The stream and the delta name it the way the lists do
+        assert subscription.get(timeout=1) == ('complaint', {'id': 'BCMS-2024-0000abcd', 'change': 'removed'})
+    finally:
+        events._hub.unsubscribe(subscription)
+    delta = official.get(f"/officials/complaints/all?since={token}").get_json()
+    assert delta['removed'] == ['BCMS-2024-0000abcd']
@@ -0,0 +1,99 @@
+"""
+The /me/stream event stream (events.py): what it pushes, when it subscribes
+and unsubscribes, and how listeners are shared per user. Without gevent
+the endpoint turns streams away.
+"""
+from flask import session
+
+import events
+
+
+def test_me_stream_pushes_messages_and_complaint_changes(seeded, client_as):
+    db, ids = seeded
+    resident, official = client_as('resident'), client_as('official')
+
+    stream = resident.get('/me/stream', buffered=False)
+    events = iter(stream.response)
+    assert next(events).startswith(b'retry:')
+    db.reset_stats()
+
+    official.post('/message/send', json={'to_uid': ids['resident_uid'], 'content': 'We are on it'})
+    official.post('/complaint/update', json={'complaint_id': ids['complaint_id'], 'status': 'Resolved'})
+    received = [next(events) for _ in range(4)]
+    stream.close()
+
+    kinds = [event.split(b'\n')[0] for event in received]
+    assert kinds == [b'event: message', b'event: notification', b'event: complaint', b'event: notification']
+    assert b'We are on it' in received[0]
+    assert ids['complaint_id'].encode() in received[2]
+    # Only the two writes and their lookups; the stream itself reads nothing
+    assert db.stats['round_trips'] == 6
+
+
+def subscribers(uid):
+    return events._hub.subscribers(events.user_topic(uid))
+
+
+def test_stream_subscribes_while_open(seeded, client_as):
+    db, ids = seeded
+    official = client_as('official')
+    assert subscribers(ids['official_uid']) == 0
+
+    stream = official.get('/me/stream', buffered=False)
+    next(iter(stream.response))
+    assert subscribers(ids['official_uid']) == 1
+    assert events._hub.subscribers(events.OFFICIALS_TOPIC) == 1
+    stream.close()
+    assert subscribers(ids['official_uid']) == 0
+    assert events._hub.subscribers(events.OFFICIALS_TOPIC) == 0
+
+
+def test_response_that_is_never_streamed_never_subscribes(app, seeded):
+    db, ids = seeded
+    with app.test_request_context('/me/stream'):
+        login = {'user_uid': ids['resident_uid'], 'user_email': ids['resident_email'], 'user_role': 'resident'}
+        session.update(login)
+        response = app.view_functions['complaint.me_stream']()
+        assert subscribers(ids['resident_uid']) == 0
+        response.close()
+    assert subscribers(ids['resident_uid']) == 0
+
+
+def test_streams_are_off_without_gevent(client_as, monkeypatch):
+    monkeypatch.setenv('ME_STREAM_ENABLED', 'auto')
+    assert events.streams_enabled() == events._gevent_patched()
+    monkeypatch.setenv('ME_STREAM_ENABLED', '0')
+    response = client_as('resident').get('/me/stream')
+    assert response.status_code == 204 and response.get_data() == b''
+
+
+class FakeListener:
+    """Stands in for UserListener's Firestore watches"""
+    closed = []
+
+    def __init__(self, db, uid):
+        self.uid = uid
+        self.streams = 0
+
+    def close(self):
+        FakeListener.closed.append(self.uid)
+
+
+def test_listeners_are_shared_per_user_and_capped(seeded, monkeypatch):
+    monkeypatch.setattr(events, '_supports_listeners', lambda db: True)
+    monkeypatch.setattr(events, 'UserListener', FakeListener)
+    monkeypatch.setattr(events, 'ME_STREAM_MAX_LISTENERS', 1)
+    FakeListener.closed = []
+
+    first, second = events.subscribe('a', 'resident'), events.subscribe('a', 'resident')
+    assert first.listening and second.listening and first.resync_seconds is None
+    assert events._listeners['a'].streams == 2
+    # Over the cap: no watches, the periodic resync instead
+    other = events.subscribe('b', 'resident')
+    assert not other.listening and other.resync_seconds == events.ME_STREAM_RESYNC_SECONDS
+
+    for subscription in (first, other):
+        events.unsubscribe(subscription)
+    assert FakeListener.closed == []
+    events.unsubscribe(second)
+    assert FakeListener.closed == ['a'] and events._listeners == {}
@@ -0,0 +1,56 @@
+"""
+Feedback lists and statistics (feedback_firebase.py): cursor paging, and
+the per-complaint aggregates behind /feedback/stats.
+"""
+
+
+def every_page(client, url, limit=7):
+    """Follow X-Next-Cursor to the end, return the feedback ids"""
+    ids, cursor = [], None
+    while True:
+        response = client.get(f"{url}?limit={limit}" + (f"&cursor={cursor}" if cursor else ''))
+        assert response.status_code == 200
+        ids += [feedback['id'] for feedback in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+
+
+def test_pages_cover_all_feedback_newest_first(seeded, client_as):
+    db, _ = seeded
+    everything = sorted(db.collection('feedback').stream(),
+                        key=lambda doc: doc.to_dict()['submitted_date'], reverse=True)
+    assert every_page(client_as('official'), '/feedback/recent') == [doc.id for doc in everything]
+
+
+def test_deleted_cursor_does_not_restart_paging(seeded, client_as):
+    db, _ = seeded
+    client = client_as('official')
+    first = client.get('/feedback/recent?limit=5')
+    cursor = first.headers['X-Next-Cursor']
+    db.collection('feedback').document(cursor).delete()
+
+    response = client.get(f"/feedback/recent?limit=5&cursor={cursor}")
+    assert response.status_code == 400 and 'first page' in response.get_json()['message']
+    assert client.get('/feedback/recent?limit=5&cursor=no-such-feedback').status_code == 400
+
+
+def test_stats_for_one_complaint(seeded, client_as):
+    _, ids = seeded
+    resident = client_as('resident')
+    for rating in ('4', '2'):
+        response = resident.post('/feedback/submit', data={
+            'feedback-type': 'response-time', 'rating': rating, 'feedback-message': 'Thanks',
+            'complaint_id': ids['complaint_id'],
+        })
+        assert response.status_code == 200
+    client = client_as('official')
+
+    stats = client.get(f"/feedback/stats?complaint_id={ids['complaint_id']}").get_json()
+    assert stats['complaint_id'] == ids['complaint_id']
+    assert stats['count'] == 2 and stats['average_rating'] == 3
+
+    # Not a complaint id, so not part of a document path: a 400, not a 500
+    for complaint_id in ('BCMS-2024/../users', 'x/y', 'feedback_summary'):
+        response = client.get('/feedback/stats', query_string={'complaint_id': complaint_id})
+        assert response.status_code == 400 and not response.get_json()['success']
@@ -0,0 +1,31 @@
+"""
+loader.py: one read per document within a request, a fresh loader for
+each request, and forget() to read a document again.
+"""
+from loader import get_loader
+
+
+def test_loader_reads_each_document_once(app, seeded):
+    db, ids = seeded
+    with app.test_request_context():
+        loader = get_loader()
+        loader.prime('users', [ids['resident_uid'], ids['official_uid'], ids['resident_uid']])
+        assert loader.get('users', ids['resident_uid']).exists
+        assert loader.get('users', ids['official_uid']).exists
+        assert not loader.get('users', 'missing-uid').exists
+        assert get_loader().get('users', ids['resident_uid']).exists
+    assert db.stats['round_trips'] == 2
+    assert db.stats['reads'] == 3
+
+
+def test_loader_is_dropped_with_the_request(app, seeded):
+    db, ids = seeded
+    with app.test_request_context():
+        get_loader().get('users', ids['resident_uid'])
+    with app.test_request_context():
+        loader = get_loader()
+        loader.get('users', ids['resident_uid'])
+        # forget() makes the next get() read the document again
+        loader.forget('users', ids['resident_uid'])
+        loader.get('users', ids['resident_uid'])
+    assert db.stats['reads'] == 3
@@ -0,0 +1,77 @@
+"""
+Request profiles (profiler.py): sampled stacks of the handling thread, or
+of the request's greenlet on gevent workers.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import profiler
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, 'PROFILE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_profile_samples_the_handler(seeded, client_as, profile_dir):
+    db, _ = seeded
+    db.latency = 0.05
+    response = client_as('admin').get('/admin/recent-activity', headers={'X-Profile': '1'})
+    name = response.headers['X-Profile-Id']
+    collapsed = (profile_dir / name).read_text()
+    assert 'get_recent_activity (admin_firebase.py' in collapsed
+
+    listed = client_as('admin').get('/admin/profiles').get_json()['profiles']
+    assert [entry['name'] for entry in listed] == [name]
+    # Only admins can ask for a profile
+    assert 'X-Profile-Id' not in client_as('official').get('/complaint/recent', headers={'X-Profile': '1'}).headers
+
+
+GEVENT_SCRIPT = """
+from gevent import monkey
+monkey.patch_all()
+
+import sys
+import gevent
+import profiler
+from conftest import login_as, seed
+from app import app
+
+profiler.PROFILE_DIR = sys.argv[1]
+db, ids = seed()
+db.latency = 0.05
+
+
+def profiled():
+    client = app.test_client()
+    login_as(client, 'admin', ids)
+    return client.get('/admin/recent-activity', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+
+
+def busy():
+    # Another greenlet holding the thread while the profiled request waits
+    for _ in range(20):
+        sum(range(20000))
+        gevent.sleep(0.005)
+
+
+names = [gevent.spawn(profiled)]
+gevent.joinall(names + [gevent.spawn(busy)], raise_error=True)
+print(names[0].value)
+"""
+
+
+def test_profile_samples_the_request_greenlet_on_gevent(tmp_path):
+    env = dict(os.environ, FIRESTORE_BACKEND='memory')
+    result = subprocess.run([sys.executable, '-c', GEVENT_SCRIPT, str(tmp_path)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    collapsed = (tmp_path / result.stdout.splitlines()[-1]).read_text()
+    lines = collapsed.splitlines()
+    assert lines and all('busy (' not in line for line in lines)
+    assert any('get_recent_activity (admin_firebase.py' in line for line in lines)
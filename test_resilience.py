@@ -0,0 +1,39 @@
+"""
+Behaviour during a Firestore outage (resilience.py), simulated with the
+stand-in's unavailable and latency settings.
+"""
+import pytest
+
+import firebase_config
+import memory_firestore
+import resilience
+
+
+def test_firestore_outage_serves_stale_results(seeded, client_as):
+    db, ids = seeded
+    client = client_as('official')
+
+    fresh = client.get('/complaint/recent')
+    db.unavailable = True
+    try:
+        for _ in range(2):  # the second request finds the circuit open
+            stale = client.get('/complaint/recent')
+            assert stale.status_code == 200 and stale.get_json() == fresh.get_json()
+            assert stale.headers['Warning'] == '110 - "Response is Stale"'
+        # Nothing cached to fall back on: a 503, not an empty list
+        response = client.get('/officials/complaints/new')
+        assert response.status_code == 503 and 'Retry-After' in response.headers
+    finally:
+        db.unavailable = False
+
+
+def test_firestore_calls_have_deadlines(app):
+    db = memory_firestore.Client(latency=resilience.READ_TIMEOUT + 1)
+    firebase_config.set_firestore_client(db)
+    resilience.reset()
+    try:
+        with pytest.raises(resilience.FirestoreUnavailable):
+            firebase_config.get_db().collection('users').document('x').get(timeout=0.01)
+        assert db.stats['round_trips'] == resilience.READ_RETRIES + 1
+    finally:
+        resilience.reset()
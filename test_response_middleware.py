@@ -0,0 +1,122 @@
+"""
+response_middleware.py on a bare Flask app with a few fixed routes, so
+the body sizes around MIN_COMPRESS_SIZE are known exactly.
+"""
+import gzip
+import json
+import os
+
+import pytest
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+import response_middleware
+from response_middleware import MIN_COMPRESS_SIZE, init_response_middleware
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'js')
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'items': ['x'] * 10})
+
+    @app.route('/large')
+    def large():
+        return jsonify({'items': ['complaint'] * MIN_COMPRESS_SIZE})
+
+    @app.route('/events')
+    def events():
+        def stream():
+            yield 'data: ' + 'x' * (2 * MIN_COMPRESS_SIZE) + '\n\n'
+        return Response(stream(), mimetype='text/event-stream')
+
+    @app.route('/file')
+    def file():
+        return send_from_directory(STATIC_DIR, 'messaging.js')
+
+    init_response_middleware(app)
+    return app.test_client()
+
+
+def test_matching_if_none_match_gets_an_empty_304(client):
+    first = client.get('/small')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    again = client.get('/small', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+    other = client.get('/small', headers={'If-None-Match': 'W/"something-else"'})
+    assert other.status_code == 200 and other.get_json() == first.get_json()
+
+
+def test_responses_vary_on_accept_encoding(client):
+    response = client.get('/small')
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'Cookie' in response.headers['Vary']
+
+
+def test_bodies_below_the_threshold_are_sent_as_is(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert len(response.get_data()) < MIN_COMPRESS_SIZE
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_bodies_over_the_threshold_are_gzipped(client, monkeypatch):
+    monkeypatch.setattr(response_middleware, 'brotli', None)
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data()))['items'][0] == 'complaint'
+
+    # Not accepted, not compressed
+    plain = client.get('/large', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+
+
+def test_brotli_is_preferred_when_installed(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.get_data()))['items'][0] == 'complaint'
+
+
+@pytest.fixture
+def buffered_bodies(monkeypatch):
+    """Paths whose body the middleware read to hash or compress"""
+    paths = []
+    for name in ('_apply_etag', '_apply_compression'):
+        original = getattr(response_middleware, name)
+
+        def spy(response, original=original):
+            paths.append(request.path)
+            return original(response)
+        monkeypatch.setattr(response_middleware, name, spy)
+    return paths
+
+
+def test_event_streams_pass_through_unbuffered(client, buffered_bodies):
+    response = client.get('/events', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert buffered_bodies == []
+    assert 'ETag' not in response.headers
+    assert 'Content-Encoding' not in response.headers
+    assert response.mimetype == 'text/event-stream'
+    assert next(iter(response.response)).startswith(b'data: ')
+    response.close()
+
+    # An ordinary JSON body does go through both
+    client.get('/large')
+    assert buffered_bodies == ['/large', '/large']
+
+
+def test_files_pass_through_uncompressed(client, buffered_bodies):
+    response = client.get('/file', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert buffered_bodies == []
+    assert 'Content-Encoding' not in response.headers
+    # send_file's own (strong) ETag is kept
+    assert not response.headers['ETag'].startswith('W/')
+    response.close()
@@ -0,0 +1,29 @@
+"""
+Identical dashboard reads made at the same moment by several officials
+should cost one set of Firestore round trips (singleflight.py).
+"""
+import threading
+
+
+def test_concurrent_identical_reads_share_one_call(seeded, client_as):
+    db, ids = seeded
+    db.latency = 0.05
+    requests = 8
+    clients = [client_as('official') for _ in range(requests)]
+    db.reset_stats()
+    barrier = threading.Barrier(requests)
+    responses = [None] * requests
+
+    def dashboard(i):
+        barrier.wait()
+        responses[i] = clients[i].get('/officials/complaints/all')
+
+    threads = [threading.Thread(target=dashboard, args=(i,)) for i in range(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(r.status_code == 200 and r.get_json() == responses[0].get_json() for r in responses)
+    # One user lookup and one complaints scan each, shared by all requests
+    assert db.stats['round_trips'] <= 4
@@ -0,0 +1,35 @@
+"""
+/officials/stats from the cache (stats_cache.py), counted in stand-in
+round trips: fresh, stale with a background refresh, and dropped when a
+complaint is submitted.
+"""
+import threading
+
+from complaints_firebase import OFFICIALS_STATS_CACHE
+
+COMPLAINT_FORM = {'title': 'Broken streetlight', 'category': 'road', 'description': 'Dark at night',
+                  'location': 'Purok 3', 'incident-date': '2025-06-01'}
+
+
+def test_stats_served_from_cache_until_a_complaint_write(seeded, client_as):
+    db, ids = seeded
+    client = client_as('official')
+
+    first = client.get('/officials/stats').get_json()
+    db.reset_stats()
+    assert client.get('/officials/stats').get_json() == first
+    assert db.stats['round_trips'] == 1  # the role check, not the complaints
+
+    # Stale: answered from the cache while one background refresh recomputes
+    OFFICIALS_STATS_CACHE._entries[None].stored_at -= OFFICIALS_STATS_CACHE.ttl
+    assert client.get('/officials/stats').get_json() == first
+    for thread in threading.enumerate():
+        if thread.name == 'officials_stats-refresh':
+            thread.join()
+    db.reset_stats()
+    client.get('/officials/stats')
+    assert db.stats['round_trips'] == 1
+
+    # A complaint submitted through this worker drops the cached numbers
+    client_as('resident').post('/complaint/submit', data=COMPLAINT_FORM)
+    assert client.get('/officials/stats').get_json()['total'] == first['total'] + 1
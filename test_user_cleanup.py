@@ -0,0 +1,238 @@
+"""
+Cleanup of a deleted user's data (user_cleanup.py), run directly against a
+seeded stand-in rather than through /admin/user/delete: what each mode
+leaves behind, resuming after a dead worker, and writes that land while a
+job is running.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import memory_firestore
+import seed_data
+import user_cleanup
+from activity import ACTIVITY_COLLECTION
+from complaint_sync import DELETED, TOMBSTONES_COLLECTION, UNLINKED
+from feedback_firebase import FEEDBACK_STATS_COLLECTION, FEEDBACK_SUMMARY_DOC
+from firebase_admin import firestore
+from user_cleanup import ANONYMOUS_NAME, CLEANUP_JOBS_COLLECTION, new_job, resume_cleanup_jobs, run_cleanup
+
+
+@pytest.fixture
+def db():
+    db = memory_firestore.Client()
+    seed_data.seed(db, complaints=200)
+    return db
+
+
+def where(db, collection, field, value):
+    return [doc.to_dict() for doc in db.collection(collection).where(field, '==', value).stream()]
+
+
+def summary_count(db):
+    doc = db.collection(FEEDBACK_STATS_COLLECTION).document(FEEDBACK_SUMMARY_DOC).get()
+    return doc.to_dict().get('count', 0) if doc.exists else 0
+
+
+@pytest.fixture
+def resident(db):
+    """A seeded resident with complaints, feedback and messages: (uid, user).
+
+    The seeded inboxes only hold received messages, so the sender's copies
+    are added as /message/send would have.
+    """
+    for doc in db.collection('users').where('role', '==', 'resident').stream():
+        user = doc.to_dict()
+        if (user.get('messages') and where(db, 'complaints', 'user_uid', doc.id)
+                and where(db, 'feedback', 'user_uid', doc.id)):
+            break
+    else:
+        pytest.fail('no resident with complaints, feedback and messages in the seeded data')
+    for message in user['messages']:
+        sender = db.collection('users').where('email', '==', message['from_email']).get()[0]
+        copies = sender.to_dict().get('messages', []) + [dict(message, isSent=True)]
+        sender.reference.update({'messages': copies})
+    return doc.id, user
+
+
+def queue(db, uid, user, mode):
+    """What /admin/user/delete does before starting the job: return the job id"""
+    job_id, job = new_job(uid, user, mode, 'admin')
+    db.collection('users').document(uid).delete()
+    db.collection(CLEANUP_JOBS_COLLECTION).document(job_id).set(job)
+    return job_id
+
+
+def job(db, job_id):
+    return db.collection(CLEANUP_JOBS_COLLECTION).document(job_id).get().to_dict()
+
+
+def inbox(db, email):
+    """Messages mentioning email in any of the user's correspondents' inboxes"""
+    return [message for doc in db.collection('users').stream()
+            for message in doc.to_dict().get('messages', [])
+            if email in (message.get('from_email'), message.get('to_email'))]
+
+
+def test_delete_removes_everything_the_user_owned(db, resident):
+    uid, user = resident
+    complaint_ids = [c['id'] for c in where(db, 'complaints', 'user_uid', uid)]
+    feedback = where(db, 'feedback', 'user_uid', uid)
+    rated = sum(1 for f in feedback if f.get('rating') in (1, 2, 3, 4, 5))
+    count_before = summary_count(db)
+    assert inbox(db, user['email'])
+
+    job_id = queue(db, uid, user, 'delete')
+    run_cleanup(db, job_id)
+
+    assert where(db, 'complaints', 'user_uid', uid) == []
+    assert all(not db.collection('complaints').document(cid).get().exists for cid in complaint_ids)
+    for cid in complaint_ids:
+        assert where(db, 'notifications', 'complaint_id', cid) == []
+        tombstone = db.collection(TOMBSTONES_COLLECTION).document(cid).get().to_dict()
+        assert tombstone['reason'] == DELETED and tombstone['user_uid'] == uid
+    assert where(db, 'feedback', 'user_uid', uid) == []
+    assert summary_count(db) == count_before - rated
+    assert where(db, ACTIVITY_COLLECTION, 'subject_id', uid) == []
+    assert inbox(db, user['email']) == []
+
+    done = job(db, job_id)
+    assert done['status'] == 'completed' and done['processed'] == done['total'] > 0
+    assert done['found']['complaints'] == len(complaint_ids) and done['found']['feedback'] == len(feedback)
+    # The personal details copied onto the job are gone with it
+    assert 'email' not in done and 'counterparty_emails' not in done
+
+
+def test_anonymise_keeps_records_without_the_user(db, resident):
+    uid, user = resident
+    complaint_ids = [c['id'] for c in where(db, 'complaints', 'user_uid', uid)]
+    feedback_ids = [f['id'] for f in where(db, 'feedback', 'user_uid', uid)]
+    notifications = sum(len(where(db, 'notifications', 'complaint_id', cid)) for cid in complaint_ids)
+    messages = len(user['messages'])  # one copy each in the senders' inboxes
+    count_before = summary_count(db)
+
+    job_id = queue(db, uid, user, 'anonymise')
+    run_cleanup(db, job_id)
+
+    for cid in complaint_ids:
+        complaint = db.collection('complaints').document(cid).get().to_dict()
+        assert complaint['user_uid'] is None and complaint['user_email'] == ''
+        assert complaint['user_name'] == ANONYMOUS_NAME
+        assert db.collection(TOMBSTONES_COLLECTION).document(cid).get().to_dict()['reason'] == UNLINKED
+    assert sum(len(where(db, 'notifications', 'complaint_id', cid)) for cid in complaint_ids) == notifications
+    for feedback_id in feedback_ids:
+        feedback = db.collection('feedback').document(feedback_id).get().to_dict()
+        assert feedback['user_uid'] is None and feedback['user_name'] == ANONYMOUS_NAME
+    assert summary_count(db) == count_before
+
+    # Their correspondents keep the messages, addressed to nobody
+    assert inbox(db, user['email']) == []
+    anonymised = [message for doc in db.collection('users').stream()
+                  for message in doc.to_dict().get('messages', [])
+                  if ANONYMOUS_NAME in (message.get('from_name'), message.get('to_name'))]
+    assert len(anonymised) == messages
+    assert job(db, job_id)['status'] == 'completed'
+
+
+class WorkerDied(BaseException):
+    """Raised to stop a job the way a recycled or crashed worker would"""
+
+
+def test_interrupted_job_is_resumed_once_its_lease_runs_out(db, resident, monkeypatch):
+    uid, user = resident
+    job_id = queue(db, uid, user, 'delete')
+
+    def die(messages, email, mode):
+        raise WorkerDied()
+    monkeypatch.setattr(user_cleanup, '_message_changes', die)
+    with pytest.raises(WorkerDied):
+        run_cleanup(db, job_id)
+    monkeypatch.undo()
+
+    stopped = job(db, job_id)
+    assert stopped['status'] == 'running' and stopped['phase'] == 'messages'
+    assert where(db, 'complaints', 'user_uid', uid) == [] and inbox(db, user['email'])
+
+    # Still leased to the worker that died, so nobody takes it over yet
+    assert resume_cleanup_jobs(db) == []
+    assert run_cleanup(db, job_id) is None and job(db, job_id)['attempts'] == 1
+
+    expired = (datetime.now() - timedelta(seconds=1)).isoformat()
+    db.collection(CLEANUP_JOBS_COLLECTION).document(job_id).update({'lease_until': expired})
+    futures = resume_cleanup_jobs(db)
+    assert len(futures) == 1
+    futures[0].result()
+
+    done = job(db, job_id)
+    assert done['status'] == 'completed' and done['attempts'] == 2
+    # Counts from the first attempt are kept, and the messages were finished
+    assert done['found'] == stopped['found'] and done['processed'] == done['total']
+    assert inbox(db, user['email']) == []
+
+
+def test_queued_job_is_started_by_resume(db, resident):
+    uid, user = resident
+    job_id = queue(db, uid, user, 'anonymise')
+    for future in resume_cleanup_jobs(db):
+        future.result()
+    assert job(db, job_id)['status'] == 'completed'
+    assert resume_cleanup_jobs(db) == []
+
+
+@pytest.mark.parametrize('mode', ['delete', 'anonymise'])
+def test_messages_sent_while_the_job_runs_are_kept(db, resident, monkeypatch, mode):
+    uid, user = resident
+    job_id = queue(db, uid, user, mode)
+    late = {'id': 'late', 'from_email': 'someone@example.com', 'to_email': 'other@example.com',
+            'content': 'Sent while the job ran'}
+    counterparties = user_cleanup._counterparties
+    appended = []
+
+    def then_appended(db, emails):
+        # Another worker appends to the inboxes after the job has read them
+        docs = counterparties(db, emails)
+        for doc in docs:
+            doc.reference.update({'messages': firestore.ArrayUnion([late])})
+            appended.append(doc.id)
+        return docs
+    monkeypatch.setattr(user_cleanup, '_counterparties', then_appended)
+    run_cleanup(db, job_id)
+
+    assert appended
+    for holder in appended:
+        assert late in db.collection('users').document(holder).get().to_dict()['messages']
+    assert inbox(db, user['email']) == []
+
+
+def test_feedback_is_taken_out_of_the_stats_once(db, resident):
+    uid, _ = resident
+    rated = [f for f in where(db, 'feedback', 'user_uid', uid) if f.get('rating') in (1, 2, 3, 4, 5)]
+    feedback_ref = db.collection('feedback').document(rated[0]['id'])
+    count_before = summary_count(db)
+
+    # The job rerun after an interruption, or an admin deleting it meanwhile
+    user_cleanup._delete_feedback(db, feedback_ref)
+    user_cleanup._delete_feedback(db, feedback_ref)
+    assert not feedback_ref.get().exists
+    assert summary_count(db) == count_before - 1
+
+
+def test_lease_is_renewed_after_every_batch(db, resident, monkeypatch):
+    uid, user = resident
+    job_id = queue(db, uid, user, 'delete')
+    monkeypatch.setattr(user_cleanup, 'CLEANUP_BATCH_SIZE', 2)
+    progress = []
+    renew = user_cleanup._renew
+
+    def recorded(job_ref, **fields):
+        progress.append(fields.get('processed'))
+        renew(job_ref, **fields)
+    monkeypatch.setattr(user_cleanup, '_renew', recorded)
+    run_cleanup(db, job_id)
+
+    done = job(db, job_id)
+    assert done['status'] == 'completed'
+    # A renewal for every two documents written, each with the progress so far
+    assert len(progress) >= done['total'] // 2
+    counts = [p for p in progress if p is not None]
+    assert counts[-1] == done['processed']
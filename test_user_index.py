@@ -0,0 +1,75 @@
+"""
+The recipient typeahead (user_index.py): answered without Firestore reads,
+safe to query while users are added and removed, and limited to users who
+can be messaged.
+"""
+import threading
+
+from user_index import UserIndex
+
+
+def test_user_index_answers_from_memory(seeded, client_as):
+    db, ids = seeded
+    client = client_as('official')
+
+    first = client.get('/users/suggest?q=res&role=resident').get_json()
+    db.reset_stats()
+    second = client.get('/users/suggest?q=res&role=resident').get_json()
+    assert db.stats['round_trips'] == 0
+    assert first == second and 0 < len(first) <= 10
+    assert all(match['role'] == 'resident' for match in first)
+    # Residents only ever get officials back
+    resident = client_as('resident')
+    assert all(match['role'] == 'official'
+               for match in resident.get('/users/suggest?q=&role=resident').get_json())
+
+
+def test_suggest_is_safe_while_users_change():
+    users = [(f"resident-{i:04d}", {'full_name': f"Resident {i:04d}", 'email': f"r{i}@example.com",
+                                    'role': 'resident'}) for i in range(200)]
+    index = UserIndex(users)
+    errors = []
+
+    def churn():
+        for _ in range(20):
+            for uid, user in users[:100]:
+                index.remove(uid)
+            for uid, user in users[:100]:
+                index.update(uid, user)
+
+    def search():
+        try:
+            for i in range(2000):
+                for match in index.suggest(f"resident {i % 200:04d}"[:11], 'resident'):
+                    assert match['name'].lower().startswith(f"resident {i % 200:04d}"[:11])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=churn)] + [threading.Thread(target=search) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(index.suggest('resident', 'resident', limit=500)) == 200
+
+
+def test_blocked_users_are_not_suggested(seeded, client_as):
+    db, ids = seeded
+    resident = db.collection('users').document(ids['other_resident_uid']).get().to_dict()
+    official, admin = client_as('official'), client_as('admin')
+
+    def suggested():
+        matches = official.get(f"/users/suggest?q={resident['full_name']}&role=resident").get_json()
+        return ids['other_resident_uid'] in [match['uid'] for match in matches]
+
+    assert suggested()
+    admin.post('/admin/user/toggle-block', json={'uid': ids['other_resident_uid'], 'action': 'block'})
+    assert not suggested()
+    admin.post('/admin/user/toggle-block', json={'uid': ids['other_resident_uid'], 'action': 'unblock'})
+    assert suggested()
+
+    # Nor after a rebuild from Firestore
+    admin.post('/admin/user/toggle-block', json={'uid': ids['other_resident_uid'], 'action': 'block'})
+    index = UserIndex((doc.id, doc.to_dict()) for doc in db.collection('users').stream())
+    assert ids['other_resident_uid'] not in [match['uid'] for match in index.suggest(resident['full_name'], 'resident')]
@@ -0,0 +1,366 @@
+"""
+Cascading cleanup of a deleted user's data.
+
+Deleting a user removes the Auth record and users/{uid}, but complaints,
+feedback, activity entries and the copies of their messages in other users'
+inboxes stay behind. A cleanup job finds them with indexed queries on
+`user_uid` and `user_email` (and, for messages, on the emails of the people
+the user corresponded with, recorded on the job from their inbox) and
+rewrites them through a BulkWriter, in a background thread of the worker
+that received the delete.
+
+Running a job twice must not change anything twice. Deleted feedback is
+taken out of the aggregates in the same transaction that deletes it, and
+only if it still exists. Messages are removed from the other inboxes with
+ArrayRemove of the exact copies, and anonymised copies are added with
+ArrayUnion before that, so messages appended to those inboxes meanwhile are
+kept.
+
+    delete     complaints (with their admin notifications), feedback and
+               messages are removed; feedback is taken out of the aggregates
+    anonymise  they are kept with the user's name, email and uid blanked
+
+The job and its progress are stored in user_cleanup_jobs/{job_id}, so the
+admin dashboard can poll it from any worker, and so a job whose worker was
+recycled or crashed is not lost: a worker holds a job through a lease it
+renews after every batch of writes, and every worker resumes queued and running jobs whose
+lease has run out when it starts (gunicorn.conf.py post_worker_init). Running a
+job again is safe, as its queries only find what still refers to the user.
+
+    python user_cleanup.py resume      # the same from a shell or cron job
+"""
+import argparse
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from firebase_admin import firestore
+
+from feedback_firebase import FEEDBACK_STATS_COLLECTION, removal_stats_updates
+from firebase_config import get_db
+from activity import ACTIVITY_COLLECTION
+from complaint_sync import DELETED, UNLINKED, stamp, write_tombstone
+from stats_cache import invalidate
+
+CLEANUP_JOBS_COLLECTION = 'user_cleanup_jobs'
+CLEANUP_MODES = ('delete', 'anonymise')
+ANONYMOUS_NAME = 'Deleted user'
+# Firestore accepts at most 30 values in an 'in' filter
+IN_FILTER_LIMIT = 30
+# A job whose worker has not renewed its lease for this long is resumed elsewhere
+CLEANUP_LEASE_SECONDS = int(os.environ.get('USER_CLEANUP_LEASE_SECONDS', '300'))
+# Attempts per write before the job fails (the BulkWriter default)
+WRITE_ATTEMPTS = 15
+# Documents written between progress updates (and lease renewals)
+CLEANUP_BATCH_SIZE = 200
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('USER_CLEANUP_WORKERS', '2')),
+    thread_name_prefix='user-cleanup',
+)
+
+
+def new_job(uid, user, mode, requested_by):
+    """(job id, job document) for a cleanup that has not started yet.
+
+    The user's email and correspondents are copied onto the job, as
+    users/{uid} is deleted before it runs; they are removed once it completes.
+    """
+    job_id = uuid.uuid4().hex[:16]
+    email = user.get('email')
+    return job_id, {
+        'id': job_id,
+        'uid': uid,
+        'name': user.get('full_name', 'Unknown'),
+        'email': email,
+        'counterparty_emails': _counterparty_emails(user, email),
+        'mode': mode,
+        'status': 'queued',
+        'phase': 'records',
+        'requested_by': requested_by,
+        'created_at': datetime.now().isoformat(),
+        'attempts': 0,
+        'found': {},
+        'processed': 0,
+        'total': 0,
+    }
+
+
+def start_cleanup(job_id):
+    """Run the job in this worker's background pool"""
+    return _executor.submit(run_cleanup, get_db(), job_id)
+
+
+def _lease():
+    return (datetime.now() + timedelta(seconds=CLEANUP_LEASE_SECONDS)).isoformat()
+
+
+def _renew(job_ref, **progress):
+    """Record progress and extend this worker's lease on the job"""
+    job_ref.update(dict(progress, lease_until=_lease()))
+
+
+def claim_job(db, job_id):
+    """Take the job for this worker, None if it is finished or another worker holds it"""
+    job_ref = db.collection(CLEANUP_JOBS_COLLECTION).document(job_id)
+
+    @firestore.transactional
+    def claim(transaction):
+        snapshot = job_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return None
+        job = snapshot.to_dict()
+        if job.get('status') not in ('queued', 'running'):
+            return None
+        if job.get('lease_until') and job['lease_until'] > datetime.now().isoformat():
+            return None
+        job.update(status='running', lease_until=_lease(), attempts=job.get('attempts', 0) + 1)
+        updates = {key: job[key] for key in ('status', 'lease_until', 'attempts')}
+        if 'started_at' not in job:
+            job['started_at'] = updates['started_at'] = datetime.now().isoformat()
+        transaction.update(job_ref, updates)
+        return job
+
+    return claim(db.transaction())
+
+
+def resume_cleanup_jobs(db=None):
+    """Start every queued or running job no worker holds, return their futures"""
+    db = db or get_db()
+    jobs = db.collection(CLEANUP_JOBS_COLLECTION).where('status', 'in', ['queued', 'running']).stream()
+    now = datetime.now().isoformat()
+    futures = []
+    for doc in jobs:
+        lease_until = doc.to_dict().get('lease_until')
+        if not lease_until or lease_until <= now:
+            futures.append(_executor.submit(run_cleanup, db, doc.id))
+    if futures:
+        print(f"Resuming {len(futures)} user cleanup jobs")
+    return futures
+
+
+def _unique(*queries):
+    docs = {}
+    for query in queries:
+        for doc in query.stream():
+            docs[doc.id] = doc
+    return list(docs.values())
+
+
+def _by_owner(collection_ref, uid, email):
+    queries = [collection_ref.where('user_uid', '==', uid)]
+    if email:
+        queries.append(collection_ref.where('user_email', '==', email))
+    return _unique(*queries)
+
+
+def _chunks(values, size=IN_FILTER_LIMIT):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _counterparty_emails(user, email):
+    """Emails of the users holding copies of this user's messages"""
+    emails = set()
+    for message in user.get('messages', []):
+        emails.add(message.get('to_email') if message.get('isSent') else message.get('from_email'))
+    emails.discard(None)
+    emails.discard(email)
+    return sorted(emails)
+
+
+def _counterparties(db, emails):
+    users_ref = db.collection('users')
+    return _unique(*(users_ref.where('email', 'in', chunk) for chunk in _chunks(emails)))
+
+
+def _message_changes(messages, email, mode):
+    """(copies to remove, anonymised copies to add) for the messages involving this user"""
+    removed, added = [], []
+    for message in messages:
+        if email not in (message.get('from_email'), message.get('to_email')):
+            continue
+        removed.append(message)
+        if mode == 'delete':
+            continue
+        message = dict(message)
+        if message.get('from_email') == email:
+            message.update(from_email='', from_name=ANONYMOUS_NAME)
+        if message.get('to_email') == email:
+            message.update(to_email='', to_name=ANONYMOUS_NAME)
+        added.append(message)
+    return removed, added
+
+
+def _clean_messages(writer, job_ref, counterparties, email, mode, processed):
+    """Remove or anonymise the user's messages in their correspondents' inboxes"""
+    for chunk in _chunks(counterparties, CLEANUP_BATCH_SIZE):
+        removals = []
+        for doc in chunk:
+            removed, added = _message_changes(doc.to_dict().get('messages', []), email, mode)
+            if added:
+                writer.update(doc.reference, {'messages': firestore.ArrayUnion(added)})
+            if removed:
+                removals.append((doc.reference, removed))
+        # The anonymised copies are in place before the originals go, so an
+        # interrupted job leaves duplicates for the rerun rather than gaps
+        writer.flush()
+        for reference, removed in removals:
+            writer.update(reference, {'messages': firestore.ArrayRemove(removed)})
+        writer.flush()
+        processed += len(chunk)
+        _renew(job_ref, processed=processed)
+    return processed
+
+
+def run_cleanup(db, job_id):
+    """Claim the job, then find and rewrite everything that refers to the user, recording progress"""
+    job = claim_job(db, job_id)
+    if job is None:
+        return
+    job_ref = db.collection(CLEANUP_JOBS_COLLECTION).document(job_id)
+    uid, mode, email = job['uid'], job['mode'], job.get('email')
+    try:
+        writer = db.bulk_writer()
+        failures = []
+
+        def on_write_error(failure, bulk_writer):
+            if failure.attempts < WRITE_ATTEMPTS:
+                return True
+            failures.append(failure)
+            return False
+
+        writer.on_write_error(on_write_error)
+        counterparties = _counterparties(db, job.get('counterparty_emails', [])) if email else []
+
+        if job.get('phase') == 'records':
+            found = _clean_records(db, writer, job_ref, uid, email, mode)
+            found['message_holders'] = len(counterparties)
+            total = sum(found.values())
+            processed = total - found['message_holders']
+            _check_writes(failures)
+            # A resumed job starts from the messages from here on
+            _renew(job_ref, phase='messages', found=found, total=total, processed=processed)
+        else:
+            # Counted again from the first correspondent, as each one is rewritten again
+            found = job['found']
+            processed = job['total'] - found.get('message_holders', 0)
+
+        processed = _clean_messages(writer, job_ref, counterparties, email, mode, processed)
+        writer.close()
+        _check_writes(failures)
+
+        job_ref.update({
+            'status': 'completed',
+            'processed': processed,
+            'finished_at': datetime.now().isoformat(),
+            'email': firestore.DELETE_FIELD,
+            'counterparty_emails': firestore.DELETE_FIELD,
+            'lease_until': firestore.DELETE_FIELD,
+        })
+        print(f"User cleanup {job_id} ({mode}) for {uid}: {found}")
+    except Exception as e:
+        print(f"Error cleaning up user {uid}: {str(e)}")
+        try:
+            job_ref.update({'status': 'failed', 'error': str(e), 'finished_at': datetime.now().isoformat(),
+                            'lease_until': firestore.DELETE_FIELD})
+        except Exception:
+            pass
+
+
+def _check_writes(failures):
+    if failures:
+        raise RuntimeError(f"{len(failures)} writes failed: {failures[0].message}")
+
+
+def _clean_records(db, writer, job_ref, uid, email, mode):
+    """Delete or anonymise the user's complaints, feedback and activity, return what was found"""
+    complaints = _by_owner(db.collection('complaints'), uid, email)
+    feedback = _by_owner(db.collection('feedback'), uid, email)
+    activity_ref = db.collection(ACTIVITY_COLLECTION)
+    activity = _unique(activity_ref.where('actor_uid', '==', uid),
+                       activity_ref.where('subject_id', '==', uid))
+    notifications = []
+    if mode == 'delete':
+        complaint_ids = [doc.to_dict().get('id', doc.id) for doc in complaints]
+        notifications_ref = db.collection('notifications')
+        notifications = _unique(*(notifications_ref.where('complaint_id', 'in', chunk)
+                                  for chunk in _chunks(complaint_ids)))
+
+    found = {
+        'complaints': len(complaints),
+        'feedback': len(feedback),
+        'notifications': len(notifications),
+        'activity': len(activity),
+    }
+    _renew(job_ref, found=found, total=sum(found.values()), processed=0)
+    processed = 0
+
+    def in_batches(docs, write):
+        nonlocal processed
+        for chunk in _chunks(docs, CLEANUP_BATCH_SIZE):
+            for doc in chunk:
+                write(doc)
+            writer.flush()
+            processed += len(chunk)
+            _renew(job_ref, processed=processed)
+
+    # Notifications are only found through their complaint, so they go first:
+    # if the job is interrupted, a rerun still finds both
+    in_batches(notifications, lambda doc: writer.delete(doc.reference))
+
+    anonymous = {'user_uid': None, 'user_email': '', 'user_name': ANONYMOUS_NAME}
+
+    def clean_complaint(doc):
+        # Tombstoned so the ?since= deltas drop it from the owner's list
+        complaint_id = doc.to_dict().get('id', doc.id)
+        if mode == 'delete':
+            writer.delete(doc.reference)
+            write_tombstone(db, writer, complaint_id, uid, DELETED)
+        else:
+            writer.update(doc.reference, stamp(dict(anonymous)))
+            write_tombstone(db, writer, complaint_id, uid, UNLINKED)
+    in_batches(complaints, clean_complaint)
+    if complaints:
+        invalidate('complaints')
+
+    if mode == 'delete':
+        in_batches(feedback, lambda doc: _delete_feedback(db, doc.reference))
+    else:
+        in_batches(feedback, lambda doc: writer.update(doc.reference, anonymous))
+
+    def clean_activity(doc):
+        # The signup entry names the user; entries they acted on stay, unattributed
+        if doc.to_dict().get('subject_id') == uid:
+            writer.delete(doc.reference)
+        else:
+            writer.update(doc.reference, {'actor_uid': None})
+    in_batches(activity, clean_activity)
+    return found
+
+
+def _delete_feedback(db, feedback_ref):
+    """Delete a feedback and take it out of the aggregates, once: nothing if it is already gone"""
+    stats_ref = db.collection(FEEDBACK_STATS_COLLECTION)
+
+    @firestore.transactional
+    def delete(transaction):
+        snapshot = feedback_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return
+        for doc_id, updates in removal_stats_updates(snapshot.to_dict()):
+            transaction.set(stats_ref.document(doc_id), updates, merge=True)
+        transaction.delete(feedback_ref)
+
+    delete(db.transaction())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run user cleanup jobs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('resume', help='run every queued or interrupted job to completion')
+    args = parser.parse_args()
+    for future in resume_cleanup_jobs():
+        future.result()
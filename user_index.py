@@ -0,0 +1,172 @@
+"""
+Per-worker prefix index over user names and emails.
+
+The messaging compose forms suggest recipients as the user types
+(/users/suggest?q=) instead of downloading every resident into a dropdown.
+Each worker keeps the users' names, emails and roles in memory as sorted
+arrays of lowercase search terms (the full name, each word of it and the
+email), one array per role, so a prefix lookup is two binary searches and
+answers in microseconds without touching Firestore.
+
+The index is built from one projected scan of the users collection on
+first use and rebuilt in a background thread once it is older than
+USER_INDEX_TTL seconds, while the old one keeps answering. Signups and
+deletions handled by this worker update it immediately; changes made
+through other workers show up after the next rebuild.
+
+Messages are addressed by uid; send_message still accepts an email from
+older clients and resolves it through the index when it is built, so it
+can fetch the recipient document directly instead of querying.
+"""
+import bisect
+import os
+import threading
+import time
+
+from firebase_config import get_db
+from user_search import normalize, search_query
+
+USER_INDEX_TTL = float(os.environ.get('USER_INDEX_TTL', '300'))
+SUGGEST_LIMIT = 10
+# Accounts that cannot receive messages
+UNLISTED_STATUSES = ('pending_approval', 'rejected', 'blocked')
+INDEX_FIELDS = ['full_name', 'email', 'role', 'status']
+
+
+def _terms(entry):
+    name = normalize(entry['name'])
+    return {term for term in [name, normalize(entry['email'])] + name.split(' ') if term}
+
+
+class UserIndex:
+    """Sorted (term, uid) arrays per role over listed users"""
+
+    def __init__(self, users=()):
+        self.users = {}
+        self.uids_by_email = {}
+        self._keys = {}   # role -> sorted [(term, uid)]
+        self._lock = threading.Lock()
+        self.built_at = time.monotonic()
+        for uid, user in users:
+            self._add(uid, user)
+        for keys in self._keys.values():
+            keys.sort()
+
+    def _add(self, uid, user, keep_sorted=False):
+        if user.get('status') in UNLISTED_STATUSES:
+            return
+        entry = {
+            'uid': uid,
+            'name': user.get('full_name') or user.get('email', ''),
+            'email': user.get('email', ''),
+            'role': user.get('role', 'resident'),
+        }
+        self.users[uid] = entry
+        if entry['email']:
+            self.uids_by_email[entry['email'].lower()] = uid
+        keys = self._keys.setdefault(entry['role'], [])
+        for term in _terms(entry):
+            if keep_sorted:
+                bisect.insort(keys, (term, uid))
+            else:
+                keys.append((term, uid))
+
+    def update(self, uid, user):
+        """Add or replace one user (e.g. after a signup in this worker)"""
+        with self._lock:
+            self._remove(uid)
+            self._add(uid, user, keep_sorted=True)
+
+    def remove(self, uid):
+        with self._lock:
+            self._remove(uid)
+
+    def _remove(self, uid):
+        entry = self.users.pop(uid, None)
+        if entry is None:
+            return
+        self.uids_by_email.pop(entry['email'].lower(), None)
+        keys = self._keys.get(entry['role'], [])
+        for term in _terms(entry):
+            i = bisect.bisect_left(keys, (term, uid))
+            if i < len(keys) and keys[i] == (term, uid):
+                del keys[i]
+
+    def suggest(self, q, role, limit=SUGGEST_LIMIT):
+        """Up to limit users of role whose name, a name word or email starts with q"""
+        prefix = search_query(q)
+        results, seen = [], set()
+        # update()/remove() shift the arrays in place; the scan is short, so hold the lock
+        with self._lock:
+            keys = self._keys.get(role, [])
+            i = bisect.bisect_left(keys, (prefix,))
+            while i < len(keys) and len(results) < limit:
+                term, uid = keys[i]
+                if not term.startswith(prefix):
+                    break
+                if uid not in seen and uid in self.users:
+                    seen.add(uid)
+                    results.append(self.users[uid])
+                i += 1
+        return sorted(results, key=lambda entry: entry['name'].lower())
+
+    def uid_for_email(self, email):
+        with self._lock:
+            return self.uids_by_email.get((email or '').lower())
+
+
+_index = None
+_index_client = None
+_refreshing = False
+_build_lock = threading.Lock()
+
+
+def build_index(db):
+    """Index every user, from one projected scan of the users collection"""
+    docs = db.collection('users').select(INDEX_FIELDS).stream()
+    return UserIndex((doc.id, doc.to_dict() or {}) for doc in docs)
+
+
+def _refresh(db):
+    global _index, _refreshing
+    try:
+        index = build_index(db)
+        with _build_lock:
+            if _index_client is db:
+                _index = index
+    except Exception as e:
+        print(f"Error rebuilding user index: {str(e)}")
+    finally:
+        _refreshing = False
+
+
+def get_user_index():
+    """This worker's index: built on first use, refreshed in the background when stale"""
+    global _index, _index_client, _refreshing
+    db = get_db()
+    with _build_lock:
+        if _index is None or _index_client is not db:
+            _index = build_index(db)
+            _index_client = db
+        elif not _refreshing and time.monotonic() - _index.built_at > USER_INDEX_TTL:
+            _refreshing = True
+            threading.Thread(target=_refresh, args=(db,), daemon=True, name='user-index-refresh').start()
+        return _index
+
+
+def uid_for_email(email):
+    """A user's uid from this worker's index, None if unknown or it is not built yet"""
+    if _index is None or _index_client is not get_db():
+        return None
+    return _index.uid_for_email(email)
+
+
+def index_user(uid, user):
+    """Reflect a new or changed user in this worker's index, if it is built"""
+    if _index is not None:
+        _index.update(uid, user)
+
+
+def unindex_user(uid):
+    if _index is not None:
+        _index.remove(uid)
@@ -0,0 +1,52 @@
+"""
+Lowercase search fields stored on users documents.
+
+/admin/users filters and pages users with indexed queries instead of
+scanning the collection, which needs three fields on every user:
+
+    name_lower       full name in lowercase, the sort key
+    search_prefixes  every prefix (up to SEARCH_PREFIX_MAX characters) of the
+                     name, of each word in it and of the email, so a
+                     name/email prefix search is one array_contains filter
+    is_admin         always present, so admins can be excluded with ==
+
+Call user_search_fields() wherever a user document is created or its name
+or email changes; migrate_user_search.py backfills existing users.
+"""
+
+SEARCH_PREFIX_MAX = 20
+
+
+def normalize(text):
+    """Lowercase with runs of whitespace collapsed"""
+    return ' '.join((text or '').lower().split())
+
+
+def search_prefixes(full_name, email):
+    """Sorted prefixes a search for the user may start with"""
+    terms = set()
+    name = normalize(full_name)
+    for word in [name] + name.split(' '):
+        terms.add(word[:SEARCH_PREFIX_MAX])
+    terms.add(normalize(email)[:SEARCH_PREFIX_MAX])
+
+    prefixes = set()
+    for term in terms:
+        for length in range(1, len(term) + 1):
+            prefixes.add(term[:length])
+    prefixes.discard('')
+    return sorted(prefixes)
+
+
+def search_query(q):
+    """The prefix to look up for a search string, '' for no search"""
+    return normalize(q)[:SEARCH_PREFIX_MAX]
+
+
+def user_search_fields(user):
+    """Search fields for a user document (merge them into the document)"""
+    return {
+        'name_lower': normalize(user.get('full_name')),
+        'search_prefixes': search_prefixes(user.get('full_name'), user.get('email')),
+        'is_admin': bool(user.get('is_admin', False)),
+    }